@@ -0,0 +1,26 @@
+"""add compiler_version to mapping_versions
+
+Revision ID: compiler_version_003
+Revises: files_listing_idx_002
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'compiler_version_003'
+down_revision = 'files_listing_idx_002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Version du compilateur ayant produit compiled_mapping : les lignes existantes
+    # restent à NULL et sont donc recompilées (cache manqué, précompilation)
+    op.add_column('mapping_versions', sa.Column('compiler_version', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('mapping_versions', 'compiler_version')
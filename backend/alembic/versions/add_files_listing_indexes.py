@@ -0,0 +1,29 @@
+"""add listing indexes to files
+
+Revision ID: files_listing_idx_002
+Revises: add_compiled_hash_001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'files_listing_idx_002'
+down_revision = 'add_compiled_hash_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pagination par clé (created_at, id) des fichiers d'un dataset
+    op.create_index('ix_files_dataset_created', 'files', ['dataset_id', 'created_at', 'id'], unique=False)
+    # Filtres par statut de parsing et d'ingestion
+    op.create_index('ix_files_dataset_status', 'files', ['dataset_id', 'status'], unique=False)
+    op.create_index('ix_files_dataset_ingestion_status', 'files', ['dataset_id', 'ingestion_status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_dataset_ingestion_status', table_name='files')
+    op.drop_index('ix_files_dataset_status', table_name='files')
+    op.drop_index('ix_files_dataset_created', table_name='files')
@@ -1,6 +1,7 @@
 """backend/app/api/dependencies.py"""
+import time
 import uuid
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Tuple
 
 from fastapi import Depends, HTTPException, status,Cookie
 from fastapi.security import OAuth2PasswordBearer
@@ -11,51 +12,73 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.db import get_db
 from app.domain.user import models as user_models
+from app.domain.user.cache import USER_CACHE_REQUESTS, TokenUser, user_cache
+from app.domain.user.schemas import UserRole
 from app.domain.user.services import user_service
 
 # Utilise le paramétrage dynamique, mais conserve la clarté du commentaire.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        session: AsyncSession = Depends(get_db)
-) -> user_models.User:
-    """
-    Récupère l'utilisateur authentifié via le token JWT.
-    Lève HTTP 401 si échec.
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str) -> Tuple[uuid.UUID, dict]:
+    """Décode le JWT et retourne (id utilisateur, claims). Lève HTTP 401 si échec."""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_from_payload: str | None = payload.get("sub")
-        if user_id_from_payload is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-
+        raise _credentials_exception()
+    if user_id_from_payload is None:
+        raise _credentials_exception()
     try:
-        user_id = uuid.UUID(user_id_from_payload)
+        return uuid.UUID(user_id_from_payload), payload
     except (ValueError, TypeError):
         logger.warning(f"Format d'UUID invalide dans le token: {user_id_from_payload}")
-        raise credentials_exception
+        raise _credentials_exception()
 
+
+async def _load_user(session: AsyncSession, user_id: uuid.UUID, payload: dict) -> user_models.User:
+    """
+    Utilisateur du token : servi par le cache (clé id + `iat`) ou lu en base
+    puis mis en cache. Lève HTTP 401 s'il n'existe pas.
+    """
+    iat = int(payload.get("iat") or 0)
+    snapshot = user_cache.get(user_id, iat)
+    if snapshot is not None:
+        USER_CACHE_REQUESTS.labels("hit").inc()
+        return await user_cache.attach(session, snapshot)
+
+    USER_CACHE_REQUESTS.labels("miss").inc()
     user = await user_service.get(session, user_id)
     if user is None:
         logger.warning(f"Aucun utilisateur trouvé avec l'UUID {user_id}")
-        raise credentials_exception
+        raise _credentials_exception()
+    user_cache.put(user_id, iat, user)
+    return user
+
+
+async def get_current_user(
+        token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_db)
+) -> user_models.User:
+    """
+    Récupère l'utilisateur authentifié via le token JWT.
+    Lève HTTP 401 si échec.
+    """
+    user_id, payload = _decode_token(token)
+    user = await _load_user(session, user_id, payload)
 
     token_role = payload.get("role")
     if not token_role or user.role.value != token_role:
         logger.warning(f"Incohérence de rôle pour l'utilisateur {user.id}. Token: {token_role}, BDD: {user.role.value}")
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
@@ -68,29 +91,40 @@ async def get_current_user_from_cookie(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Non authentifié (cookie manquant)"
         )
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Impossible de valider les identifiants",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        # Le cookie peut contenir "Bearer ", on le retire
-        token = access_token.split(" ")[-1]
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id_str: str | None = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        # Convertit en UUID pour la requête ORM
-        user_id = uuid.UUID(user_id_str)
-    except (JWTError, ValueError, TypeError):
-        raise credentials_exception
-        
-    user = await user_service.get(db, user_id)
-    if user is None:
-        raise credentials_exception
-    return user
+
+    # Le cookie peut contenir "Bearer ", on le retire
+    user_id, payload = _decode_token(access_token.split(" ")[-1])
+    return await _load_user(db, user_id, payload)
+
+
+async def get_current_claims_from_cookie(
+    access_token: str | None = Cookie(None),
+    db: AsyncSession = Depends(get_db)
+) -> TokenUser | user_models.User:
+    """
+    Variante pour les endpoints de lecture qui n'ont besoin que de l'identité
+    et du rôle. Avec AUTH_CLAIMS_FAST_PATH, les claims du JWT (signé) suffisent
+    pour un token émis depuis moins de AUTH_CLAIMS_MAX_AGE secondes, sauf si
+    l'utilisateur a été invalidé depuis (dans ce processus) ; sinon, même
+    vérification que get_current_user_from_cookie.
+    """
+    if not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Non authentifié (cookie manquant)"
+        )
+
+    user_id, payload = _decode_token(access_token.split(" ")[-1])
+    iat = int(payload.get("iat") or 0)
+    fresh = iat and time.time() - iat <= settings.AUTH_CLAIMS_MAX_AGE
+    if settings.AUTH_CLAIMS_FAST_PATH and fresh and not user_cache.invalidated_since(user_id, iat):
+        try:
+            role = UserRole(payload.get("role"))
+        except ValueError:
+            raise _credentials_exception()
+        USER_CACHE_REQUESTS.labels("claims").inc()
+        return TokenUser(id=user_id, role=role)
+    return await _load_user(db, user_id, payload)
 
 
 def require_role(required_role: user_models.UserRole):
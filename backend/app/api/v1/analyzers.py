@@ -1,13 +1,27 @@
 """app/api/v1/analyzers.py"""
-from fastapi import APIRouter, Depends, Body, HTTPException, status
+import uuid
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Body, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from elasticsearch import AsyncElasticsearch, ConnectionError
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.dependencies import get_current_user_from_cookie
+from app.core.config import settings
+from app.core.db import get_db
 from app.core.es_client import get_es_client
+from app.domain.analyzer.analyze_cache import with_analyze_cache
+from app.domain.analyzer.batch import BatchAnalyzer
+from app.domain.analyzer.evaluation import evaluate_file
 from app.domain.analyzer.models import AnalyzerGraph
-# CORRECTION : L'import de 'convert_graph_to_es_analyzer' a été supprimé car il n'est pas utilisé ici.
-from app.domain.analyzer.services import debug_analyzer_step_by_step
+from app.domain.analyzer.services import analyze_text, convert_graph_to_es_analyzer, debug_analyzer_step_by_step
+from app.domain.analyzer.local import (
+    LocalAnalysisError, LocalAnalyzer, LocalESClient, UnsupportedComponentError,
+)
+from app.domain.user.models import User
 # Import du validateur principal
 from app.domain.analyzer.validators.validator import validate_full_graph, ValidationError
 
@@ -20,9 +34,54 @@ class AnalyzerRequest(BaseModel):
     graph: AnalyzerGraph
 
 
+class AnalyzerBatchRequest(BaseModel):
+    texts: List[str]
+    graph: AnalyzerGraph
+
+
+class EvalQuery(BaseModel):
+    text: str
+    # Rangs (dans l'échantillon) des documents pertinents : active le rappel@k
+    relevant: Optional[List[int]] = None
+
+
+class RelevanceEvalRequest(BaseModel):
+    file_id: uuid.UUID
+    column: str
+    graph_a: AnalyzerGraph
+    graph_b: AnalyzerGraph
+    queries: List[EvalQuery] = Field(..., min_length=1)
+    sample_size: int = Field(1000, ge=1, description="Nombre de documents de l'échantillon")
+    top_k: int = Field(10, ge=1, le=100)
+    workers: Optional[int] = Field(None, ge=1, le=32, description="Nombre de processus (défaut: nb de CPU)")
+
+
+Engine = Literal["es", "local"]
+ENGINE_QUERY = Query("es", description="Moteur d'analyse : Elasticsearch ('es') ou émulation locale ('local')")
+
+
+def _analysis_client(graph: AnalyzerGraph, engine: Engine, es_client: AsyncElasticsearch):
+    """
+    Client `_analyze` du moteur demandé. En local, l'analyseur est construit
+    d'avance pour signaler tout composant non émulé avant l'analyse. Côté ES,
+    les réponses `_analyze` passent par le cache partagé.
+    """
+    if engine == "es":
+        return with_analyze_cache(es_client)
+    try:
+        LocalAnalyzer(convert_graph_to_es_analyzer(graph))
+    except UnsupportedComponentError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"{e}. Utilisez engine=es pour ce graphe.")
+    except (LocalAnalysisError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return LocalESClient()
+
+
 @router.post("/debug")
 async def debug_analyzer_endpoint(
         request: AnalyzerRequest = Body(...),
+        engine: Engine = ENGINE_QUERY,
         es_client: AsyncElasticsearch = Depends(get_es_client)
 ):
     """Analyse un texte pas à pas et retourne chaque étape."""
@@ -30,10 +89,36 @@ async def debug_analyzer_endpoint(
     try:
 
         validate_full_graph(request.graph)
-        steps, path = await debug_analyzer_step_by_step(request.graph, request.text, es_client)
+        client = _analysis_client(request.graph, engine, es_client)
+        steps, path = await debug_analyzer_step_by_step(request.graph, request.text, client)
         return {"steps": steps, "path": path}
     except ValidationError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException:
+        raise
+    except ConnectionError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Impossible de se connecter à Elasticsearch.")
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"Une erreur interne est survenue: {e}")
+
+
+@router.post("/analyze")
+async def analyze_endpoint(
+        request: AnalyzerRequest = Body(...),
+        engine: Engine = ENGINE_QUERY,
+        es_client: AsyncElasticsearch = Depends(get_es_client)
+):
+    """Analyse un texte et retourne le flux de tokens final (positions et offsets)."""
+    try:
+        validate_full_graph(request.graph)
+        client = _analysis_client(request.graph, engine, es_client)
+        return {"engine": engine, "tokens": await analyze_text(request.graph, request.text, client)}
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException:
+        raise
     except ConnectionError:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                             detail="Impossible de se connecter à Elasticsearch.")
@@ -42,6 +127,75 @@ async def debug_analyzer_endpoint(
                             detail=f"Une erreur interne est survenue: {e}")
 
 
+@router.post("/analyze/batch")
+async def analyze_batch_endpoint(
+        request: AnalyzerBatchRequest = Body(...),
+        engine: Engine = ENGINE_QUERY,
+        concurrency: int = Query(None, ge=1, le=64, description="Appels `_analyze` simultanés"),
+        stats: bool = Query(True, description="Fréquence des tokens et nombre de tokens par étape"),
+        top_n: int = Query(50, ge=0, le=1000, description="Nombre de tokens les plus fréquents retournés"),
+        es_client: AsyncElasticsearch = Depends(get_es_client)
+):
+    """
+    Analyse un lot de textes avec le même graphe. Le graphe est validé et converti
+    une seule fois ; la réponse est un flux NDJSON : une ligne par texte
+    (`index`, `tokens` ou `error`), puis une ligne `summary`.
+    """
+    if len(request.texts) > settings.ANALYZE_BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Au plus {settings.ANALYZE_BATCH_MAX_TEXTS} textes par lot.")
+    try:
+        validate_full_graph(request.graph)
+        batch = BatchAnalyzer.from_graph(
+            request.graph,
+            es_client=with_analyze_cache(es_client) if engine == "es" else None,
+            concurrency=concurrency or settings.ANALYZE_BATCH_CONCURRENCY,
+            with_stats=stats,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UnsupportedComponentError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"{e}. Utilisez engine=es pour ce graphe.")
+    except (LocalAnalysisError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(batch.iter_ndjson(request.texts, top_n), media_type="application/x-ndjson")
+
+
+@router.post("/evaluate")
+async def evaluate_relevance_endpoint(
+        request: RelevanceEvalRequest = Body(...),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user_from_cookie),
+):
+    """
+    Compare deux graphes d'analyseur (A/B) sur un échantillon d'une colonne d'un
+    fichier stocké et une liste de requêtes : index inversé et classement BM25
+    en mémoire (moteur local, sans réindexation ES), recouvrement des termes,
+    distribution du nombre de tokens et indicateur de rappel par requête.
+    """
+    if request.sample_size > settings.ANALYZER_EVAL_MAX_DOCS or len(request.queries) > settings.ANALYZER_EVAL_MAX_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Au plus {settings.ANALYZER_EVAL_MAX_DOCS} documents et "
+                   f"{settings.ANALYZER_EVAL_MAX_QUERIES} requêtes par évaluation.")
+    for label, graph in (("graph_a", request.graph_a), ("graph_b", request.graph_b)):
+        try:
+            validate_full_graph(graph)
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label}: {e}")
+    try:
+        return await evaluate_file(
+            db, current_user, request.file_id, request.column, request.graph_a, request.graph_b,
+            [q.model_dump() for q in request.queries], request.sample_size, request.top_k, request.workers,
+        )
+    except UnsupportedComponentError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"{e}. L'évaluation utilise le moteur local.")
+    except (LocalAnalysisError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post("/validate", status_code=status.HTTP_200_OK)
 async def validate_analyzer_endpoint(graph: AnalyzerGraph = Body(...)):
     """
@@ -1,7 +1,8 @@
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File, BackgroundTasks, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import des dépendances, modèles, schémas et services
@@ -11,6 +12,7 @@ from app.api.dependencies import get_current_user_from_cookie, PaginationParams
 from app.domain.user.models import User
 from app.domain.dataset import models, schemas
 from app.domain.file import schemas as file_schemas
+from app.domain.file.models import FileStatus, IngestionStatus
 from app.domain.dataset.services import DatasetService
 from app.domain.file.services import FileService, TaskService
 from loguru import logger
@@ -74,70 +76,36 @@ async def list_datasets(
     summary="Obtenir les détails d'un dataset"
 )
 async def get_dataset_details(
-    dataset: models.Dataset = Depends(get_current_dataset_for_owner),
-    db: AsyncSession = Depends(get_db)
+    dataset_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_cookie),
+    pagination: PaginationParams = Depends()
 ):
-    """Retourne les informations détaillées d'un dataset."""
-    # Charger explicitement les relations des fichiers avec leurs uploaders
-    await db.refresh(dataset, attribute_names=['files'])
-    
-    # Construire manuellement les données des fichiers avec le nom d'utilisateur
-    files_data = []
-    for file in dataset.files:
-        # Récupérer le nom d'utilisateur depuis la relation uploader si elle est chargée
-        uploader_name = None
-        if hasattr(file, 'uploader') and file.uploader:
-            uploader_name = file.uploader.username
-        
-        # Si la relation n'est pas chargée, faire une requête séparée
-        if not uploader_name:
-            from sqlalchemy import select
-            from app.domain.user.models import User
-            
-            result = await db.execute(
-                select(User.username).where(User.id == file.uploader_id)
-            )
-            uploader_name = result.scalar_one_or_none()
-        
-        file_data = {
-            "id": file.id,
-            "filename_original": file.filename_original,
-            "filename_stored": file.filename_stored,
-            "status": file.status,
-            "parsing_error": file.parsing_error,
-            "version": file.version,
-            "size_bytes": file.size_bytes,
-            "file_size": file.size_bytes,  # Alias pour compatibilité
-            "hash": file.hash,
-            "line_count": file.line_count,
-            "column_count": file.column_count,
-            "uploader_id": file.uploader_id,
-            "uploader_name": uploader_name,
-            "created_at": file.created_at,
-            "updated_at": file.updated_at,
-            "ingestion_status": file.ingestion_status,
-            "docs_indexed": file.docs_indexed,
-            "ingestion_errors": file.ingestion_errors,
-            "mapping_id": None,  # Le modèle File n'a pas cet attribut
-            "inferred_schema": file.inferred_schema,
-            "preview_data": file.preview_data,
-            "mime_type": file.mime_type
-        }
-        files_data.append(file_data)
-    
-    # Créer un dictionnaire avec les données du dataset et les fichiers modifiés
-    dataset_data = {
-        "id": dataset.id,
-        "name": dataset.name,
-        "description": dataset.description,
-        "owner_id": dataset.owner_id,
-        "created_at": dataset.created_at,
-        "updated_at": dataset.updated_at,
-        "files": files_data,
-        "mappings": dataset.mappings
-    }
-    
-    return dataset_data
+    """
+    Retourne les informations détaillées d'un dataset : une page de fichiers
+    (les plus récents d'abord, `files_total` donnant le nombre total) et le
+    résumé de ses mappings. Un ETag permet au client de revalider la vue
+    (304 si rien n'a changé).
+    """
+    etag, detail = await dataset_service.get_detail(
+        db, dataset_id, current_user.id, skip=pagination.skip, limit=pagination.limit,
+        if_none_match=request.headers.get("if-none-match"),
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if detail is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return detail
+
+async def get_owned_dataset_id(
+    dataset_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_cookie)
+) -> uuid.UUID:
+    """Variante légère de get_current_dataset_for_owner : vérification par EXISTS, rien n'est chargé."""
+    return await dataset_service.ensure_owned_by(db, dataset_id, current_user.id)
 
 @router.delete(
     "/{dataset_id}",
@@ -145,11 +113,11 @@ async def get_dataset_details(
     summary="Supprimer un dataset"
 )
 async def delete_dataset(
-    dataset: models.Dataset = Depends(get_current_dataset_for_owner),
+    dataset_id: uuid.UUID = Depends(get_owned_dataset_id),
     db: AsyncSession = Depends(get_db)
 ):
     """Supprime un dataset et toutes ses ressources associées."""
-    await dataset_service.remove(db=db, dataset_id=dataset.id)
+    await dataset_service.remove(db=db, dataset_id=dataset_id)
     return
 
 # --- Endpoints pour la gestion des Fichiers au sein d'un Dataset ---
@@ -187,11 +155,26 @@ async def upload_file_to_dataset(
     summary="Lister les fichiers d'un dataset"
 )
 async def list_files_in_dataset(
-    dataset: models.Dataset = Depends(get_current_dataset_for_owner),
-    pagination: PaginationParams = Depends()
+    response: Response,
+    dataset_id: uuid.UUID = Depends(get_owned_dataset_id),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1, le=100, description="Nombre maximal de fichiers retournés."),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor)."),
+    status: Optional[FileStatus] = Query(None, description="Filtre sur le statut de parsing."),
+    ingestion_status: Optional[IngestionStatus] = Query(None, description="Filtre sur le statut d'ingestion."),
+    created_after: Optional[datetime] = Query(None, description="Fichiers créés à partir de cette date."),
+    created_before: Optional[datetime] = Query(None, description="Fichiers créés avant cette date."),
 ):
-    """Retourne la liste paginée des fichiers appartenant à un dataset."""
-    start = pagination.skip
-    end = pagination.skip + pagination.limit
-    logger.debug(dataset.files[start:end])
-    return dataset.files[start:end]
\ No newline at end of file
+    """
+    Retourne une page de fichiers du dataset, du plus récent au plus ancien,
+    filtrée et paginée en base (pagination par clé). Le curseur de la page
+    suivante est renvoyé dans l'en-tête `X-Next-Cursor`, absent sur la
+    dernière page.
+    """
+    files, next_cursor = await FileService().list_by_dataset(
+        db, dataset_id, limit=limit, cursor=cursor, file_status=status, ingestion_status=ingestion_status,
+        created_after=created_after, created_before=created_before,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return files
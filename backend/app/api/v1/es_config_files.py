@@ -1,15 +1,20 @@
 """ app/api/v1/es_config_files.py """
-import shutil
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from typing import List, Literal, Optional
+
+from app.domain.analysis_files.schemas import AnalysisFileOut
+from app.domain.analysis_files.services import AnalysisFileStore
+from app.domain.analysis_files.sync import PARTIAL_SUFFIX
 
 router = APIRouter()
 
-# Ce chemin pointe vers un dossier local de votre projet backend.
+# Ce chemin pointe vers un dossier local de votre projet backend (app/es_analysis_files).
 # En développement, ce même dossier doit être monté en tant que volume
 # dans le conteneur Elasticsearch via docker-compose.yml.
-ANALYSIS_FILES_PATH = Path(__file__).resolve().parent.parent / "es_analysis_files"
+ANALYSIS_FILES_PATH = Path(__file__).resolve().parent.parent.parent / "es_analysis_files"
+
+analysis_store = AnalysisFileStore(ANALYSIS_FILES_PATH)
 
 
 @router.get("/analysis", response_model=List[str])
@@ -18,36 +23,59 @@ async def list_analysis_files():
     Retourne la liste des fichiers de configuration disponibles pour les analyseurs.
     Ces fichiers sont lus depuis le dossier local partagé.
     """
-    # S'assure que le dossier existe pour éviter les erreurs au premier lancement.
-    ANALYSIS_FILES_PATH.mkdir(parents=True, exist_ok=True)
     try:
-        files = [f.name for f in ANALYSIS_FILES_PATH.iterdir() if f.is_file()]
-        return sorted(files)
-    except Exception as e:
+        return await analysis_store.list_names()
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la lecture des fichiers : {e}")
+
+
+@router.get("/analysis/manifest", response_model=List[AnalysisFileOut])
+async def analysis_files_manifest():
+    """Taille, date de modification et hash SHA-256 de chaque fichier d'analyse."""
+    try:
+        return await analysis_store.manifest()
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la lecture des fichiers : {e}")
 
 
 @router.post("/upload", response_model=dict)
-async def upload_analysis_file(file: UploadFile = File(...)):
+async def upload_analysis_file(
+        file: UploadFile = File(...),
+        format: Optional[Literal["solr", "wordnet", "stopwords"]] = Query(
+            None, description="Compile le fichier (synonymes Solr/WordNet ou stopwords) avant publication."),
+        lowercase: bool = Query(False, description="Met les termes en minuscules lors de la compilation."),
+        expand: bool = Query(True, description="Équivalences développées (expand des filtres de synonymes)."),
+):
     """
     Téléverse un fichier de configuration depuis le frontend et le sauvegarde
-    dans le dossier local partagé.
+    dans le dossier local partagé. Le contenu est écrit en flux, sans bloquer
+    la boucle d'événements. Avec `format`, le fichier est validé, dédoublonné
+    et trié avant publication ; le rapport de compilation (cycles, expansions
+    excessives, estimation mémoire) est retourné, et un 422 le porte en cas
+    d'erreur.
     """
-    ANALYSIS_FILES_PATH.mkdir(parents=True, exist_ok=True)
-
     # Sécurité : Nettoie le nom du fichier pour éviter les traversées de répertoire (../)
-    safe_filename = Path(file.filename).name
-    destination_path = ANALYSIS_FILES_PATH / safe_filename
+    safe_filename = Path(file.filename or "").name
 
-    if not safe_filename:
+    # Les fichiers cachés et temporaires ne sont ni listés ni synchronisés
+    if not safe_filename or safe_filename.startswith(".") or safe_filename.endswith(PARTIAL_SUFFIX):
         raise HTTPException(status_code=400, detail="Nom de fichier invalide.")
 
+    report = None
     try:
-        with destination_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Impossible de sauvegarder le fichier : {e}")
+        if format is None:
+            entry = await analysis_store.save(file, safe_filename)
+        else:
+            options = {"lowercase": lowercase} if format == "stopwords" else {"lowercase": lowercase, "expand": expand}
+            entry, report = await analysis_store.save_compiled(file, safe_filename, format, **options)
     finally:
-        file.file.close()
+        await file.close()
+
+    if entry is None:
+        raise HTTPException(status_code=422, detail=report.model_dump())
 
-    return {"filename": safe_filename, "message": "Fichier téléversé avec succès"}
+    response = {"filename": safe_filename, "sha256": entry.sha256, "size_bytes": entry.size_bytes,
+                "message": "Fichier téléversé avec succès"}
+    if report is not None:
+        response["report"] = report.model_dump()
+    return response
@@ -1,17 +1,20 @@
+import json
+import time
 import uuid
-from typing import List
-import asyncio
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter, Depends, status, HTTPException, BackgroundTasks, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
 # Import des dépendances et des modèles/schémas
-from app.core.db import get_db
+from app.core.db import get_db, async_session_maker
+from app.core.responses import RawJSONResponse
 # --- CORRECTION : Utiliser la dépendance du cookie ---
 from app.api.dependencies import get_current_user_from_cookie
 from app.domain.user.models import User
 from app.domain.file import models, schemas
+from app.domain.file.events import INGESTION, PROGRESS, STATUS, FileEvent, file_events
 from app.domain.file.services import FileService, TaskService
 from app.domain.file_preview.services import FilePreviewService
 from app.domain.file_preview.schemas import FilePreviewChunk
@@ -120,43 +123,106 @@ async def reparse_file(
 from starlette.responses import Response
 from sse_starlette.sse import EventSourceResponse
 
+# Ping envoyé au client SSE en l'absence d'événement (secondes)
+SSE_KEEPALIVE_SECONDS = 10.0
+# Sans événement pendant ce délai, l'état est relu en base (événement perdu, bus déconnecté)
+SSE_RECHECK_SECONDS = 60.0
+PARSE_DONE = {models.FileStatus.READY.value, models.FileStatus.ERROR.value}
+INGESTION_DONE = {models.IngestionStatus.COMPLETED.value, models.IngestionStatus.FAILED.value}
+
+
 @router.get("/{file_id}/status")
 async def stream_file_status(
     file: models.File = Depends(get_current_file_for_owner),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    until: Literal["parsed", "ingested"] = Query(
+        "parsed", description="Fin du flux : parsing terminé (défaut) ou ingestion terminée."),
 ):
+    """
+    Flux SSE du statut d'un fichier, alimenté par le bus d'événements publié
+    par les tâches de parsing et d'ingestion (`status_update`,
+    `ingestion_update`, `progress` en pourcentage). Aucune session de base
+    n'est gardée pendant le flux ; l'état n'est relu en base qu'après
+    SSE_RECHECK_SECONDS sans événement. Avec `until=ingested`, un parsing en
+    erreur termine aussi le flux (aucune ingestion ne suivra).
+    """
+    file_id = file.id
+    # La session de la requête (authentification, propriété) est libérée avant le flux
+    await db.close()
+
+    async def current_state() -> models.File:
+        async with async_session_maker() as session:
+            return await session.get(models.File, file_id)
+
+    def is_done(parse_status: str, ingestion_status: str) -> bool:
+        if until == "ingested":
+            return ingestion_status in INGESTION_DONE or parse_status == models.FileStatus.ERROR.value
+        return parse_status in PARSE_DONE
+
+    def final_events(parse_status: str, detail: Optional[str]):
+        events = [{"event": "status_update", "data": parse_status}]
+        if parse_status == models.FileStatus.ERROR.value and detail:
+            events.append({"event": "parsing_error", "data": detail})
+        return events
+
     async def event_generator():
-        last_status = None
-        keepalive_count = 0
         try:
-            while file.status in [models.FileStatus.PENDING, models.FileStatus.PARSING]:
-                await asyncio.sleep(2)
-                await db.refresh(file)
-                # Statut changé : on notifie
-                if file.status != last_status:
-                    yield {
-                        "event": "status_update",
-                        "data": file.status.value
-                    }
-                    last_status = file.status
-                else:
-                    keepalive_count += 1
-                    # Ping toutes les 10s
-                    if keepalive_count % 5 == 0:
+            # Abonnement avant la lecture de l'état : aucun événement ne peut être manqué entre les deux
+            async with file_events.subscribe(file_id) as subscription:
+                state = await current_state()
+                if state is None:
+                    yield {"event": "error", "data": "Fichier supprimé."}
+                    return
+                parse_status, ingestion_status = state.status.value, state.ingestion_status.value
+                if is_done(parse_status, ingestion_status):
+                    for event in final_events(parse_status, state.parsing_error):
+                        yield event
+                    return
+                yield {"event": "status_update", "data": parse_status}
+
+                last_event = time.monotonic()
+                while True:
+                    event = await subscription.next(SSE_KEEPALIVE_SECONDS)
+                    if event is not None:
+                        received = [event]
+                    elif time.monotonic() - last_event < SSE_RECHECK_SECONDS:
                         yield {"data": "ping"}
-            # Statut final obligatoire
-            yield {
-                "event": "status_update",
-                "data": file.status.value
-            }
-            # Si erreur, message dédié
-            if file.status == models.FileStatus.ERROR and file.ingestion_errors:
-                yield {
-                    "event": "parsing_error",
-                    "data": file.ingestion_errors[0]
-                }
+                        continue
+                    else:
+                        # Long silence : relecture de l'état, convertie en événements manquants
+                        state = await current_state()
+                        if state is None:
+                            yield {"event": "error", "data": "Fichier supprimé."}
+                            return
+                        received = []
+                        if state.status.value != parse_status:
+                            received.append(FileEvent(file_id=str(file_id), kind=STATUS, status=state.status.value,
+                                                      detail=state.parsing_error))
+                        if state.ingestion_status.value != ingestion_status:
+                            received.append(FileEvent(file_id=str(file_id), kind=INGESTION,
+                                                      status=state.ingestion_status.value))
+                        if not received:
+                            yield {"data": "ping"}
+                    last_event = time.monotonic()
+
+                    for event in received:
+                        if event.kind == PROGRESS:
+                            yield {"event": "progress",
+                                   "data": json.dumps({"percent": event.progress, "stage": event.stage})}
+                        elif event.kind == STATUS:
+                            parse_status = event.status
+                            if is_done(parse_status, ingestion_status):
+                                for final in final_events(parse_status, event.detail):
+                                    yield final
+                                return
+                            yield {"event": "status_update", "data": parse_status}
+                        elif event.kind == INGESTION:
+                            ingestion_status = event.status
+                            yield {"event": "ingestion_update", "data": ingestion_status}
+                            if is_done(parse_status, ingestion_status):
+                                return
         except Exception as e:
-            # Log optionnel ici
+            logger.error(f"Flux SSE du fichier {file_id} interrompu : {e}")
             yield {
                 "event": "error",
                 "data": f"Erreur interne SSE: {str(e)}"
@@ -174,8 +240,11 @@ async def get_file_preview(
     file: models.File = Depends(get_current_file_for_owner),
     chunk_index: int = Query(0, ge=0),
     chunk_size: int = Query(100, ge=1, le=10_000),
+    raw: bool = Query(False, description="Réponse sérialisée par orjson, sans revalidation du modèle (gros chunks)."),
 ):
     """Retourne un aperçu paginé par chunk du contenu du fichier."""
+    if raw:
+        return RawJSONResponse(preview_service.get_preview_data(file, chunk_index=chunk_index, chunk_size=chunk_size))
     return preview_service.get_preview(file, chunk_index=chunk_index, chunk_size=chunk_size)
 
 
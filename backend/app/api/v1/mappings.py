@@ -1,26 +1,32 @@
 # app/api/v1/mappings.py
 import time
+import asyncio
 import json
+import uuid
 import logging
 from hashlib import sha256
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from prometheus_client import Counter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.db import get_db
+from ...core.responses import RawJSONResponse
 from ...core.es_client import get_es_client
 from ...domain.user.models import User
 from ...domain.mapping.services import MappingService
+from ...domain.mapping.body_stream import iter_spool, run_on_streamed_body, spool_ndjson
+from ...domain.mapping.id_check import ID_CHECK_MODES
 from ...domain.mapping.schemas import (
-    ValidateOut, CompileOut, DryRunOut,
+    ValidateOut, CompileOut, DryRunOut, DryRunFileIn,
     MappingCreate, MappingUpdate, MappingOut, MappingDetailOut,
     MappingVersionCreate, MappingVersionUpdate, MappingVersionOut,
-    InferTypesOut, EstimateSizeOut, CheckIdsOut
+    InferTypesOut, EstimateSizeOut, CheckIdsOut, CheckIdsJobIn, PrecompileOut
 )
-from app.api.dependencies import get_current_user_from_cookie
+from ...domain.user.schemas import UserRole
+from app.api.dependencies import get_current_claims_from_cookie, get_current_user_from_cookie, require_role
 
 log = logging.getLogger("mapping")
 
@@ -31,7 +37,8 @@ COMPILE_COUNT = Counter("mapping_compile_calls_total", "compile calls")
 APPLY_OK = Counter("mapping_apply_success_total", "apply OK", ["resource"])   # ilm|pipeline|index
 APPLY_FAIL = Counter("mapping_apply_fail_total", "apply FAIL", ["resource"])
 
-MAX_BODY = 5 * 1024 * 1024  # 5 MB
+RAW_QUERY = Query(False, description="Réponse sérialisée par orjson, sans revalidation du modèle (gros échantillons).")
+STREAM_QUERY = Query(None, description="`ndjson` : documents et issues envoyés au fil de l'exécution, résumé en dernière ligne.")
 
 
 def log_call(route: str, dsl_version: str, compiled_hash: str, sample_size: int, latency_ms: float, issues_count: int):
@@ -51,11 +58,8 @@ def log_call(route: str, dsl_version: str, compiled_hash: str, sample_size: int,
 # ---------- Validation / Compilation / Dry-run ----------
 
 @router.post("/validate", response_model=ValidateOut)
-async def validate_mapping(request: Request, user=Depends(get_current_user_from_cookie)):
+async def validate_mapping(request: Request, user=Depends(get_current_claims_from_cookie)):
     """Valide un mapping DSL et retourne les erreurs/warnings."""
-    cl = request.headers.get("content-length")
-    if cl and int(cl) > MAX_BODY:
-        raise HTTPException(status_code=413, detail="Payload too large")
     body = await request.json()
     return MappingService.validate(body)
 
@@ -67,14 +71,16 @@ def validate_mapping_test(body: Dict[str, Any]):
 
 
 @router.post("/compile", response_model=CompileOut)
-async def compile_mapping(request: Request, includePlan: bool = False, user=Depends(get_current_user_from_cookie)):
-    """Compile un mapping DSL en mapping Elasticsearch exploitable."""
-    cl = request.headers.get("content-length")
-    if cl and int(cl) > MAX_BODY:
-        raise HTTPException(status_code=413, detail="Payload too large")
+async def compile_mapping(
+    request: Request,
+    includePlan: bool = False,
+    user=Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_db),
+):
+    """Compile un mapping DSL en mapping Elasticsearch exploitable (cache MappingVersion)."""
     body = await request.json()
     svc = MappingService()
-    return svc.compile(body, include_plan=includePlan)
+    return await svc.compile_cached(db, body, include_plan=includePlan)
 
 
 @router.post("/compile/test", response_model=CompileOut)
@@ -85,41 +91,108 @@ def compile_mapping_test(body: Dict[str, Any], includePlan: bool = False):
 
 
 @router.post("/dry-run", response_model=DryRunOut)
-async def dry_run_mapping(request: Request, user=Depends(get_current_user_from_cookie)):
-    """Exécute un dry-run du mapping sur un échantillon de données."""
-    cl = request.headers.get("content-length")
-    if cl and int(cl) > MAX_BODY:
-        raise HTTPException(status_code=413, detail="Payload too large")
-    body = await request.json()
-
-    rows = (body.get("sample") or {}).get("rows") or body.get("rows") or []
-    body["globals"] = body.get("globals") or {}  # sécurité
-    sample = {"rows": rows}
+async def dry_run_mapping(
+    request: Request,
+    raw: bool = RAW_QUERY,
+    stream: Optional[Literal["ndjson"]] = STREAM_QUERY,
+    user=Depends(get_current_claims_from_cookie),
+):
+    """
+    Exécute un dry-run du mapping sur un échantillon de données. Avec `raw=true`,
+    le résultat de l'exécuteur est sérialisé tel quel (même contenu JSON) ; avec
+    `stream=ndjson`, il est envoyé en NDJSON (voir `MappingService.dry_run_stream`).
+
+    Le corps est analysé au fil de sa réception : les lignes alimentent
+    l'exécuteur à mesure qu'elles arrivent (voir `body_stream`). La taille du
+    corps est bornée par `BodyLimitMiddleware`.
+    """
+    summary: Dict[str, Any] = {"rows": 0}
+
+    def counted(rows):
+        for row in rows:
+            summary["rows"] += 1
+            yield row
+
+    def run(body: Dict[str, Any], rows) -> Any:
+        # Peut être rappelé sur toutes les lignes si le mapping est complété après elles
+        summary["body"], summary["rows"] = body, 0
+        sample = {"rows": counted(rows)}
+        if stream == "ndjson":
+            return spool_ndjson(MappingService.dry_run_stream(body, sample))
+        return MappingService.dry_run_data(body, sample) if raw else MappingService.dry_run(body, sample)
 
     t0 = time.perf_counter()
-    out = MappingService.dry_run(body, sample)
+    try:
+        out = await run_on_streamed_body(request.stream(), run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stream == "ndjson":
+        return StreamingResponse(iter_spool(out), media_type="application/x-ndjson")
+
     lat = (time.perf_counter() - t0) * 1000
+    body = summary["body"]
     dv = body.get("dsl_version", "1.0")
     ch = body.get("compiled_hash", "")
     ic = len(out.issues) if hasattr(out, "issues") else len(out.get("issues", []))
-    log_call("/mappings/dry-run", dv, ch, len(rows), lat, ic)
+    log_call("/mappings/dry-run", dv, ch, summary["rows"], lat, ic)
 
-    return out
+    return RawJSONResponse(out) if raw else out
 
 
 @router.post("/dry-run/test", response_model=DryRunOut)
-def dry_run_mapping_test(body: Dict[str, Any]):
+def dry_run_mapping_test(
+    body: Dict[str, Any],
+    raw: bool = RAW_QUERY,
+    stream: Optional[Literal["ndjson"]] = STREAM_QUERY,
+):
     """Version de test sans authentification."""
     rows = (body.get("sample") or {}).get("rows") or body.get("rows") or []
     body["globals"] = body.get("globals") or {}  # sécurité
     sample = {"rows": rows}
+    if stream == "ndjson":
+        return StreamingResponse(MappingService.dry_run_stream(body, sample), media_type="application/x-ndjson")
+    if raw:
+        return RawJSONResponse(MappingService.dry_run_data(body, sample))
     return MappingService.dry_run(body, sample)
 
 
+@router.post("/dry-run/file", response_model=DryRunOut)
+async def dry_run_mapping_on_file(
+    payload: DryRunFileIn,
+    raw: bool = RAW_QUERY,
+    stream: Optional[Literal["ndjson"]] = STREAM_QUERY,
+    user: User = Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Exécute un dry-run sur un échantillon tiré côté serveur d'un fichier stocké
+    (`sampling` : head, reservoir, stratified, most_issues), sans faire transiter
+    les lignes par le navigateur. Le résumé de l'échantillonnage est renvoyé
+    dans `stats.sample` (`source_rows` : index des lignes dans le fichier).
+    """
+    body = dict(payload.mapping)
+    body["globals"] = body.get("globals") or {}  # sécurité
+    rows, sample_info = await MappingService().sample_file(db, payload.file_id, user, body, payload.sampling)
+    sample = {"rows": rows}
+
+    if stream == "ndjson":
+        return StreamingResponse(MappingService.dry_run_stream(body, sample, sample_info=sample_info),
+                                 media_type="application/x-ndjson")
+
+    t0 = time.perf_counter()
+    out = await asyncio.to_thread(MappingService.dry_run_data, body, sample)
+    out["stats"]["sample"] = sample_info
+    lat = (time.perf_counter() - t0) * 1000
+    log_call("/mappings/dry-run/file", body.get("dsl_version", "1.0"), body.get("compiled_hash", ""),
+             len(rows), lat, len(out["issues"]))
+
+    return RawJSONResponse(out) if raw else DryRunOut(**out)
+
+
 # ---------- Schema (avec ETag stable) ----------
 
 @router.get("/schema")
-async def get_mapping_schema(request: Request, user=Depends(get_current_user_from_cookie)):
+async def get_mapping_schema(request: Request, user=Depends(get_current_claims_from_cookie)):
     """Récupère le schéma JSON du DSL Mapping (source de vérité pour le frontend)."""
     from ...domain.mapping.validators.common.mapping import get_schema
 
@@ -146,93 +219,73 @@ def get_mapping_schema_test():
 
 # ---------- Outils: check-ids / infer-types / estimate-size ----------
 
+def _check_ids_options(body: Dict[str, Any]):
+    """Extrait et valide id_policy, mode et fp_rate d'une requête check-ids."""
+    idp = (body.get("mapping") or {}).get("id_policy") or {}
+    mode = body.get("mode", "exact")
+    if mode not in ID_CHECK_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {list(ID_CHECK_MODES)}")
+    try:
+        fp_rate = float(body.get("fp_rate", 0.01))
+    except (TypeError, ValueError):
+        fp_rate = -1.0
+    if not 0.0 < fp_rate < 1.0:
+        raise HTTPException(status_code=400, detail="fp_rate must be in ]0, 1[")
+    return idp, mode, fp_rate
+
+
+def _check_ids_inline(body: Dict[str, Any]) -> CheckIdsOut:
+    """Vérifie les collisions d'ID sur les lignes inline `sample.rows`."""
+    idp, mode, fp_rate = _check_ids_options(body)
+    rows = (body.get("sample") or {}).get("rows") or []
+    return MappingService.check_ids(lambda: rows, idp, mode, fp_rate, len(rows))
+
+
 @router.post("/check-ids", response_model=CheckIdsOut)
-def check_ids(body: Dict[str, Any], user=Depends(get_current_user_from_cookie)):
-    """Vérifie les collisions d'ID sur un échantillon de données."""
-    sample = body.get("sample", {})
-    mapping = body.get("mapping", {})
-
-    rows = sample.get("rows", [])
-    idp = mapping.get("id_policy", {})
-
-    cols = idp.get("from", [])
-    if not cols and idp.get("source"):
-        cols = [idp["source"]]
-
-    sep = idp.get("sep", ":")
-
-    seen, dups, samples = set(), 0, []
-
-    for i, r in enumerate(rows):
-        v = sep.join("" if r.get(c) is None else str(r.get(c)) for c in cols)
-        if idp.get("hash"):
-            import hashlib
-            v = getattr(hashlib, idp["hash"])((idp.get("salt", "") + v).encode()).hexdigest()
-
-        if v in seen:
-            dups += 1
-            if len(samples) < 5:
-                samples.append({"row": i, "_id": v})
-        seen.add(v)
-
-    # Métriques Prometheus
-    from app.domain.mapping.services import mapping_check_ids_total, mapping_check_ids_duplicates
-    mapping_check_ids_total.inc()
-    if dups > 0:
-        mapping_check_ids_duplicates.inc(dups)
-
-    return CheckIdsOut(
-        total=len(rows),
-        duplicates=dups,
-        duplicate_rate=(dups / len(rows)) if rows else 0.0,
-        samples=samples,
-    )
+async def check_ids(
+    body: Dict[str, Any],
+    user: User = Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Vérifie les collisions d'ID sur un échantillon inline (`sample.rows`)
+    ou sur un fichier stocké (`file_id`).
+
+    `mode` : "exact" (défaut, déversement sur disque au-delà du seuil mémoire)
+    ou "bloom" (filtre probabiliste puis confirmation exacte, `fp_rate`).
+    """
+    file_id = body.get("file_id")
+    if not file_id:
+        return await asyncio.to_thread(_check_ids_inline, body)
+    idp, mode, fp_rate = _check_ids_options(body)
+    try:
+        file_uuid = uuid.UUID(str(file_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid file_id")
+    return await MappingService().check_ids_on_file(db, file_uuid, user, idp, mode, fp_rate)
 
 
 @router.post("/check-ids/test", response_model=CheckIdsOut)
 def check_ids_test(body: Dict[str, Any]):
     """Version de test sans authentification."""
-    sample = body.get("sample", {})
-    mapping = body.get("mapping", {})
-
-    rows = sample.get("rows", [])
-    idp = mapping.get("id_policy", {})
-
-    cols = idp.get("from", [])
-    if not cols and idp.get("source"):
-        cols = [idp["source"]]
-
-    sep = idp.get("sep", ":")
-
-    seen, dups, samples = set(), 0, []
-
-    for i, r in enumerate(rows):
-        v = sep.join("" if r.get(c) is None else str(r.get(c)) for c in cols)
-        if idp.get("hash"):
-            import hashlib
-            v = getattr(hashlib, idp["hash"])((idp.get("salt", "") + v).encode()).hexdigest()
-
-        if v in seen:
-            dups += 1
-            if len(samples) < 5:
-                samples.append({"row": i, "_id": v})
-        seen.add(v)
-
-    from app.domain.mapping.services import mapping_check_ids_total, mapping_check_ids_duplicates
-    mapping_check_ids_total.inc()
-    if dups > 0:
-        mapping_check_ids_duplicates.inc(dups)
-
-    return CheckIdsOut(
-        total=len(rows),
-        duplicates=dups,
-        duplicate_rate=(dups / len(rows)) if rows else 0.0,
-        samples=samples,
-    )
+    return _check_ids_inline(body)
+
+
+@router.post("/check-ids/job", response_model=CheckIdsOut)
+async def check_ids_job(
+    job: CheckIdsJobIn,
+    user: User = Depends(get_current_user_from_cookie),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Vérifie les collisions d'ID d'un fichier stocké avec l'id_policy d'une
+    version de mapping (version active par défaut), shards en parallèle.
+    """
+    return await MappingService().check_ids_job(db, job, user)
 
 
 @router.post("/infer-types", response_model=InferTypesOut)
-def infer_types_ep(body: Dict[str, Any], user=Depends(get_current_user_from_cookie)):
+def infer_types_ep(body: Dict[str, Any], user=Depends(get_current_claims_from_cookie)):
     """Infère les types Elasticsearch à partir d'un échantillon de données."""
     rows = body.get("rows", [])
     globals_cfg = body.get("globals", {})
@@ -240,7 +293,7 @@ def infer_types_ep(body: Dict[str, Any], user=Depends(get_current_user_from_cook
 
 
 @router.post("/estimate-size", response_model=EstimateSizeOut)
-def estimate_size_ep(body: Dict[str, Any], user=Depends(get_current_user_from_cookie)):
+def estimate_size_ep(body: Dict[str, Any], user=Depends(get_current_claims_from_cookie)):
     """Estime la taille de l'index et recommande le nombre de shards."""
     mapping = body.get("mapping") or body  # tolère en root
     field_stats = body.get("field_stats", [])
@@ -269,6 +322,20 @@ def estimate_size_test(body: Dict[str, Any]):
     return MappingService.estimate_size(mapping, field_stats, num_docs, replicas, target_shard_gb)
 
 
+# ---------- Cache de compilation ----------
+
+@router.post("/precompile", response_model=PrecompileOut)
+async def precompile_active_versions(
+    force: bool = Query(False, description="Recompile aussi les versions déjà en cache"),
+    workers: Optional[int] = Query(None, ge=1, le=32, description="Nombre de processus (défaut: nb de CPU)"),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(require_role(UserRole.ADMIN)),
+):
+    """Précompile en parallèle toutes les versions actives (à appeler au déploiement)."""
+    service = MappingService()
+    return await service.precompile_active_versions(db, force=force, max_workers=workers)
+
+
 # ---------- CRUD Mappings ----------
 
 @router.post("/", response_model=MappingOut)
@@ -384,29 +451,30 @@ async def apply_mapping(
     body: dict,
     current_user: User = Depends(get_current_user_from_cookie),
     mapping_service: MappingService = Depends(),
+    db: AsyncSession = Depends(get_db),
     es_client=Depends(get_es_client),
 ):
     """Applique un mapping avec ILM et pipeline d'ingestion (idempotent)."""
     try:
         COMPILE_COUNT.inc()
-        compiled = mapping_service.compile(body, include_plan=False)
+        compiled = await mapping_service.compile_cached(db, body, include_plan=False)
 
-        ilm_policy = compiled.get("ilm_policy", {})
-        ingest_pipeline = compiled.get("ingest_pipeline", {})
-        settings = compiled.get("settings", {})
-        mappings = compiled.get("mappings", {})
+        ilm_policy = compiled.ilm_policy or {}
+        ingest_pipeline = compiled.ingest_pipeline or {}
+        settings = compiled.settings or {}
+        mappings = compiled.mappings or {}
 
         results: Dict[str, Any] = {}
 
         # 1. ILM
         if ilm_policy:
             try:
-                r1 = es_client.ilm.put_lifecycle(
+                r1 = await es_client.ilm.put_lifecycle(
                     name=ilm_policy["name"],
                     body=ilm_policy["policy"],
                 )
                 APPLY_OK.labels("ilm").inc()
-                results["ilm"] = {"status": "ok", "result": r1}
+                results["ilm"] = {"status": "ok", "result": r1.body}
             except Exception as e:
                 APPLY_FAIL.labels("ilm").inc()
                 results["ilm"] = {"status": "error", "error": str(e)}
@@ -414,12 +482,12 @@ async def apply_mapping(
         # 2. Pipeline
         if ingest_pipeline:
             try:
-                r2 = es_client.ingest.put_pipeline(
+                r2 = await es_client.ingest.put_pipeline(
                     id=ingest_pipeline["name"],
                     body=ingest_pipeline["pipeline"],
                 )
                 APPLY_OK.labels("pipeline").inc()
-                results["pipeline"] = {"status": "ok", "result": r2}
+                results["pipeline"] = {"status": "ok", "result": r2.body}
             except Exception as e:
                 APPLY_FAIL.labels("pipeline").inc()
                 results["pipeline"] = {"status": "error", "error": str(e)}
@@ -427,13 +495,13 @@ async def apply_mapping(
         # 3. Index
         try:
             index_body = {"settings": settings, "mappings": mappings}
-            r3 = es_client.indices.create(
+            # ignore_status=400 : l'index existe déjà
+            r3 = await es_client.options(ignore_status=400).indices.create(
                 index=body["index"],
                 body=index_body,
-                ignore=400,  # Ignore si l'index existe déjà
             )
             APPLY_OK.labels("index").inc()
-            results["index"] = {"status": "ok", "result": r3}
+            results["index"] = {"status": "ok", "result": r3.body}
         except Exception as e:
             APPLY_FAIL.labels("index").inc()
             results["index"] = {"status": "error", "error": str(e)}
@@ -0,0 +1,27 @@
+# app/api/v1/monitoring.py
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies import require_role
+from app.core.request_metrics import slow_request_profiles
+from app.domain.user.models import User
+from app.domain.user.schemas import UserRole
+
+router = APIRouter()
+
+
+@router.get("/profiles")
+async def list_slow_request_profiles(admin: User = Depends(require_role(UserRole.ADMIN))) -> List[Dict[str, Any]]:
+    """Liste les profils des requêtes lentes gardés en mémoire, du plus récent au plus ancien."""
+    return [profile.summary() for profile in slow_request_profiles.list()]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_slow_request_profile(profile_id: str, admin: User = Depends(require_role(UserRole.ADMIN))):
+    """Rapport texte (cProfile ou pyinstrument) d'une requête lente."""
+    profile = slow_request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profil introuvable.")
+    return PlainTextResponse(profile.report)
@@ -0,0 +1,85 @@
+"""
+app/core/body_limit.py
+Middleware ASGI limitant la taille des corps de requête pendant leur lecture.
+
+Le Content-Length annoncé est vérifié d'emblée, puis les octets réellement
+reçus sont comptés au fil des messages `http.request` : une requête chunked
+(sans Content-Length) ou qui ment sur sa taille est interrompue dès que la
+limite est franchie, sans que le corps complet soit jamais en mémoire.
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PAYLOAD_TOO_LARGE = "Payload too large"
+
+
+class BodyTooLargeError(HTTPException):
+    """Levée par `receive` lorsque le corps dépasse la limite (convertie en 413 par FastAPI)."""
+
+    def __init__(self, limit: int):
+        super().__init__(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, PAYLOAD_TOO_LARGE)
+        self.limit = limit
+
+
+class BodyLimitMiddleware:
+    """
+    Applique une limite (octets) par préfixe de chemin ; le préfixe le plus
+    long l'emporte. Les chemins sans préfixe correspondant ne sont pas limités.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        # Préfixes triés du plus long au plus court
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and (not content_length.isdigit() or int(content_length) > limit):
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLargeError(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLargeError:
+            # Corps lu hors d'un endpoint FastAPI (middleware, application montée...)
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse({"detail": PAYLOAD_TOO_LARGE}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                headers={"Connection": "close"})
+        await response(scope, receive, send)
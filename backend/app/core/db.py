@@ -1,25 +1,147 @@
 """app/core/db.py"""
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from fastapi import Request
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from typing import AsyncGenerator
-from app.core.config import settings
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings, Settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Méthodes HTTP servies par la réplique en lecture lorsqu'elle est configurée
+READ_ONLY_METHODS = frozenset({"GET", "HEAD"})
+STATEMENT_TYPES = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"})
+
+# Métriques Prometheus
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Attente d'une connexion du pool SQLAlchemy (ouverture de connexion incluse)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_connections_checked_out", "Connexions du pool en cours d'utilisation", ["engine"])
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Durée d'exécution des requêtes SQL par type d'instruction",
+    ["engine", "statement"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool asyncio mesurant l'attente de chaque checkout (étiquetée par `logging_name`)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self._orig_logging_name or "primary").observe(time.perf_counter() - start)
+
+
+def statement_type(statement: str) -> str:
+    """Premier mot-clé de l'instruction SQL (SELECT, INSERT...), `OTHER` sinon."""
+    keyword = statement.lstrip(" \n\t(").split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in STATEMENT_TYPES else "OTHER"
+
+
+def _instrument(engine: AsyncEngine, name: str) -> None:
+    """Chronomètre les requêtes de l'engine et expose l'occupation de son pool."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.labels(name, statement_type(statement)).observe(elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    pool = sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.labels(name).set_function(pool.checkedout)
+
+
+def engine_options(url: str, config: Settings = settings) -> Dict[str, Any]:
+    """
+    Arguments de `create_async_engine` pour une URL : pool dimensionné, pre-ping
+    et cache des requêtes préparées pour asyncpg ; SQLite garde son pool par
+    défaut (les tests utilisent une base en mémoire).
+    """
+    options: Dict[str, Any] = {"echo": config.DB_ECHO}
+    backend = make_url(url)
+    if backend.get_backend_name() == "sqlite":
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    if backend.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            # Cache de SQLAlchemy (instructions préparées) et cache interne d'asyncpg
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def create_engine_from_settings(config: Settings = settings, read_replica: bool = False) -> Optional[AsyncEngine]:
+    """Crée l'engine principal, ou celui de la réplique en lecture (None si non configurée)."""
+    url = config.DATABASE_READ_URL if read_replica else config.DATABASE_URL
+    if not url:
+        return None
+    name = "replica" if read_replica else "primary"
+    engine = create_async_engine(url, pool_logging_name=name, **engine_options(url, config))
+    _instrument(engine, name)
+    return engine
+
+
+engine = create_engine_from_settings(settings)
 async_session_maker = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
     class_=AsyncSession
 )
 
+read_engine = create_engine_from_settings(settings, read_replica=True)
+read_session_maker = async_sessionmaker(
+    bind=read_engine,
+    expire_on_commit=False,
+    class_=AsyncSession
+) if read_engine is not None else async_session_maker
+
 Base = declarative_base()
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Retourne une session de base de données asynchrone.
+    Retourne une session de base de données asynchrone. Les requêtes GET/HEAD
+    sont servies par la réplique en lecture si DATABASE_READ_URL est défini.
     """
-    async with async_session_maker() as session:
+    maker = read_session_maker if request.method in READ_ONLY_METHODS else async_session_maker
+    async with maker() as session:
         yield session
+
+
+async def dispose_engines() -> None:
+    """Ferme les pools de connexions (arrêt de l'application)."""
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
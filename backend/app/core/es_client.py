@@ -1,29 +1,125 @@
 """ app/core/es_client.py"""
+from typing import Any, Dict, Optional
+
 from elasticsearch import AsyncElasticsearch
-from fastapi import Depends, HTTPException, status
-from app.core.config import get_settings, Settings
+from fastapi import HTTPException, status
+from loguru import logger
+from prometheus_client import Gauge
+
+from app.core.config import settings, Settings
+
+DEFAULT_CLUSTER = "default"
 
+# Métriques Prometheus (évaluées à chaque scrape)
+ES_POOL_IN_USE = Gauge("es_pool_connections_in_use", "Connexions HTTP Elasticsearch en cours d'utilisation", ["cluster"])
+ES_POOL_SIZE = Gauge("es_pool_connections_max", "Taille maximale du pool de connexions Elasticsearch", ["cluster"])
+ES_CLUSTER_UP = Gauge("es_cluster_up", "Dernier état connu du cluster (1=green/yellow, 0=red/injoignable)", ["cluster"])
 
-async def get_es_client(settings: Settings = Depends(get_settings)) -> AsyncElasticsearch:
+
+class ESClientRegistry:
     """
-    Dépendance FastAPI pour fournir un client AsyncElasticsearch.
-    Gère la connexion et la fermeture propre.
+    Registre des clients AsyncElasticsearch partagés, un par cluster.
+
+    Chaque client garde son pool de connexions HTTP ouvert (keep-alive) pour
+    toute la durée de vie de l'application, au lieu d'ouvrir une connexion par
+    requête. Les clients sont créés au démarrage (lifespan) et fermés à l'arrêt.
     """
-    connection_args = {'hosts': [settings.ES_HOST]}
-    if settings.ES_API_KEY:
-        connection_args["api_key"] = settings.ES_API_KEY
-    elif settings.ES_USERNAME and settings.ES_PASSWORD:
-        connection_args["basic_auth"] = (settings.ES_USERNAME, settings.ES_PASSWORD)
 
-    es_client = None
+    def __init__(self, config: Settings):
+        self._config = config
+        self._clients: Dict[str, AsyncElasticsearch] = {}
+
+    @property
+    def clusters(self) -> Dict[str, str]:
+        """Clusters configurés : nom -> URL."""
+        return {DEFAULT_CLUSTER: self._config.ES_HOST, **self._config.ES_CLUSTERS}
+
+    def _connection_args(self, host: str) -> Dict[str, Any]:
+        cfg = self._config
+        args: Dict[str, Any] = {
+            "hosts": [host],
+            "connections_per_node": cfg.ES_CONNECTIONS_PER_NODE,
+            "request_timeout": cfg.ES_REQUEST_TIMEOUT,
+            "max_retries": cfg.ES_MAX_RETRIES,
+            "retry_on_timeout": cfg.ES_RETRY_ON_TIMEOUT,
+        }
+        if cfg.ES_API_KEY:
+            args["api_key"] = cfg.ES_API_KEY
+        elif cfg.ES_USERNAME and cfg.ES_PASSWORD:
+            args["basic_auth"] = (cfg.ES_USERNAME, cfg.ES_PASSWORD)
+        return args
+
+    def get(self, cluster: str = DEFAULT_CLUSTER) -> AsyncElasticsearch:
+        """Retourne le client partagé d'un cluster (créé à la première demande)."""
+        client = self._clients.get(cluster)
+        if client is None:
+            host = self.clusters.get(cluster)
+            if host is None:
+                raise KeyError(f"Cluster Elasticsearch inconnu: {cluster}")
+            client = AsyncElasticsearch(**self._connection_args(host))
+            self._clients[cluster] = client
+            ES_POOL_IN_USE.labels(cluster).set_function(lambda c=cluster: self.pool_stats(c)["in_use"])
+            ES_POOL_SIZE.labels(cluster).set_function(lambda c=cluster: self.pool_stats(c)["max"])
+        return client
+
+    def pool_stats(self, cluster: str = DEFAULT_CLUSTER) -> Dict[str, int]:
+        """Occupation du pool HTTP d'un cluster (somme sur ses nœuds)."""
+        stats = {"nodes": 0, "in_use": 0, "max": 0}
+        client = self._clients.get(cluster)
+        if client is None:
+            return stats
+        for node in client.transport.node_pool.all():
+            stats["nodes"] += 1
+            stats["max"] += node.config.connections_per_node
+            session = getattr(node, "session", None)
+            connector = getattr(session, "connector", None)
+            # aiohttp n'expose pas publiquement les connexions acquises
+            stats["in_use"] += len(getattr(connector, "_acquired", ()))
+        return stats
+
+    async def health(self) -> Dict[str, Dict[str, Any]]:
+        """Santé de chaque cluster configuré (`_cluster/health`) et occupation de son pool."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for cluster in self.clusters:
+            try:
+                client = self.get(cluster).options(request_timeout=5, max_retries=0)
+                resp = await client.cluster.health()
+                cluster_status = resp.get("status", "unknown")
+                out[cluster] = {"status": cluster_status, "pool": self.pool_stats(cluster)}
+                ES_CLUSTER_UP.labels(cluster).set(0 if cluster_status == "red" else 1)
+            except Exception as e:
+                out[cluster] = {"status": "unreachable", "error": str(e), "pool": self.pool_stats(cluster)}
+                ES_CLUSTER_UP.labels(cluster).set(0)
+        return out
+
+    async def startup(self) -> None:
+        """Crée les clients de tous les clusters configurés et journalise leur santé."""
+        for cluster in self.clusters:
+            self.get(cluster)
+        for cluster, info in (await self.health()).items():
+            logger.info(f"Elasticsearch [{cluster}] : {info['status']}")
+
+    async def close(self, cluster: Optional[str] = None) -> None:
+        """Ferme le client d'un cluster (ou de tous) et libère les connexions."""
+        names = [cluster] if cluster else list(self._clients)
+        for name in names:
+            client = self._clients.pop(name, None)
+            if client is not None:
+                await client.close()
+
+
+es_registry = ESClientRegistry(settings)
+
+
+async def get_es_client() -> AsyncElasticsearch:
+    """
+    Dépendance FastAPI fournissant le client AsyncElasticsearch partagé.
+    Le client n'est pas fermé après la requête : il appartient au registre.
+    """
     try:
-        es_client = AsyncElasticsearch(**connection_args)
-        yield es_client
+        return es_registry.get()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Impossible de se connecter à Elasticsearch: {e}"
         )
-    finally:
-        if es_client:
-            await es_client.close()
@@ -61,4 +61,7 @@ class FileParsingError(AppException):
 
 class IngestionError(AppException):
     def __init__(self, detail: str = "Erreur lors de l'ingestion des données."):
-        super().__init__(status.HTTP_500_INTERNAL_SERVER_ERROR, detail)
\ No newline at end of file
+        super().__init__(status.HTTP_500_INTERNAL_SERVER_ERROR, detail)
+class InvalidMappingError(AppException):
+    def __init__(self, detail: str = "Mapping DSL invalide pour cette opération."):
+        super().__init__(status.HTTP_422_UNPROCESSABLE_ENTITY, detail)
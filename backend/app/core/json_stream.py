@@ -0,0 +1,202 @@
+"""
+app/core/json_stream.py
+Lecture incrémentale d'un corps JSON dont un tableau (les lignes d'un
+échantillon, ou un fichier qui est lui-même un tableau) peut être volumineux.
+
+Le parseur reçoit le corps par morceaux d'octets et rend les éléments du
+tableau ciblé dès qu'ils sont complets ; les autres membres de l'objet racine
+sont décodés normalement et rassemblés dans `header`. Chaque valeur est
+décodée par `json.JSONDecoder.raw_decode` (implémentation C) : seul le
+découpage entre membres et éléments est fait ici.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_WS = re.compile(r"[ \t\n\r]*")
+# Suite possible d'un nombre coupé en fin de tampon ("4." avant "5e-3")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+# Au-delà, le texte déjà consommé est retiré du tampon
+_COMPACT_AT = 64 * 1024
+
+
+class IncrementalRowsParser:
+    """
+    Objet JSON racine dont les membres `row_paths` (chemins de clés, par
+    exemple ("rows",) ou ("sample", "rows")) sont des tableaux rendus élément
+    par élément par `feed`. Seuls les objets menant à ces chemins sont
+    parcourus ; tout autre membre est décodé d'un bloc. Le chemin vide `()`
+    désigne un tableau racine.
+    """
+
+    def __init__(self, row_paths: Tuple[Tuple[str, ...], ...] = (("rows",),)):
+        self.row_paths = set(row_paths)
+        self._prefixes = {path[:i] for path in row_paths for i in range(1, len(path))}
+        self.header: Dict[str, Any] = {}
+        # Chemin du tableau en cours de lecture (ou déjà lu)
+        self.rows_path: Optional[Tuple[str, ...]] = None
+        self.rows_count = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        # Taille de tampon à atteindre avant de retenter le décodage d'une valeur incomplète
+        self._retry_at = 0
+        # Pile des objets ouverts : (chemin, dict cible)
+        self._stack: List[Tuple[Tuple[str, ...], Dict[str, Any]]] = []
+        self._key: Optional[str] = None
+        self._state = "start"
+        self._final = False
+
+    @property
+    def in_rows(self) -> bool:
+        """Vrai tant que le tableau des lignes est ouvert (d'autres lignes peuvent suivre)."""
+        return self._state in ("first_item", "item", "after_item")
+
+    def feed(self, data: bytes, final: bool = False) -> List[Any]:
+        """Ajoute un morceau du corps ; retourne les éléments de tableau devenus complets."""
+        self._buf += self._utf8.decode(data, final)
+        self._final = final
+        rows: List[Any] = []
+        if len(self._buf) >= self._retry_at or final:
+            self._retry_at = 0
+            self._parse(rows)
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._retry_at = max(0, self._retry_at - self._pos)
+            self._pos = 0
+        if final and self._state != "done":
+            raise ValueError("Corps JSON incomplet.")
+        return rows
+
+    def close(self) -> List[Any]:
+        return self.feed(b"", final=True)
+
+    # --- Analyse ---
+
+    def _peek(self) -> Optional[str]:
+        """Premier caractère significatif (espaces sautés), None s'il faut plus de données."""
+        self._pos = _WS.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _value(self) -> Tuple[bool, Any]:
+        """Décode la valeur à la position courante : (False, None) si elle est incomplète."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._final:
+                raise ValueError(f"JSON invalide : {e.msg} (position {e.pos})") from None
+            # Nouvel essai quand le texte en attente aura doublé (coût linéaire sur les grosses valeurs)
+            self._retry_at = 2 * len(self._buf) - self._pos
+            return False, None
+        if not self._final and (end == len(self._buf) or (
+                isinstance(value, (int, float)) and _NUMBER_TAIL.match(self._buf, end).end() == len(self._buf))):
+            # Un nombre en fin de tampon peut encore se prolonger
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _unexpected(self, char: str) -> ValueError:
+        return ValueError(f"JSON invalide : caractère inattendu {char!r} (position {self._pos})")
+
+    def _parse(self, rows: List[Any]) -> None:
+        while True:
+            if self._state == "done":
+                if self._peek() is not None:
+                    raise self._unexpected(self._buf[self._pos])
+                return
+            char = self._peek()
+            if char is None:
+                return
+            state = self._state
+
+            if state == "start":
+                if char == "[" and () in self.row_paths:
+                    self._pos += 1
+                    self.rows_path = ()
+                    self._state = "first_item"
+                    continue
+                if char != "{":
+                    raise ValueError("Le corps doit être un objet JSON.")
+                self._pos += 1
+                self._stack.append(((), self.header))
+                self._state = "first_key"
+
+            elif state in ("first_key", "key"):
+                if char == "}" and state == "first_key":
+                    self._pos += 1
+                    self._close_object()
+                elif char == '"':
+                    ok, key = self._value()
+                    if not ok:
+                        return
+                    self._key = key
+                    self._state = "colon"
+                else:
+                    raise self._unexpected(char)
+
+            elif state == "colon":
+                if char != ":":
+                    raise self._unexpected(char)
+                self._pos += 1
+                self._state = "value"
+
+            elif state == "value":
+                path, target = self._stack[-1]
+                member = path + (self._key,)
+                if member in self.row_paths and char == "[" and self.rows_path is None:
+                    self._pos += 1
+                    self.rows_path = member
+                    self._state = "first_item"
+                elif member in self._prefixes and char == "{":
+                    self._pos += 1
+                    target[self._key] = {}
+                    self._stack.append((member, target[self._key]))
+                    self._state = "first_key"
+                else:
+                    ok, value = self._value()
+                    if not ok:
+                        return
+                    target[self._key] = value
+                    self._state = "after_value"
+
+            elif state == "after_value":
+                if char == ",":
+                    self._pos += 1
+                    self._state = "key"
+                elif char == "}":
+                    self._pos += 1
+                    self._close_object()
+                else:
+                    raise self._unexpected(char)
+
+            elif state in ("first_item", "item"):
+                if char == "]" and state == "first_item":
+                    self._pos += 1
+                    self._close_array()
+                    continue
+                ok, value = self._value()
+                if not ok:
+                    return
+                rows.append(value)
+                self.rows_count += 1
+                self._state = "after_item"
+
+            elif state == "after_item":
+                if char == ",":
+                    self._pos += 1
+                    self._state = "item"
+                elif char == "]":
+                    self._pos += 1
+                    self._close_array()
+                else:
+                    raise self._unexpected(char)
+
+    def _close_array(self) -> None:
+        self._state = "after_value" if self._stack else "done"
+
+    def _close_object(self) -> None:
+        self._stack.pop()
+        self._state = "after_value" if self._stack else "done"
@@ -0,0 +1,205 @@
+"""
+app/core/request_metrics.py
+Middleware ASGI d'observabilité HTTP : histogramme de latence par route
+(gabarit de chemin, méthode, statut), requêtes en cours, et profils des
+requêtes lentes.
+
+Une fraction des requêtes (SLOW_REQUEST_PROFILE_SAMPLE_RATE) est profilée
+jusqu'à l'envoi des en-têtes de réponse ; le profil n'est gardé que si ce
+délai dépasse SLOW_REQUEST_THRESHOLD_MS. Un seul profil est actif à la fois :
+le profileur voit tout ce qui s'exécute sur la boucle d'événements pendant la
+requête (y compris les autres requêtes concurrentes), mais pas le code des
+endpoints synchrones exécutés dans le pool de threads.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import random
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pragma: no cover - pyinstrument est optionnel
+    PyinstrumentProfiler = None
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP par gabarit de route",
+    ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requêtes HTTP en cours", ["method"])
+SLOW_REQUESTS = Counter("http_slow_requests_total", "Requêtes au-delà du seuil de lenteur", ["route", "method"])
+
+# Label des requêtes qui ne correspondent à aucune route (évite l'explosion de cardinalité)
+UNMATCHED_ROUTE = "unmatched"
+# Nombre de fonctions listées dans un rapport cProfile
+PROFILE_TOP_FUNCTIONS = 40
+
+
+@dataclass
+class RequestProfile:
+    """Profil d'une requête lente."""
+    method: str
+    route: str
+    path: str
+    status: int
+    duration_ms: float
+    profiler: str
+    report: str = field(repr=False)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    ts: float = field(default_factory=time.time)
+
+    def summary(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["report"]
+        return data
+
+
+class ProfileStore:
+    """Derniers profils gardés en mémoire (les plus anciens sont évincés)."""
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def list(self) -> List[RequestProfile]:
+        """Du plus récent au plus ancien."""
+        return list(reversed(self._profiles.values()))
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+slow_request_profiles = ProfileStore(settings.SLOW_REQUEST_PROFILES_KEPT)
+
+
+class _CProfileSession:
+    name = "cprofile"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def report(self) -> str:
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return out.getvalue()
+
+
+class _PyinstrumentSession:
+    name = "pyinstrument"
+
+    def __init__(self):
+        self._profiler = PyinstrumentProfiler(async_mode="enabled")
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def report(self) -> str:
+        return self._profiler.output_text()
+
+
+def route_template(scope: Scope) -> str:
+    """Gabarit de la route résolue par le routeur (ex. /api/v1/files/{file_id}/status)."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """Mesure chaque requête HTTP et profile, par échantillonnage, les requêtes lentes."""
+
+    def __init__(self, app: ASGIApp, threshold_ms: Optional[float] = None, sample_rate: Optional[float] = None,
+                 profiler: Optional[str] = None, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.threshold_ms = settings.SLOW_REQUEST_THRESHOLD_MS if threshold_ms is None else threshold_ms
+        self.sample_rate = settings.SLOW_REQUEST_PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        profiler = profiler or settings.SLOW_REQUEST_PROFILER
+        if profiler == "pyinstrument" and PyinstrumentProfiler is None:
+            logger.warning("pyinstrument n'est pas installé : profils des requêtes lentes via cProfile.")
+            profiler = "cprofile"
+        self.session_class = _PyinstrumentSession if profiler == "pyinstrument" else _CProfileSession
+        self.store = slow_request_profiles if store is None else store
+        self._profiling = False
+
+    def _start_profile(self):
+        if self.sample_rate <= 0 or self._profiling or random.random() >= self.sample_rate:
+            return None
+        try:
+            session = self.session_class()
+        except (RuntimeError, ValueError) as e:
+            # Un autre profileur est déjà actif sur ce thread
+            logger.debug(f"Profil de requête non démarré : {e}")
+            return None
+        self._profiling = True
+        return session
+
+    def _stop_profile(self, session) -> None:
+        session.stop()
+        self._profiling = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        headers_ms: Optional[float] = None
+        session = self._start_profile()
+
+        async def instrumented_send(message: Message) -> None:
+            nonlocal status, headers_ms, session
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_ms = (time.perf_counter() - start) * 1000
+                if session is not None:
+                    self._stop_profile(session)
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, instrumented_send)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            duration = time.perf_counter() - start
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.labels(route, method, str(status)).observe(duration)
+            if headers_ms is None:
+                headers_ms = duration * 1000
+                if session is not None:
+                    self._stop_profile(session)
+
+            if headers_ms >= self.threshold_ms:
+                SLOW_REQUESTS.labels(route, method).inc()
+                logger.warning(f"Requête lente : {method} {route} -> {status} en {headers_ms:.0f} ms")
+                if session is not None:
+                    await self._keep_profile(session, method, route, scope.get("path", ""), status, headers_ms)
+
+    async def _keep_profile(self, session, method: str, route: str, path: str, status: int, duration_ms: float):
+        # La mise en forme du rapport (pstats) est faite hors de la boucle d'événements
+        report = await asyncio.to_thread(session.report)
+        self.store.add(RequestProfile(method=method, route=route, path=path, status=status,
+                                      duration_ms=round(duration_ms, 3), profiler=session.name, report=report))
@@ -0,0 +1,56 @@
+"""
+app/core/responses.py
+Réponse JSON rapide pour les gros payloads internes (dry-run, aperçus).
+
+Les endpoints qui retournent un `RawJSONResponse` court-circuitent la
+validation du `response_model` et `jsonable_encoder` : le contenu doit donc
+être une structure produite par le serveur (dict, list, types JSON natifs),
+jamais une entrée client non vérifiée. orjson est utilisé s'il est installé,
+avec repli sur le module json.
+"""
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson est optionnel
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Types hors JSON natif rencontrés dans les lignes de données (pandas, numpy, Decimal...)."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        # Couvre pd.Timestamp, sous-classe de datetime qu'orjson ne sérialise pas
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "item"):  # scalaires numpy
+        return obj.item()
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON compact UTF-8 (avec orjson, NaN/Infinity deviennent null)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RawJSONResponse(JSONResponse):
+    """JSONResponse sérialisée par orjson, sans revalidation du modèle de réponse."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
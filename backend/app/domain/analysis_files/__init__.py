@@ -0,0 +1,5 @@
+"""Package des fichiers d'analyse Elasticsearch (synonymes, stopwords...) : stockage, compilation, manifeste et synchronisation."""
+
+from . import compiler, schemas, services, sync
+
+__all__ = ["compiler", "schemas", "services", "sync"]
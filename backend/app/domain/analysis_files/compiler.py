@@ -0,0 +1,401 @@
+"""
+app/domain/analysis_files/compiler.py
+Compilation des fichiers de synonymes (formats Solr et WordNet) et de
+stopwords avant leur publication pour Elasticsearch : lecture en flux,
+normalisation et dédoublonnage, détection des cycles et des expansions
+multi-mots excessives, estimation de la mémoire du FST et écriture d'un
+fichier trié dans le format source (Solr ou WordNet), ou d'une liste de mots
+triée.
+"""
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .schemas import CompileIssue, CompileReportOut
+from .sync import PARTIAL_SUFFIX
+
+COMPILE_FORMATS = ("solr", "wordnet", "stopwords")
+MAX_REPORTED = 100
+
+# Estimation de l'empreinte du SynonymMap Lucene : FST des entrées (un arc par
+# octet non partagé avec l'entrée précédente), ordinaux des sorties par entrée,
+# table des mots de sortie (BytesRefHash).
+FST_ARC_BYTES = 4
+OUTPUT_ORD_BYTES = 3
+OUTPUT_LIST_BYTES = 2
+WORD_OVERHEAD_BYTES = 12
+# CharArraySet du filtre stop : tableau de char (UTF-16) + référence par mot
+STOPWORD_OVERHEAD_BYTES = 32
+
+Terms = Tuple[str, ...]
+# Identifiant du premier synset écrit (format des identifiants WordNet à 9 chiffres)
+WORDNET_FIRST_SYNSET = 100_000_001
+
+
+class _Issues:
+    """Erreurs ou avertissements : comptés en totalité, conservés jusqu'à MAX_REPORTED."""
+
+    def __init__(self):
+        self.count = 0
+        self.items: List[CompileIssue] = []
+
+    def add(self, line: int, message: str) -> None:
+        self.count += 1
+        if len(self.items) < MAX_REPORTED:
+            self.items.append(CompileIssue(line=line, message=message))
+
+
+def normalize_term(term: str, lowercase: bool = False) -> str:
+    """NFC, espaces internes réduits à un seul, casse optionnellement abaissée."""
+    term = " ".join(unicodedata.normalize("NFC", term).split())
+    return term.lower() if lowercase else term
+
+
+def _split_unescaped(text: str, sep: str) -> List[str]:
+    """Découpe sur `sep` hors séquences échappées par `\\` (les échappements sont conservés)."""
+    if "\\" not in text:
+        return text.split(sep)
+    parts, current, i = [], [], 0
+    while i < len(text):
+        if text[i] == "\\" and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+        elif text.startswith(sep, i):
+            parts.append("".join(current))
+            current = []
+            i += len(sep)
+        else:
+            current.append(text[i])
+            i += 1
+    parts.append("".join(current))
+    return parts
+
+
+def _unescape(term: str) -> str:
+    return re.sub(r"\\(.)", r"\1", term) if "\\" in term else term
+
+
+def _escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace(",", "\\,").replace("=>", "=\\>")
+
+
+# --- Analyse des formats (générateurs : une règle à la fois) ---
+
+SolrRule = Tuple[str, Terms, Terms]  # ("equiv", termes, ()) ou ("map", entrées, sorties)
+
+
+def iter_solr_rules(lines: Iterable[str], errors: _Issues, lowercase: bool = False) -> Iterator[Tuple[int, SolrRule]]:
+    """Règles d'un fichier Solr : `a, b, c` (équivalence) ou `a, b => c` (réécriture explicite)."""
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        sides = _split_unescaped(line, "=>")
+        if len(sides) > 2:
+            errors.add(lineno, "Plus d'un '=>' sur la ligne.")
+            continue
+        parsed = []
+        for side in sides:
+            terms = tuple(normalize_term(_unescape(t), lowercase) for t in _split_unescaped(side, ","))
+            parsed.append(tuple(t for t in terms if t))
+            if len(parsed[-1]) != len(terms):
+                errors.add(lineno, "Terme vide (virgule en trop ou côté de '=>' vide).")
+        if any(not side for side in parsed):
+            continue
+        yield lineno, ("map", parsed[0], parsed[1]) if len(parsed) == 2 else ("equiv", parsed[0], ())
+
+
+_WORDNET_LINE = re.compile(r"^s\((\d+),\d+,'((?:[^']|'')*)',")
+
+
+def iter_wordnet_rules(lines: Iterable[str], errors: _Issues, lowercase: bool = False) -> Iterator[Tuple[int, SolrRule]]:
+    """Synsets du format prolog WordNet (`s(id,n,'mot',...)`), regroupés par identifiant consécutif."""
+    synset, words, first_line = None, [], 0
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line:
+            continue
+        match = _WORDNET_LINE.match(line)
+        if not match:
+            errors.add(lineno, "Ligne WordNet invalide (attendu: s(id,n,'mot',type,sens,tag).).")
+            continue
+        if match.group(1) != synset:
+            if words:
+                yield first_line, ("equiv", tuple(words), ())
+            synset, words, first_line = match.group(1), [], lineno
+        word = normalize_term(match.group(2).replace("''", "'"), lowercase)
+        if word:
+            words.append(word)
+    if words:
+        yield first_line, ("equiv", tuple(words), ())
+
+
+def iter_stopwords(lines: Iterable[str], lowercase: bool = False) -> Iterator[Tuple[int, str]]:
+    """Mots d'une liste de stopwords (commentaires `#` en début de ligne, `|` au format Snowball)."""
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.split("|", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        word = normalize_term(line, lowercase)
+        if word:
+            yield lineno, word
+
+
+# --- Analyses ---
+
+def find_cycles(edges: Dict[str, Set[str]], limit: int = MAX_REPORTED) -> List[List[str]]:
+    """Composantes fortement connexes de plus d'un terme (Tarjan itératif)."""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    cycles: List[List[str]] = []
+    counter = 0
+    for root in sorted(edges):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(edges.get(root, ()))))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges.get(child, ())))))
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 and len(cycles) < limit:
+                    cycles.append(sorted(component))
+    return cycles
+
+
+def _word_count(term: str) -> int:
+    return term.count(" ") + 1
+
+
+def estimate_synonym_memory(outputs: Dict[str, Set[str]]) -> Dict[str, int]:
+    """Estimation (octets) du SynonymMap construit par ES : FST des entrées, sorties, table des mots."""
+    fst = 0
+    previous = b""
+    for term in sorted(outputs):
+        data = term.encode("utf-8")
+        shared = 0
+        for a, b in zip(previous, data):
+            if a != b:
+                break
+            shared += 1
+        fst += (len(data) - shared) * FST_ARC_BYTES
+        previous = data
+    output_lists = sum(len(o) * OUTPUT_ORD_BYTES + OUTPUT_LIST_BYTES for o in outputs.values())
+    words = {w for o in outputs.values() for w in o}
+    word_table = sum(len(w.encode("utf-8")) + WORD_OVERHEAD_BYTES for w in words)
+    return {"fst_bytes": fst, "outputs_bytes": output_lists, "words_bytes": word_table,
+            "total_bytes": fst + output_lists + word_table}
+
+
+# --- Compilation ---
+
+def _write_lines(lines: Iterable[str], dest: Path) -> None:
+    tmp = dest.with_name(f".{dest.name}{PARTIAL_SUFFIX}")
+    with open(tmp, "w", encoding="utf-8", newline="\n") as out:
+        for line in lines:
+            out.write(line)
+            out.write("\n")
+    os.replace(tmp, dest)
+
+
+def compile_synonyms(
+        src: Path,
+        dest: Optional[Path] = None,
+        fmt: str = "solr",
+        lowercase: bool = False,
+        expand: bool = True,
+        max_expansion: int = 1_000,
+        max_words: int = 8,
+) -> CompileReportOut:
+    """
+    Compile un fichier de synonymes Solr ou WordNet. Les équivalences sont
+    dédoublonnées (mêmes termes dans un autre ordre) et les réécritures
+    explicites de même entrée fusionnées. Une règle est « explosive » si le
+    nombre d'entrées multiplié par le nombre total de mots des sorties dépasse
+    `max_expansion`, ou si un terme dépasse `max_words` mots. La sortie triée
+    n'est écrite que s'il n'y a pas d'erreur.
+    """
+    errors, warnings = _Issues(), _Issues()
+    report = CompileReportOut(format=fmt)
+    parse = iter_wordnet_rules if fmt == "wordnet" else iter_solr_rules
+    # Clé triée pour le dédoublonnage -> (ligne, termes dans l'ordre source) : sans expansion,
+    # ES réécrit chaque terme vers le premier du groupe, l'ordre doit donc être conservé
+    groups: Dict[Terms, Tuple[int, Terms]] = {}
+    mappings: Dict[str, Set[str]] = defaultdict(set)
+    first_line: Dict[str, int] = {}
+
+    with open(src, "r", encoding="utf-8-sig") as f:
+        for lineno, (kind, left, right) in parse(_count_lines(f, report), errors, lowercase):
+            report.rules_in += 1
+            if kind == "equiv":
+                terms = tuple(dict.fromkeys(left))
+                if len(terms) < 2:
+                    warnings.add(lineno, f"Équivalence sans synonyme : '{left[0]}'.")
+                    report.duplicates += 1
+                    continue
+                key = tuple(sorted(terms))
+                if key in groups:
+                    report.duplicates += 1
+                    first, kept = groups[key]
+                    if not expand and kept[0] != terms[0]:
+                        warnings.add(lineno, f"Équivalence déjà définie ligne {first} avec '{kept[0]}' "
+                                             f"pour premier terme : '{terms[0]}' est ignoré.")
+                    continue
+                groups[key] = (lineno, terms)
+            else:
+                added = False
+                for term in left:
+                    before = len(mappings[term])
+                    mappings[term].update(right)
+                    first_line.setdefault(term, lineno)
+                    added |= len(mappings[term]) > before
+                if not added:
+                    report.duplicates += 1
+
+    # Entrées -> sorties du SynonymMap (équivalences développées ou non)
+    outputs: Dict[str, Set[str]] = defaultdict(set)
+    for term, targets in mappings.items():
+        outputs[term] |= targets
+    for _, terms in groups.values():
+        for term in terms:
+            outputs[term].update(terms if expand else terms[:1])
+
+    # Cycles entre réécritures explicites (les équivalences sont symétriques par nature)
+    edges = {term: {t for t in targets if t != term} for term, targets in mappings.items()}
+    report.cycles = find_cycles(edges)
+    for cycle in report.cycles:
+        warnings.add(first_line.get(cycle[0], 0), f"Cycle de réécritures : {' => '.join(cycle + cycle[:1])}.")
+
+    explosive = []
+    rules = [(line, list(terms), list(terms) if expand else list(terms[:1])) for line, terms in groups.values()]
+    rules += [(first_line[term], [term], sorted(targets)) for term, targets in mappings.items()]
+    for line, inputs, targets in rules:
+        cost = len(inputs) * sum(_word_count(t) for t in targets)
+        longest = max(_word_count(t) for t in inputs + targets)
+        if cost > max_expansion or longest > max_words:
+            explosive.append({"line": line, "inputs": len(inputs), "outputs": len(targets),
+                              "expansion": cost, "max_words": longest,
+                              "sample": list(dict.fromkeys(inputs + targets))[:5]})
+    explosive.sort(key=lambda e: (-e["expansion"], e["line"]))
+    report.explosive = explosive[:MAX_REPORTED]
+    report.explosive_count = len(explosive)
+
+    all_terms = set(outputs) | {t for o in outputs.values() for t in o}
+    report.terms = len(all_terms)
+    report.multiword_terms = sum(1 for t in all_terms if " " in t)
+    report.rules_out = len(groups) + len(mappings)
+    report.memory = estimate_synonym_memory(outputs)
+    _finish(report, errors, warnings)
+
+    if dest is not None and not errors.count:
+        # Groupes triés entre eux, termes laissés dans leur ordre source
+        ordered = [groups[key][1] for key in sorted(groups)]
+        if fmt == "wordnet":
+            # Le fichier reste lisible par un filtre configuré avec `format: wordnet`
+            _write_lines(_wordnet_lines(ordered), dest)
+        else:
+            explicit = (f"{', '.join(map(_escape, sorted(left)))} => {', '.join(map(_escape, sorted(right)))}"
+                        for right, left in _group_by_targets(mappings))
+            equivalences = (", ".join(map(_escape, terms)) for terms in ordered)
+            _write_lines(_chain(explicit, equivalences), dest)
+    return report
+
+
+def _wordnet_lines(groups: Iterable[Terms]) -> Iterator[str]:
+    """Synsets au format prolog WordNet, renumérotés dans l'ordre d'écriture."""
+    for synset, terms in enumerate(groups, WORDNET_FIRST_SYNSET):
+        for n, term in enumerate(terms, 1):
+            word = term.replace("'", "''")
+            yield f"s({synset},{n},'{word}',n,1,0)."
+
+
+def _group_by_targets(mappings: Dict[str, Set[str]]) -> List[Tuple[Terms, List[str]]]:
+    """Réécritures regroupées par ensemble de sorties (`a => c` et `b => c` deviennent `a, b => c`)."""
+    by_targets: Dict[Terms, List[str]] = defaultdict(list)
+    for term, targets in mappings.items():
+        by_targets[tuple(sorted(targets))].append(term)
+    return sorted(by_targets.items(), key=lambda item: (sorted(item[1]), item[0]))
+
+
+def compile_stopwords(src: Path, dest: Optional[Path] = None, lowercase: bool = False) -> CompileReportOut:
+    """Compile une liste de stopwords : normalisation, dédoublonnage et tri."""
+    errors, warnings = _Issues(), _Issues()
+    report = CompileReportOut(format="stopwords")
+    words: Set[str] = set()
+    with open(src, "r", encoding="utf-8-sig") as f:
+        for lineno, word in iter_stopwords(_count_lines(f, report), lowercase):
+            report.rules_in += 1
+            if word in words:
+                report.duplicates += 1
+                continue
+            if " " in word:
+                # Le filtre stop compare des tokens isolés : une expression ne correspond jamais
+                warnings.add(lineno, f"Stopword de plusieurs mots, jamais appliqué : '{word}'.")
+            words.add(word)
+    report.rules_out = report.terms = len(words)
+    report.multiword_terms = sum(1 for w in words if " " in w)
+    total = sum(len(w.encode("utf-16-le")) + STOPWORD_OVERHEAD_BYTES for w in words)
+    report.memory = {"total_bytes": total}
+    _finish(report, errors, warnings)
+    if dest is not None:
+        _write_lines(sorted(words), dest)
+    return report
+
+
+def compile_analysis_file(src: Path, dest: Optional[Path], fmt: str, **options) -> CompileReportOut:
+    """Compile `src` selon son format ; `dest=None` valide sans écrire."""
+    if fmt not in COMPILE_FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(COMPILE_FORMATS)})")
+    try:
+        if fmt == "stopwords":
+            return compile_stopwords(src, dest, options.get("lowercase", False))
+        return compile_synonyms(src, dest, fmt, **options)
+    except UnicodeDecodeError as e:
+        return CompileReportOut(format=fmt, error_count=1,
+                                errors=[CompileIssue(line=0, message=f"Fichier non UTF-8 : {e.reason}.")])
+
+
+def _count_lines(lines: Iterable[str], report: CompileReportOut) -> Iterator[str]:
+    for line in lines:
+        report.lines += 1
+        yield line
+
+
+def _chain(*iterables: Iterable[str]) -> Iterator[str]:
+    for iterable in iterables:
+        yield from iterable
+
+
+def _finish(report: CompileReportOut, errors: _Issues, warnings: _Issues) -> None:
+    report.error_count = errors.count
+    report.errors = errors.items
+    report.warnings = warnings.items
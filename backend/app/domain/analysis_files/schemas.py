@@ -0,0 +1,44 @@
+""" app/domain/analysis_files/schemas.py """
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+
+class AnalysisFileOut(BaseModel):
+    """Entrée du manifeste d'un fichier d'analyse."""
+    name: str = Field(description="Nom du fichier.")
+    size_bytes: int = Field(description="Taille du fichier en octets.")
+    modified_at: datetime = Field(description="Date de dernière modification.")
+    sha256: str = Field(description="Hash SHA-256 du contenu.")
+
+
+class SyncReportOut(BaseModel):
+    """Résultat d'une synchronisation différentielle."""
+    copied: List[str] = []
+    unchanged: List[str] = []
+    deleted: List[str] = []
+    errors: Dict[str, str] = {}
+
+
+class CompileIssue(BaseModel):
+    line: int = Field(description="Numéro de ligne dans le fichier source (0 si non applicable).")
+    message: str
+
+
+class CompileReportOut(BaseModel):
+    """Rapport de compilation d'un fichier de synonymes ou de stopwords."""
+    format: str = Field(description="Format source : solr, wordnet ou stopwords.")
+    lines: int = 0
+    rules_in: int = Field(0, description="Règles (ou mots) lus dans la source.")
+    rules_out: int = Field(0, description="Règles (ou mots) écrits après dédoublonnage.")
+    duplicates: int = 0
+    terms: int = Field(0, description="Termes distincts.")
+    multiword_terms: int = 0
+    error_count: int = 0
+    errors: List[CompileIssue] = []
+    warnings: List[CompileIssue] = []
+    cycles: List[List[str]] = Field([], description="Cycles entre règles explicites (a => b, b => a).")
+    explosive: List[Dict[str, Any]] = Field([], description="Règles dont l'expansion multi-mots est excessive.")
+    explosive_count: int = 0
+    memory: Dict[str, int] = Field({}, description="Estimation de l'empreinte mémoire (octets) dans ES.")
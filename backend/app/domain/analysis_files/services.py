@@ -0,0 +1,146 @@
+"""
+app/domain/analysis_files/services.py
+Stockage des fichiers d'analyse (synonymes, stopwords...) sans bloquer la
+boucle d'événements : écriture en flux asynchrone avec hash calculé au fil de
+l'eau, et manifeste en mémoire (taille, mtime, SHA-256) calculé à la demande
+(GET /analysis/manifest, synchronisation) ; la simple liste des noms ne lit
+que le dossier.
+"""
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+from loguru import logger
+
+from app.core.exceptions import SaveError
+from .compiler import compile_analysis_file
+from .schemas import AnalysisFileOut, CompileReportOut, SyncReportOut
+from .sync import CHUNK_SIZE, PARTIAL_SUFFIX, HashManifest, delta_sync, hash_file, iter_analysis_files
+
+
+class AnalysisFileStore:
+    """
+    Dossier de fichiers d'analyse partagé avec Elasticsearch. Le manifeste est
+    rafraîchi hors de la boucle d'événements : seuls les fichiers dont la taille
+    ou le mtime a changé (modifiés hors de l'application) sont relus.
+    """
+
+    def __init__(self, root: Path, chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self._hashes = HashManifest()
+        self._entries: Dict[str, AnalysisFileOut] = {}
+        self._lock = asyncio.Lock()
+
+    def _scan(self) -> Dict[str, AnalysisFileOut]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        entries = {}
+        for entry in iter_analysis_files(self.root):
+            st = entry.stat()
+            entries[entry.name] = AnalysisFileOut(
+                name=entry.name,
+                size_bytes=st.st_size,
+                modified_at=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                sha256=self._hashes.sha256(entry),
+            )
+        self._hashes.retain(entries)
+        return entries
+
+    async def refresh(self) -> None:
+        """Resynchronise le manifeste avec le disque."""
+        async with self._lock:
+            self._entries = await asyncio.to_thread(self._scan)
+
+    async def manifest(self) -> List[AnalysisFileOut]:
+        """Entrées du manifeste, triées par nom."""
+        await self.refresh()
+        return [self._entries[name] for name in sorted(self._entries)]
+
+    def _names(self) -> List[str]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return sorted(entry.name for entry in iter_analysis_files(self.root))
+
+    async def list_names(self) -> List[str]:
+        """Noms des fichiers, lus dans le dossier (ni stat ni hash)."""
+        return await asyncio.to_thread(self._names)
+
+    async def _receive(self, file: UploadFile, tmp: Path) -> str:
+        """Écrit le fichier téléversé par blocs dans `tmp` et retourne son SHA-256."""
+        digest = hashlib.sha256()
+        async with aiofiles.open(tmp, "wb") as out:
+            while chunk := await file.read(self.chunk_size):
+                digest.update(chunk)
+                await out.write(chunk)
+        return digest.hexdigest()
+
+    def _tmp_path(self, filename: str) -> Path:
+        return self.root / f".{filename}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+
+    async def _publish(self, filename: str, sha: str) -> AnalysisFileOut:
+        st = await aiofiles.os.stat(self.root / filename)
+        async with self._lock:
+            self._hashes.records[filename] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            entry = AnalysisFileOut(
+                name=filename,
+                size_bytes=st.st_size,
+                modified_at=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                sha256=sha,
+            )
+            self._entries[filename] = entry
+        return entry
+
+    async def save(self, file: UploadFile, filename: str) -> AnalysisFileOut:
+        """
+        Écrit le fichier téléversé par blocs dans un fichier temporaire, puis le
+        renomme : le fichier visible (et lu par ES) n'est jamais partiel.
+        """
+        await asyncio.to_thread(self.root.mkdir, parents=True, exist_ok=True)
+        tmp = self._tmp_path(filename)
+        try:
+            sha = await self._receive(file, tmp)
+            await aiofiles.os.replace(tmp, self.root / filename)
+        except OSError as e:
+            logger.error(f"Erreur de sauvegarde du fichier d'analyse '{filename}' : {e}")
+            raise SaveError()
+        finally:
+            if await aiofiles.os.path.exists(tmp):
+                await aiofiles.os.remove(tmp)
+        return await self._publish(filename, sha)
+
+    async def save_compiled(
+            self, file: UploadFile, filename: str, fmt: str, **options
+    ) -> Tuple[Optional[AnalysisFileOut], CompileReportOut]:
+        """
+        Téléverse puis compile le fichier (synonymes ou stopwords) hors de la
+        boucle d'événements. Seule la version compilée est publiée, et rien ne
+        l'est si la compilation relève des erreurs.
+        """
+        await asyncio.to_thread(self.root.mkdir, parents=True, exist_ok=True)
+        raw, compiled = self._tmp_path(filename), self._tmp_path(filename)
+        try:
+            await self._receive(file, raw)
+            report = await asyncio.to_thread(compile_analysis_file, raw, compiled, fmt, **options)
+            if report.error_count:
+                return None, report
+            sha = await asyncio.to_thread(hash_file, compiled)
+            await aiofiles.os.replace(compiled, self.root / filename)
+        except OSError as e:
+            logger.error(f"Erreur de compilation du fichier d'analyse '{filename}' : {e}")
+            raise SaveError()
+        finally:
+            for tmp in (raw, compiled):
+                if await aiofiles.os.path.exists(tmp):
+                    await aiofiles.os.remove(tmp)
+        return await self._publish(filename, sha), report
+
+    async def sync_to(self, dest: Path, delete: bool = False) -> SyncReportOut:
+        """Synchronisation différentielle vers `dest` en réutilisant les hashes du manifeste."""
+        await self.refresh()
+        hashes = {name: e.sha256 for name, e in self._entries.items()}
+        return await asyncio.to_thread(delta_sync, self.root, dest, delete, hashes)
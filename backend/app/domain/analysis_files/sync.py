@@ -0,0 +1,132 @@
+"""
+app/domain/analysis_files/sync.py
+Synchronisation différentielle des fichiers d'analyse vers le dossier de
+configuration d'Elasticsearch : seuls les fichiers dont le contenu (SHA-256)
+diffère sont copiés. Le dossier de destination garde un manifeste des hashes
+pour ne pas relire ses fichiers tant que leur taille et leur mtime n'ont pas bougé.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from loguru import logger
+
+from .schemas import SyncReportOut
+
+CHUNK_SIZE = 1024 * 1024
+# Manifeste de la destination : nom -> {"sha256", "size", "mtime_ns"}
+MANIFEST_NAME = ".sync-manifest.json"
+# Fichiers temporaires d'écriture (upload, copie) : jamais listés ni synchronisés
+PARTIAL_SUFFIX = ".part"
+
+
+def hash_file(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 du contenu d'un fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_analysis_files(folder: Path) -> Iterator[os.DirEntry]:
+    """Fichiers d'analyse d'un dossier (hors fichiers cachés et écritures en cours)."""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith(".") and not entry.name.endswith(PARTIAL_SUFFIX):
+                yield entry
+
+
+class HashManifest:
+    """
+    Hashes connus des fichiers d'un dossier, réutilisés tant que la taille et le
+    mtime d'un fichier n'ont pas changé ; sinon le fichier est relu.
+    """
+
+    def __init__(self, records: Optional[Dict[str, Dict]] = None):
+        self.records: Dict[str, Dict] = records or {}
+
+    def sha256(self, entry: os.DirEntry) -> str:
+        st = entry.stat()
+        record = self.records.get(entry.name)
+        if record and record["size"] == st.st_size and record["mtime_ns"] == st.st_mtime_ns:
+            return record["sha256"]
+        sha = hash_file(Path(entry.path))
+        self.records[entry.name] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        return sha
+
+    def retain(self, names) -> None:
+        """Oublie les fichiers disparus."""
+        self.records = {name: r for name, r in self.records.items() if name in names}
+
+    @classmethod
+    def load(cls, path: Path) -> "HashManifest":
+        try:
+            return cls(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return cls()
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.name + PARTIAL_SUFFIX)
+        tmp.write_text(json.dumps(self.records, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def copy_atomic(src: Path, dest: Path) -> None:
+    """Copie via un fichier temporaire renommé : ES ne lit jamais un fichier à moitié écrit."""
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}")
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def delta_sync(source: Path, dest: Path, delete: bool = False,
+               source_hashes: Optional[Dict[str, str]] = None) -> SyncReportOut:
+    """
+    Copie de `source` vers `dest` les fichiers absents ou dont le contenu
+    diffère (comparaison des SHA-256). `source_hashes` (nom -> hash, par exemple
+    le manifeste du store) évite de relire la source. Avec `delete`, les
+    fichiers absents de la source sont supprimés de la destination.
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    manifest_path = dest / MANIFEST_NAME
+    dest_manifest = HashManifest.load(manifest_path)
+    source_manifest = HashManifest()
+    report = SyncReportOut()
+
+    dest_entries = {e.name: e for e in iter_analysis_files(dest)}
+    source_names = set()
+    for entry in sorted(iter_analysis_files(source), key=lambda e: e.name):
+        source_names.add(entry.name)
+        try:
+            src_sha = (source_hashes or {}).get(entry.name) or source_manifest.sha256(entry)
+            dest_entry = dest_entries.get(entry.name)
+            if dest_entry is not None and dest_manifest.sha256(dest_entry) == src_sha:
+                report.unchanged.append(entry.name)
+                continue
+            target = dest / entry.name
+            copy_atomic(Path(entry.path), target)
+            st = target.stat()
+            dest_manifest.records[entry.name] = {"sha256": src_sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            report.copied.append(entry.name)
+        except OSError as e:
+            logger.error(f"Synchronisation de '{entry.name}' impossible : {e}")
+            report.errors[entry.name] = str(e)
+
+    if delete:
+        for name in sorted(set(dest_entries) - source_names):
+            try:
+                (dest / name).unlink()
+                report.deleted.append(name)
+            except OSError as e:
+                report.errors[name] = str(e)
+
+    dest_manifest.retain((set(dest_entries) | source_names) - set(report.deleted))
+    dest_manifest.save(manifest_path)
+    return report
@@ -0,0 +1,198 @@
+"""
+app/domain/analyzer/analyze_cache.py
+Cache TTL/LRU des réponses `_analyze` d'Elasticsearch, indexé par
+(hash de la définition d'analyseur, hash du texte, version du cluster).
+Les requêtes identiques simultanées partagent un seul appel à ES.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from elasticsearch import AsyncElasticsearch
+from loguru import logger
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+# Métriques Prometheus
+ANALYZE_CACHE_REQUESTS = Counter(
+    "analyzer_analyze_cache_requests_total",
+    "Appels `_analyze` par issue du cache (hit, miss, coalesced, bypass)", ["result"])
+ANALYZE_DURATION = Histogram(
+    "analyzer_analyze_duration_seconds",
+    "Durée d'un appel `_analyze` vu de l'application, selon l'issue du cache", ["result"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5])
+
+# La version du cluster n'est relue qu'au plus toutes les VERSION_TTL secondes
+VERSION_TTL = 300.0
+# Après un échec de `info()`, pas de nouvel essai avant VERSION_FAILURE_TTL secondes (cache contourné)
+VERSION_FAILURE_TTL = 10.0
+
+Key = Tuple[str, str, str]
+
+
+def _sha256(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def analyze_key(body: Dict[str, Any], cluster_version: str) -> Key:
+    """Clé du cache : la définition (tout le corps sauf le texte), le texte et la version du cluster."""
+    definition = {k: v for k, v in body.items() if k != "text"}
+    text = body.get("text")
+    return (
+        _sha256(json.dumps(definition, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str)),
+        _sha256(text if isinstance(text, str) else json.dumps(text, ensure_ascii=False)),
+        cluster_version,
+    )
+
+
+class AnalyzeCache:
+    """
+    Cache LRU borné avec expiration (TTL) des réponses `_analyze`. Une requête
+    déjà en cours pour la même clé est attendue au lieu d'être relancée ; une
+    erreur n'est jamais mise en cache. Prévu pour une seule boucle asyncio.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Key, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _lookup(self, key: Key) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Key, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: Key, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Réponse en cache, sinon résultat de `fetch()` partagé avec les appels identiques simultanés."""
+        start = time.perf_counter()
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            self._observe("hit", start)
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                # shield : l'annulation d'un appelant n'annule pas l'appel partagé
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # L'appelant d'origine a été annulé : on relance l'appel
+                return await self.get_or_fetch(key, fetch)
+            self._observe("coalesced", start)
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Récupère l'exception si personne n'attendait ce future
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._put(key, value)
+        finally:
+            self._in_flight.pop(key, None)
+        self._observe("miss", start)
+        return value
+
+    @staticmethod
+    def _observe(result: str, start: float) -> None:
+        ANALYZE_CACHE_REQUESTS.labels(result).inc()
+        ANALYZE_DURATION.labels(result).observe(time.perf_counter() - start)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+analyze_cache = AnalyzeCache(settings.ANALYZE_CACHE_SIZE, settings.ANALYZE_CACHE_TTL)
+
+# Version du cluster par client : (expiration, version ou None après un échec)
+_cluster_versions: Dict[int, Tuple[float, Optional[str]]] = {}
+
+
+async def cluster_version(es_client: AsyncElasticsearch) -> Optional[str]:
+    """Version du cluster (relue au plus toutes les VERSION_TTL secondes), None si indisponible."""
+    cached = _cluster_versions.get(id(es_client))
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    try:
+        info = await es_client.info()
+        version = str(info["version"]["number"])
+    except Exception as e:
+        logger.debug(f"Version du cluster indisponible, cache `_analyze` ignoré : {e}")
+        # ES dégradé : l'échec est mémorisé, sans aller-retour `info()` supplémentaire par appel
+        _cluster_versions[id(es_client)] = (time.monotonic() + VERSION_FAILURE_TTL, None)
+        return None
+    _cluster_versions[id(es_client)] = (time.monotonic() + VERSION_TTL, version)
+    return version
+
+
+class _CachedIndices:
+    def __init__(self, es_client: AsyncElasticsearch, cache: AnalyzeCache):
+        self._es_client = es_client
+        self._cache = cache
+
+    async def analyze(self, body: Dict[str, Any]) -> Any:
+        version = await cluster_version(self._es_client)
+        if version is None:
+            ANALYZE_CACHE_REQUESTS.labels("bypass").inc()
+            return await self._es_client.indices.analyze(body=body)
+        return await self._cache.get_or_fetch(
+            analyze_key(body, version), lambda: self._es_client.indices.analyze(body=body))
+
+
+class CachedAnalyzeClient:
+    """
+    Client exposant `indices.analyze(body=...)` comme AsyncElasticsearch, servi
+    par le cache `_analyze`. Les réponses sont partagées : à ne pas modifier.
+    """
+
+    def __init__(self, es_client: AsyncElasticsearch, cache: AnalyzeCache = analyze_cache):
+        self.indices = _CachedIndices(es_client, cache)
+
+
+def with_analyze_cache(es_client: AsyncElasticsearch, cache: AnalyzeCache = analyze_cache):
+    """Client `_analyze` avec cache, ou le client tel quel si le cache est désactivé."""
+    return CachedAnalyzeClient(es_client, cache) if cache.enabled else es_client
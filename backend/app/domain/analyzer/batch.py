@@ -0,0 +1,151 @@
+"""
+app/domain/analyzer/batch.py
+Analyse d'un lot de textes avec un même graphe : définition convertie une seule
+fois, appels `_analyze` en parallèle (concurrence bornée), résultats en flux.
+"""
+import asyncio
+import json
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from elasticsearch import AsyncElasticsearch
+
+from app.domain.analyzer.local import LocalAnalyzer
+from app.domain.analyzer.metrics import ANALYZER_CALL_SECONDS
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import convert_graph_to_es_analyzer
+
+TOKEN_KEYS = ("token", "start_offset", "end_offset", "type", "position", "positionLength")
+
+
+def _clean_token(token: Dict[str, Any]) -> Dict[str, Any]:
+    # La réponse explain ajoute bytes, termFrequency, keyword... : format `_analyze` seul
+    return {k: token[k] for k in TOKEN_KEYS if k in token}
+
+
+def _stages(detail: Dict[str, Any]) -> List[tuple]:
+    """Étapes (nom, tokens) d'une réponse explain : tokenizer puis chaque filtre."""
+    stages = [(detail["tokenizer"]["name"], detail["tokenizer"]["tokens"])]
+    stages += [(f["name"], f["tokens"]) for f in detail.get("tokenfilters", [])]
+    return stages
+
+
+class BatchStats:
+    """Fréquence des tokens finaux et nombre de tokens produits par étape."""
+
+    def __init__(self):
+        self.texts = 0
+        self.errors = 0
+        self.tokens = 0
+        self.token_frequency: Counter = Counter()
+        self.stage_names: List[str] = []
+        self.stage_tokens: List[int] = []
+
+    def add(self, stage_counts: List[tuple], final_tokens: List[Dict[str, Any]]) -> None:
+        self.texts += 1
+        self.tokens += len(final_tokens)
+        self.token_frequency.update(t["token"] for t in final_tokens)
+        if not self.stage_names:
+            # Noms uniques même si un filtre apparaît deux fois dans la chaîne
+            seen: Counter = Counter()
+            for name, _ in stage_counts:
+                seen[name] += 1
+                self.stage_names.append(name if seen[name] == 1 else f"{name}#{seen[name]}")
+            self.stage_tokens = [0] * len(stage_counts)
+        for i, (_, count) in enumerate(stage_counts):
+            self.stage_tokens[i] += count
+
+    def to_dict(self, top_n: int) -> Dict[str, Any]:
+        analyzed = self.texts or 1
+        return {
+            "texts": self.texts,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "distinct_tokens": len(self.token_frequency),
+            "token_frequency": [[t, n] for t, n in self.token_frequency.most_common(top_n)],
+            "stages": [
+                {"name": name, "tokens": total, "mean_per_text": round(total / analyzed, 3)}
+                for name, total in zip(self.stage_names, self.stage_tokens)
+            ],
+        }
+
+
+class BatchAnalyzer:
+    """
+    Analyse de nombreux textes avec un même graphe. La définition d'analyseur
+    est calculée une fois ; les textes sont envoyés à Elasticsearch (ou au
+    moteur local) avec au plus `concurrency` appels en cours, et les résultats
+    sont restitués dans l'ordre des textes.
+    """
+
+    def __init__(
+            self,
+            definition: Dict[str, Any],
+            es_client: Optional[AsyncElasticsearch] = None,
+            concurrency: int = 8,
+            with_stats: bool = True,
+    ):
+        self.definition = definition
+        self.es_client = es_client
+        # Moteur local compilé une seule fois pour tout le lot
+        self.local = LocalAnalyzer(definition) if es_client is None else None
+        self.concurrency = max(1, concurrency)
+        self.with_stats = with_stats
+        self.stats = BatchStats()
+        self._call_seconds = ANALYZER_CALL_SECONDS.labels("batch", "es" if self.local is None else "local")
+
+    @classmethod
+    def from_graph(cls, graph: AnalyzerGraph, es_client: Optional[AsyncElasticsearch] = None,
+                   **kwargs: Any) -> "BatchAnalyzer":
+        """`es_client=None` sélectionne le moteur local."""
+        return cls(convert_graph_to_es_analyzer(graph), es_client, **kwargs)
+
+    async def _analyze(self, text: str) -> Dict[str, Any]:
+        if self.local is not None:
+            if self.with_stats:
+                return {"detail": await asyncio.to_thread(self.local.explain, text)}
+            tokens = await asyncio.to_thread(self.local.analyze, text)
+            return {"tokens": [t.to_dict() for t in tokens]}
+        body = {"text": text, **self.definition}
+        if self.with_stats:
+            body["explain"] = True
+        return await self.es_client.indices.analyze(body=body)
+
+    async def _analyze_one(self, index: int, text: str) -> Dict[str, Any]:
+        try:
+            with self._call_seconds.time():
+                response = await self._analyze(text)
+            # Réponse inattendue (explain incomplet...) : erreur de l'élément, le flux continue
+            if not self.with_stats:
+                return {"index": index, "tokens": [_clean_token(t) for t in response.get("tokens", [])]}
+            stages = _stages(response["detail"])
+            final = [_clean_token(t) for t in stages[-1][1]]
+        except Exception as e:
+            self.stats.errors += 1
+            return {"index": index, "error": str(e) or e.__class__.__name__}
+        self.stats.add([(name, len(tokens)) for name, tokens in stages], final)
+        return {"index": index, "tokens": final}
+
+    async def iter_results(self, texts: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Résultat de chaque texte, dans l'ordre, avec une fenêtre d'appels en cours bornée."""
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            for i, text in enumerate(texts):
+                pending.append(asyncio.ensure_future(self._analyze_one(i, text)))
+                if len(pending) >= self.concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # Client déconnecté : on n'attend pas les appels restants
+            for task in pending:
+                task.cancel()
+
+    async def iter_ndjson(self, texts: List[str], top_n: int = 50) -> AsyncIterator[str]:
+        """Une ligne JSON par texte, puis une ligne `summary` avec les statistiques du lot."""
+        async for result in self.iter_results(texts):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        summary = self.stats.to_dict(top_n)
+        if not self.with_stats:
+            summary = {"texts": len(texts) - self.stats.errors, "errors": self.stats.errors}
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
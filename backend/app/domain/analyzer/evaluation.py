@@ -0,0 +1,241 @@
+"""
+app/domain/analyzer/evaluation.py
+Évaluation A/B de deux analyseurs sur un échantillon de documents et une liste
+de requêtes, sans réindexation Elasticsearch : analyse locale des documents
+(en parallèle), index inversé en mémoire, classement BM25, recouvrement des
+termes et distribution du nombre de tokens.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ResourceNotFoundError
+from app.domain.analyzer.local import LocalAnalyzer
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import convert_graph_to_es_analyzer
+from app.domain.user.models import User
+
+# Paramètres BM25 par défaut de Lucene / Elasticsearch
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _analyze_chunk(definition: Dict[str, Any], texts: List[str]) -> List[List[str]]:
+    """
+    Termes de chaque texte d'un lot. Fonction de module pour pouvoir être
+    exécutée dans un ProcessPoolExecutor (l'analyseur est construit par lot).
+    """
+    analyzer = LocalAnalyzer(definition)
+    return [[t.token for t in analyzer.analyze(text)] for text in texts]
+
+
+def tokenize_documents(
+        definitions: Sequence[Dict[str, Any]],
+        texts: List[str],
+        workers: Optional[int] = None,
+        min_chunk: int = 500,
+) -> List[List[List[str]]]:
+    """
+    Termes des documents pour chaque définition d'analyseur. Les documents sont
+    découpés en lots d'au moins `min_chunk` textes répartis sur `workers`
+    processus ; un seul lot est analysé sur place.
+    """
+    # Vérifie les définitions avant de lancer les processus (composant non émulé...)
+    for definition in definitions:
+        LocalAnalyzer(definition)
+    workers = max(1, workers or os.cpu_count() or 1)
+    size = max(min_chunk, math.ceil(len(texts) / workers)) or 1
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    if workers == 1 or len(chunks) <= 1:
+        return [_analyze_chunk(d, texts) for d in definitions]
+    # Lancé via un thread du serveur : spawn plutôt que fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks) * len(definitions)), mp_context=context) as pool:
+        futures = [[pool.submit(_analyze_chunk, d, chunk) for chunk in chunks] for d in definitions]
+        return [[terms for f in per_def for terms in f.result()] for per_def in futures]
+
+
+class InvertedIndex:
+    """Index inversé en mémoire (terme -> {document: fréquence}) avec classement BM25."""
+
+    def __init__(self, documents: List[List[str]], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_lengths = [len(terms) for terms in documents]
+        for doc, terms in enumerate(documents):
+            for term, tf in Counter(terms).items():
+                self.postings[term][doc] = tf
+        self.doc_count = len(documents)
+        self.avg_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+
+    @property
+    def vocabulary(self) -> set:
+        return set(self.postings)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query_terms: List[str], top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Documents contenant au moins un terme, triés par score BM25 décroissant (puis par rang)."""
+        scores: Dict[int, float] = defaultdict(float)
+        avg = self.avg_length or 1.0
+        for term, qtf in Counter(query_terms).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avg)
+                scores[doc] += qtf * idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k] if top_k is not None else ranked
+
+
+def token_distribution(documents: List[List[str]]) -> Dict[str, Any]:
+    """Distribution du nombre de tokens par document."""
+    counts = sorted(len(terms) for terms in documents)
+    if not counts:
+        return {"documents": 0, "tokens": 0, "distinct_terms": 0}
+
+    def percentile(p: float) -> int:
+        return counts[min(len(counts) - 1, int(p * len(counts)))]
+
+    return {
+        "documents": len(counts),
+        "tokens": sum(counts),
+        "distinct_terms": len({t for terms in documents for t in terms}),
+        "min": counts[0],
+        "mean": round(sum(counts) / len(counts), 3),
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+        "p99": percentile(0.99),
+        "max": counts[-1],
+        "empty_documents": sum(1 for c in counts if c == 0),
+    }
+
+
+def _jaccard(a: set, b: set) -> float:
+    return round(len(a & b) / len(a | b), 4) if a or b else 1.0
+
+
+class RelevanceEvaluator:
+    """
+    Compare deux analyseurs (A et B) : chaque document et chaque requête est
+    analysé par les deux, puis recherché dans l'index BM25 de l'analyseur.
+    Sans jugements, le nombre de documents trouvés sert d'indicateur de rappel ;
+    avec des documents pertinents par requête, le rappel@k est calculé.
+    """
+
+    def __init__(self, definition_a: Dict[str, Any], definition_b: Dict[str, Any],
+                 top_k: int = 10, workers: Optional[int] = None):
+        self.definitions = {"a": definition_a, "b": definition_b}
+        self.top_k = top_k
+        self.workers = workers
+
+    def run(self, documents: List[str], queries: List[Dict[str, Any]], min_chunk: int = 500) -> Dict[str, Any]:
+        """
+        `queries` : liste de {"text": ..., "relevant": [rangs de documents] (optionnel)}.
+        Retourne les résultats par analyseur, par requête et un résumé comparatif.
+        """
+        doc_terms = dict(zip(self.definitions, tokenize_documents(
+            list(self.definitions.values()), documents, self.workers, min_chunk)))
+        indexes = {name: InvertedIndex(terms) for name, terms in doc_terms.items()}
+        query_terms = dict(zip(self.definitions, tokenize_documents(
+            list(self.definitions.values()), [q["text"] for q in queries], workers=1)))
+
+        per_query = []
+        for i, query in enumerate(queries):
+            relevant = set(query.get("relevant") or [])
+            entry: Dict[str, Any] = {"query": query["text"]}
+            top = {}
+            for name, index in indexes.items():
+                terms = query_terms[name][i]
+                ranked = index.search(terms)
+                top[name] = [doc for doc, _ in ranked[:self.top_k]]
+                result = {
+                    "terms": terms,
+                    "matched": len(ranked),
+                    "top": [{"doc": doc, "score": round(score, 4)} for doc, score in ranked[:self.top_k]],
+                }
+                if relevant:
+                    result["recall_at_k"] = round(len(relevant & set(top[name])) / len(relevant), 4)
+                entry[name] = result
+            entry["top_overlap"] = _jaccard(set(top["a"]), set(top["b"]))
+            per_query.append(entry)
+
+        return {
+            "analyzers": {
+                name: {"tokens": token_distribution(terms)} for name, terms in doc_terms.items()
+            },
+            "vocabulary_overlap": _jaccard(indexes["a"].vocabulary, indexes["b"].vocabulary),
+            "queries": per_query,
+            "summary": self._summary(per_query),
+        }
+
+    def _summary(self, per_query: List[Dict[str, Any]]) -> Dict[str, Any]:
+        n = len(per_query) or 1
+        summary: Dict[str, Any] = {"queries": len(per_query)}
+        for name in self.definitions:
+            results = [q[name] for q in per_query]
+            judged = [r["recall_at_k"] for r in results if "recall_at_k" in r]
+            summary[name] = {
+                "mean_matched": round(sum(r["matched"] for r in results) / n, 3),
+                "zero_hit_queries": sum(1 for r in results if r["matched"] == 0),
+                **({"mean_recall_at_k": round(sum(judged) / len(judged), 4)} if judged else {}),
+            }
+        summary["mean_top_overlap"] = round(sum(q["top_overlap"] for q in per_query) / n, 4)
+        # Rappel@k si des jugements sont fournis, sinon nombre moyen de documents trouvés
+        metric = "mean_recall_at_k" if "mean_recall_at_k" in summary["a"] else "mean_matched"
+        a, b = summary["a"][metric], summary["b"][metric]
+        summary["better_recall"] = "a" if a > b else "b" if b > a else None
+        summary["compared_on"] = metric
+        return summary
+
+
+def sample_column(rows: Iterable[Dict[str, Any]], column: str, size: int) -> List[str]:
+    """Les `size` premières valeurs non vides d'une colonne, converties en texte."""
+    values = (row.get(column) for row in rows)
+    return list(islice((str(v) for v in values if v not in (None, "")), size))
+
+
+async def evaluate_file(
+        db: AsyncSession,
+        user: User,
+        file_id: uuid.UUID,
+        column: str,
+        graph_a: AnalyzerGraph,
+        graph_b: AnalyzerGraph,
+        queries: List[Dict[str, Any]],
+        sample_size: int,
+        top_k: int = 10,
+        workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Évaluation A/B sur un échantillon (les premières valeurs non vides) d'une colonne d'un fichier stocké."""
+    from app.domain.file.readers import get_stored_path, iter_file_rows
+    from app.domain.file.services import FileService
+
+    file = await FileService().get_owned_by_user(db, file_id, user)
+    path = get_stored_path(file)
+    if not path.exists():
+        raise ResourceNotFoundError("Fichier physique introuvable.")
+
+    evaluator = RelevanceEvaluator(
+        convert_graph_to_es_analyzer(graph_a), convert_graph_to_es_analyzer(graph_b), top_k, workers)
+
+    def run() -> Dict[str, Any]:
+        documents = sample_column(iter_file_rows(path), column, sample_size)
+        if not documents:
+            raise ValueError(f"La colonne '{column}' est absente ou vide dans le fichier.")
+        return {"file_id": str(file_id), "column": column, **evaluator.run(documents, queries)}
+
+    return await asyncio.to_thread(run)
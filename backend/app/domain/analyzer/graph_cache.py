@@ -0,0 +1,97 @@
+"""
+app/domain/analyzer/graph_cache.py
+Cache LRU des résultats de validation et des définitions `_analyze` converties,
+indexé par un hash canonique du graphe (nœuds, arêtes, paramètres).
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.domain.analyzer.models import AnalyzerGraph
+
+_MISSING = object()
+
+
+def graph_hash(graph: AnalyzerGraph) -> str:
+    """
+    SHA-256 de la forme canonique du graphe. Seuls comptent les champs lus par
+    la validation et la conversion : les données d'UI (label, meta, catégorie)
+    et l'identité du graphe n'entrent pas dans le hash. L'ordre des listes est
+    conservé car il détermine le parcours du chemin.
+    """
+    canonical = {
+        "nodes": [[n.id, n.kind.value, n.name, n.params or {}] for n in graph.nodes],
+        "edges": [[e.id, e.source, e.target] for e in graph.edges],
+    }
+    data = json.dumps(canonical, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class GraphCache:
+    """
+    Cache LRU par hash de graphe. Chaque entrée garde le résultat de la
+    validation (None si valide, message d'erreur sinon) et la définition
+    d'analyseur convertie. Les valeurs mises en cache sont copiées en sortie :
+    les appelants peuvent les modifier sans altérer le cache.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, kind: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Valeur en cache pour (kind, key), calculée et mémorisée à la première demande."""
+        with self._lock:
+            value = self._entries.get((kind, key), _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end((kind, key))
+                self.hits += 1
+                return copy.deepcopy(value)
+            self.misses += 1
+        value = compute()
+        self._put((kind, key), value)
+        return copy.deepcopy(value)
+
+    def _put(self, key: Tuple[str, str], value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """À appeler quand la registry change : les résultats en dépendent."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+graph_cache = GraphCache(settings.ANALYZER_GRAPH_CACHE_SIZE)
+
+
+def cached_validation(graph: AnalyzerGraph, validate: Callable[[AnalyzerGraph], None],
+                      key: Optional[str] = None) -> Optional[str]:
+    """Message d'erreur de validation du graphe (None s'il est valide), mis en cache."""
+
+    def compute() -> Optional[str]:
+        try:
+            validate(graph)
+            return None
+        except ValueError as e:
+            return str(e)
+
+    return graph_cache.get_or_compute("validation", key or graph_hash(graph), compute)
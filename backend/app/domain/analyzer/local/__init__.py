@@ -0,0 +1,15 @@
+"""
+app/domain/analyzer/local
+Moteur d'analyse local : émule `_analyze` pour les tokenizers et filtres courants,
+sans appel à Elasticsearch.
+"""
+from . import char_filters, token_filters, tokenizers  # noqa: F401  (enregistrement des composants)
+from .base import (
+    CHAR_FILTERS, TOKEN_FILTERS, TOKENIZERS, LocalAnalysisError, Token, UnsupportedComponentError,
+)
+from .engine import LocalAnalyzer, LocalESClient, analyze
+
+__all__ = [
+    "CHAR_FILTERS", "TOKEN_FILTERS", "TOKENIZERS", "LocalAnalysisError", "LocalAnalyzer",
+    "LocalESClient", "Token", "UnsupportedComponentError", "analyze",
+]
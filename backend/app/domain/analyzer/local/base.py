@@ -0,0 +1,193 @@
+"""
+app/domain/analyzer/local/base.py
+Types communs du moteur d'analyse local : tokens, erreurs, registres de composants.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class LocalAnalysisError(ValueError):
+    """Configuration d'analyse invalide (équivalent d'une erreur 400 d'Elasticsearch)."""
+
+
+class UnsupportedComponentError(LocalAnalysisError):
+    """Composant ou option non émulé localement : l'analyse doit passer par Elasticsearch."""
+
+
+@dataclass
+class Token:
+    """Token au format de l'API `_analyze`."""
+    token: str
+    start_offset: int
+    end_offset: int
+    type: str
+    position: int
+    position_length: int = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "token": self.token,
+            "start_offset": self.start_offset,
+            "end_offset": self.end_offset,
+            "type": self.type,
+            "position": self.position,
+        }
+        if self.position_length != 1:
+            out["positionLength"] = self.position_length
+        return out
+
+
+class CharMap:
+    """
+    Texte produit par un char filter, avec pour chaque caractère de sortie
+    l'intervalle [start, end) du texte d'entrée dont il provient.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def keep(self, text: str, offset: int) -> None:
+        """Recopie `text` (situé à `offset` dans l'entrée) sans modification."""
+        self.parts.append(text)
+        self.starts.extend(range(offset, offset + len(text)))
+        self.ends.extend(range(offset + 1, offset + len(text) + 1))
+
+    def replace(self, text: str, start: int, end: int) -> None:
+        """Remplace l'intervalle [start, end) de l'entrée par `text`."""
+        self.parts.append(text)
+        self.starts.extend([start] * len(text))
+        self.ends.extend([end] * len(text))
+
+    def result(self) -> Tuple[str, List[int], List[int]]:
+        return "".join(self.parts), self.starts, self.ends
+
+
+# Signatures des composants
+CharFilterFn = Callable[[str], Tuple[str, List[int], List[int]]]
+TokenizerFn = Callable[[str], List[Token]]
+TokenFilterFn = Callable[[List[Token]], List[Token]]
+
+CHAR_FILTERS: Dict[str, Callable[[Dict[str, Any]], CharFilterFn]] = {}
+TOKENIZERS: Dict[str, Callable[[Dict[str, Any]], TokenizerFn]] = {}
+TOKEN_FILTERS: Dict[str, Callable[[Dict[str, Any]], TokenFilterFn]] = {}
+
+
+def _register(registry: Dict[str, Callable], *names: str):
+    def decorator(factory):
+        for name in names:
+            registry[name] = factory
+        return factory
+    return decorator
+
+
+def char_filter(*names: str):
+    return _register(CHAR_FILTERS, *names)
+
+
+def tokenizer(*names: str):
+    return _register(TOKENIZERS, *names)
+
+
+def token_filter(*names: str):
+    return _register(TOKEN_FILTERS, *names)
+
+
+# --- Lecture des paramètres (valeurs éventuellement transmises en chaîne) ---
+
+def param_int(params: Dict[str, Any], name: str, default: int) -> int:
+    value = params.get(name, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise LocalAnalysisError(f"Paramètre [{name}] invalide : {value!r}")
+
+
+def param_bool(params: Dict[str, Any], name: str, default: bool) -> bool:
+    value = params.get(name, default)
+    if isinstance(value, str):
+        if value.lower() not in ("true", "false"):
+            raise LocalAnalysisError(f"Paramètre [{name}] invalide : {value!r}")
+        return value.lower() == "true"
+    return bool(value)
+
+
+def param_list(params: Dict[str, Any], name: str, default: Optional[List[str]] = None) -> List[str]:
+    """Liste de chaînes ; une chaîne seule est une liste d'un élément (comme ES)."""
+    value = params.get(name, default)
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value]
+
+
+# Espaces au sens de Character.isWhitespace (hors espaces insécables)
+JAVA_WHITESPACE = frozenset(
+    "\t\n\u000b\f\r\u001c\u001d\u001e\u001f \u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2008\u2009\u200a\u2028\u2029\u205f\u3000"
+)
+
+
+# --- Expressions régulières Java ---
+
+_JAVA_FLAGS = {
+    "CASE_INSENSITIVE": re.IGNORECASE,
+    "MULTILINE": re.MULTILINE,
+    "DOTALL": re.DOTALL,
+    "COMMENTS": re.VERBOSE,
+    "UNICODE_CASE": 0,
+    "UNICODE_CHARACTER_CLASS": 0,
+}
+
+
+def compile_java_regex(pattern: str, flags: Optional[str] = None) -> "re.Pattern[str]":
+    """
+    Compile une regex Java (syntaxe java.util.regex). Comme en Java, \\w, \\d,
+    \\s et \\b sont ASCII sauf avec le flag UNICODE_CHARACTER_CLASS.
+    """
+    names = [f.strip() for f in (flags or "").split("|") if f.strip()]
+    re_flags = 0
+    for name in names:
+        if name not in _JAVA_FLAGS:
+            raise UnsupportedComponentError(f"Flag regex non émulé : {name}")
+        re_flags |= _JAVA_FLAGS[name]
+    if "UNICODE_CHARACTER_CLASS" not in names:
+        re_flags |= re.ASCII
+    try:
+        return re.compile(pattern, re_flags)
+    except re.error as e:
+        # Syntaxe Java non supportée par `re` (\p{L}, classes imbriquées...)
+        raise UnsupportedComponentError(f"Regex non émulable localement : {e}")
+
+
+def java_replacement(replacement: str) -> Callable[["re.Match[str]"], str]:
+    """Convertit une chaîne de remplacement Java ($1, ${nom}, \\$) en fonction de remplacement."""
+    parts: List[Any] = []
+    literal: List[str] = []
+    i = 0
+    while i < len(replacement):
+        c = replacement[i]
+        if c == "\\" and i + 1 < len(replacement):
+            literal.append(replacement[i + 1])
+            i += 2
+            continue
+        if c == "$":
+            m = re.match(r"\{(\w+)\}|(\d)", replacement[i + 1:])
+            if not m:
+                raise LocalAnalysisError(f"Référence de groupe invalide dans [{replacement}]")
+            parts.append("".join(literal))
+            literal = []
+            parts.append(m.group(1) or int(m.group(2)))
+            i += 1 + m.end()
+            continue
+        literal.append(c)
+        i += 1
+    parts.append("".join(literal))
+
+    def expand(match: "re.Match[str]") -> str:
+        return "".join(p if isinstance(p, str) else (match.group(p) or "") for p in parts)
+
+    return expand
@@ -0,0 +1,151 @@
+"""
+app/domain/analyzer/local/char_filters.py
+Char filters émulés : html_strip, mapping, pattern_replace.
+"""
+import html
+import re
+from typing import Any, Dict, List
+
+from .base import (
+    CharFilterFn, CharMap, LocalAnalysisError, UnsupportedComponentError,
+    char_filter, compile_java_regex, java_replacement, param_list,
+)
+
+# Éléments de type bloc remplacés par un saut de ligne (comme HTMLStripCharFilter)
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "caption", "center", "dd", "dir", "div",
+    "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hgroup", "hr", "isindex", "li", "main", "menu", "nav", "noframes",
+    "noscript", "ol", "p", "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead",
+    "title", "tr", "ul",
+})
+
+_HTML_TOKEN = re.compile(
+    r"<!--.*?-->"
+    r"|<!\[CDATA\[(?P<cdata>.*?)\]\]>"
+    r"|<(?P<skip>script|style)\b[^>]*>.*?</(?P=skip)\s*>"
+    r"|<[!?][^>]*>"
+    r"|<(?P<close>/?)(?P<tag>[A-Za-z][A-Za-z0-9:_-]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>"
+    r"|&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);?",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+@char_filter("html_strip")
+def html_strip(params: Dict[str, Any]) -> CharFilterFn:
+    escaped = {t.lower() for t in param_list(params, "escaped_tags")}
+
+    def apply(text: str):
+        out = CharMap()
+        pos = 0
+        for m in _HTML_TOKEN.finditer(text):
+            out.keep(text[pos:m.start()], pos)
+            pos = m.end()
+            raw = m.group(0)
+            if raw.startswith("&"):
+                decoded = html.unescape(raw)
+                if decoded != raw:
+                    out.replace(decoded, m.start(), m.end())
+                else:
+                    out.keep(raw, m.start())
+            elif m.group("cdata") is not None:
+                out.keep(m.group("cdata"), m.start("cdata"))
+            elif m.group("tag"):
+                tag = m.group("tag").lower()
+                if tag in escaped:
+                    out.keep(raw, m.start())
+                elif tag in _BLOCK_TAGS:
+                    out.replace("\n", m.start(), m.end())
+            # commentaires, script/style, doctype : supprimés
+        out.keep(text[pos:], pos)
+        return out.result()
+
+    return apply
+
+
+_ESCAPES = {"\\": "\\", "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "\"": "\"", "'": "'"}
+
+
+def _unescape_rule(value: str) -> str:
+    """Déséchappe une règle de mapping (\\n, \\t, \\uXXXX...)."""
+    out, i = [], 0
+    while i < len(value):
+        c = value[i]
+        if c == "\\" and i + 1 < len(value):
+            nxt = value[i + 1]
+            if nxt == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", value[i + 2:i + 6]):
+                out.append(chr(int(value[i + 2:i + 6], 16)))
+                i += 6
+                continue
+            if nxt not in _ESCAPES:
+                raise LocalAnalysisError(f"Séquence d'échappement invalide dans [{value}]")
+            out.append(_ESCAPES[nxt])
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def parse_mapping_rules(rules: List[str]) -> Dict[str, str]:
+    """Analyse des règles `clé => valeur` (syntaxe du char filter mapping)."""
+    mapping: Dict[str, str] = {}
+    for rule in rules:
+        m = re.fullmatch(r"\s*(.+?)\s*=>\s*(.*?)\s*", rule, re.DOTALL)
+        if not m:
+            raise LocalAnalysisError(f"Règle de mapping invalide : [{rule}]")
+        key = _unescape_rule(m.group(1))
+        if not key:
+            raise LocalAnalysisError(f"Règle de mapping invalide : [{rule}]")
+        mapping[key] = _unescape_rule(m.group(2))
+    return mapping
+
+
+@char_filter("mapping")
+def mapping_filter(params: Dict[str, Any]) -> CharFilterFn:
+    if params.get("mappings_path"):
+        raise UnsupportedComponentError("mappings_path n'est pas lu par le moteur local")
+    rules = parse_mapping_rules(param_list(params, "mappings"))
+    if not rules:
+        raise LocalAnalysisError("mapping requires either `mappings` or `mappings_path` to be configured")
+    lengths = sorted({len(k) for k in rules}, reverse=True)
+
+    def apply(text: str):
+        out = CharMap()
+        i, kept = 0, 0
+        while i < len(text):
+            # Correspondance la plus longue à la position courante
+            for n in lengths:
+                key = text[i:i + n]
+                if key in rules:
+                    out.keep(text[kept:i], kept)
+                    out.replace(rules[key], i, i + n)
+                    i += n
+                    kept = i
+                    break
+            else:
+                i += 1
+        out.keep(text[kept:], kept)
+        return out.result()
+
+    return apply
+
+
+@char_filter("pattern_replace")
+def pattern_replace(params: Dict[str, Any]) -> CharFilterFn:
+    if "pattern" not in params:
+        raise LocalAnalysisError("pattern is missing for [pattern_replace] char filter")
+    pattern = compile_java_regex(params["pattern"], params.get("flags"))
+    expand = java_replacement(params.get("replacement") or "")
+
+    def apply(text: str):
+        out = CharMap()
+        pos = 0
+        for m in pattern.finditer(text):
+            out.keep(text[pos:m.start()], pos)
+            out.replace(expand(m), m.start(), m.end())
+            pos = m.end()
+        out.keep(text[pos:], pos)
+        return out.result()
+
+    return apply
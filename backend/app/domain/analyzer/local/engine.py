@@ -0,0 +1,215 @@
+"""
+app/domain/analyzer/local/engine.py
+Exécution locale d'une définition d'analyseur au format de l'API `_analyze`.
+"""
+import dataclasses
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.domain.analyzer.metrics import ANALYZER_STEP_SECONDS
+
+from .base import (
+    CHAR_FILTERS, TOKEN_FILTERS, TOKENIZERS, CharFilterFn, LocalAnalysisError, Token,
+    TokenFilterFn, TokenizerFn, UnsupportedComponentError,
+)
+
+# Écarts entre les valeurs d'un tableau `text` (positions et offsets)
+POSITION_INCREMENT_GAP = 100
+OFFSET_GAP = 1
+
+# Analyseurs prédéfinis émulés : nom -> définition custom équivalente
+BUILTIN_ANALYZERS: Dict[str, Dict[str, Any]] = {
+    "standard": {"tokenizer": "standard", "filter": ["lowercase"]},
+    "simple": {"tokenizer": "lowercase"},
+    "whitespace": {"tokenizer": "whitespace"},
+    "keyword": {"tokenizer": "keyword"},
+    "stop": {"tokenizer": "lowercase", "filter": ["stop"]},
+}
+
+ComponentSpec = Union[str, Dict[str, Any]]
+
+# Durée par étape, mesurée seulement en mode explain (debug, statistiques de lot)
+_STEP_SECONDS = {kind: ANALYZER_STEP_SECONDS.labels(kind, "local")
+                 for kind in ("char_filter", "tokenizer", "token_filter")}
+
+
+def _build(registry: Dict[str, Any], kind: str, spec: ComponentSpec) -> Tuple[str, Any]:
+    """Instancie un composant nommé (`"lowercase"`) ou anonyme (`{"type": ...}`)."""
+    if isinstance(spec, str):
+        name, params, label = spec, {}, spec
+    else:
+        name = spec.get("type")
+        if not name:
+            raise LocalAnalysisError(f"{kind} sans [type] : {spec}")
+        params = {k: v for k, v in spec.items() if k != "type"}
+        label = f"__anonymous__{name}"
+    factory = registry.get(name)
+    if factory is None:
+        raise UnsupportedComponentError(f"{kind} [{name}] non émulé localement")
+    return label, factory(params)
+
+
+def _compose(prev: Tuple[List[int], List[int]], starts: List[int], ends: List[int]):
+    """Ramène les correspondances d'un char filter aux offsets du texte d'origine."""
+    p_starts, p_ends = prev
+
+    def start_of(i: int) -> int:
+        return p_starts[i] if i < len(p_starts) else (p_ends[-1] if p_ends else 0)
+
+    def end_of(i: int) -> int:
+        return p_ends[i - 1] if i > 0 else (p_starts[0] if p_starts else 0)
+
+    return [start_of(s) for s in starts], [end_of(e) for e in ends]
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+Stage = Tuple[str, List[Token]]
+
+
+class LocalAnalyzer:
+    """Chaîne char filters -> tokenizer -> token filters, compilée une fois et réutilisable."""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.builtin: Optional[str] = None
+        if "analyzer" in definition:
+            name = definition["analyzer"]
+            if not isinstance(name, str) or name not in BUILTIN_ANALYZERS:
+                raise UnsupportedComponentError(f"Analyseur [{name}] non émulé localement")
+            self.builtin = name
+            definition = BUILTIN_ANALYZERS[name]
+        for unsupported in ("normalizer", "field", "index"):
+            if definition.get(unsupported):
+                raise UnsupportedComponentError(f"Option [{unsupported}] non émulée (nécessite un index)")
+
+        self.char_filters: List[Tuple[str, CharFilterFn]] = [
+            _build(CHAR_FILTERS, "char_filter", spec) for spec in _as_list(definition.get("char_filter"))
+        ]
+        self.tokenizer: Tuple[str, TokenizerFn] = _build(
+            TOKENIZERS, "tokenizer", definition.get("tokenizer") or "standard"
+        )
+        self.filters: List[Tuple[str, TokenFilterFn]] = [
+            _build(TOKEN_FILTERS, "filter", spec) for spec in _as_list(definition.get("filter"))
+        ]
+
+    def _run(self, text: str, explain: bool) -> Tuple[List[Tuple[str, str]], List[Stage]]:
+        """
+        Analyse une valeur. Retourne les textes produits par les char filters et
+        les étapes à tokens (tokenizer puis chaque filtre) ; sans `explain`, seule
+        la dernière étape est conservée.
+        """
+        filtered_texts: List[Tuple[str, str]] = []
+        filtered = text
+        mapping: Optional[Tuple[List[int], List[int]]] = None
+        for name, fn in self.char_filters:
+            start = perf_counter()
+            filtered, starts, ends = fn(filtered)
+            mapping = (starts, ends) if mapping is None else _compose(mapping, starts, ends)
+            filtered_texts.append((name, filtered))
+            if explain:
+                _STEP_SECONDS["char_filter"].observe(perf_counter() - start)
+
+        start = perf_counter()
+        tokens = self.tokenizer[1](filtered)
+        if mapping is not None:
+            starts, ends = mapping
+            for t in tokens:
+                t.start_offset = starts[t.start_offset] if t.start_offset < len(starts) else len(text)
+                t.end_offset = ends[t.end_offset - 1] if t.end_offset > 0 else t.start_offset
+
+        if explain:
+            _STEP_SECONDS["tokenizer"].observe(perf_counter() - start)
+
+        stages: List[Stage] = [(self.tokenizer[0], tokens)]
+        for name, fn in self.filters:
+            # Les filtres peuvent modifier les tokens en place : copie pour la trace
+            source = [dataclasses.replace(t) for t in tokens] if explain else tokens
+            start = perf_counter()
+            tokens = fn(source)
+            stages.append((name, tokens))
+            if explain:
+                _STEP_SECONDS["token_filter"].observe(perf_counter() - start)
+        return filtered_texts, stages if explain else stages[-1:]
+
+    def _run_many(self, texts: List[str], explain: bool) -> Tuple[List[Tuple[str, str]], List[Stage]]:
+        """Analyse plusieurs valeurs comme un champ multi-valué (écarts de position et d'offset)."""
+        filtered_texts: List[Tuple[str, str]] = []
+        merged: List[Stage] = []
+        position_base: List[int] = []
+        offset_base = 0
+        for i, text in enumerate(texts):
+            filtered, stages = self._run(text, explain)
+            filtered_texts.extend(filtered)
+            if i == 0:
+                merged = [(name, list(tokens)) for name, tokens in stages]
+                position_base = [0] * len(stages)
+            for k, (_, tokens) in enumerate(stages):
+                if i > 0:
+                    for t in tokens:
+                        t.position += position_base[k]
+                        t.start_offset += offset_base
+                        t.end_offset += offset_base
+                    merged[k][1].extend(tokens)
+                if tokens:
+                    position_base[k] = tokens[-1].position + POSITION_INCREMENT_GAP + 1
+            offset_base += len(text) + OFFSET_GAP
+        return filtered_texts, merged
+
+    def analyze(self, text: Union[str, List[str]]) -> List[Token]:
+        """Tokens finaux d'une valeur (ou d'un tableau de valeurs)."""
+        texts = text if isinstance(text, list) else [text]
+        return self._run_many(texts, explain=False)[1][-1][1]
+
+    def explain(self, text: Union[str, List[str]]) -> Dict[str, Any]:
+        """Détail par composant, au format de la réponse `explain` d'Elasticsearch."""
+        texts = text if isinstance(text, list) else [text]
+        filtered_texts, stages = self._run_many(texts, explain=True)
+        if self.builtin:
+            return {
+                "custom_analyzer": False,
+                "analyzer": {"name": self.builtin, "tokens": [t.to_dict() for t in stages[-1][1]]},
+            }
+        charfilters: Dict[str, List[str]] = {}
+        for name, filtered in filtered_texts:
+            charfilters.setdefault(name, []).append(filtered)
+        return {
+            "custom_analyzer": True,
+            "charfilters": [{"name": n, "filtered_text": v} for n, v in charfilters.items()],
+            "tokenizer": {"name": stages[0][0], "tokens": [t.to_dict() for t in stages[0][1]]},
+            "tokenfilters": [
+                {"name": name, "tokens": [t.to_dict() for t in tokens]} for name, tokens in stages[1:]
+            ],
+        }
+
+
+def analyze(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Équivalent local de `POST _analyze` : même corps de requête, même forme de
+    réponse (`tokens`, ou `detail` avec `explain: true`).
+    """
+    texts = [str(t) for t in _as_list(body.get("text"))]
+    if not texts:
+        raise LocalAnalysisError("text is missing")
+    analyzer = LocalAnalyzer(body)
+    if body.get("explain"):
+        return {"detail": analyzer.explain(texts)}
+    return {"tokens": [t.to_dict() for t in analyzer.analyze(texts)]}
+
+
+class _LocalIndices:
+    async def analyze(self, body: Dict[str, Any] = None, **kwargs: Any) -> Dict[str, Any]:
+        return analyze(body if body is not None else kwargs)
+
+
+class LocalESClient:
+    """
+    Client minimal exposant `indices.analyze` comme AsyncElasticsearch, pour
+    réutiliser les services d'analyse sans cluster.
+    """
+
+    def __init__(self):
+        self.indices = _LocalIndices()
@@ -0,0 +1,185 @@
+"""
+app/domain/analyzer/local/stemmers.py
+Stemmers émulés : Porter (english), minimal_english, possessive_english, minimal_french.
+"""
+from typing import Callable, Dict
+
+_VOWELS = frozenset("aeiou")
+
+
+class PorterStemmer:
+    """Algorithme de Porter (version de référence, utilisée par PorterStemFilter)."""
+
+    def _cons(self, w: str, i: int) -> bool:
+        if w[i] in _VOWELS:
+            return False
+        if w[i] == "y":
+            return i == 0 or not self._cons(w, i - 1)
+        return True
+
+    def _m(self, stem: str) -> int:
+        """Nombre de séquences voyelles-consonnes (VC) du radical."""
+        n, i, size = 0, 0, len(stem)
+        while i < size and self._cons(stem, i):
+            i += 1
+        while i < size:
+            while i < size and not self._cons(stem, i):
+                i += 1
+            if i >= size:
+                break
+            while i < size and self._cons(stem, i):
+                i += 1
+            n += 1
+        return n
+
+    def _has_vowel(self, stem: str) -> bool:
+        return any(not self._cons(stem, i) for i in range(len(stem)))
+
+    def _double_cons(self, w: str) -> bool:
+        return len(w) >= 2 and w[-1] == w[-2] and self._cons(w, len(w) - 1)
+
+    def _cvc(self, w: str) -> bool:
+        if len(w) < 3:
+            return False
+        if not self._cons(w, len(w) - 1) or self._cons(w, len(w) - 2) or not self._cons(w, len(w) - 3):
+            return False
+        return w[-1] not in "wxy"
+
+    def _replace(self, w: str, suffix: str, repl: str, min_m: int) -> tuple:
+        """Remplace `suffix` si le radical a une mesure > min_m ; retourne (mot, suffixe trouvé)."""
+        if not w.endswith(suffix):
+            return w, False
+        stem = w[:len(w) - len(suffix)]
+        if self._m(stem) > min_m:
+            return stem + repl, True
+        return w, True
+
+    def _step1ab(self, w: str) -> str:
+        if w.endswith("s"):
+            if w.endswith("sses"):
+                w = w[:-2]
+            elif w.endswith("ies"):
+                w = w[:-2]
+            elif not w.endswith("ss"):
+                w = w[:-1]
+        if w.endswith("eed"):
+            if self._m(w[:-3]) > 0:
+                w = w[:-1]
+            return w
+        for suffix in ("ed", "ing"):
+            if w.endswith(suffix) and self._has_vowel(w[:-len(suffix)]):
+                w = w[:-len(suffix)]
+                if w.endswith(("at", "bl", "iz")):
+                    return w + "e"
+                if self._double_cons(w):
+                    return w if w[-1] in "lsz" else w[:-1]
+                if self._m(w) == 1 and self._cvc(w):
+                    return w + "e"
+                return w
+        return w
+
+    def _step1c(self, w: str) -> str:
+        if w.endswith("y") and self._has_vowel(w[:-1]):
+            return w[:-1] + "i"
+        return w
+
+    _STEP2 = (
+        ("ational", "ate"), ("tional", "tion"), ("enci", "ence"), ("anci", "ance"), ("izer", "ize"),
+        ("bli", "ble"), ("alli", "al"), ("entli", "ent"), ("eli", "e"), ("ousli", "ous"),
+        ("ization", "ize"), ("ation", "ate"), ("ator", "ate"), ("alism", "al"), ("iveness", "ive"),
+        ("fulness", "ful"), ("ousness", "ous"), ("aliti", "al"), ("iviti", "ive"), ("biliti", "ble"),
+        ("logi", "log"),
+    )
+    _STEP3 = (
+        ("icate", "ic"), ("ative", ""), ("alize", "al"), ("iciti", "ic"), ("ical", "ic"),
+        ("ful", ""), ("ness", ""),
+    )
+    _STEP4 = (
+        "al", "ance", "ence", "er", "ic", "able", "ible", "ant", "ement", "ment", "ent",
+        "ion", "ou", "ism", "ate", "iti", "ous", "ive", "ize",
+    )
+
+    def _longest_rule(self, w: str, rules) -> str:
+        # Règle au suffixe le plus long (les règles sont disjointes par fin de mot)
+        for suffix, repl in sorted(rules, key=lambda r: -len(r[0])):
+            if w.endswith(suffix):
+                return self._replace(w, suffix, repl, 0)[0]
+        return w
+
+    def _step4(self, w: str) -> str:
+        for suffix in sorted(self._STEP4, key=len, reverse=True):
+            if not w.endswith(suffix):
+                continue
+            stem = w[:len(w) - len(suffix)]
+            if suffix == "ion" and not stem.endswith(("s", "t")):
+                return w
+            return stem if self._m(stem) > 1 else w
+        return w
+
+    def _step5(self, w: str) -> str:
+        if w.endswith("e"):
+            m = self._m(w[:-1])
+            if m > 1 or (m == 1 and not self._cvc(w[:-1])):
+                w = w[:-1]
+        if w.endswith("ll") and self._m(w) > 1:
+            w = w[:-1]
+        return w
+
+    def stem(self, word: str) -> str:
+        if len(word) <= 2:
+            return word
+        w = self._step1ab(word)
+        w = self._step1c(w)
+        w = self._longest_rule(w, self._STEP2)
+        w = self._longest_rule(w, self._STEP3)
+        w = self._step4(w)
+        return self._step5(w)
+
+
+def minimal_english(word: str) -> str:
+    """EnglishMinimalStemmer : pluriels simples uniquement."""
+    n = len(word)
+    if n < 3 or word[-1] != "s":
+        return word
+    if word[-2] in "us":
+        return word
+    if word[-2] == "e":
+        if n > 3 and word[-3] == "i" and word[-4] not in "ae":
+            return word[:-3] + "y"
+        if word[-3] in "iaoe":
+            return word
+    return word[:-1]
+
+
+def possessive_english(word: str) -> str:
+    """EnglishPossessiveFilter : retire le 's final."""
+    if len(word) >= 2 and word[-1] in "sS" and word[-2] in "'’ʼ":
+        return word[:-2]
+    return word
+
+
+def minimal_french(word: str) -> str:
+    """FrenchMinimalStemmer : pluriels et féminins simples."""
+    if len(word) < 6:
+        return word
+    if word[-1] == "x":
+        if word[-3:-1] == "au":
+            return word[:-2] + "l"
+        return word[:-1]
+    for c in "sreé":
+        if word and word[-1] == c:
+            word = word[:-1]
+    if len(word) >= 2 and word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+_porter = PorterStemmer()
+
+STEMMERS: Dict[str, Callable[[str], str]] = {
+    "english": _porter.stem,
+    "porter": _porter.stem,
+    "minimal_english": minimal_english,
+    "possessive_english": possessive_english,
+    "minimal_french": minimal_french,
+}
@@ -0,0 +1,269 @@
+"""
+app/domain/analyzer/local/token_filters.py
+Token filters émulés : lowercase, uppercase, asciifolding, stop, trim, length,
+ngram, edge_ngram, shingle, stemmer.
+"""
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from .base import (
+    JAVA_WHITESPACE, LocalAnalysisError, Token, TokenFilterFn, UnsupportedComponentError,
+    param_bool, param_int, token_filter,
+)
+from .stemmers import STEMMERS
+
+# Limites par défaut des réglages d'index (index.max_ngram_diff, index.max_shingle_diff)
+MAX_NGRAM_DIFF = 1
+MAX_SHINGLE_DIFF = 3
+
+# Listes prédéfinies de Lucene
+STOPWORDS: Dict[str, frozenset] = {
+    "_none_": frozenset(),
+    "_english_": frozenset(
+        "a an and are as at be but by for if in into is it no not of on or such that the their "
+        "then there these they this to was will with".split()
+    ),
+    "_french_": frozenset(
+        "au aux avec ce ces dans de des du elle en et eux il je la le leur lui ma mais me même mes "
+        "moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton "
+        "tu un une vos votre vous c d j l à m n s t y été étée étées étés étant suis es est sommes "
+        "êtes sont serai seras sera serons serez seront serais serait serions seriez seraient étais "
+        "était étions étiez étaient fus fut fûmes fûtes furent sois soit soyons soyez soient fusse "
+        "fusses fût fussions fussiez fussent ayant eu eue eues eus ai as avons avez ont aurai auras "
+        "aura aurons aurez auront aurais aurait aurions auriez auraient avais avait avions aviez "
+        "avaient eut eûmes eûtes eurent aie aies ait ayons ayez aient eusse eusses eût eussions "
+        "eussiez eussent ceci cela celà cet cette ici ils les leurs quel quels quelle quelles sans soi".split()
+    ),
+}
+
+
+def _map_chars(text: str, fn) -> str:
+    # Conversion caractère par caractère (Character.toLowerCase ne change pas la longueur)
+    out = []
+    for c in text:
+        mapped = fn(c)
+        out.append(mapped if len(mapped) == 1 else c)
+    return "".join(out)
+
+
+@token_filter("lowercase")
+def lowercase(params: Dict[str, Any]) -> TokenFilterFn:
+    if params.get("language"):
+        raise UnsupportedComponentError(f"lowercase[language={params['language']}] non émulé")
+
+    def apply(tokens: List[Token]) -> List[Token]:
+        for t in tokens:
+            t.token = _map_chars(t.token, str.lower)
+        return tokens
+    return apply
+
+
+@token_filter("uppercase")
+def uppercase(params: Dict[str, Any]) -> TokenFilterFn:
+    def apply(tokens: List[Token]) -> List[Token]:
+        for t in tokens:
+            t.token = _map_chars(t.token, str.upper)
+        return tokens
+    return apply
+
+
+# Repliements de ASCIIFoldingFilter non couverts par la décomposition NFKD
+_FOLDING = {
+    "Æ": "AE", "æ": "ae", "Ø": "O", "ø": "o", "ß": "ss", "Œ": "OE", "œ": "oe", "Ł": "L", "ł": "l",
+    "Đ": "D", "đ": "d", "Ð": "D", "ð": "d", "Þ": "TH", "þ": "th", "Ħ": "H", "ħ": "h", "ı": "i",
+    "ĸ": "q", "Ŋ": "N", "ŋ": "n", "ſ": "s", "Ŧ": "T", "ŧ": "t", "ƒ": "f", "«": "\"", "»": "\"",
+    "‘": "'", "’": "'", "‚": "'", "‛": "'", "“": "\"", "”": "\"", "„": "\"", "‟": "\"",
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "−": "-", "¡": "!", "¿": "?",
+}
+
+
+def fold_to_ascii(text: str) -> str:
+    out = []
+    for c in text:
+        if ord(c) < 0x80:
+            out.append(c)
+        elif c in _FOLDING:
+            out.append(_FOLDING[c])
+        else:
+            base = "".join(ch for ch in unicodedata.normalize("NFKD", c) if not unicodedata.combining(ch))
+            out.append(base if base and base.isascii() else c)
+    return "".join(out)
+
+
+def _with_original(tokens: List[Token], fn, preserve: bool) -> List[Token]:
+    """Applique `fn` ; avec `preserve_original`, l'original suit le token transformé (même position)."""
+    out: List[Token] = []
+    for t in tokens:
+        value = fn(t.token)
+        out.append(Token(value, t.start_offset, t.end_offset, t.type, t.position, t.position_length))
+        if preserve and value != t.token:
+            out.append(t)
+    return out
+
+
+@token_filter("asciifolding")
+def asciifolding(params: Dict[str, Any]) -> TokenFilterFn:
+    preserve = param_bool(params, "preserve_original", False)
+    return lambda tokens: _with_original(tokens, fold_to_ascii, preserve)
+
+
+@token_filter("stop")
+def stop(params: Dict[str, Any]) -> TokenFilterFn:
+    if params.get("stopwords_path"):
+        raise UnsupportedComponentError("stopwords_path n'est pas lu par le moteur local")
+    ignore_case = param_bool(params, "ignore_case", False)
+    raw = params.get("stopwords", "_english_")
+    if isinstance(raw, str):
+        if raw.startswith("_"):
+            if raw not in STOPWORDS:
+                raise UnsupportedComponentError(f"Liste de stopwords non émulée : {raw}")
+            words = set(STOPWORDS[raw])
+        else:
+            words = {raw}
+    else:
+        words = {str(w) for w in raw}
+    if ignore_case:
+        words = {w.lower() for w in words}
+
+    def apply(tokens: List[Token]) -> List[Token]:
+        # Les positions d'origine sont conservées : un mot retiré laisse un trou
+        if ignore_case:
+            return [t for t in tokens if t.token.lower() not in words]
+        return [t for t in tokens if t.token not in words]
+    return apply
+
+
+@token_filter("trim")
+def trim(params: Dict[str, Any]) -> TokenFilterFn:
+    ws = "".join(JAVA_WHITESPACE)
+
+    def apply(tokens: List[Token]) -> List[Token]:
+        for t in tokens:
+            t.token = t.token.strip(ws)
+        return tokens
+    return apply
+
+
+@token_filter("length")
+def length(params: Dict[str, Any]) -> TokenFilterFn:
+    low = param_int(params, "min", 0)
+    high = param_int(params, "max", 2 ** 31 - 1)
+    if low > high:
+        raise LocalAnalysisError("minimum length must be less than or equal to maximum length")
+    return lambda tokens: [t for t in tokens if low <= len(t.token) <= high]
+
+
+def _gram_bounds(params: Dict[str, Any], filter_name: str, check_diff: bool) -> tuple:
+    low = param_int(params, "min_gram", 1)
+    high = param_int(params, "max_gram", 2)
+    if check_diff and high - low > MAX_NGRAM_DIFF:
+        raise LocalAnalysisError(
+            f"The difference between max_gram and min_gram in NGram Tokenizer must be less than or "
+            f"equal to: [{MAX_NGRAM_DIFF}] but was [{high - low}]. This limit can be set by changing "
+            f"the [index.max_ngram_diff] index level setting."
+        )
+    if low < 1 or low > high:
+        raise LocalAnalysisError(f"[{filter_name}] min_gram doit être >= 1 et <= max_gram")
+    return low, high
+
+
+def _grams(tokens: List[Token], low: int, high: int, preserve: bool, edge: bool) -> List[Token]:
+    out: List[Token] = []
+    for t in tokens:
+        text = t.token
+        starts = [0] if edge else range(len(text))
+        for start in starts:
+            for size in range(low, high + 1):
+                if start + size > len(text):
+                    break
+                out.append(Token(text[start:start + size], t.start_offset, t.end_offset, t.type, t.position))
+        # L'original n'est émis que s'il ne figure pas déjà parmi les grammes
+        if preserve and (len(text) < low or len(text) > high):
+            out.append(t)
+    return out
+
+
+@token_filter("ngram", "nGram")
+def ngram(params: Dict[str, Any]) -> TokenFilterFn:
+    low, high = _gram_bounds(params, "ngram", check_diff=True)
+    preserve = param_bool(params, "preserve_original", False)
+    return lambda tokens: _grams(tokens, low, high, preserve, edge=False)
+
+
+@token_filter("edge_ngram", "edgeNGram")
+def edge_ngram(params: Dict[str, Any]) -> TokenFilterFn:
+    if params.get("side", "front") != "front":
+        raise UnsupportedComponentError("edge_ngram[side=back] non émulé")
+    low, high = _gram_bounds(params, "edge_ngram", check_diff=False)
+    preserve = param_bool(params, "preserve_original", False)
+    return lambda tokens: _grams(tokens, low, high, preserve, edge=True)
+
+
+@token_filter("shingle")
+def shingle(params: Dict[str, Any]) -> TokenFilterFn:
+    low = param_int(params, "min_shingle_size", 2)
+    high = param_int(params, "max_shingle_size", 2)
+    if low < 2 or low > high:
+        raise LocalAnalysisError("min_shingle_size doit être >= 2 et <= max_shingle_size")
+    unigrams = param_bool(params, "output_unigrams", True)
+    diff = high - low + (1 if unigrams else 0)
+    if diff > MAX_SHINGLE_DIFF:
+        raise LocalAnalysisError(
+            f"In Shingle TokenFilter the difference between max_shingle_size and min_shingle_size "
+            f"(and +1 if outputting unigrams) must be less than or equal to: [{MAX_SHINGLE_DIFF}] but was "
+            f"[{diff}]. This limit can be set by changing the [index.max_shingle_diff] index level setting."
+        )
+    unigrams_if_none = param_bool(params, "output_unigrams_if_no_shingles", False)
+    sep = params.get("token_separator", " ")
+    filler = params.get("filler_token", "_")
+
+    def apply(tokens: List[Token]) -> List[Token]:
+        if not tokens:
+            return tokens
+        # Une entrée par position ; les trous (stopwords retirés) deviennent des fillers
+        slots: List[Optional[Token]] = [None] * (tokens[-1].position + 1)
+        for t in tokens:
+            if slots[t.position] is None:
+                slots[t.position] = t
+        out: List[Token] = []
+        made_shingle = False
+        for pos, first in enumerate(slots):
+            if first is not None and unigrams:
+                out.append(first)
+            for size in range(low, high + 1):
+                window = slots[pos:pos + size]
+                if len(window) < size or all(s is None for s in window):
+                    break
+                real = [s for s in window if s is not None]
+                text = sep.join(s.token if s is not None else filler for s in window)
+                start = first.start_offset if first is not None else real[0].start_offset
+                out.append(Token(text, start, real[-1].end_offset, "shingle", pos, size))
+                made_shingle = True
+        if not made_shingle and not unigrams and unigrams_if_none:
+            return tokens
+        return out
+    return apply
+
+
+def _stemmer_fn(language: str):
+    fn = STEMMERS.get(language)
+    if fn is None:
+        raise UnsupportedComponentError(f"Stemmer non émulé : {language}")
+    return fn
+
+
+@token_filter("stemmer")
+def stemmer(params: Dict[str, Any]) -> TokenFilterFn:
+    stem = _stemmer_fn(params.get("language") or params.get("name") or "english")
+
+    def apply(tokens: List[Token]) -> List[Token]:
+        for t in tokens:
+            t.token = stem(t.token)
+        return tokens
+    return apply
+
+
+@token_filter("porter_stem")
+def porter_stem(params: Dict[str, Any]) -> TokenFilterFn:
+    return stemmer({"language": "porter"})
+
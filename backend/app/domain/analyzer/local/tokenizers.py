@@ -0,0 +1,200 @@
+"""
+app/domain/analyzer/local/tokenizers.py
+Tokenizers émulés : standard (segmentation UAX#29 simplifiée), whitespace,
+keyword, pattern, letter et lowercase.
+"""
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from .base import (
+    JAVA_WHITESPACE, LocalAnalysisError, Token, TokenizerFn,
+    compile_java_regex, param_int, tokenizer,
+)
+
+# Classes de rupture de mot (UAX#29) utiles au tokenizer standard
+_MID_LETTER = frozenset(":··״‧︓﹕：")
+_MID_NUM = frozenset(",;;։،؍٬߸⁄︐︔﹐﹔，；")
+_MID_NUM_LET = frozenset(".'‘’․﹒＇．")
+
+LETTER, NUMERIC, EXTEND_NUM_LET, EXTEND, IDEOGRAPHIC, HIRAGANA, KATAKANA = range(7)
+
+
+def _word_class(c: str) -> Optional[int]:
+    cp = ord(c)
+    if 0x3040 <= cp <= 0x309F:
+        return HIRAGANA
+    if 0x30A0 <= cp <= 0x30FF or 0x31F0 <= cp <= 0x31FF or 0xFF66 <= cp <= 0xFF9D:
+        return KATAKANA
+    if 0x3400 <= cp <= 0x4DBF or 0x4E00 <= cp <= 0x9FFF or 0xF900 <= cp <= 0xFAFF or 0x20000 <= cp <= 0x2FA1F:
+        return IDEOGRAPHIC
+    cat = unicodedata.category(c)
+    if cat == "Nd":
+        return NUMERIC
+    if cat[0] == "L" or cat == "Nl":
+        return LETTER
+    if cat == "Pc":
+        return EXTEND_NUM_LET
+    if cat in ("Mn", "Mc", "Me", "Cf"):
+        return EXTEND
+    return None
+
+
+def _is_hangul(c: str) -> bool:
+    cp = ord(c)
+    return 0xAC00 <= cp <= 0xD7AF or 0x1100 <= cp <= 0x11FF or 0x3130 <= cp <= 0x318F
+
+
+def _split_long(tokens: List[Token], max_len: int) -> List[Token]:
+    """Découpe les tokens plus longs que `max_token_length` (comme Lucene)."""
+    out: List[Token] = []
+    for t in tokens:
+        if len(t.token) <= max_len:
+            t.position = len(out)
+            out.append(t)
+            continue
+        for i in range(0, len(t.token), max_len):
+            piece = t.token[i:i + max_len]
+            out.append(Token(piece, t.start_offset + i, t.start_offset + i + len(piece), t.type, len(out)))
+    return out
+
+
+def _standard_tokens(text: str) -> List[Token]:
+    classes = [_word_class(c) for c in text]
+    n = len(text)
+    tokens: List[Token] = []
+    i = 0
+    while i < n:
+        cls = classes[i]
+        if cls in (IDEOGRAPHIC, HIRAGANA):
+            # Un token par idéogramme / hiragana
+            j = i + 1
+            while j < n and classes[j] == EXTEND:
+                j += 1
+            kind = "<IDEOGRAPHIC>" if cls == IDEOGRAPHIC else "<HIRAGANA>"
+            tokens.append(Token(text[i:j], i, j, kind, len(tokens)))
+            i = j
+            continue
+        if cls not in (LETTER, NUMERIC, EXTEND_NUM_LET, KATAKANA):
+            i += 1
+            continue
+
+        start, j = i, i + 1
+        prev = cls
+        while j < n:
+            c, cur = text[j], classes[j]
+            if cur == EXTEND:
+                j += 1
+                continue
+            if cur in (LETTER, NUMERIC, EXTEND_NUM_LET) and prev != KATAKANA:
+                prev = cur
+                j += 1
+                continue
+            if cur in (KATAKANA, EXTEND_NUM_LET) and prev in (KATAKANA, EXTEND_NUM_LET):
+                prev = cur
+                j += 1
+                continue
+            # Ponctuation interne : lettre.lettre, chiffre,chiffre, l'apostrophe...
+            nxt = classes[j + 1] if j + 1 < n else None
+            if (
+                (prev == LETTER and nxt == LETTER and (c in _MID_LETTER or c in _MID_NUM_LET))
+                or (prev == NUMERIC and nxt == NUMERIC and (c in _MID_NUM or c in _MID_NUM_LET))
+            ):
+                prev = nxt
+                j += 2
+                continue
+            break
+
+        word = text[start:j]
+        word_classes = {classes[k] for k in range(start, j)}
+        if word_classes & {LETTER, NUMERIC, KATAKANA}:
+            if KATAKANA in word_classes:
+                kind = "<KATAKANA>"
+            elif LETTER not in word_classes:
+                kind = "<NUM>"
+            elif any(_is_hangul(ch) for ch in word):
+                kind = "<HANGUL>"
+            else:
+                kind = "<ALPHANUM>"
+            tokens.append(Token(word, start, j, kind, len(tokens)))
+        i = j
+    return tokens
+
+
+@tokenizer("standard")
+def standard(params: Dict[str, Any]) -> TokenizerFn:
+    max_len = param_int(params, "max_token_length", 255)
+    if max_len < 1 or max_len > 1024 * 1024:
+        raise LocalAnalysisError("maxTokenLength must be greater than 0 and less than 1048576")
+    return lambda text: _split_long(_standard_tokens(text), max_len)
+
+
+def _char_run_tokenizer(keep, max_len: int, lower: bool = False) -> TokenizerFn:
+    """Tokenizer par suites de caractères acceptés (modèle CharTokenizer de Lucene)."""
+
+    def apply(text: str) -> List[Token]:
+        tokens: List[Token] = []
+        start = None
+        for i, c in enumerate(text + "\0"):
+            if i < len(text) and keep(c):
+                if start is None:
+                    start = i
+                if i - start + 1 < max_len:
+                    continue
+                end = i + 1
+            elif start is None:
+                continue
+            else:
+                end = i
+            word = text[start:end]
+            tokens.append(Token(word.lower() if lower else word, start, end, "word", len(tokens)))
+            start = None
+        return tokens
+
+    return apply
+
+
+@tokenizer("whitespace")
+def whitespace(params: Dict[str, Any]) -> TokenizerFn:
+    max_len = param_int(params, "max_token_length", 255)
+    return _char_run_tokenizer(lambda c: c not in JAVA_WHITESPACE, max_len)
+
+
+@tokenizer("letter")
+def letter(params: Dict[str, Any]) -> TokenizerFn:
+    return _char_run_tokenizer(lambda c: unicodedata.category(c)[0] == "L", 255)
+
+
+@tokenizer("lowercase")
+def lowercase(params: Dict[str, Any]) -> TokenizerFn:
+    return _char_run_tokenizer(lambda c: unicodedata.category(c)[0] == "L", 255, lower=True)
+
+
+@tokenizer("keyword")
+def keyword(params: Dict[str, Any]) -> TokenizerFn:
+    def apply(text: str) -> List[Token]:
+        return [Token(text, 0, len(text), "word", 0)] if text else []
+    return apply
+
+
+@tokenizer("pattern")
+def pattern(params: Dict[str, Any]) -> TokenizerFn:
+    regex = compile_java_regex(params.get("pattern", r"\W+"), params.get("flags"))
+    group = param_int(params, "group", -1)
+
+    def apply(text: str) -> List[Token]:
+        tokens: List[Token] = []
+        if group >= 0:
+            for m in regex.finditer(text):
+                if m.group(group):
+                    tokens.append(Token(m.group(group), m.start(group), m.end(group), "word", len(tokens)))
+            return tokens
+        pos = 0
+        for m in regex.finditer(text):
+            if m.start() > pos:
+                tokens.append(Token(text[pos:m.start()], pos, m.start(), "word", len(tokens)))
+            pos = m.end()
+        if pos < len(text):
+            tokens.append(Token(text[pos:], pos, len(text), "word", len(tokens)))
+        return tokens
+
+    return apply
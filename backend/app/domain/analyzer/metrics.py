@@ -0,0 +1,44 @@
+"""
+app/domain/analyzer/metrics.py
+Métriques Prometheus du chemin analyseur (validation, appels d'analyse, étapes
+du pipeline) et journalisation de debug échantillonnée.
+"""
+import random
+from typing import Any
+
+from loguru import logger
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+_BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+
+ANALYZER_RULE_SECONDS = Histogram(
+    "analyzer_validation_rule_seconds", "Durée de chaque règle de validation du graphe", ["rule"], buckets=_BUCKETS)
+ANALYZER_RULE_FAILURES = Counter(
+    "analyzer_validation_failures_total", "Graphes rejetés, par règle de validation", ["rule"])
+ANALYZER_CALL_SECONDS = Histogram(
+    "analyzer_analyze_call_seconds",
+    "Durée des appels d'analyse (explain, prefix, tokens, batch) par moteur", ["call", "engine"], buckets=_BUCKETS)
+ANALYZER_STEP_SECONDS = Histogram(
+    "analyzer_pipeline_step_seconds",
+    "Durée par étape du pipeline (char_filter, tokenizer, token_filter) par moteur", ["kind", "engine"],
+    buckets=_BUCKETS)
+
+
+def engine_of(es_client: Any) -> str:
+    """Label `engine` d'un client `_analyze` : moteur local émulé ou Elasticsearch."""
+    from app.domain.analyzer.local import LocalESClient
+
+    return "local" if isinstance(es_client, LocalESClient) else "es"
+
+
+def sampled_debug(message: str, **fields: Any) -> None:
+    """
+    Log de debug structuré (champs liés via `bind`, sérialisés par le sink),
+    émis pour une fraction ANALYZER_DEBUG_LOG_SAMPLE_RATE des appels.
+    """
+    rate = settings.ANALYZER_DEBUG_LOG_SAMPLE_RATE
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    logger.bind(**fields).debug(message)
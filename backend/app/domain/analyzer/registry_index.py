@@ -0,0 +1,141 @@
+"""
+app/domain/analyzer/registry_index.py
+Index de la registry construit au chargement : paramètres indexés par nom avec
+leur convertisseur précompilé, et matrice dense tokenizer × token_filter.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Verdicts de la matrice de compatibilité
+COMPATIBLE = 0
+INCOMPATIBLE = 1          # token_filter explicitement à false
+NOT_LISTED_PARTIAL = 2    # non listé, règle "*": "partial"
+NOT_LISTED_FORBIDDEN = 3  # non listé, règle "*": false
+
+KIND_MAP = {
+    "tokenizer": "tokenizers",
+    "token_filter": "token_filters",
+    "char_filter": "char_filters",
+}
+
+
+def _to_int(value: Any) -> int:
+    return int(value)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _converter(param_def: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Convertisseur d'un paramètre selon son type déclaré (ou le type de son champ d'UI)."""
+    param_type = param_def.get("type")
+    field_type = (param_def.get("field") or {}).get("itemType")
+    if param_type == "integer" or field_type == "number":
+        return _to_int
+    if param_type == "boolean" or field_type == "checkbox":
+        return bool
+    return _identity
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    name: str
+    definition: Dict[str, Any]
+    mandatory: bool
+    _convert: Callable[[Any], Any]
+
+    def convert(self, value: Any) -> Any:
+        """Convertit (et donc valide) une valeur ; ValueError si elle ne correspond pas au type."""
+        try:
+            return self._convert(value)
+        except (ValueError, TypeError):
+            raise ValueError(
+                f"Impossible de convertir le paramètre '{self.name}' avec la valeur '{value}' vers le type attendu.")
+
+
+@dataclass(frozen=True)
+class ComponentIndex:
+    kind: str
+    name: str
+    definition: Dict[str, Any]
+    params: Dict[str, ParamSpec] = field(default_factory=dict)
+    mandatory: Tuple[str, ...] = ()
+
+    @property
+    def accepts_params(self) -> bool:
+        return bool(self.params)
+
+
+def index_component(kind: str, definition: Dict[str, Any]) -> ComponentIndex:
+    elements = (definition.get("params") or {}).get("elements") or []
+    params = {
+        p["name"]: ParamSpec(p["name"], p, bool(p.get("mandatory")), _converter(p))
+        for p in elements
+    }
+    return ComponentIndex(
+        kind=kind,
+        name=definition["name"],
+        definition=definition,
+        params=params,
+        mandatory=tuple(n for n, p in params.items() if p.mandatory),
+    )
+
+
+def compatibility_verdict(rules: Optional[Dict[str, Any]], token_filter: str) -> int:
+    """Verdict des règles d'un tokenizer pour un token_filter (même sémantique que la règle de validation)."""
+    if rules is None:
+        # Tokenizer sans règles : tout est permis
+        return COMPATIBLE
+    is_compatible = rules.get(token_filter)
+    if is_compatible is False:
+        return INCOMPATIBLE
+    wildcard = rules.get("*")
+    if wildcard == "partial" and is_compatible is not True:
+        return NOT_LISTED_PARTIAL
+    if wildcard is False and is_compatible is not True:
+        return NOT_LISTED_FORBIDDEN
+    return COMPATIBLE
+
+
+class CompatibilityMatrix:
+    """Matrice dense tokenizer × token_filter des verdicts de compatibilité, une ligne par tokenizer."""
+
+    def __init__(self, tokenizers: List[str], token_filters: List[str], rules: Dict[str, Dict[str, Any]]):
+        self.rules = rules
+        self.tokenizer_index = {name: i for i, name in enumerate(tokenizers)}
+        self.token_filter_index = {name: j for j, name in enumerate(token_filters)}
+        self.rows: List[bytearray] = [
+            bytearray(compatibility_verdict(rules.get(tok), tf) for tf in token_filters)
+            for tok in tokenizers
+        ]
+
+    def verdict(self, tokenizer: str, token_filter: str) -> int:
+        i = self.tokenizer_index.get(tokenizer)
+        j = self.token_filter_index.get(token_filter)
+        if i is None or j is None:
+            # Composant hors registry : évaluation directe des règles
+            return compatibility_verdict(self.rules.get(tokenizer), token_filter)
+        return self.rows[i][j]
+
+
+@dataclass(frozen=True)
+class RegistryIndex:
+    components: Dict[str, Dict[str, ComponentIndex]]
+    compatibility: CompatibilityMatrix
+
+    def get(self, kind: str, name: str) -> Optional[ComponentIndex]:
+        return self.components.get(KIND_MAP.get(kind, kind), {}).get(name)
+
+
+def build_index(definitions: Dict[str, Any]) -> RegistryIndex:
+    components = {
+        key: {name: index_component(key, d) for name, d in definitions.get(key, {}).items()}
+        for key in KIND_MAP.values()
+    }
+    matrix = CompatibilityMatrix(
+        list(definitions.get("tokenizers", {})),
+        list(definitions.get("token_filters", {})),
+        definitions.get("compatibility", {}),
+    )
+    return RegistryIndex(components, matrix)
@@ -1,10 +1,13 @@
 """ app/domain/analyzer/registry_loader.py """
 import json
-from math import log
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from loguru import logger
-from sqlalchemy import false
+
+from app.core.config import settings
+from app.domain.analyzer.graph_cache import graph_cache
+from app.domain.analyzer.registry_index import ComponentIndex, RegistryIndex, build_index
 
 
 class RegistryLoader:
@@ -12,9 +15,16 @@ class RegistryLoader:
     Singleton chargé de fournir toutes les définitions de composants
     (tokenizers, token_filters, char_filters) ainsi que les règles de compatibilité
     pour la validation d'un pipeline d'Analyzer Elasticsearch.
+
+    Au chargement, un index est construit (paramètres par nom avec convertisseurs
+    précompilés, matrice de compatibilité). Les fichiers JSON sont surveillés :
+    s'ils changent, la registry est rechargée sans redémarrer le processus.
     """
     _instance = None
     _definitions: Dict[str, Any] = {}
+    _index: Optional[RegistryIndex] = None
+    _signature: Tuple = ()
+    _checked_at: float = 0.0
 
     SHARED_PATH = Path(__file__).resolve().parent.parent.parent.parent.parent / "shared-contract" / "registry"
 
@@ -28,36 +38,78 @@ class RegistryLoader:
             cls._instance = super().__new__(cls)
             cls._instance._definitions = {}
             cls._instance._load_definitions()
+        else:
+            cls._instance.reload_if_changed()
         return cls._instance
 
+    def _files_signature(self) -> Tuple:
+        """Empreinte (nom, mtime, taille) des fichiers JSON de la registry."""
+        return tuple(
+            (p.name, st.st_mtime_ns, st.st_size)
+            for p in sorted(self.SHARED_PATH.glob("*.json"))
+            for st in (p.stat(),)
+        )
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """
+        Recharge la registry si un fichier JSON a changé (vérifié au plus une fois
+        par REGISTRY_RELOAD_INTERVAL secondes). En cas d'erreur de lecture, les
+        définitions précédentes restent en place. Retourne True si rechargée.
+        """
+        interval = settings.REGISTRY_RELOAD_INTERVAL
+        now = time.monotonic()
+        if not force and (interval <= 0 or now - self._checked_at < interval):
+            return False
+        self._checked_at = now
+        try:
+            signature = self._files_signature()
+        except OSError as e:
+            logger.warning(f"Registry illisible, définitions conservées: {e}")
+            return False
+        if not force and signature == self._signature:
+            return False
+        try:
+            self._load_definitions()
+        except RuntimeError as e:
+            # Fichier en cours d'écriture ou invalide : on garde la version chargée
+            self._signature = signature
+            logger.error(f"Rechargement de la registry ignoré: {e}")
+            return False
+        logger.info("Registry des composants rechargée")
+        return True
+
     def _load_definitions(self):
         """
-        Charge en mémoire les fichiers de définition nécessaires à la validation.
+        Charge en mémoire les fichiers de définition nécessaires à la validation,
+        construit l'index puis remplace l'état courant en une seule fois.
         """
         logger.debug("_load definitions")
+        signature = self._files_signature()
+        definitions: Dict[str, Any] = {}
         try:
             logger.debug("_es_analyzer_tokenizer.json")
             with open(self.SHARED_PATH / "_es_analyzer_tokenizer.json", encoding="utf-8") as f:
-                self._definitions["tokenizers"] = {item['name']: item for item in json.load(f)["tokenizers"]}
+                definitions["tokenizers"] = {item['name']: item for item in json.load(f)["tokenizers"]}
 
             logger.debug("_es_analyzer_token_filter.json")
             with open(self.SHARED_PATH / "_es_analyzer_token_filter.json", encoding="utf-8") as f:
-                self._definitions["token_filters"] = {item['name']: item for item in json.load(f)["token_filters"]}
+                definitions["token_filters"] = {item['name']: item for item in json.load(f)["token_filters"]}
             logger.debug("_es_analyzer_char_filter.json")
             with open(self.SHARED_PATH / "_es_analyzer_char_filter.json", encoding="utf-8") as f:
-                self._definitions["char_filters"] = {item['name']: item for item in json.load(f)["char_filters"]}
+                definitions["char_filters"] = {item['name']: item for item in json.load(f)["char_filters"]}
             logger.debug("_es_token_filter_compatibility.json")
             compat_path = self.SHARED_PATH / "_es_token_filter_compatibility.json"
             if compat_path.exists():
                 with open(compat_path, encoding="utf-8") as f:
-                    self._definitions["compatibility"] = {
+                    definitions["compatibility"] = {
                         item['tokenizer']: item['token_filters']
                         for item in json.load(f)["compatibility"]
                     }
             else:
-                self._definitions["compatibility"] = {}
+                definitions["compatibility"] = {}
 
-            logger.debug(f"tokenizers presents: {self._definitions['tokenizers'].keys()}")
+            logger.debug(f"tokenizers presents: {definitions['tokenizers'].keys()}")
+            index = build_index(definitions)
 
         except FileNotFoundError as e:
             logger.critical(f"Fichier de définition critique manquant: {e.filename}")
@@ -65,6 +117,13 @@ class RegistryLoader:
         except json.JSONDecodeError as e:
             logger.critical(f"Erreur de parsing JSON dans un fichier de définition: {e}")
             raise RuntimeError(f"Erreur de parsing JSON dans un fichier de définition: {e}") from e
+        except (KeyError, TypeError) as e:
+            logger.critical(f"Structure inattendue dans un fichier de définition: {e}")
+            raise RuntimeError(f"Structure inattendue dans un fichier de définition: {e}") from e
+
+        self._definitions, self._index, self._signature = definitions, index, signature
+        # Validations et conversions en cache dépendent de la registry
+        graph_cache.clear()
 
     def get_tokenizer(self, name: str) -> Optional[Dict[str, Any]]:
         """Obtenir un tokenizer par son nom."""
@@ -86,12 +145,16 @@ class RegistryLoader:
         """
         Obtenir un composant par son type et son nom.
         """
-        kind_map = {
-            "tokenizer": "tokenizers",
-            "token_filter": "token_filters",
-            "char_filter": "char_filters"
-        }
-        return self._definitions.get(kind_map.get(kind, kind), {}).get(name)
+        component = self._index.get(kind, name)
+        return component.definition if component else None
+
+    def get_index(self, kind: str, name: str) -> Optional[ComponentIndex]:
+        """Composant indexé (paramètres par nom, convertisseurs précompilés)."""
+        return self._index.get(kind, name)
+
+    def compatibility_verdict(self, tokenizer_name: str, token_filter_name: str) -> int:
+        """Verdict de la matrice de compatibilité (voir registry_index)."""
+        return self._index.compatibility.verdict(tokenizer_name, token_filter_name)
 
     # --- CORRECTION : MÉTHODE AJOUTÉE ---
     def validate_element_exists(self, kind: str, name: str) -> bool:
@@ -100,13 +163,13 @@ class RegistryLoader:
         """
         try:
             if not self.get_component(kind, name):
-                return false
+                return False
             return True
         except Exception as e:
             available_keys = self._definitions.keys()
             logger.error(f"error finding {e}")
             logger.debug(f"available keys:{available_keys}")
-            return false
+            return False
 
     @property
     def __dict__(self):
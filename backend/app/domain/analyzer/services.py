@@ -1,7 +1,10 @@
 """ app/domain/analyzer/services.py """
-import json
+import asyncio
 from typing import List, Dict, Any, Tuple, Optional
 from elasticsearch import AsyncElasticsearch
+from loguru import logger
+from app.domain.analyzer.graph_cache import graph_cache, graph_hash
+from app.domain.analyzer.metrics import ANALYZER_CALL_SECONDS, ANALYZER_STEP_SECONDS, engine_of, sampled_debug
 from app.domain.analyzer.models import AnalyzerGraph, Node, Kind
 from app.domain.analyzer.registry_loader import RegistryLoader
 
@@ -12,75 +15,157 @@ async def debug_analyzer_step_by_step(
     """
     Analyse un texte en suivant le graphe pas à pas et retourne ls résultats intermédiaires
     ainsi que le chemin de graphe valide.
+
+    Un seul appel `_analyze` avec `explain: true` fournit la sortie de chaque
+    étape. En cas d'échec (paramètre refusé par ES, graphe partiel...), on
+    retombe sur un appel par préfixe du pipeline, lancés en parallèle, pour
+    localiser l'étape fautive.
     """
-    results: List[Dict[str, Any]] = [{"step_name": "Input Text", "output": text}]
+    pipeline_nodes = _pipeline_nodes(graph)
+    try:
+        return await _debug_with_explain(graph, pipeline_nodes, text, es_client)
+    except Exception as e:
+        logger.debug(f"Analyse explain indisponible, repli sur les appels par étape : {e}")
+        return await _debug_with_prefix_calls(graph, pipeline_nodes, text, es_client)
 
-    node_map, edge_map = _build_lookup_maps(graph)
-    current_node: Optional[Node] = _find_start_node(graph)
 
-    pipeline_nodes: List[Node] = []
-    valid_path: Dict[str, List[str]] = {"nodes": [], "edges": []}
+async def analyze_text(graph: AnalyzerGraph, text: str, es_client: AsyncElasticsearch) -> List[Dict[str, Any]]:
+    """Flux de tokens final (positions et offsets) de l'analyseur décrit par le graphe."""
+    analyzer_definition = convert_graph_to_es_analyzer(graph)
+    with ANALYZER_CALL_SECONDS.labels("tokens", engine_of(es_client)).time():
+        response = await es_client.indices.analyze(body={"text": text, **analyzer_definition})
+    return response.get("tokens", [])
+
 
-    temp_node = current_node
+def _pipeline_nodes(graph: AnalyzerGraph) -> List[Node]:
+    """Nœuds du pipeline dans l'ordre, en suivant les arêtes depuis le nœud 'input'."""
+    node_map, edge_map = _build_lookup_maps(graph)
+    pipeline_nodes: List[Node] = []
+    temp_node: Optional[Node] = _find_start_node(graph)
     while temp_node:
         pipeline_nodes.append(temp_node)
         target_id = edge_map.get(temp_node.id)
-        # CORRECTION : 'break' sur sa propre ligne
         if not target_id:
             break
         temp_node = node_map.get(target_id)
+    return pipeline_nodes
+
+
+def _prefix_graph(graph: AnalyzerGraph, pipeline_nodes: List[Node], i: int) -> AnalyzerGraph:
+    """Sous-graphe limité aux i+1 premiers nœuds du pipeline (plus le nœud 'output')."""
+    sub_graph_nodes = pipeline_nodes[:i + 1]
+    output_node = next((n for n in graph.nodes if n.kind == Kind.output), None)
+    if output_node:
+        sub_graph_nodes.append(output_node)
+    ids = {n.id for n in sub_graph_nodes}
+    sub_graph_edges = [edge for edge in graph.edges if edge.source in ids and edge.target in ids]
+    return AnalyzerGraph(
+        nodes=sub_graph_nodes,
+        edges=sub_graph_edges,
+        id=graph.id,
+        name=graph.name,
+        version=graph.version,
+        settings=graph.settings
+    )
+
+
+async def _analyze_tokens(es_client: AsyncElasticsearch, text: str, analyzer_definition: Dict) -> List[str]:
+    with ANALYZER_CALL_SECONDS.labels("prefix", engine_of(es_client)).time():
+        response = await es_client.indices.analyze(body={"text": text, **analyzer_definition})
+    return [token_info['token'] for token_info in response.get("tokens", [])]
+
+
+def _step_name(node: Node) -> str:
+    return f"After '{node.name}' ({node.kind.value})"
+
+
+def _add_to_path(valid_path: Dict[str, List[str]], graph: AnalyzerGraph, node: Node) -> None:
+    valid_path["nodes"].append(node.id)
+    edge_to_node = next((e for e in graph.edges if e.target == node.id), None)
+    if edge_to_node and edge_to_node.id:
+        valid_path["edges"].append(edge_to_node.id)
+
 
+async def _debug_with_explain(
+        graph: AnalyzerGraph, pipeline_nodes: List[Node], text: str, es_client: AsyncElasticsearch
+) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """
+    Étapes tokenizer / token filters lues dans la réponse `explain`. Les étapes
+    en amont de la tokenisation (input, char_filter) sont tokenisées avec le
+    tokenizer standard : elles gardent leur appel par préfixe, lancé en
+    parallèle de l'appel principal, sauf si leur définition est celle du
+    tokenizer de l'analyseur complet.
+    """
+    analyzer_definition = convert_graph_to_es_analyzer(graph)
+    sampled_debug("Définition de l'analyseur", definition=analyzer_definition, graph_id=graph.id)
+    tokenizer_stage = {**analyzer_definition, "filter": []}
+
+    pre_steps: Dict[int, Dict] = {}
     for i, node in enumerate(pipeline_nodes):
-        if node.kind == 'input':
-            valid_path["nodes"].append(node.id)
-            continue
+        if node.kind in (Kind.input, Kind.char_filter):
+            prefix_definition = convert_graph_to_es_analyzer(_prefix_graph(graph, pipeline_nodes, i))
+            if prefix_definition != tokenizer_stage:
+                pre_steps[i] = prefix_definition
 
-        sub_graph_nodes = pipeline_nodes[:i + 1]
+    async def explain() -> Dict[str, Any]:
+        with ANALYZER_CALL_SECONDS.labels("explain", engine_of(es_client)).time():
+            return await es_client.indices.analyze(body={"text": text, **analyzer_definition, "explain": True})
 
-        output_node = next((n for n in graph.nodes if n.kind == 'output'), None)
-        if output_node:
-            sub_graph_nodes.append(output_node)
+    responses = await asyncio.gather(
+        explain(),
+        *(_analyze_tokens(es_client, text, d) for d in pre_steps.values()),
+    )
+    detail = responses[0]["detail"]
+    pre_tokens = dict(zip(pre_steps, responses[1:]))
 
-        sub_graph_edges = [
-            edge for edge in graph.edges
-            if edge.source in {n.id for n in sub_graph_nodes}
-               and edge.target in {n.id for n in sub_graph_nodes}
-        ]
+    def tokens_of(stage: Dict[str, Any]) -> List[str]:
+        return [t["token"] for t in stage.get("tokens", [])]
 
-        sub_graph = AnalyzerGraph(
-            nodes=sub_graph_nodes,
-            edges=sub_graph_edges,
-            id=graph.id,
-            name=graph.name,
-            version=graph.version,
-            settings=graph.settings
-        )
+    tokenizer_tokens = tokens_of(detail["tokenizer"])
+    filter_tokens = [tokens_of(f) for f in detail.get("tokenfilters", [])]
+    final_tokens = filter_tokens[-1] if filter_tokens else tokenizer_tokens
 
-        try:
-            analyzer_definition = convert_graph_to_es_analyzer(sub_graph)
+    results: List[Dict[str, Any]] = [{"step_name": "Input Text", "output": text}]
+    valid_path: Dict[str, List[str]] = {"nodes": [], "edges": []}
+    filter_idx = 0
+    for i, node in enumerate(pipeline_nodes):
+        if node.kind in (Kind.input, Kind.char_filter):
+            output = pre_tokens.get(i, tokenizer_tokens)
+        elif node.kind == Kind.tokenizer:
+            output = tokenizer_tokens
+        elif node.kind == Kind.token_filter:
+            output = filter_tokens[filter_idx]
+            filter_idx += 1
+        else:
+            output = final_tokens
+        results.append({"step_name": _step_name(node), "output": output})
+        _add_to_path(valid_path, graph, node)
+    return results, valid_path
 
-            print(f"--- Définition pour l'étape '{node.name}' ---")
-            print(json.dumps(analyzer_definition, indent=2, ensure_ascii=False))
-            print("--------------------------------------------------")
 
-            request_body = {"text": text, **analyzer_definition}
+async def _debug_with_prefix_calls(
+        graph: AnalyzerGraph, pipeline_nodes: List[Node], text: str, es_client: AsyncElasticsearch
+) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """Un appel `_analyze` par préfixe du pipeline (en parallèle), arrêt à la première étape en échec."""
 
-            response = await es_client.indices.analyze(body=request_body)
+    engine = engine_of(es_client)
 
-            tokens = [token_info['token'] for token_info in response.get("tokens", [])]
-            results.append({"step_name": f"After '{node.name}' ({node.kind.value})", "output": tokens})
+    async def analyze_prefix(i: int) -> List[str]:
+        analyzer_definition = convert_graph_to_es_analyzer(_prefix_graph(graph, pipeline_nodes, i))
+        with ANALYZER_STEP_SECONDS.labels(pipeline_nodes[i].kind.value, engine).time():
+            return await _analyze_tokens(es_client, text, analyzer_definition)
 
-            valid_path["nodes"].append(node.id)
-            edge_to_node = next((e for e in graph.edges if e.target == node.id), None)
-            if edge_to_node and edge_to_node.id:
-                valid_path["edges"].append(edge_to_node.id)
+    outputs = await asyncio.gather(*(analyze_prefix(i) for i in range(len(pipeline_nodes))), return_exceptions=True)
 
-        except Exception as e:
-            print(f"ERREUR lors de l'analyse à l'étape '{node.name}': {e}")
+    results: List[Dict[str, Any]] = [{"step_name": "Input Text", "output": text}]
+    valid_path: Dict[str, List[str]] = {"nodes": [], "edges": []}
+    for node, output in zip(pipeline_nodes, outputs):
+        if isinstance(output, Exception):
+            logger.warning(f"Erreur lors de l'analyse à l'étape '{node.name}': {output}")
             results.append({"step_name": f"Error at '{node.name}'", "output": ["Analysis failed at this step."]})
-            # CORRECTION : 'break' sur sa propre ligne
             break
-
+        results.append({"step_name": _step_name(node), "output": output})
+        _add_to_path(valid_path, graph, node)
     return results, valid_path
 
 
@@ -97,25 +182,16 @@ def _find_start_node(graph: AnalyzerGraph) -> Node:
         raise ValueError("Le graphe est invalide : il doit contenir un nœud 'input'.")
 
 
-def _convert_param_value(value: Any, param_def: Dict[str, Any]) -> Any:
-    param_type = param_def.get("type")
-    field_type = param_def.get("field", {}).get("itemType")
-
-    try:
-        if param_type == "integer" or field_type == "number":
-            return int(value)
-        if param_type == "boolean" or field_type == "checkbox":
-            return bool(value)
-        return value
-    except (ValueError, TypeError):
-        raise ValueError(
-            f"Impossible de convertir le paramètre '{param_def['name']}' avec la valeur '{value}' vers le type attendu.")
-
-
 def convert_graph_to_es_analyzer(graph: AnalyzerGraph) -> Dict:
     """
     Convertit le graphe en une définition d'analyseur valide pour l'API _analyze.
+    Le résultat est mis en cache par hash canonique du graphe.
     """
+    return graph_cache.get_or_compute("definition", graph_hash(graph), lambda: _convert_graph(graph))
+
+
+def _convert_graph(graph: AnalyzerGraph) -> Dict:
+    registry = RegistryLoader()
     node_map, edge_map = _build_lookup_maps(graph)
     current_node: Optional[Node] = _find_start_node(graph)
 
@@ -137,19 +213,17 @@ def convert_graph_to_es_analyzer(graph: AnalyzerGraph) -> Dict:
         node_name = next_node.name
 
         if next_node.params:
-            # Note: L'instanciation de RegistryLoader() à chaque fois n'est pas optimale,
-            # mais elle est fonctionnelle. La refactorisation l'a améliorée.
-            component_def = RegistryLoader().get_component(node_kind, node_name)
-            if not component_def or not component_def.get("params"):
+            component = registry.get_index(node_kind, node_name)
+            if not component or not component.definition.get("params"):
                 raise ValueError(f"Définition introuvable pour les paramètres de '{node_name}'.")
 
             converted_params = {}
             for param_name, param_value in next_node.params.items():
-                param_def = next((p for p in component_def["params"]["elements"] if p["name"] == param_name), None)
+                spec = component.params.get(param_name)
                 # CORRECTION : 'raise' sur sa propre ligne
-                if not param_def:
+                if not spec:
                     raise ValueError(f"Définition du paramètre '{param_name}' introuvable.")
-                converted_params[param_name] = _convert_param_value(param_value, param_def)
+                converted_params[param_name] = spec.convert(param_value)
 
             definition = {"type": node_name, **converted_params}
 
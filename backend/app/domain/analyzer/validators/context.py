@@ -0,0 +1,50 @@
+""" backend/app/domain/analyzer/validators/context.py """
+from functools import cached_property
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.domain.analyzer.models import AnalyzerGraph, Kind, Node
+from . import utils
+
+
+class GraphContext:
+    """
+    Analyse structurelle d'un graphe, calculée à la demande puis partagée entre
+    les règles de validation : table des nœuds, listes d'adjacence, chemin
+    principal 'input' -> 'output' et tokenizer de ce chemin.
+    """
+
+    def __init__(self, graph: AnalyzerGraph):
+        self.graph = graph
+
+    @cached_property
+    def node_map(self) -> Dict[str, Node]:
+        return {node.id: node for node in self.graph.nodes}
+
+    @cached_property
+    def adjacency(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        return utils.build_adjacency_maps(self.graph)
+
+    @property
+    def adj(self) -> Dict[str, List[str]]:
+        return self.adjacency[0]
+
+    @cached_property
+    def _path(self) -> Tuple[List[Node], Set[str]]:
+        # Une ValueError n'est pas mise en cache : chaque règle la relève
+        return utils.find_path_and_nodes(self.graph, node_map=self.node_map, adj=self.adj)
+
+    @property
+    def path_nodes(self) -> List[Node]:
+        return self._path[0]
+
+    @property
+    def path_ids(self) -> Set[str]:
+        return self._path[1]
+
+    @cached_property
+    def tokenizer(self) -> Optional[Node]:
+        return utils.find_tokenizer_on_path(self.path_nodes)
+
+    @cached_property
+    def token_filters(self) -> List[Node]:
+        return [n for n in self.path_nodes if n.kind == Kind.token_filter]
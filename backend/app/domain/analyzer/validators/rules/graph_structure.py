@@ -1,18 +1,22 @@
 """backend/app/services/validation/rules/graph_structure.py """
+from typing import Optional
+
 from app.domain.analyzer.models import AnalyzerGraph
 from app.domain.analyzer.registry_loader import RegistryLoader
-from app.domain.analyzer.validators import utils
+from app.domain.analyzer.validators.context import GraphContext
 
 
-def validate_graph_connectivity(graph: AnalyzerGraph, definitions: RegistryLoader):
+def validate_graph_connectivity(graph: AnalyzerGraph, definitions: RegistryLoader,
+                                ctx: Optional[GraphContext] = None):
     """
     Valide que tous les nœuds du graphe sont connectés au chemin principal.
 
     Un nœud orphelin (non connecté au chemin entre 'input' et 'output')
     est considéré comme une erreur de configuration.
     """
-    _, path_node_ids = utils.find_path_and_nodes(graph)
-    all_node_ids = {node.id for node in graph.nodes}
+    ctx = ctx or GraphContext(graph)
+    path_node_ids = ctx.path_ids
+    all_node_ids = set(ctx.node_map)
 
     if path_node_ids != all_node_ids:
         orphan_ids = all_node_ids - path_node_ids
@@ -20,13 +24,13 @@ def validate_graph_connectivity(graph: AnalyzerGraph, definitions: RegistryLoade
             f"Nœuds orphelins détectés. Tous les nœuds doivent être connectés au chemin principal. Nœuds non connectés : {', '.join(orphan_ids)}")
 
 
-def validate_acyclic(graph: AnalyzerGraph, definitions: RegistryLoader):
+def validate_acyclic(graph: AnalyzerGraph, definitions: RegistryLoader, ctx: Optional[GraphContext] = None):
     """
     Valide que le graphe est un Graphe Acyclique Dirigé (DAG).
 
     Utilise un algorithme de parcours en profondeur (DFS) pour détecter les cycles.
     """
-    adj, _ = utils.build_adjacency_maps(graph)
+    adj = (ctx or GraphContext(graph)).adj
     visiting = set()
     visited = set()
 
@@ -3,7 +3,7 @@ from app.domain.analyzer.models import AnalyzerGraph, Kind
 from app.domain.analyzer.registry_loader import RegistryLoader
 from loguru import logger
 
-def validate_all_node_params(graph: AnalyzerGraph, definitions: RegistryLoader):
+def validate_all_node_params(graph: AnalyzerGraph, definitions: RegistryLoader, ctx=None):
     """
     Valide les paramètres de chaque nœud du graphe à partir de la registry.
     """
@@ -11,31 +11,30 @@ def validate_all_node_params(graph: AnalyzerGraph, definitions: RegistryLoader):
         if node.kind in [Kind.input, Kind.output]:
             continue
 
-        definition = definitions.get_component(node.kind.value, node.name)
-        if not definition:
+        component = definitions.get_index(node.kind.value, node.name)
+        if not component:
             logger.error(f"Le composant '{node.name}' n'accepte aucun paramètre, mais en a reçu.")
             raise ValueError(f"Aucune définition trouvée pour {node.kind.value} '{node.name}'.")
 
         # Si le composant ne requiert aucun paramètre
-        if not definition.get("params") or not definition["params"].get("elements"):
+        if not component.accepts_params:
             if node.params:
                 logger.error(f"Le composant '{node.name}' n'accepte aucun paramètre, mais en a reçu.")
                 raise ValueError(f"Le composant '{node.name}' n'accepte aucun paramètre, mais en a reçu.")
             continue
 
-        defined_params = {p["name"]: p for p in definition["params"]["elements"]}
         received_params = node.params or {}
 
-        # Vérifier les paramètres inconnus
-        for param_name in received_params:
-            if param_name not in defined_params:
+        # Vérifier les paramètres inconnus et leur type (convertisseur précompilé)
+        for param_name, param_value in received_params.items():
+            spec = component.params.get(param_name)
+            if spec is None:
                 logger.error(f"Paramètre inconnu '{param_name}' pour le composant '{node.name}'.")
                 raise ValueError(f"Paramètre inconnu '{param_name}' pour le composant '{node.name}'.")
+            spec.convert(param_value)
 
         # Vérifier les paramètres obligatoires
-        for param_name, param_def in defined_params.items():
-            if param_def.get("mandatory") and param_name not in received_params:
+        for param_name in component.mandatory:
+            if param_name not in received_params:
                 logger.error(f"Paramètre obligatoire '{param_name}' manquant pour le composant '{node.name}'.")
                 raise ValueError(f"Paramètre obligatoire '{param_name}' manquant pour le composant '{node.name}'.")
-
-        logger.debug("validate all node ok")
@@ -1,10 +1,12 @@
 """ backend/app/services/validation/rules/sequence.py """
+from typing import Optional
+
 from app.domain.analyzer.models import AnalyzerGraph, Kind
 from app.domain.analyzer.registry_loader import RegistryLoader
-from app.domain.analyzer.validators import utils
+from app.domain.analyzer.validators.context import GraphContext
 
 
-def validate_node_sequence(graph: AnalyzerGraph, definitions: RegistryLoader):
+def validate_node_sequence(graph: AnalyzerGraph, definitions: RegistryLoader, ctx: Optional[GraphContext] = None):
     """
     Valide l'ordre séquentiel des types de nœuds dans le pipeline.
 
@@ -12,7 +14,7 @@ def validate_node_sequence(graph: AnalyzerGraph, definitions: RegistryLoader):
     - Les 'char_filter' ne peuvent apparaître qu'avant le 'tokenizer'.
     - Les 'token_filter' ne peuvent apparaître qu'après le 'tokenizer'.
     """
-    path_nodes, _ = utils.find_path_and_nodes(graph)
+    path_nodes = (ctx or GraphContext(graph)).path_nodes
 
     tokenizer_found = False
     for node in path_nodes:
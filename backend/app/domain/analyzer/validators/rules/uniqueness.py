@@ -5,7 +5,7 @@ from app.domain.analyzer.registry_loader import RegistryLoader
 from loguru import logger
 
 
-def validate_node_uniqueness(graph: AnalyzerGraph, definitions: RegistryLoader):
+def validate_node_uniqueness(graph: AnalyzerGraph, definitions: RegistryLoader, ctx=None):
     """
     Valide la présence et l'unicité des nœuds critiques.
 
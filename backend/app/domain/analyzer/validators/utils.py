@@ -13,14 +13,21 @@ def build_adjacency_maps(graph: AnalyzerGraph) -> Tuple[Dict[str, List[str]], Di
     return adj, rev_adj
 
 
-def find_path_and_nodes(graph: AnalyzerGraph) -> Tuple[List[Node], Set[str]]:
+def find_path_and_nodes(
+        graph: AnalyzerGraph,
+        node_map: Optional[Dict[str, Node]] = None,
+        adj: Optional[Dict[str, List[str]]] = None,
+) -> Tuple[List[Node], Set[str]]:
     """
     Trouve le chemin principal de 'input' à 'output' et retourne les nœuds
     qui le composent ainsi que l'ensemble de leurs IDs.
+    `node_map` et `adj` peuvent être fournis s'ils sont déjà calculés (GraphContext).
     Lève une ValueError si le chemin est invalide ou non trouvé.
     """
-    node_map = {node.id: node for node in graph.nodes}
-    adj, _ = build_adjacency_maps(graph)
+    if node_map is None:
+        node_map = {node.id: node for node in graph.nodes}
+    if adj is None:
+        adj, _ = build_adjacency_maps(graph)
 
     try:
         start_node = next(n for n in graph.nodes if n.kind == Kind.input)
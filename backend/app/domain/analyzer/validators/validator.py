@@ -1,8 +1,10 @@
 """ backend/app/services/validation/validator.py"""
+from app.domain.analyzer.graph_cache import cached_validation
+from app.domain.analyzer.metrics import ANALYZER_RULE_FAILURES, ANALYZER_RULE_SECONDS
 from app.domain.analyzer.models import AnalyzerGraph
 from app.domain.analyzer.registry_loader import RegistryLoader
+from .context import GraphContext
 from .registry import VALIDATION_RULES
-from loguru import logger
 
 
 class ValidationError(ValueError):
@@ -10,25 +12,40 @@ class ValidationError(ValueError):
     pass
 
 
-def validate_full_graph(graph: AnalyzerGraph):
+def validate_full_graph(graph: AnalyzerGraph, use_cache: bool = True):
     """
     Orchestre l'exécution de toutes les règles de validation sur le graphe.
 
     Cette fonction charge les définitions des composants (tokenizers, filtres, etc.)
     et exécute séquentiellement chaque règle de validation définie dans le registre.
     Si une règle échoue, une ValidationError est levée.
+
+    Le résultat est mis en cache par hash canonique du graphe : un graphe déjà
+    validé (ou déjà rejeté) n'est pas revalidé.
     """
-    logger.debug("try definitions load")
+    if use_cache:
+        error = cached_validation(graph, _run_rules)
+        if error is not None:
+            raise ValidationError(error)
+        return
     try:
-        # 1. Charger toutes les définitions et les règles de compatibilité
-        definitions = RegistryLoader()
-
-        # 2. Exécuter chaque règle enregistrée
-        for rule_func in VALIDATION_RULES:
-            logger.debug(f"validation: {rule_func.__name__}")
-            rule_func(graph, definitions)
-
+        _run_rules(graph)
     except ValueError as e:
-        # 3. Capter les erreurs de validation et les encapsuler
+        # Capter les erreurs de validation et les encapsuler
         # pour une gestion d'erreur uniforme dans l'API.
         raise ValidationError(str(e)) from e
+
+
+def _run_rules(graph: AnalyzerGraph) -> None:
+    # 1. Charger toutes les définitions et les règles de compatibilité
+    definitions = RegistryLoader()
+    # 2. Exécuter chaque règle enregistrée, avec un contexte (chemin, adjacence) commun
+    ctx = GraphContext(graph)
+    for rule_func in VALIDATION_RULES:
+        rule = rule_func.__name__
+        try:
+            with ANALYZER_RULE_SECONDS.labels(rule).time():
+                rule_func(graph, definitions, ctx)
+        except ValueError:
+            ANALYZER_RULE_FAILURES.labels(rule).inc()
+            raise
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 
 from app.domain.file.schemas import FileOut
-from app.domain.mapping.schemas import MappingOut
+from app.domain.mapping.schemas import MappingSummaryOut
 
 
 # --- Schémas pour Dataset ---
@@ -31,9 +31,10 @@ class DatasetOut(DatasetBase):
 # --- Schéma composite ---
 
 class DatasetDetailOut(DatasetOut):
-    """Vue détaillée d'un dataset incluant ses fichiers et mappings."""
+    """Vue détaillée d'un dataset incluant une page de ses fichiers et le résumé de ses mappings."""
     files: List[FileOut] = []  # Utilise maintenant le schéma de fichier unifié et détaillé
-    mappings: List[MappingOut] = []
+    files_total: int = Field(0, description="Nombre total de fichiers du dataset (toutes pages).")
+    mappings: List[MappingSummaryOut] = []
     model_config = ConfigDict(from_attributes=True)
 
 # --- Schémas pour la recherche ---
@@ -1,12 +1,14 @@
+import hashlib
 import uuid
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import exists, func, select
 from loguru import logger
 
 from app.domain.dataset import models, schemas
+from app.domain.file.models import File
+from app.domain.mapping.models import Mapping
 from app.domain.user.models import User
 from app.core.exceptions import (
     ResourceNotFoundError,
@@ -22,38 +24,101 @@ class DatasetService:
         """Récupère un dataset par son ID."""
         return await db.get(models.Dataset, dataset_id)
 
+    async def is_owned_by(self, db: AsyncSession, dataset_id: uuid.UUID, owner_id: uuid.UUID) -> bool:
+        """Vérifie la propriété d'un dataset par une requête EXISTS, sans charger de relation."""
+        query = select(exists().where(models.Dataset.id == dataset_id, models.Dataset.owner_id == owner_id))
+        return bool((await db.execute(query)).scalar())
+
+    async def ensure_owned_by(self, db: AsyncSession, dataset_id: uuid.UUID, owner_id: uuid.UUID) -> uuid.UUID:
+        """Retourne l'ID du dataset s'il appartient à `owner_id`, lève ResourceNotFoundError sinon."""
+        if not await self.is_owned_by(db, dataset_id, owner_id):
+            raise ResourceNotFoundError("Jeu de données non trouvé ou accès non autorisé.")
+        return dataset_id
+
     async def get_owned_by_user(
         self, db: AsyncSession, dataset_id: uuid.UUID, user: User
     ) -> models.Dataset:
         """
-        Récupère un dataset, vérifie la propriété et charge toutes les relations
-        nécessaires pour l'affichage détaillé, y compris l'uploader de chaque fichier.
+        Récupère un dataset et vérifie la propriété. Seule la ligne du dataset
+        est chargée : la vue détaillée passe par `get_detail`, le listing des
+        fichiers par `FileService.list_by_dataset`.
         """
-        from app.domain.file.models import File
-        from app.domain.mapping.models import Mapping
-        
-        query = (
-            select(models.Dataset)
-            .where(models.Dataset.id == dataset_id, models.Dataset.owner_id == user.id)
-            .options(
-                # Charge la relation 'files' et, pour chaque fichier, charge son 'uploader'
-                selectinload(models.Dataset.files).options(
-                    joinedload(File.uploader)
-                ),
-                # Charge la relation 'mappings'
-                selectinload(models.Dataset.mappings)
-            )
-        )
+        query = select(models.Dataset).where(models.Dataset.id == dataset_id, models.Dataset.owner_id == user.id)
         result = await db.execute(query)
         dataset = result.scalars().first()
 
         if not dataset:
             raise ResourceNotFoundError("Jeu de données non trouvé ou accès non autorisé.")
-        
-        # Le mapping de l'ORM vers Pydantic se chargera de construire les objets FileOut
-        # y compris le `uploader_name` grâce au `joinedload`.
         return dataset
 
+    # Colonnes de File exposées par FileOut
+    _FILE_COLUMNS = (
+        File.id, File.filename_original, File.status, File.parsing_error, File.version,
+        File.size_bytes, File.hash, File.line_count, File.column_count, File.uploader_id,
+        File.created_at, File.updated_at, File.ingestion_status, File.docs_indexed,
+        File.ingestion_errors, File.inferred_schema, File.preview_data, File.mime_type,
+    )
+
+    async def get_detail(
+        self, db: AsyncSession, dataset_id: uuid.UUID, owner_id: uuid.UUID,
+        skip: int = 0, limit: int = 100, if_none_match: Optional[str] = None,
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Vue détaillée d'un dataset en un nombre constant de requêtes, quel que
+        soit le nombre de fichiers : en-tête (avec la version de la vue pour
+        l'ETag), page de fichiers avec le nom de l'uploader et le mapping
+        associé, résumé des mappings. Retourne (etag, None) si `if_none_match`
+        correspond à la version courante.
+        """
+        def _stat(column, *where):
+            return select(column).where(*where).scalar_subquery()
+
+        in_dataset = (File.dataset_id == models.Dataset.id,)
+        mapping_in_dataset = (Mapping.dataset_id == models.Dataset.id,)
+        header = (await db.execute(
+            select(
+                models.Dataset.id, models.Dataset.name, models.Dataset.description,
+                models.Dataset.owner_id, models.Dataset.created_at, models.Dataset.updated_at,
+                _stat(func.count(File.id), *in_dataset).label("files_total"),
+                _stat(func.max(func.coalesce(File.updated_at, File.created_at)), *in_dataset).label("files_changed"),
+                _stat(func.count(Mapping.id), *mapping_in_dataset).label("mappings_total"),
+                _stat(func.max(Mapping.updated_at), *mapping_in_dataset).label("mappings_changed"),
+            ).where(models.Dataset.id == dataset_id, models.Dataset.owner_id == owner_id)
+        )).mappings().first()
+        if header is None:
+            raise ResourceNotFoundError("Jeu de données non trouvé ou accès non autorisé.")
+
+        version = "|".join(str(header[k]) for k in (
+            "updated_at", "files_total", "files_changed", "mappings_total", "mappings_changed"))
+        etag = f'W/"{hashlib.sha256(f"{version}|{skip}|{limit}".encode()).hexdigest()[:32]}"'
+        if if_none_match == etag:
+            return etag, None
+
+        # Premier mapping créé pour chaque fichier source (FileOut.mapping_id)
+        mapping_id = (
+            select(Mapping.id).where(Mapping.source_file_id == File.id)
+            .order_by(Mapping.created_at).limit(1).scalar_subquery()
+        )
+        files = await db.execute(
+            select(*self._FILE_COLUMNS, User.username.label("uploader_name"), mapping_id.label("mapping_id"))
+            .outerjoin(User, User.id == File.uploader_id)
+            .where(File.dataset_id == dataset_id)
+            .order_by(File.created_at.desc(), File.id.desc())
+            .offset(skip).limit(limit)
+        )
+        mappings = await db.execute(
+            select(Mapping.id, Mapping.name, Mapping.dataset_id, Mapping.source_file_id,
+                   Mapping.index_name, Mapping.created_at, Mapping.updated_at)
+            .where(Mapping.dataset_id == dataset_id)
+            .order_by(Mapping.created_at)
+        )
+
+        detail = {k: header[k] for k in ("id", "name", "description", "owner_id", "created_at", "updated_at")}
+        detail["files_total"] = header["files_total"]
+        detail["files"] = [dict(row) for row in files.mappings()]
+        detail["mappings"] = [dict(row) for row in mappings.mappings()]
+        return etag, detail
+
     async def create(
         self, db: AsyncSession, dataset_in: schemas.DatasetCreate, owner: User
     ) -> models.Dataset:
@@ -0,0 +1,211 @@
+"""
+app/domain/file/events.py
+Bus d'événements des fichiers (statut de parsing, d'ingestion, progression).
+Les tâches de fond publient, les flux SSE s'abonnent sans garder de session
+de base de données. Par défaut le bus est local au processus ; avec
+FILE_EVENTS_BACKEND=postgres, les événements transitent par LISTEN/NOTIFY
+et atteignent les abonnés de tous les workers.
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Dict, Optional, Set
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+FILE_EVENTS_PUBLISHED = Counter("file_events_published_total", "Événements de fichier publiés", ["kind"])
+FILE_EVENTS_DROPPED = Counter(
+    "file_events_dropped_total", "Événements perdus par des abonnés trop lents (file pleine)")
+FILE_EVENTS_SUBSCRIBERS = Gauge("file_events_subscribers", "Abonnés en cours aux événements de fichier")
+
+# Types d'événements
+STATUS = "status"
+INGESTION = "ingestion"
+PROGRESS = "progress"
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# Taille maximale d'un payload NOTIFY PostgreSQL
+NOTIFY_MAX_BYTES = 8000
+# Reconnexion de la connexion LISTEN perdue : délai initial puis doublé jusqu'au maximum (secondes)
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """Événement relatif à un fichier ; `progress` est un pourcentage (0-100)."""
+    file_id: str
+    kind: str
+    status: Optional[str] = None
+    progress: Optional[float] = None
+    stage: Optional[str] = None
+    detail: Optional[str] = None
+    ts: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "FileEvent":
+        return cls(**json.loads(payload))
+
+
+class Subscription:
+    """File d'attente bornée d'un abonné."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[FileEvent]:
+        """Prochain événement, ou None si rien n'arrive avant `timeout` secondes."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class FileEventBus:
+    """
+    Diffusion en mémoire des événements vers les abonnés d'un fichier. Chaque
+    abonné a une file bornée : un abonné trop lent perd les événements les plus
+    anciens plutôt que de ralentir les tâches qui publient.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def dispatch(self, event: FileEvent) -> None:
+        """Remet l'événement aux abonnés locaux (appelé dans la boucle d'événements)."""
+        for queue in self._subscribers.get(event.file_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                FILE_EVENTS_DROPPED.inc()
+            queue.put_nowait(event)
+
+    async def publish(self, event: FileEvent) -> None:
+        FILE_EVENTS_PUBLISHED.labels(event.kind).inc()
+        self.dispatch(event)
+
+    @asynccontextmanager
+    async def subscribe(self, file_id) -> AsyncIterator["Subscription"]:
+        """Abonnement aux événements d'un fichier, actif dès l'entrée dans le contexte."""
+        file_id = str(file_id)
+        subscription = Subscription()
+        self._subscribers.setdefault(file_id, set()).add(subscription.queue)
+        FILE_EVENTS_SUBSCRIBERS.inc()
+        try:
+            yield subscription
+        finally:
+            FILE_EVENTS_SUBSCRIBERS.dec()
+            subscribers = self._subscribers.get(file_id)
+            if subscribers is not None:
+                subscribers.discard(subscription.queue)
+                if not subscribers:
+                    del self._subscribers[file_id]
+
+    async def startup(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class PostgresFileEventBus(FileEventBus):
+    """
+    Variante inter-processus : `publish` émet un NOTIFY et chaque processus
+    redistribue localement ce qu'il reçoit par LISTEN. Une connexion asyncpg
+    dédiée (hors du pool SQLAlchemy) sert aux deux ; si elle est perdue, elle
+    est rétablie en tâche de fond (les événements de l'intervalle sont
+    rattrapés par la relecture périodique des flux SSE).
+    """
+
+    def __init__(self, dsn: str, channel: str):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._closing = False
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    async def startup(self) -> None:
+        self._closing = False
+        await self._connect()
+        logger.info(f"Événements de fichier : écoute du canal PostgreSQL '{self.channel}'")
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+
+    def _on_terminated(self, connection) -> None:
+        if self._closing or connection is not self._conn:
+            return
+        # Diffusion locale en attendant la reconnexion
+        self._conn = None
+        logger.warning(f"Connexion LISTEN du canal '{self.channel}' perdue, reconnexion.")
+        self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while not self._closing:
+            try:
+                await self._connect()
+                logger.info(f"Événements de fichier : écoute du canal '{self.channel}' rétablie")
+                return
+            except Exception as e:
+                logger.warning(f"Reconnexion au canal '{self.channel}' impossible ({e}), nouvel essai dans {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self.dispatch(FileEvent.from_json(payload))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Événement de fichier invalide reçu sur '{channel}' : {e}")
+
+    async def publish(self, event: FileEvent) -> None:
+        payload = event.to_json()
+        if self._conn is None or len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+            # Pas encore démarré (tâche hors application) ou payload trop gros : diffusion locale
+            await super().publish(event)
+            return
+        FILE_EVENTS_PUBLISHED.labels(event.kind).inc()
+        async with self._lock:
+            await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+def create_file_event_bus() -> FileEventBus:
+    if settings.FILE_EVENTS_BACKEND == "postgres":
+        # asyncpg attend une DSN libpq, sans le suffixe de driver SQLAlchemy
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        return PostgresFileEventBus(dsn, settings.FILE_EVENTS_CHANNEL)
+    return FileEventBus()
+
+
+file_events = create_file_event_bus()
+
+
+async def publish_file_event(file_id, kind: str, **fields) -> None:
+    """Publie un événement sans jamais faire échouer la tâche appelante."""
+    try:
+        await file_events.publish(FileEvent(file_id=str(file_id), kind=kind, **fields))
+    except Exception as e:
+        logger.warning(f"Publication de l'événement {kind} du fichier {file_id} impossible : {e}")
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Integer,
     DateTime,
     ForeignKey,
+    Index,
     Enum as SQLAlchemyEnum
 )
 from sqlalchemy.orm import relationship
@@ -15,7 +16,7 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 from app.core.db import Base
-from app.utils.db_types import JSONOrJSONB
+from app.utils.db_types import JSONOrJSONB, UuidType as CustomUUID
 
 
 # --- Enums pour les statuts ---
@@ -68,9 +69,17 @@ class File(Base):
     
     # Clés étrangères
     dataset_id = Column(UUID(as_uuid=True), ForeignKey("datasets.id"), nullable=False)
-    uploader_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Même type que users.id (UUID natif sous PostgreSQL) : jointure directe avec User
+    uploader_id = Column(CustomUUID, ForeignKey("users.id"), nullable=False)
 
     # Relations
     dataset = relationship("Dataset", back_populates="files")
     uploader = relationship("User", back_populates="files")
     mappings = relationship("Mapping", back_populates="source_file", cascade="all, delete-orphan")
+
+    # Listing paginé par clé (created_at, id) et filtres par statut au sein d'un dataset
+    __table_args__ = (
+        Index("ix_files_dataset_created", "dataset_id", "created_at", "id"),
+        Index("ix_files_dataset_status", "dataset_id", "status"),
+        Index("ix_files_dataset_ingestion_status", "dataset_id", "ingestion_status"),
+    )
@@ -0,0 +1,85 @@
+"""
+app/domain/file/readers.py
+Lecture en flux (ligne à ligne) des fichiers stockés, sans charger tout le fichier en mémoire.
+"""
+import codecs
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.exceptions import UnsupportedFormatError
+from app.core.json_stream import IncrementalRowsParser
+from app.domain.file import models
+
+# Taille des morceaux lus pour un tableau JSON
+JSON_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def get_stored_path(file: models.File) -> Path:
+    """Chemin physique d'un fichier stocké."""
+    return settings.UPLOAD_DIR / str(file.dataset_id) / file.filename_stored
+
+
+def iter_csv_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Itère sur les lignes d'un CSV (détection du séparateur, fallback ';')."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as csvfile:
+        try:
+            delimiter = csv.Sniffer().sniff(csvfile.read(2048)).delimiter
+        except csv.Error:
+            delimiter = ";"
+        csvfile.seek(0)
+        yield from csv.DictReader(csvfile, delimiter=delimiter)
+
+
+def _skip_bom(f) -> None:
+    """Place le fichier (ouvert en binaire) après l'éventuel BOM UTF-8."""
+    if f.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+        f.seek(0)
+
+
+def iter_json_array_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Itère sur les éléments d'un tableau JSON, lu par morceaux (parseur incrémental)."""
+    parser = IncrementalRowsParser(row_paths=((),))
+    with open(path, "rb") as f:
+        _skip_bom(f)
+        while chunk := f.read(JSON_READ_CHUNK_SIZE):
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def iter_json_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Itère sur les objets d'un fichier JSONL (ou d'un tableau JSON)."""
+    with open(path, "rb") as f:
+        _skip_bom(f)
+        is_array = f.read(1024).lstrip().startswith(b"[")
+    if is_array:
+        yield from iter_json_array_rows(path)
+        return
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_excel_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Itère sur les lignes d'un classeur Excel (chargé via pandas)."""
+    df = pd.read_excel(path)
+    df = df.astype(object).where(pd.notna(df), None)
+    for row in df.to_dict(orient="records"):
+        yield row
+
+
+def iter_file_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    """Itère sur les lignes d'un fichier de données selon son extension."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return iter_csv_rows(path)
+    if suffix == ".json":
+        return iter_json_rows(path)
+    if suffix in (".xlsx", ".xls"):
+        return iter_excel_rows(path)
+    raise UnsupportedFormatError()
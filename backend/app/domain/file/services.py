@@ -1,7 +1,10 @@
 import uuid
+import base64
 import hashlib
+import json
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 import csv
 
@@ -10,14 +13,15 @@ import pandas as pd
 from loguru import logger
 from fastapi import UploadFile, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import selectinload,joinedload
-from elasticsearch import AsyncElasticsearch
+from app.core.es_client import es_registry
 from elasticsearch.helpers import async_bulk
 
 from app.core.config import settings
 from app.core.db import async_session_maker
 from app.domain.file import models, schemas
+from app.domain.file.events import INGESTION, PROGRESS, STATUS, publish_file_event
 from app.domain.user.models import User
 from app.domain.project.models import Project as AnalyzerProject
 from app.domain.analyzer.models import AnalyzerGraph
@@ -79,9 +83,62 @@ class FileValidator:
             raise FileAlreadyExistsError()
 
 
+def encode_cursor(created_at: datetime, file_id: uuid.UUID) -> str:
+    """Curseur opaque de pagination par clé : position (created_at, id) du dernier fichier servi."""
+    raw = json.dumps([created_at.isoformat(), str(file_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, file_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(file_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur de pagination invalide.")
+
+
 class FileService:
     """Service pour tout le cycle de vie d'un Fichier."""
 
+    async def list_by_dataset(
+        self,
+        db: AsyncSession,
+        dataset_id: uuid.UUID,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        file_status: Optional[models.FileStatus] = None,
+        ingestion_status: Optional[models.IngestionStatus] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Tuple[List[models.File], Optional[str]]:
+        """
+        Page de fichiers d'un dataset, du plus récent au plus ancien, filtrée
+        en base. Pagination par clé sur (created_at, id) : le coût d'une page ne
+        dépend pas de sa position. Retourne (fichiers, curseur de la page
+        suivante ou None).
+        """
+        query = select(models.File).where(models.File.dataset_id == dataset_id)
+        if file_status is not None:
+            query = query.where(models.File.status == file_status)
+        if ingestion_status is not None:
+            query = query.where(models.File.ingestion_status == ingestion_status)
+        if created_after is not None:
+            query = query.where(models.File.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(models.File.created_at < created_before)
+        if cursor:
+            query = query.where(tuple_(models.File.created_at, models.File.id) < decode_cursor(cursor))
+
+        # Une ligne de plus que demandé indique l'existence d'une page suivante
+        query = query.order_by(models.File.created_at.desc(), models.File.id.desc()).limit(limit + 1)
+        files = list((await db.execute(query)).scalars().all())
+        next_cursor = None
+        if len(files) > limit:
+            files = files[:limit]
+            next_cursor = encode_cursor(files[-1].created_at, files[-1].id)
+        return files, next_cursor
+
     async def get_owned_by_user(self, db: AsyncSession, file_id: uuid.UUID, user: User) -> models.File:
         """Récupère un fichier et vérifie la propriété via le dataset parent."""
         file = await db.get(models.File, file_id)
@@ -189,6 +246,8 @@ class TaskService:
 
             file.status = models.FileStatus.PARSING
             await db.commit()
+            await publish_file_event(file_id, STATUS, status=file.status.value)
+            await publish_file_event(file_id, PROGRESS, progress=0.0, stage="reading")
 
             try:
                 path = settings.UPLOAD_DIR / str(file.dataset_id) / file.filename_stored
@@ -210,6 +269,7 @@ class TaskService:
                 else:
                     raise UnsupportedFormatError()
 
+                await publish_file_event(file_id, PROGRESS, progress=70.0, stage="schema")
                 # --- MISE À JOUR : la génération d'aperçu est extraite dans file_preview ---
                 file.inferred_schema = self._infer_schema_from_dataframe(df)
                 file.line_count = len(df)
@@ -227,6 +287,8 @@ class TaskService:
                 logger.error(f"[ParsingTask] Échec critique du parsing pour le fichier {file_id}: {e}")
             finally:
                 await db.commit()
+                await publish_file_event(file_id, PROGRESS, progress=100.0, stage="done")
+                await publish_file_event(file_id, STATUS, status=file.status.value, detail=file.parsing_error)
 
     def _prepare_data_for_bulk(self, df: pd.DataFrame, rules: List, index: str):
         rename_map = {r.source: r.target for r in rules}
@@ -235,8 +297,18 @@ class TaskService:
             doc = {r.target: row.get(r.target) for r in rules if r.target in df_renamed.columns}
             yield {"_index": index, "_source": doc}
 
+    async def _bulk_actions_with_progress(self, actions, total: int, file_id: uuid.UUID, steps: int = 20):
+        """Transmet les actions bulk à `async_bulk` en publiant la progression par paliers de 100/steps %."""
+        step = max(1, total // steps)
+        for count, action in enumerate(actions, 1):
+            yield action
+            if count % step == 0 or count == total:
+                await publish_file_event(
+                    file_id, PROGRESS, progress=round(100.0 * count / max(total, 1), 1), stage="indexing")
+
     async def ingest_data(self, file_id: uuid.UUID, mapping_id: uuid.UUID):
-        async with async_session_maker() as db, AsyncElasticsearch(hosts=[settings.ES_HOST]) as es_client:
+        es_client = es_registry.get()
+        async with async_session_maker() as db:
             file = await db.get(models.File, file_id)
             # Import du mapping depuis le package mapping
             from app.domain.mapping.models import Mapping
@@ -251,6 +323,8 @@ class TaskService:
 
             file.ingestion_status = models.IngestionStatus.IN_PROGRESS
             await db.commit()
+            await publish_file_event(file_id, INGESTION, status=file.ingestion_status.value)
+            await publish_file_event(file_id, PROGRESS, progress=0.0, stage="reading")
 
             try:
                 file_path = settings.UPLOAD_DIR / str(file.dataset_id) / file.filename_stored
@@ -268,8 +342,9 @@ class TaskService:
                 from app.domain.mapping.schemas import MappingRule
                 rules = [MappingRule.model_validate(r) for r in mapping.mapping_rules]
 
+                actions = self._prepare_data_for_bulk(df, rules, mapping.index_name)
                 success, errors = await async_bulk(
-                    es_client, self._prepare_data_for_bulk(df, rules, mapping.index_name)
+                    es_client, self._bulk_actions_with_progress(actions, len(df), file_id)
                 )
 
                 file.docs_indexed = success
@@ -296,3 +371,6 @@ class TaskService:
 
             finally:
                 await db.commit()
+                errors_detail = "; ".join(file.ingestion_errors[:1]) if file.ingestion_errors else None
+                await publish_file_event(
+                    file_id, INGESTION, status=file.ingestion_status.value, detail=errors_detail)
@@ -28,6 +28,9 @@ class FilePreviewService:
         return df.to_dict(orient="records")
 
     def _build_chunk(self, df: pd.DataFrame, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+        return FilePreviewChunk(**self._chunk_data(df, chunk_index, chunk_size))
+
+    def _chunk_data(self, df: pd.DataFrame, chunk_index: int, chunk_size: int) -> Dict[str, Any]:
         total_rows = len(df)
         total_chunks = max(1, (total_rows + chunk_size - 1) // chunk_size)
         start = chunk_index * chunk_size
@@ -41,63 +44,66 @@ class FilePreviewService:
         # Calculer si il y a plus de chunks après celui-ci
         has_more = (chunk_index + 1) < total_chunks
 
-        return FilePreviewChunk(
-            chunk_index=chunk_index,
-            chunk_size=chunk_size,
-            total_rows=total_rows,
-            total_chunks=total_chunks,
-            has_more=has_more,
-            rows=rows,
-        )
+        return {
+            "chunk_index": chunk_index,
+            "chunk_size": chunk_size,
+            "total_rows": total_rows,
+            "total_chunks": total_chunks,
+            "has_more": has_more,
+            "rows": rows,
+        }
 
-    def preview_csv_like(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+    def read_csv_like(self, path: Path) -> pd.DataFrame:
         # Détecte le séparateur; fallback point-virgule
         try:
             with path.open("r", encoding="utf-8-sig") as csvfile:
                 try:
                     dialect = csv.Sniffer().sniff(csvfile.read(2048))
                     csvfile.seek(0)
-                    df = pd.read_csv(csvfile, sep=dialect.delimiter)
+                    return pd.read_csv(csvfile, sep=dialect.delimiter)
                 except (csv.Error, pd.errors.ParserError):
                     csvfile.seek(0)
-                    df = pd.read_csv(csvfile, sep=";")
+                    return pd.read_csv(csvfile, sep=";")
         except UnicodeDecodeError:
             # Fallback lecture directe via pandas (laisser pandas deviner)
-            df = pd.read_csv(path)
-        return self._build_chunk(df, chunk_index, chunk_size)
-
-    def preview_excel(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
-        df = pd.read_excel(path)
-        return self._build_chunk(df, chunk_index, chunk_size)
+            return pd.read_csv(path)
 
-    def preview_json(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+    def read_json(self, path: Path) -> pd.DataFrame:
         # Support JSONL si possible; sinon JSON tableau
         try:
-            df = pd.read_json(path, lines=True)
+            return pd.read_json(path, lines=True)
         except ValueError:
-            df = pd.read_json(path)
-        return self._build_chunk(df, chunk_index, chunk_size)
+            return pd.read_json(path)
 
-    def get_preview(self, file: file_models.File, chunk_index: int = 0, chunk_size: Optional[int] = None) -> FilePreviewChunk:
-        path = self.get_file_path(file)
-        size = chunk_size or self.default_chunk_size
+    def read_frame(self, path: Path) -> pd.DataFrame:
         suffix = path.suffix.lower()
-
         if suffix == ".csv":
-            return self.preview_csv_like(path, chunk_index, size)
+            return self.read_csv_like(path)
         if suffix in (".xlsx", ".xls"):
-            return self.preview_excel(path, chunk_index, size)
+            return pd.read_excel(path)
         if suffix == ".json":
-            return self.preview_json(path, chunk_index, size)
+            return self.read_json(path)
 
         # Par défaut, tentative via pandas (peut couvrir tsv, etc.)
         try:
-            df = pd.read_csv(path)
+            return pd.read_csv(path)
         except Exception:
-            df = pd.read_json(path)
-        return self._build_chunk(df, chunk_index, size)
+            return pd.read_json(path)
 
+    def preview_csv_like(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+        return self._build_chunk(self.read_csv_like(path), chunk_index, chunk_size)
 
+    def preview_excel(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+        return self._build_chunk(pd.read_excel(path), chunk_index, chunk_size)
 
+    def preview_json(self, path: Path, chunk_index: int, chunk_size: int) -> FilePreviewChunk:
+        return self._build_chunk(self.read_json(path), chunk_index, chunk_size)
 
+    def get_preview_data(self, file: file_models.File, chunk_index: int = 0,
+                         chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """Aperçu sous forme de dict brut, sans validation Pydantic (chemin de réponse rapide)."""
+        path = self.get_file_path(file)
+        return self._chunk_data(self.read_frame(path), chunk_index, chunk_size or self.default_chunk_size)
 
+    def get_preview(self, file: file_models.File, chunk_index: int = 0, chunk_size: Optional[int] = None) -> FilePreviewChunk:
+        return FilePreviewChunk(**self.get_preview_data(file, chunk_index, chunk_size))
@@ -0,0 +1,143 @@
+"""
+app/domain/mapping/body_stream.py
+Dry-run alimenté au fil de la réception du corps de requête.
+
+Le corps (mapping DSL + `sample.rows` ou `rows`) est analysé par morceaux :
+dès que le tableau des lignes commence et que le mapping est connu (membre
+`fields` déjà reçu), l'exécuteur démarre dans un thread et consomme les
+lignes à mesure qu'elles arrivent, via une file bornée. Si les lignes
+précèdent le mapping, elles sont gardées jusqu'à la fin du corps, comme
+auparavant. L'ordre des membres JSON n'ayant pas de sens, des membres du
+mapping reçus après les lignes sont acceptés : les lignes déjà transmises
+sont aussi déversées en NDJSON (mémoire puis disque), et l'exécution est
+refaite sur elles si le mapping final diffère.
+"""
+import asyncio
+import copy
+import json
+import queue
+import tempfile
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from app.core.json_stream import IncrementalRowsParser
+
+T = TypeVar("T")
+
+DRY_RUN_ROW_PATHS = (("sample", "rows"), ("rows",))
+
+# Lots de lignes en attente entre la lecture du corps et l'exécuteur
+ROWS_QUEUE_BATCHES = 8
+# Sortie NDJSON gardée en mémoire avant déversement sur disque
+NDJSON_SPOOL_BYTES = 1024 * 1024
+# Idem pour la copie des lignes transmises à l'exécuteur (ré-exécution éventuelle)
+ROWS_SPOOL_BYTES = 4 * 1024 * 1024
+
+_END = object()
+
+
+class BodyAbortedError(Exception):
+    """Interrompt l'exécuteur lorsque la lecture du corps échoue."""
+
+
+def _mapping_from(header: Dict[str, Any]) -> Dict[str, Any]:
+    body = dict(header)
+    body["globals"] = body.get("globals") or {}  # sécurité
+    return body
+
+
+def _drain(feed: "queue.Queue") -> Iterator[Any]:
+    while True:
+        batch = feed.get()
+        if batch is _END:
+            return
+        if isinstance(batch, BodyAbortedError):
+            raise batch
+        yield from batch
+
+
+def _iter_spooled_rows(spool) -> Iterator[Dict[str, Any]]:
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+async def run_on_streamed_body(chunks: AsyncIterable[bytes],
+                               consume: Callable[[Dict[str, Any], Iterable[Dict[str, Any]]], T]) -> T:
+    """
+    Analyse le corps de dry-run reçu par morceaux et appelle
+    `consume(mapping, rows)` dans un thread. Lève ValueError si le corps n'est
+    pas un JSON valide. Si des membres reçus après les premières lignes
+    modifient le mapping, `consume` est rappelé avec le mapping final sur
+    toutes les lignes : seul ce second résultat est retourné.
+    """
+    loop = asyncio.get_running_loop()
+    parser = IncrementalRowsParser(DRY_RUN_ROW_PATHS)
+    feed: "queue.Queue" = queue.Queue(maxsize=ROWS_QUEUE_BATCHES)
+    worker: Optional[asyncio.Future] = None
+    started_with: Optional[Dict[str, Any]] = None
+    buffered: List[Dict[str, Any]] = []
+    # Copie des lignes transmises à l'exécuteur, relue si le mapping change après elles
+    spool = tempfile.SpooledTemporaryFile(max_size=ROWS_SPOOL_BYTES, mode="w+", encoding="utf-8")
+
+    async def put(item: Any) -> None:
+        if isinstance(item, list):
+            spool.writelines(json.dumps(row) + "\n" for row in item)
+        # Contre-pression : la lecture attend que l'exécuteur suive (sauf s'il a échoué)
+        while True:
+            try:
+                feed.put_nowait(item)
+                return
+            except queue.Full:
+                if worker.done():
+                    return
+                await asyncio.sleep(0.005)
+
+    with spool:
+        try:
+            async for chunk in chunks:
+                rows = parser.feed(chunk)
+                if worker is None and parser.in_rows and "fields" in parser.header:
+                    mapping = _mapping_from(parser.header)
+                    started_with = copy.deepcopy(mapping)
+                    worker = loop.run_in_executor(None, consume, mapping, _drain(feed))
+                    rows, buffered = buffered + rows, []
+                if rows:
+                    if worker is not None:
+                        await put(rows)
+                    else:
+                        buffered.extend(rows)
+            rows = parser.close()
+        except BaseException:
+            if worker is not None:
+                await put(BodyAbortedError())
+                await asyncio.gather(worker, return_exceptions=True)
+            raise
+
+        final = _mapping_from(parser.header)
+        if worker is None:
+            return await loop.run_in_executor(None, consume, final, buffered + rows)
+
+        if rows:
+            await put(rows)
+        await put(_END)
+        if not any(final.get(k) != started_with.get(k) for k in set(final) | set(started_with)):
+            return await worker
+        # Mapping complété après les lignes : le premier résultat (ou son erreur) est écarté
+        await asyncio.gather(worker, return_exceptions=True)
+        return await loop.run_in_executor(None, consume, final, _iter_spooled_rows(spool))
+
+
+def spool_ndjson(lines: Iterable[bytes]) -> "tempfile.SpooledTemporaryFile":
+    """Écrit un flux NDJSON dans un fichier temporaire (mémoire puis disque), prêt à être relu."""
+    spool = tempfile.SpooledTemporaryFile(max_size=NDJSON_SPOOL_BYTES)
+    for chunk in lines:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def iter_spool(spool, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Relit un fichier temporaire par blocs puis le ferme."""
+    with spool:
+        while chunk := spool.read(chunk_size):
+            yield chunk
@@ -0,0 +1,106 @@
+"""
+app/domain/mapping/canonical_hash.py
+Hash canonique du DSL de mapping (compiled_hash).
+
+Le hash produit est le SHA-256 de la sérialisation JSON canonique historique
+(clés triées, séparateurs compacts, UTF-8 non échappé) : il est identique octet
+pour octet à `sha256(json.dumps(dsl, sort_keys=True, ...))`.
+
+Au lieu de construire une seule grande chaîne, le DSL est parcouru et haché
+section par section : les grosses sections (dictionnaires inline,
+settings.analysis) sont sérialisées chacune à part. Rien n'est mis en cache :
+les corps de requête sont des objets neufs, et un cache indexé par identité
+rendrait un hash périmé après une modification sur place.
+
+Par défaut (CANONICAL_HASH_ORJSON) les sections sont sérialisées avec orjson,
+plusieurs fois plus rapide que json ; une section dont un nombre serait formaté
+différemment est resérialisée avec json, le hash reste donc inchangé.
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson est optionnel
+    orjson = None
+
+from app.core.config import settings
+
+
+# Sections sérialisées à part : chemin depuis la racine, "*" = chaque entrée du dict
+SPLIT_SECTIONS: Tuple[Tuple[str, ...], ...] = (
+    ("dictionaries", "*"),
+    ("settings", "analysis"),
+)
+
+# Nombres que json.dumps et orjson ne formatent pas pareil (exposant, |x| < 1e-4).
+# En sortie compacte un nombre suit toujours ":", "," ou "[" : le texte des
+# chaînes ("3e arrondissement") ne provoque donc pas de repli inutile.
+_ORJSON_UNSAFE_NUMBER = re.compile(rb"[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Sérialisation canonique de référence (module json)."""
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    """
+    Sérialisation canonique via orjson, avec repli sur json dès que la sortie
+    pourrait diverger (flottants en notation exponentielle, clés non-str...).
+    Les flottants non finis (NaN/Infinity, hors norme JSON) ne sont pas couverts.
+    """
+    try:
+        out = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        return _json_dumps(obj)
+    if _ORJSON_UNSAFE_NUMBER.search(out):
+        return _json_dumps(obj)
+    return out
+
+
+class CanonicalHasher:
+    """Calcule le hash canonique d'un DSL de manière incrémentale."""
+
+    def __init__(self, use_orjson: bool = False):
+        self.use_orjson = use_orjson and orjson is not None
+
+    def dumps(self, obj: Any) -> bytes:
+        """Sérialise un objet sous forme canonique."""
+        return _orjson_dumps(obj) if self.use_orjson else _json_dumps(obj)
+
+    def hexdigest(self, dsl: Dict[str, Any]) -> str:
+        """Retourne le SHA-256 hexadécimal de la forme canonique du DSL."""
+        h = hashlib.sha256()
+        self._feed(h, dsl, SPLIT_SECTIONS)
+        return h.hexdigest()
+
+    def _feed(self, h, obj: Any, sections: Tuple[Tuple[str, ...], ...]) -> None:
+        """
+        Alimente le hash avec la forme canonique de `obj`. Seuls les dicts menant
+        à une section découpée sont parcourus ; le reste est sérialisé d'un bloc.
+        """
+        if not sections or not isinstance(obj, dict) or not all(isinstance(k, str) for k in obj):
+            h.update(self.dumps(obj))
+            return
+
+        h.update(b"{")
+        for i, key in enumerate(sorted(obj)):
+            if i:
+                h.update(b",")
+            h.update(_json_dumps(key))
+            h.update(b":")
+            value = obj[key]
+            sub = tuple(s[1:] for s in sections if len(s) > 1 and s[0] in (key, "*"))
+            self._feed(h, value, sub)
+        h.update(b"}")
+
+
+default_hasher = CanonicalHasher(use_orjson=settings.CANONICAL_HASH_ORJSON)
+
+
+def canonical_hash(dsl: Dict[str, Any]) -> str:
+    """Hash canonique SHA-256 d'un DSL avec le hasher par défaut."""
+    return default_hasher.hexdigest(dsl)
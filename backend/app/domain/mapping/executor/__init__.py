@@ -1,2 +1,2 @@
 # app/domain/mapping/executor/__init__.py
-from .executor import PipelineExecutor, run_dry_run  # PipelineExecutor kept for future extension
+from .executor import PipelineExecutor, iter_dry_run, run_dry_run  # PipelineExecutor kept for future extension
@@ -4,6 +4,7 @@ from prometheus_client import Counter, Histogram, Gauge
 from .ops import (
     ExecIssue, OP_REGISTRY, eval_condition, _coalesce, _is_null
 )
+from ..id_check import ExactIdIndex, make_id_builder
 
 # Métriques Prometheus V2.1
 JP_HIT = Counter("jsonpath_cache_hits_total", "hits")
@@ -81,6 +82,14 @@ def _compile_mapping(mapping: dict):
     mapping["__compiled__"] = compiled
     return compiled
 
+def _get_id_builder(mapping: dict):
+    """Fonction ligne -> _id de l'id_policy, construite une fois par mapping."""
+    if "__id_builder__" not in mapping:
+        idp = mapping.get("id_policy")
+        # Sémantique historique du dry-run : seules les colonnes `from` comptent (_id "" sans colonne)
+        mapping["__id_builder__"] = make_id_builder(idp, source_fallback=False) if idp else None
+    return mapping["__id_builder__"]
+
 def _build_container_index(mapping: dict) -> dict:
     """Construit un index des containers pour le placement des valeurs."""
     idx = {}
@@ -363,50 +372,54 @@ def execute_document(mapping, row, row_idx):
         # Placement des valeurs avec support des containers
         _place_value(doc, tgt, result, container_idx)
 
-    idp = mapping.get("id_policy")
-    if idp:
-        sep = idp.get("sep", ":")
-        sources = idp.get("from", [])
-        vals = [row.get(s) for s in sources]
-        id_val = sep.join("" if v is None else str(v) for v in vals)
-        if idp.get("hash"):
-            import hashlib
-            algo = idp["hash"]
-            h = getattr(hashlib, algo)
-            s = (idp.get("salt","")) + id_val
-            id_val = h(s.encode("utf-8")).hexdigest()
-        doc["_id"] = id_val
+    build_id = _get_id_builder(mapping)
+    if build_id is not None:
+        doc["_id"] = build_id(row)
 
     return doc, issues
 
-def run_dry_run(mapping, rows):
-    docs, issues = [], []
-    seen_ids, id_policy = set(), mapping.get("id_policy") or {}
-    stats = {"issues_per_code": {}, "date_fail_per_field": {}}
+def iter_dry_run(mapping, rows, stats=None):
+    """
+    Générateur du dry-run : produit ("doc", {"_id", "_source"}) et ("issue", {...})
+    au fil des lignes, sans rien accumuler. `stats` (issues_per_code,
+    date_fail_per_field) est complété en place ; il est final une fois le
+    générateur épuisé. `rows` peut être n'importe quel itérable.
+    """
+    id_policy = mapping.get("id_policy") or {}
+    if stats is None:
+        stats = {}
+    stats.setdefault("issues_per_code", {})
+    stats.setdefault("date_fail_per_field", {})
 
     def _bump(code, field=None):
         stats["issues_per_code"][code] = 1 + stats["issues_per_code"].get(code, 0)
         if code == "E_DATE_PARSE_FAIL" and field:
             d = stats["date_fail_per_field"]; d[field] = 1 + d.get(field, 0)
 
-    for i, row in enumerate(rows):
-        d, isss = execute_document(mapping, row, i)
-        # on_conflict
-        _id = d.pop("_id", None)
-        if _id is not None:
-            if _id in seen_ids:
+    # Index des _id vus : déversé sur disque au-delà du seuil mémoire
+    with ExactIdIndex() as seen_ids:
+        for i, row in enumerate(rows):
+            d, isss = execute_document(mapping, row, i)
+            # on_conflict
+            _id = d.pop("_id", None)
+            if _id is not None and not seen_ids.add(_id):
                 policy = id_policy.get("on_conflict", "error")
-                issues.append({"row": i, "field": "_id", "code": "E_ID_CONFLICT",
-                               "msg": f"duplicate _id '{_id}' (policy={policy})"})
+                yield "issue", {"row": i, "field": "_id", "code": "E_ID_CONFLICT",
+                                "msg": f"duplicate _id '{_id}' (policy={policy})"}
                 _bump("E_ID_CONFLICT")
                 if policy == "skip": continue
                 # overwrite: on garde le doc courant; error: on signale seulement
-            seen_ids.add(_id)
 
-        docs.append({"_id": _id, "_source": d})
-        for it in isss:
-            issues.append(it)
-            _bump(it.get("code","W_OP"))
+            yield "doc", {"_id": _id, "_source": d}
+            for it in isss:
+                yield "issue", it
+                _bump(it.get("code","W_OP"))
+
+def run_dry_run(mapping, rows):
+    docs, issues = [], []
+    stats = {"issues_per_code": {}, "date_fail_per_field": {}}
+    for kind, item in iter_dry_run(mapping, rows, stats):
+        (docs if kind == "doc" else issues).append(item)
     return {"docs_preview": docs, "issues": issues, "stats": stats}
 
 # Backward-compatible alias for potential class-based extension
@@ -0,0 +1,351 @@
+"""
+app/domain/mapping/id_check.py
+Vérification d'unicité des _id à grande échelle.
+
+Deux niveaux :
+- mode "exact" : index des empreintes d'ID en mémoire, déversé dans un index
+  SQLite temporaire sur disque dès que le seuil mémoire est dépassé ;
+- mode "bloom" : filtre de Bloom (taux de faux positifs configurable) qui
+  repère les doublons probables en une passe, puis une seconde passe ne
+  compte exactement que ces candidats.
+"""
+import hashlib
+import math
+import multiprocessing
+import os
+import sqlite3
+import struct
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+ID_CHECK_MODES = ("exact", "bloom")
+MAX_SAMPLES = 5
+
+# Coût mémoire approximatif d'une empreinte de 16 octets stockée dans un set
+_SET_ENTRY_BYTES = 96
+
+# Enregistrement d'un fichier de shard : empreinte, n° de ligne, longueur de l'_id
+_SHARD_RECORD = struct.Struct("<16sQI")
+
+
+def make_id_builder(idp: Dict[str, Any], source_fallback: bool = True) -> Optional[Callable[[Dict[str, Any]], str]]:
+    """
+    Construit la fonction ligne -> _id décrite par une id_policy
+    (`from` ou `source`, `sep`, `hash` + `salt` optionnels). Sans colonne,
+    retourne None ; avec `source_fallback=False` (exécuteur), `source` est
+    ignoré et une policy sans `from` produit l'_id "" (ou le hash du sel).
+    """
+    cols = list(idp.get("from") or [])
+    if not cols and source_fallback and idp.get("source"):
+        cols = [idp["source"]]
+    if not cols and source_fallback:
+        return None
+    sep = idp.get("sep", ":")
+
+    def build(row: Dict[str, Any]) -> str:
+        return sep.join("" if row.get(c) is None else str(row.get(c)) for c in cols)
+
+    algo = idp.get("hash")
+    if not algo:
+        return build
+
+    # Algorithme et sel résolus une seule fois (pas de getattr par ligne)
+    ctor = getattr(hashlib, algo)
+    salt = idp.get("salt", "")
+
+    def build_hashed(row: Dict[str, Any]) -> str:
+        return ctor((salt + build(row)).encode("utf-8")).hexdigest()
+
+    return build_hashed
+
+
+def id_digest(value: str) -> bytes:
+    """Empreinte compacte (16 octets) d'un _id."""
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+
+
+class ExactIdIndex:
+    """
+    Ensemble exact d'empreintes d'ID, déversé sur disque au-delà d'un seuil.
+
+    Tant que le seuil n'est pas atteint les empreintes restent dans un set ;
+    ensuite elles sont stockées dans une table SQLite temporaire indexée.
+    """
+
+    def __init__(self, memory_limit_bytes: Optional[int] = None, tmp_dir: Optional[str] = None):
+        if memory_limit_bytes is None:
+            memory_limit_bytes = settings.ID_CHECK_MEMORY_LIMIT_MB * 1024 * 1024
+        self.max_entries = max(1, memory_limit_bytes // _SET_ENTRY_BYTES)
+        self.tmp_dir = tmp_dir or settings.ID_CHECK_TMP_DIR
+        self._mem: Set[bytes] = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._db is not None
+
+    def add(self, value: str) -> bool:
+        """Ajoute un _id ; retourne False s'il était déjà présent."""
+        return self.add_digest(id_digest(value))
+
+    def add_digest(self, digest: bytes) -> bool:
+        if self._db is None:
+            if digest in self._mem:
+                return False
+            self._mem.add(digest)
+            if len(self._mem) > self.max_entries:
+                self._spill()
+            return True
+        cur = self._db.execute("INSERT OR IGNORE INTO ids (d) VALUES (?)", (digest,))
+        return cur.rowcount == 1
+
+    def __contains__(self, value: str) -> bool:
+        digest = id_digest(value)
+        if self._db is None:
+            return digest in self._mem
+        return self._db.execute("SELECT 1 FROM ids WHERE d = ?", (digest,)).fetchone() is not None
+
+    def _spill(self) -> None:
+        """Bascule l'index mémoire vers un index SQLite temporaire."""
+        fd, self._path = tempfile.mkstemp(prefix="idcheck-", suffix=".sqlite", dir=self.tmp_dir)
+        os.close(fd)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE ids (d BLOB PRIMARY KEY) WITHOUT ROWID")
+        # Insertion triée : remplissage séquentiel du B-tree
+        self._db.executemany("INSERT INTO ids (d) VALUES (?)", ((d,) for d in sorted(self._mem)))
+        self._mem = set()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+        self._mem = set()
+
+    def __enter__(self) -> "ExactIdIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BloomFilter:
+    """Filtre de Bloom (double hachage sur une empreinte de 16 octets)."""
+
+    def __init__(self, num_bits: int, num_hashes: int):
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        """Dimensionne le filtre pour `capacity` éléments et le taux de faux positifs visé."""
+        capacity = max(1, capacity)
+        num_bits = int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        num_hashes = int(round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest: bytes) -> bool:
+        """Ajoute une empreinte ; retourne True si elle était peut-être déjà présente."""
+        present = True
+        bits = self.bits
+        for pos in self._positions(digest):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+
+def _result(total: int, dups: int, samples: List[Dict[str, Any]], stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "total": total,
+        "duplicates": dups,
+        "duplicate_rate": (dups / total) if total else 0.0,
+        "samples": samples,
+        "stats": stats,
+    }
+
+
+def check_ids_exact(
+    rows: Iterable[Dict[str, Any]],
+    build_id: Callable[[Dict[str, Any]], str],
+    memory_limit_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Comptage exact des doublons en une passe (index déversé sur disque si besoin)."""
+    total, dups, samples = 0, 0, []
+    with ExactIdIndex(memory_limit_bytes) as index:
+        for i, row in enumerate(rows):
+            total += 1
+            v = build_id(row)
+            if not index.add(v):
+                dups += 1
+                if len(samples) < MAX_SAMPLES:
+                    samples.append({"row": i, "_id": v})
+        spilled = index.spilled
+    return _result(total, dups, samples, {"mode": "exact", "spilled": spilled})
+
+
+def check_ids_bloom(
+    rows_factory: Callable[[], Iterable[Dict[str, Any]]],
+    build_id: Callable[[Dict[str, Any]], str],
+    capacity: int,
+    fp_rate: float = 0.01,
+) -> Dict[str, Any]:
+    """
+    Deux passes : le filtre de Bloom repère les doublons probables, puis la
+    seconde passe les confirme exactement. Seules les empreintes candidates
+    (doublons réels + faux positifs) sont gardées en mémoire.
+    """
+    bloom = BloomFilter.for_capacity(capacity, fp_rate)
+    candidates: Set[bytes] = set()
+    total = 0
+    for row in rows_factory():
+        total += 1
+        digest = id_digest(build_id(row))
+        if bloom.add(digest):
+            candidates.add(digest)
+    del bloom
+
+    dups, samples, seen, confirmed = 0, [], set(), set()
+    if total > capacity:
+        # Filtre sous-dimensionné : le taux réel de faux positifs dépasse fp_rate
+        logger.warning(f"check-ids bloom : {total} _id pour une capacité de {capacity}, "
+                       f"{len(candidates)} candidats gardés en mémoire.")
+
+    if candidates:
+        for i, row in enumerate(rows_factory()):
+            v = build_id(row)
+            digest = id_digest(v)
+            if digest not in candidates:
+                continue
+            if digest in seen:
+                dups += 1
+                confirmed.add(digest)
+                if len(samples) < MAX_SAMPLES:
+                    samples.append({"row": i, "_id": v})
+            else:
+                seen.add(digest)
+
+    # Candidats jamais revus en double = faux positifs du filtre
+    stats = {"mode": "bloom", "fp_rate": fp_rate, "capacity": capacity, "capacity_exceeded": total > capacity,
+             "candidates": len(candidates), "false_positives": len(candidates) - len(confirmed)}
+    return _result(total, dups, samples, stats)
+
+
+def _count_shard(path: str, memory_limit_bytes: Optional[int]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Compte les doublons d'un fichier de shard (exécuté dans un processus fils)."""
+    dups, samples = 0, []
+    read_header, header_size = _SHARD_RECORD.unpack, _SHARD_RECORD.size
+    with ExactIdIndex(memory_limit_bytes) as index, open(path, "rb") as f:
+        while True:
+            header = f.read(header_size)
+            if not header:
+                break
+            digest, row, size = read_header(header)
+            value = f.read(size)
+            if not index.add_digest(digest):
+                dups += 1
+                if len(samples) < MAX_SAMPLES:
+                    samples.append({"row": row, "_id": value.decode("utf-8")})
+    return dups, samples
+
+
+def shards_for_size(size_bytes: int) -> int:
+    """Nombre de shards d'un fichier : un par ID_CHECK_SHARD_SIZE_MB de données (1 à 256)."""
+    shard_bytes = settings.ID_CHECK_SHARD_SIZE_MB * 1024 * 1024
+    return max(1, min(256, math.ceil(size_bytes / shard_bytes)))
+
+
+def check_ids_sharded(
+    rows: Iterable[Dict[str, Any]],
+    build_id: Callable[[Dict[str, Any]], str],
+    shards: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    memory_limit_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Comptage exact partitionné par préfixe d'empreinte.
+
+    Les _id sont calculés en flux et répartis dans des fichiers de shard
+    temporaires (un même _id tombe toujours dans le même shard), puis chaque
+    shard est dédoublonné dans un processus séparé avec sa part du budget mémoire.
+    """
+    shards = max(1, min(256, shards or os.cpu_count() or 1))
+    if memory_limit_bytes is None:
+        memory_limit_bytes = settings.ID_CHECK_MEMORY_LIMIT_MB * 1024 * 1024
+    workers = max(1, min(shards, max_workers or os.cpu_count() or 1))
+    pack = _SHARD_RECORD.pack
+
+    with tempfile.TemporaryDirectory(prefix="idcheck-", dir=settings.ID_CHECK_TMP_DIR) as tmp:
+        paths = [os.path.join(tmp, f"shard-{i:03d}.bin") for i in range(shards)]
+        files = [open(p, "wb") for p in paths]
+        total = 0
+        try:
+            for i, row in enumerate(rows):
+                total += 1
+                value = build_id(row).encode("utf-8")
+                digest = hashlib.blake2b(value, digest_size=16).digest()
+                f = files[digest[0] % shards]
+                f.write(pack(digest, i, len(value)))
+                f.write(value)
+        finally:
+            for f in files:
+                f.close()
+
+        # Appelé depuis un thread du serveur : processus fils démarrés par spawn, jamais par fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_count_shard, paths, [memory_limit_bytes // workers] * shards))
+
+    dups = sum(d for d, _ in results)
+    samples = sorted((s for _, shard_samples in results for s in shard_samples), key=lambda s: s["row"])
+    return _result(total, dups, samples[:MAX_SAMPLES], {"mode": "sharded", "shards": shards, "workers": workers})
+
+
+def check_ids(
+    rows_factory: Callable[[], Iterable[Dict[str, Any]]],
+    idp: Dict[str, Any],
+    mode: str = "exact",
+    fp_rate: float = 0.01,
+    capacity: Optional[int] = None,
+    memory_limit_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Vérifie l'unicité des _id produits par une id_policy.
+    `rows_factory` doit pouvoir être rappelée (deux passes en mode bloom).
+    """
+    if mode not in ID_CHECK_MODES:
+        raise ValueError(f"mode inconnu: {mode} (attendu: {', '.join(ID_CHECK_MODES)})")
+    build_id = make_id_builder(idp)
+    if build_id is None:
+        total = sum(1 for _ in rows_factory())
+        return _result(total, 0, [], {"mode": mode})
+    if mode == "bloom":
+        if not capacity:
+            # Nombre de lignes inconnu : une passe de comptage pour dimensionner le filtre
+            capacity = sum(1 for _ in rows_factory())
+        return check_ids_bloom(rows_factory, build_id, capacity, fp_rate)
+    return check_ids_exact(rows_factory(), build_id, memory_limit_bytes)
@@ -59,6 +59,7 @@ class MappingVersion(Base):
     dsl_content = Column(JSONB, nullable=False)  # Le mapping DSL complet
     compiled_mapping = Column(JSONB, nullable=True)  # Mapping ES compilé (cache)
     compiled_hash = Column(String(64), nullable=True, index=True)  # SHA256 du DSL normalisé pour idempotence
+    compiler_version = Column(String(64), nullable=True)  # Version du compilateur ayant produit compiled_mapping
     
     # Métadonnées
     description = Column(Text, nullable=True)
@@ -0,0 +1,162 @@
+"""
+app/domain/mapping/sampling.py
+Échantillonnage côté serveur des lignes d'un fichier stocké pour le dry-run.
+
+Toutes les stratégies consomment les lignes en une seule passe et gardent en
+mémoire au plus `size` lignes (ou `size` par strate, pour au plus
+MAX_STRATA strates) :
+- "head" : les premières lignes ;
+- "reservoir" : échantillon uniforme (algorithme R) ;
+- "stratified" : échantillon proportionnel aux valeurs d'une colonne, au moins
+  une ligne par strate tant que la taille le permet ;
+- "most_issues" : les lignes qui produisent le plus d'issues à l'exécution
+  du mapping.
+Les lignes retenues sont rendues dans l'ordre du fichier, avec leur index
+d'origine.
+"""
+import heapq
+import itertools
+import json
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SAMPLING_STRATEGIES = ("head", "reservoir", "stratified", "most_issues")
+
+# Au-delà, les valeurs de la colonne de stratification sont regroupées dans une strate commune
+MAX_STRATA = 100
+OTHER_STRATUM = "__other__"
+
+Row = Dict[str, Any]
+Indexed = Tuple[int, Row]
+
+
+def _ordered(picked: Iterable[Indexed]) -> List[Indexed]:
+    return sorted(picked, key=lambda item: item[0])
+
+
+def sample_head(rows: Iterable[Row], size: int) -> Tuple[List[Indexed], int]:
+    picked = list(itertools.islice(enumerate(rows), size))
+    return picked, len(picked)
+
+
+def sample_reservoir(rows: Iterable[Row], size: int, rng: random.Random) -> Tuple[List[Indexed], int]:
+    reservoir: List[Indexed] = []
+    seen = 0
+    for seen, row in enumerate(rows, 1):
+        if len(reservoir) < size:
+            reservoir.append((seen - 1, row))
+        else:
+            j = rng.randrange(seen)
+            if j < size:
+                reservoir[j] = (seen - 1, row)
+    return _ordered(reservoir), seen
+
+
+def _stratum_key(value: Any) -> str:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return str(value)
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _allocate(counts: Dict[str, int], size: int) -> Dict[str, int]:
+    """Quotas proportionnels (plus forts restes), au moins 1 par strate si `size` le permet."""
+    total = sum(counts.values())
+    if total <= size:
+        return dict(counts)
+    floor = 1 if size >= len(counts) else 0
+    quotas = {k: min(n, max(floor, size * n // total)) for k, n in counts.items()}
+    remaining = size - sum(quotas.values())
+    if remaining > 0:
+        by_remainder = sorted(counts, key=lambda k: (size * counts[k]) % total, reverse=True)
+        for k in itertools.cycle(by_remainder):
+            if remaining <= 0:
+                break
+            if quotas[k] < counts[k]:
+                quotas[k] += 1
+                remaining -= 1
+    elif remaining < 0:
+        # Le plancher d'une ligne par strate a dépassé la taille : on retire aux plus grosses strates
+        for k in sorted(counts, key=counts.get, reverse=True):
+            take = min(-remaining, quotas[k] - floor)
+            quotas[k] -= take
+            remaining += take
+            if remaining == 0:
+                break
+    return quotas
+
+
+def sample_stratified(rows: Iterable[Row], size: int, column: str,
+                      rng: random.Random) -> Tuple[List[Indexed], int, Dict[str, int]]:
+    reservoirs: Dict[str, List[Indexed]] = {}
+    counts: Dict[str, int] = {}
+    seen = 0
+    for seen, row in enumerate(rows, 1):
+        key = _stratum_key(row.get(column))
+        if key not in counts and len(counts) >= MAX_STRATA:
+            key = OTHER_STRATUM
+        n = counts[key] = counts.get(key, 0) + 1
+        reservoir = reservoirs.setdefault(key, [])
+        if len(reservoir) < size:
+            reservoir.append((seen - 1, row))
+        else:
+            j = rng.randrange(n)
+            if j < size:
+                reservoir[j] = (seen - 1, row)
+
+    quotas = _allocate(counts, size)
+    picked: List[Indexed] = []
+    for key, quota in quotas.items():
+        reservoir = reservoirs[key]
+        picked.extend(reservoir if quota >= len(reservoir) else rng.sample(reservoir, quota))
+    return _ordered(picked), seen, {k: q for k, q in quotas.items() if q}
+
+
+def sample_most_issues(rows: Iterable[Row], size: int, mapping: Dict[str, Any]) -> Tuple[List[Indexed], int]:
+    """Exécute le mapping sur chaque ligne et garde les `size` lignes les plus problématiques."""
+    from app.domain.mapping.executor.executor import execute_document
+
+    # Tas min sur (nb d'issues, -index) : à égalité, les premières lignes du fichier sont gardées
+    heap: List[Tuple[int, int, Row]] = []
+    seen = 0
+    for seen, row in enumerate(rows, 1):
+        _, issues = execute_document(mapping, row, seen - 1)
+        if not issues:
+            continue
+        item = (len(issues), -(seen - 1), row)
+        if len(heap) < size:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+    return _ordered((-neg_index, row) for _, neg_index, row in heap), seen
+
+
+def sample_rows(rows: Iterable[Row], strategy: str, size: int, column: Optional[str] = None,
+                seed: Optional[int] = None,
+                mapping: Optional[Dict[str, Any]] = None) -> Tuple[List[Row], Dict[str, Any]]:
+    """
+    Échantillonne `rows` selon `strategy`. Retourne les lignes retenues et un
+    résumé (stratégie, lignes parcourues, index d'origine des lignes, strates).
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"strategy must be one of {list(SAMPLING_STRATEGIES)}")
+    if size < 1:
+        raise ValueError("size must be >= 1")
+    rng = random.Random(seed)
+    info: Dict[str, Any] = {"strategy": strategy}
+
+    if strategy == "head":
+        picked, seen = sample_head(rows, size)
+    elif strategy == "reservoir":
+        picked, seen = sample_reservoir(rows, size, rng)
+    elif strategy == "stratified":
+        if not column:
+            raise ValueError("column is required for the stratified strategy")
+        picked, seen, strata = sample_stratified(rows, size, column, rng)
+        info.update(column=column, strata=strata)
+    else:
+        if mapping is None:
+            raise ValueError("mapping is required for the most_issues strategy")
+        picked, seen = sample_most_issues(rows, size, mapping)
+
+    info.update(size=len(picked), rows_scanned=seen, source_rows=[index for index, _ in picked])
+    return [row for _, row in picked], info
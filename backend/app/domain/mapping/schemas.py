@@ -1,8 +1,8 @@
 """ app/domain/mapping/schemas.py """
 import uuid
-from pydantic import BaseModel, Field, ConfigDict, field_validator, ValidationInfo
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator, ValidationInfo
 from datetime import datetime
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Literal
 
 
 class MappingRule(BaseModel):
@@ -44,6 +44,18 @@ class MappingOut(MappingBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MappingSummaryOut(BaseModel):
+    """Résumé d'un mapping (sans ses règles) pour les vues de liste."""
+    id: uuid.UUID
+    name: str
+    dataset_id: uuid.UUID
+    source_file_id: uuid.UUID
+    index_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Nouveaux schémas pour l'API de validation DSL
 class ValidationIssueModel(BaseModel):
     code: str
@@ -106,12 +118,39 @@ class CheckIdsOut(BaseModel):
     duplicates: int
     duplicate_rate: float
     samples: List[Dict[str, Any]] = []
+    stats: Dict[str, Any] = {}
+
+class CheckIdsJobIn(BaseModel):
+    """Vérification des collisions d'ID d'un fichier stocké avec l'id_policy d'une version de mapping."""
+    file_id: uuid.UUID
+    mapping_id: uuid.UUID
+    version: Optional[int] = Field(None, description="Numéro de version (défaut: version active)")
+    workers: Optional[int] = Field(None, ge=1, le=32, description="Nombre de processus (défaut: nb de CPU)")
 
 class DryRunOut(BaseModel):
     docs_preview: List[Dict[str, Any]] = []
     issues: List[DryRunIssue] = []
     stats: Dict[str, Any] = {}  # {"issues_per_code": {...}, "date_fail_per_field": {...}}
 
+class DryRunSampling(BaseModel):
+    """Stratégie d'échantillonnage des lignes d'un fichier stocké (voir app/domain/mapping/sampling.py)."""
+    strategy: Literal["head", "reservoir", "stratified", "most_issues"] = "head"
+    size: int = Field(100, ge=1, le=10_000, description="Nombre de lignes de l'échantillon")
+    column: Optional[str] = Field(None, description="Colonne de stratification (stratégie 'stratified')")
+    seed: Optional[int] = Field(None, description="Graine du tirage aléatoire (reproductibilité)")
+
+    @model_validator(mode='after')
+    def column_for_stratified(self) -> "DryRunSampling":
+        if self.strategy == 'stratified' and not self.column:
+            raise ValueError("La stratégie 'stratified' requiert une colonne.")
+        return self
+
+class DryRunFileIn(BaseModel):
+    """Dry-run d'un mapping DSL sur un échantillon tiré côté serveur d'un fichier stocké."""
+    file_id: uuid.UUID
+    mapping: Dict[str, Any]
+    sampling: DryRunSampling = DryRunSampling()
+
 
 class CompileOut(BaseModel):
     settings: Dict[str, Any]
@@ -122,6 +161,14 @@ class CompileOut(BaseModel):
     ilm_policy: Optional[Dict[str, Any]] = None
 
 
+class PrecompileOut(BaseModel):
+    """Résultat de la précompilation des versions actives."""
+    total: int
+    compiled: int
+    skipped: int
+    failed: List[Dict[str, Any]] = []
+
+
 # --- Schémas pour le versioning des mappings ---
 
 class MappingVersionBase(BaseModel):
@@ -130,7 +177,7 @@ class MappingVersionBase(BaseModel):
     version_metadata: Optional[Dict[str, Any]] = Field(None, description="Métadonnées supplémentaires")
 
 class MappingVersionCreate(MappingVersionBase):
-    pass
+    is_active: bool = Field(True, description="Active cette version (désactive la précédente)")
 
 class MappingVersionUpdate(BaseModel):
     dsl_content: Optional[Dict[str, Any]] = None
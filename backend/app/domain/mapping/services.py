@@ -1,8 +1,11 @@
 import uuid
+import asyncio
 import hashlib
-import json
 import time
-from typing import Optional, List, Any, Dict, Tuple
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Any, Dict, Iterable, Iterator, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from sqlalchemy.orm import selectinload, joinedload
@@ -11,14 +14,19 @@ from prometheus_client import Counter, Histogram, Gauge
 
 from app.domain.mapping import models, schemas
 from app.domain.user.models import User
+from app.core.responses import dumps as json_dumps
 from app.core.exceptions import (
     ResourceNotFoundError,
-    ForbiddenError
+    ForbiddenError,
+    InvalidMappingError
 )
 from .validators.common.json_validator import validate_mapping as _validate
 from .inference import infer_types
 from .sizing import estimate_size
-from .schemas import InferTypesOut, FieldStat, InferSuggestion, EstimateSizeOut
+from .canonical_hash import canonical_hash
+from .id_check import check_ids as _check_ids, check_ids_sharded, make_id_builder, shards_for_size
+from .sampling import sample_rows
+from .schemas import InferTypesOut, FieldStat, InferSuggestion, EstimateSizeOut, CheckIdsOut
 
 # Métriques Prometheus
 mapping_validate_total = Counter('mapping_validate_total', 'Total des validations de mapping')
@@ -31,15 +39,57 @@ dry_run_issues_total = Counter('dry_run_issues_total', 'Total des issues détect
 dry_run_sample_size = Histogram('dry_run_sample_size', 'Taille des échantillons de dry-run')
 mapping_check_ids_total = Counter('mapping_check_ids_total', 'Total des vérifications d\'ID')
 mapping_check_ids_duplicates = Counter('mapping_check_ids_duplicates', 'Total des doublons d\'ID détectés')
+mapping_compile_cache_hits_total = Counter('mapping_compile_cache_hits_total', 'Compilations servies depuis le cache MappingVersion')
+mapping_compile_cache_misses_total = Counter('mapping_compile_cache_misses_total', 'Compilations absentes du cache MappingVersion')
 
+# Lignes NDJSON regroupées par écriture lors d'un dry-run en flux
+DRY_RUN_STREAM_BATCH = 100
 
-def _normalized_dsl(dsl: dict) -> str:
-    """Normalise le DSL pour un hash cohérent."""
-    return json.dumps(dsl, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
 
-def _sha256(s: str) -> str:
-    """Calcule le hash SHA256 d'une chaîne."""
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+class _CountedRows:
+    """Itérable compté au fil de la consommation (les lignes lues en flux n'ont pas de len())."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def _compiled_hash(mapping: dict) -> str:
+    """Calcule le compiled_hash d'un DSL (dsl_version 2.2 par défaut)."""
+    dsl = dict(mapping)  # Copie superficielle : les sous-arbres gardent leur identité pour le cache
+    dsl.setdefault("dsl_version", "2.2")
+    return canonical_hash(dsl)
+
+def _compiler_version() -> str:
+    """
+    Empreinte du code du compilateur (ce module et les schémas de sortie) :
+    toute modification invalide les compilations persistées.
+    """
+    h = hashlib.sha256()
+    for name in ("services.py", "schemas.py"):
+        h.update((Path(__file__).parent / name).read_bytes())
+    return h.hexdigest()
+
+
+COMPILER_VERSION = _compiler_version()
+
+
+def _has_current_compilation(version: models.MappingVersion) -> bool:
+    """Vrai si la version porte une compilation produite par le compilateur courant."""
+    return (version.compiled_mapping is not None and version.compiled_hash is not None
+            and version.compiler_version == COMPILER_VERSION)
+
+def _compile_for_cache(dsl: dict) -> Dict[str, Any]:
+    """
+    Compile un DSL et retourne le contenu à persister dans MappingVersion.compiled_mapping.
+    Fonction de module pour pouvoir être exécutée dans un ProcessPoolExecutor.
+    """
+    return MappingService.compile(dsl).model_dump(exclude={"execution_plan"})
 
 class MappingService:
     """Service pour les opérations CRUD sur l'entité Mapping."""
@@ -137,8 +187,13 @@ class MappingService:
             node[leaf]["type"] = "nested" if "[]" in path or ctype == "nested" else "object"
 
     @staticmethod
-    def compile(mapping: Dict[str, Any], include_plan: bool = False) -> schemas.CompileOut:
-        """Compile un mapping DSL en mapping Elasticsearch exploitable."""
+    def compile(
+        mapping: Dict[str, Any], include_plan: bool = False, compiled_hash: Optional[str] = None
+    ) -> schemas.CompileOut:
+        """
+        Compile un mapping DSL en mapping Elasticsearch exploitable.
+        `compiled_hash` peut être fourni s'il a déjà été calculé par l'appelant.
+        """
         start_time = time.time()
         mapping_compile_total.inc()
         
@@ -186,13 +241,11 @@ class MappingService:
             node[parts[-1]] = field_def
 
         settings = mapping.get("settings") or {}
-        plan = [{"target": f["target"], "input": f["input"], "ops": f.get("pipeline", [])} for f in mapping["fields"]] if include_plan else None
+        plan = MappingService._execution_plan(mapping) if include_plan else None
         
         # Calcul du hash du DSL normalisé pour idempotence
-        dsl = dict(mapping)  # Copie défensive
-        dsl.setdefault("dsl_version", "2.2")  # Version V2.2 par défaut
-        normalized = _normalized_dsl(dsl)
-        compiled_hash = _sha256(normalized)
+        if compiled_hash is None:
+            compiled_hash = _compiled_hash(mapping)
         
         # Génération automatique des pipelines d'ingestion et politiques ILM
         ingest = MappingService._gen_ingest_pipeline(mapping)
@@ -205,7 +258,6 @@ class MappingService:
         if mapping.get("runtime_fields"):
             mappings["runtime"] = mapping["runtime_fields"]
         
-        # ⚠️ stocke compiled_hash quand tu persistes MappingVersion
         out = schemas.CompileOut(
             settings=settings, 
             mappings=mappings, 
@@ -221,22 +273,133 @@ class MappingService:
         
         return out
 
+    @staticmethod
+    def _execution_plan(mapping: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Construit le plan d'exécution (inputs + ops) de chaque champ."""
+        return [{"target": f["target"], "input": f["input"], "ops": f.get("pipeline", [])} for f in mapping["fields"]]
+
+    # Cache de compilation persistant (MappingVersion.compiled_mapping)
+    async def compile_cached(
+        self, db: AsyncSession, mapping: Dict[str, Any], include_plan: bool = False
+    ) -> schemas.CompileOut:
+        """
+        Compile un mapping DSL en réutilisant la compilation persistée d'une
+        MappingVersion de même compiled_hash, produite par le compilateur courant.
+        Recompile seulement en cas d'absence.
+        """
+        compiled_hash = _compiled_hash(mapping)
+        cached = await self._get_cached_compilation(db, compiled_hash)
+        if cached is None:
+            mapping_compile_cache_misses_total.inc()
+            return self.compile(mapping, include_plan=include_plan, compiled_hash=compiled_hash)
+
+        mapping_compile_cache_hits_total.inc()
+        out = schemas.CompileOut(**cached)
+        if include_plan:
+            out.execution_plan = self._execution_plan(mapping)
+        return out
+
+    async def precompile_active_versions(
+        self, db: AsyncSession, force: bool = False, max_workers: Optional[int] = None
+    ) -> schemas.PrecompileOut:
+        """
+        Précompile en parallèle (un processus par worker) toutes les versions actives
+        et persiste le résultat. Sans `force`, les versions déjà compilées par le
+        compilateur courant sont ignorées.
+        """
+        result = await db.execute(
+            select(models.MappingVersion).where(models.MappingVersion.is_active == True)
+        )
+        versions = result.scalars().all()
+        todo = [v for v in versions if force or not _has_current_compilation(v)]
+
+        failed: List[Dict[str, Any]] = []
+        if todo:
+            loop = asyncio.get_running_loop()
+            # spawn : pas de fork d'un processus qui porte la boucle, les pools asyncpg/aiohttp et des threads
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                outputs = await asyncio.gather(
+                    *(loop.run_in_executor(pool, _compile_for_cache, v.dsl_content) for v in todo),
+                    return_exceptions=True,
+                )
+            for version, output in zip(todo, outputs):
+                if isinstance(output, BaseException):
+                    logger.warning(f"Précompilation échouée pour la version {version.id}: {output}")
+                    failed.append({"version_id": str(version.id), "error": str(output)})
+                    continue
+                version.compiled_mapping = output
+                version.compiled_hash = output["compiled_hash"]
+                version.compiler_version = COMPILER_VERSION
+            await db.commit()
+
+        compiled = len(todo) - len(failed)
+        logger.info(f"Précompilation : {compiled} version(s) compilée(s), {len(failed)} échec(s).")
+        return schemas.PrecompileOut(
+            total=len(versions),
+            compiled=compiled,
+            skipped=len(versions) - len(todo),
+            failed=failed,
+        )
+
+    async def _get_cached_compilation(self, db: AsyncSession, compiled_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Retourne la compilation persistée pour un compiled_hash, ou None. Une
+        compilation d'une autre version du compilateur compte comme absente.
+        """
+        query = (
+            select(models.MappingVersion.compiled_mapping)
+            .where(
+                models.MappingVersion.compiled_hash == compiled_hash,
+                models.MappingVersion.compiler_version == COMPILER_VERSION,
+                models.MappingVersion.compiled_mapping.isnot(None),
+            )
+            .limit(1)
+        )
+        result = await db.execute(query)
+        cached = result.scalar_one_or_none()
+        # Les anciennes lignes peuvent ne contenir que le mapping ES : on les ignore
+        if not isinstance(cached, dict) or "mappings" not in cached or "settings" not in cached:
+            return None
+        return cached
+
+    @staticmethod
+    def _fill_compile_cache(version: models.MappingVersion) -> None:
+        """Compile le DSL d'une version et renseigne compiled_mapping / compiled_hash / compiler_version."""
+        try:
+            compiled = _compile_for_cache(version.dsl_content)
+        except Exception as e:
+            # Un DSL incomplet reste enregistrable : la version n'a simplement pas de cache
+            logger.warning(f"Compilation impossible pour la version {version.id}, cache non renseigné: {e}")
+            version.compiled_mapping = None
+            version.compiled_hash = None
+            version.compiler_version = None
+            return
+        version.compiled_mapping = compiled
+        version.compiled_hash = compiled["compiled_hash"]
+        version.compiler_version = COMPILER_VERSION
+
     @staticmethod
     def dry_run(mapping: Dict[str, Any], sample: Dict[str, Any]) -> schemas.DryRunOut:
         """Exécute un dry-run du mapping sur un échantillon de données."""
+        from .schemas import DryRunOut
+        return DryRunOut(**MappingService.dry_run_data(mapping, sample))
+
+    @staticmethod
+    def dry_run_data(mapping: Dict[str, Any], sample: Dict[str, Any]) -> Dict[str, Any]:
+        """Comme `dry_run`, mais retourne le résultat brut de l'exécuteur, sans validation Pydantic."""
         start_time = time.time()
         dry_run_total.inc()
         
         from app.domain.mapping.executor import run_dry_run
         
-        # sample attend "rows": List[Dict[str, Any]]
-        rows = sample.get("rows", [])
-        
-        # Mesurer la taille de l'échantillon
-        dry_run_sample_size.observe(len(rows))
+        # sample attend "rows" : liste ou itérable de Dict[str, Any] (lignes lues en flux)
+        rows = _CountedRows(sample.get("rows", []))
         
         result = run_dry_run(mapping, rows)
         
+        # Mesurer la taille de l'échantillon
+        dry_run_sample_size.observe(rows.count)
+        
         # Mesurer la durée et incrémenter les issues par code
         duration_ms = (time.time() - start_time) * 1000
         dry_run_duration_ms.observe(duration_ms)
@@ -247,8 +410,53 @@ class MappingService:
                 code = issue.get("code", "unknown")
                 dry_run_issues_total.labels(code=code).inc()
         
-        from .schemas import DryRunOut
-        return DryRunOut(**result)
+        return result
+
+    @staticmethod
+    def dry_run_stream(mapping: Dict[str, Any], sample: Dict[str, Any],
+                       batch_size: int = DRY_RUN_STREAM_BATCH,
+                       sample_info: Optional[Dict[str, Any]] = None) -> Iterator[bytes]:
+        """
+        Dry-run en NDJSON : une ligne par document (`type: doc`) ou issue
+        (`type: issue`), émise au fil de l'exécution, puis une ligne finale
+        `type: summary` (compteurs, stats, durée). Le premier enregistrement part
+        immédiatement, les suivants par lots ; rien n'est accumulé côté serveur.
+        Une erreur en cours de route est signalée par une ligne `type: error`.
+        `sample_info` (échantillonnage côté serveur) est repris dans `stats.sample`.
+        """
+        start_time = time.time()
+        dry_run_total.inc()
+
+        from app.domain.mapping.executor import iter_dry_run
+
+        rows = _CountedRows(sample.get("rows", []))
+
+        stats: Dict[str, Any] = {}
+        counts = {"doc": 0, "issue": 0}
+        buffer: List[bytes] = []
+        try:
+            for kind, item in iter_dry_run(mapping, rows, stats):
+                counts[kind] += 1
+                if kind == "issue":
+                    dry_run_issues_total.labels(code=item.get("code", "unknown")).inc()
+                buffer.append(json_dumps({"type": kind, **item}))
+                if len(buffer) >= batch_size or counts["doc"] + counts["issue"] == 1:
+                    yield b"\n".join(buffer) + b"\n"
+                    buffer.clear()
+        except Exception as e:
+            logger.exception("Dry-run en flux interrompu")
+            buffer.append(json_dumps({"type": "error", "msg": str(e)}))
+            yield b"\n".join(buffer) + b"\n"
+            return
+
+        duration_ms = (time.time() - start_time) * 1000
+        dry_run_duration_ms.observe(duration_ms)
+        dry_run_sample_size.observe(rows.count)
+        if sample_info is not None:
+            stats["sample"] = sample_info
+        buffer.append(json_dumps({"type": "summary", "docs": counts["doc"], "issues": counts["issue"],
+                                  "stats": stats, "duration_ms": round(duration_ms, 3)}))
+        yield b"\n".join(buffer) + b"\n"
 
     @staticmethod
     def infer_types(rows: List[dict], globals_cfg: dict) -> InferTypesOut:
@@ -262,6 +470,76 @@ class MappingService:
         data = estimate_size(mapping, field_stats, num_docs, replicas, target_shard_gb)
         return EstimateSizeOut(**data)
 
+    @staticmethod
+    def check_ids(rows_factory, id_policy: dict, mode: str = "exact", fp_rate: float = 0.01,
+                  capacity: Optional[int] = None) -> CheckIdsOut:
+        """Vérifie les collisions d'ID (mode exact avec déversement disque, ou bloom)."""
+        result = _check_ids(rows_factory, id_policy or {}, mode=mode, fp_rate=fp_rate, capacity=capacity)
+        mapping_check_ids_total.inc()
+        if result["duplicates"] > 0:
+            mapping_check_ids_duplicates.inc(result["duplicates"])
+        return CheckIdsOut(**result)
+
+    async def check_ids_on_file(self, db: AsyncSession, file_id: uuid.UUID, user: User, id_policy: dict,
+                                mode: str = "exact", fp_rate: float = 0.01) -> CheckIdsOut:
+        """Vérifie les collisions d'ID sur un fichier stocké, lu en flux (hors boucle d'événements)."""
+        from app.domain.file.services import FileService
+        from app.domain.file.readers import get_stored_path, iter_file_rows
+
+        file = await FileService().get_owned_by_user(db, file_id, user)
+        path = get_stored_path(file)
+        if not path.exists():
+            raise ResourceNotFoundError("Fichier physique introuvable.")
+        return await asyncio.to_thread(
+            self.check_ids, lambda: iter_file_rows(path), id_policy, mode, fp_rate, file.line_count
+        )
+
+    async def sample_file(self, db: AsyncSession, file_id: uuid.UUID, user: User, mapping: Dict[str, Any],
+                          sampling: schemas.DryRunSampling) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Tire côté serveur un échantillon d'un fichier stocké pour le dry-run,
+        lu en flux (hors boucle d'événements). Retourne les lignes et le résumé
+        de l'échantillonnage (index d'origine des lignes, strates...).
+        """
+        from app.domain.file.services import FileService
+        from app.domain.file.readers import get_stored_path, iter_file_rows
+
+        file = await FileService().get_owned_by_user(db, file_id, user)
+        path = get_stored_path(file)
+        if not path.exists():
+            raise ResourceNotFoundError("Fichier physique introuvable.")
+        return await asyncio.to_thread(
+            sample_rows, iter_file_rows(path), sampling.strategy, sampling.size,
+            column=sampling.column, seed=sampling.seed, mapping=mapping,
+        )
+
+    async def check_ids_job(self, db: AsyncSession, job: schemas.CheckIdsJobIn, user: User) -> CheckIdsOut:
+        """
+        Vérifie les collisions d'ID d'un fichier stocké avec l'id_policy d'une
+        version de mapping : lecture en flux, shards traités en parallèle.
+        """
+        from app.domain.file.services import FileService
+        from app.domain.file.readers import get_stored_path, iter_file_rows
+
+        version = await self.get_version(db, job.mapping_id, user, job.version)
+        file = await FileService().get_owned_by_user(db, job.file_id, user)
+        path = get_stored_path(file)
+        if not path.exists():
+            raise ResourceNotFoundError("Fichier physique introuvable.")
+
+        build_id = make_id_builder(version.dsl_content.get("id_policy") or {})
+        if build_id is None:
+            raise InvalidMappingError("La version de mapping ne définit pas d'id_policy.")
+
+        # Nombre de shards fixé par la taille du fichier, nombre de processus par `workers`
+        result = await asyncio.to_thread(
+            check_ids_sharded, iter_file_rows(path), build_id, shards_for_size(path.stat().st_size), job.workers
+        )
+        mapping_check_ids_total.inc()
+        if result["duplicates"] > 0:
+            mapping_check_ids_duplicates.inc(result["duplicates"])
+        return CheckIdsOut(**result)
+
     @staticmethod
     def _gen_ingest_pipeline(mapping: dict) -> dict:
         """Génère un pipeline d'ingestion automatique."""
@@ -341,6 +619,7 @@ class MappingService:
             created_by=user.id,
             is_active=version_in.is_active or False
         )
+        self._fill_compile_cache(new_version)
         db.add(new_version)
         
         await db.commit()
@@ -364,6 +643,9 @@ class MappingService:
         for field, value in update_data.items():
             setattr(version, field, value)
         
+        if "dsl_content" in update_data:
+            self._fill_compile_cache(version)
+        
         await db.commit()
         await db.refresh(version)
         logger.info(f"Version {version.version} du mapping {version.mapping_id} mise à jour.")
@@ -410,6 +692,22 @@ class MappingService:
         max_version = result.scalar()
         return (max_version or 0) + 1
 
+    async def get_version(
+        self, db: AsyncSession, mapping_id: uuid.UUID, user: User, version: Optional[int] = None
+    ) -> models.MappingVersion:
+        """Récupère une version d'un mapping (la version active par défaut)."""
+        await self.get_owned_by_user(db, mapping_id, user)
+        query = select(models.MappingVersion).where(models.MappingVersion.mapping_id == mapping_id)
+        if version is None:
+            query = query.where(models.MappingVersion.is_active.is_(True))
+        else:
+            query = query.where(models.MappingVersion.version == version)
+        result = await db.execute(query.order_by(models.MappingVersion.version.desc()).limit(1))
+        mapping_version = result.scalars().first()
+        if not mapping_version:
+            raise ResourceNotFoundError("Version non trouvée.")
+        return mapping_version
+
     async def _get_version_by_id(self, db: AsyncSession, version_id: uuid.UUID, user: User) -> models.MappingVersion:
         """Récupère une version par son ID et vérifie les permissions."""
         version = await db.get(models.MappingVersion, version_id)
@@ -0,0 +1,96 @@
+"""
+app/domain/user/cache.py
+Cache en mémoire (TTL court, LRU) des utilisateurs authentifiés, indexé par
+(id utilisateur, `iat` du token). Évite une requête SQL par requête HTTP
+authentifiée ; les changements de rôle ou de statut l'invalident explicitement.
+"""
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import Counter
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.domain.user.models import User
+from app.domain.user.schemas import UserRole
+
+USER_CACHE_REQUESTS = Counter(
+    "auth_user_cache_requests_total",
+    "Résolutions de l'utilisateur authentifié par issue (hit, miss, claims)", ["result"])
+
+Key = Tuple[uuid.UUID, int]
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """Utilisateur reconstruit depuis les seules claims du JWT (chemin rapide des lectures)."""
+    id: uuid.UUID
+    role: UserRole
+
+
+class UserCache:
+    """
+    Instantanés des colonnes de l'utilisateur (jamais l'instance ORM elle-même,
+    qui appartient à la session de la requête qui l'a chargée). Chaque requête
+    reçoit sa propre instance, rattachée à sa session sans requête SQL.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Date (epoch) de la dernière invalidation par utilisateur
+        self._invalidated_at: Dict[uuid.UUID, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, user_id: uuid.UUID, iat: int) -> Optional[Dict[str, Any]]:
+        key = (user_id, iat)
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, snapshot = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return snapshot
+
+    def put(self, user_id: uuid.UUID, iat: int, user: User) -> None:
+        if not self.enabled:
+            return
+        snapshot = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+        self._entries[(user_id, iat)] = (time.monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end((user_id, iat))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """À appeler après tout changement de rôle ou de statut : oublie toutes les entrées de l'utilisateur."""
+        for key in [k for k in self._entries if k[0] == user_id]:
+            del self._entries[key]
+        self._invalidated_at[user_id] = time.time()
+
+    def invalidated_since(self, user_id: uuid.UUID, iat: int) -> bool:
+        """Vrai si l'utilisateur a été invalidé après l'émission du token."""
+        return self._invalidated_at.get(user_id, 0.0) >= iat
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._invalidated_at.clear()
+
+    async def attach(self, db: AsyncSession, snapshot: Dict[str, Any]) -> User:
+        """Instance propre à la session de la requête, construite depuis l'instantané (sans SELECT)."""
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
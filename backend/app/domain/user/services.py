@@ -3,6 +3,7 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.domain.user.models import User
+from app.domain.user.cache import user_cache
 from app.core.security import get_password_hash, verify_password
 from app.domain.user.schemas import UserCreate, UserRole
 from fastapi import HTTPException
@@ -54,6 +55,15 @@ class UserService:
         await db.refresh(user)
         return user
 
+    @staticmethod
+    async def set_role(db: AsyncSession, user: User, role: UserRole) -> User:
+        """Change le rôle d'un utilisateur et invalide ses entrées du cache d'authentification."""
+        user.role = role
+        await db.commit()
+        await db.refresh(user)
+        user_cache.invalidate(user.id)
+        return user
+
     async def authenticate(self, db: AsyncSession, username: str, password: str) -> User | None:
         """Authentifie un utilisateur."""
         user = await self.get_by_username(db, username)
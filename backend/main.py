@@ -5,9 +5,14 @@ from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Imports des modules de l'application
-from app.api.v1 import analyzers, projects, es_config_files, auth, datasets, files, mappings, dictionaries, demo
-from app.core.db import engine, Base, get_db
+from app.api.v1 import analyzers, projects, es_config_files, auth, datasets, files, mappings, dictionaries, demo, monitoring
+from app.core.db import engine, Base, get_db, async_session_maker, dispose_engines
 from app.core.logging_config import setup_logging
+from app.core.body_limit import BodyLimitMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.config import settings
+from app.core.es_client import es_registry
+from app.domain.file.events import file_events
 
 # Import explicite de tous les modèles SQLAlchemy dans le bon ordre
 from app.domain.user.models import User
@@ -83,6 +88,12 @@ async def lifespan(app: FastAPI):
     configure_mappers()
     logger.info("Relations SQLAlchemy configurées.")
 
+    # Clients Elasticsearch partagés (un pool de connexions par cluster)
+    await es_registry.startup()
+
+    # Bus des événements de fichier (LISTEN/NOTIFY si FILE_EVENTS_BACKEND=postgres)
+    await file_events.startup()
+
     # Warm-up performance : précharger les mappings actifs et compiler les pipelines
     try:
         from app.domain.mapping.services import MappingService
@@ -105,11 +116,12 @@ async def lifespan(app: FastAPI):
             
         if active_versions:
             logger.info(f"Warm-up : précompilation de {len(active_versions)} mappings actifs")
+            # Compilation parallèle + persistance dans MappingVersion.compiled_mapping
+            async with async_session_maker() as db:
+                await MappingService().precompile_active_versions(db)
+
             for version in active_versions:
                 try:
-                    # Calculer compiled_hash et compiler le mapping
-                    MappingService.compile(version.dsl_content, include_plan=False)
-                    
                     # Warm-up des pipelines d'exécution
                     from app.domain.mapping.executor import run_dry_run
                     # Précompiler avec un échantillon minimal
@@ -130,6 +142,9 @@ async def lifespan(app: FastAPI):
     yield  # L'application s'exécute ici
 
     logger.info("Arrêt de l'application...")
+    await es_registry.close()
+    await file_events.close()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -148,14 +163,23 @@ origins = [
     "http://127.0.0.1:3000", # Alternative localhost
 ]
 
+# Limite de taille des corps de requête, appliquée pendant la lecture (y compris en chunked).
+# Ajoutée avant CORSMiddleware pour s'exécuter à l'intérieur : les 413 portent les en-têtes CORS.
+app.add_middleware(BodyLimitMiddleware, limits=settings.REQUEST_BODY_LIMITS)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,  # Utiliser la liste spécifique au lieu de "*"
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Curseur de pagination des listings (GET /datasets/{id}/files)
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Latence par route, requêtes en cours et profils des requêtes lentes (ajouté en dernier : mesure toute la pile)
+app.add_middleware(RequestMetricsMiddleware)
+
 # --- NOUVEAU : Gestionnaire d'exceptions global ---
 @app.exception_handler(AppException)
 async def app_exception_handler(request: Request, exc: AppException):
@@ -186,13 +210,14 @@ async def health_check():
 @app.get("/ready", tags=["Health Checks"])
 async def readiness_check(db: AsyncSession = Depends(get_db)):
     """Vérifie si l'application est prête à accepter du trafic (readiness probe)."""
+    elasticsearch = await es_registry.health()
     try:
         await db.execute("SELECT 1")
         logger.info("Readiness check réussi.")
-        return {"status": "ready", "dependencies": {"database": "ok"}}
+        return {"status": "ready", "dependencies": {"database": "ok", "elasticsearch": elasticsearch}}
     except Exception as e:
         logger.error(f"Readiness check échoué : impossible de se connecter à la base de données. Erreur: {e}")
-        return {"status": "not_ready", "dependencies": {"database": "error"}}
+        return {"status": "not_ready", "dependencies": {"database": "error", "elasticsearch": elasticsearch}}
 
 @app.get("/metrics", tags=["Monitoring"])
 async def metrics():
@@ -213,6 +238,7 @@ app.include_router(es_config_files.router, prefix="/api/v1/es_config_files", tag
 app.include_router(mappings.router, prefix="/api/v1", tags=["Mappings"])
 app.include_router(dictionaries.router, prefix="/api/v1", tags=["Dictionaries"])
 app.include_router(demo.router, prefix="/api/v1/demo", tags=["Demo"])
+app.include_router(monitoring.router, prefix="/api/v1/monitoring", tags=["Monitoring"])
 
 if __name__ == "__main__":
     import os
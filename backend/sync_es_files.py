@@ -1,7 +1,10 @@
 """sync_es_files.py """
-import shutil
+import argparse
+import sys
 from pathlib import Path
 
+from app.domain.analysis_files.sync import delta_sync
+
 # --- Configuration ---
 # Le dossier source dans votre projet backend
 SOURCE_DIR = Path(__file__).parent / "app" / "es_analysis_files"
@@ -10,56 +13,29 @@ SOURCE_DIR = Path(__file__).parent / "app" / "es_analysis_files"
 DEST_DIR = Path("/usr/share/elasticsearch/config/analysis")
 
 
-def sync_files():
+def sync_files(source: Path = SOURCE_DIR, dest: Path = DEST_DIR, delete: bool = False) -> int:
     """
-    Synchronise les fichiers du dossier SOURCE_DIR vers DEST_DIR.
+    Synchronise les fichiers du dossier source vers la destination.
 
-    Copie un fichier si :
-    - Il n'existe pas dans la destination.
-    - Sa date de dernière modification est plus récente dans la source.
+    Un fichier est copié s'il n'existe pas dans la destination ou si son
+    contenu (SHA-256) diffère ; les dates de modification ne comptent pas.
+    Retourne 1 si une copie a échoué, 0 sinon.
     """
     print("--- Début de la synchronisation des fichiers d'analyse ES ---")
+    source.mkdir(parents=True, exist_ok=True)
+    report = delta_sync(source, dest, delete=delete)
 
-    # S'assurer que les dossiers existent
-    SOURCE_DIR.mkdir(exist_ok=True)
-    DEST_DIR.mkdir(exist_ok=True)
-
-    source_files = [f for f in SOURCE_DIR.iterdir() if f.is_file()]
-
-    if not source_files:
-        print("Aucun fichier à synchroniser dans le dossier source.")
-        return
-
-    copied_count = 0
-    skipped_count = 0
-
-    for src_file in source_files:
-        dest_file = DEST_DIR / src_file.name
-
-        should_copy = False
-        if not dest_file.exists():
-            print(f"[Nouveau] Le fichier '{src_file.name}' n'existe pas dans la destination.")
-            should_copy = True
-        else:
-            src_mtime = src_file.stat().st_mtime
-            dest_mtime = dest_file.stat().st_mtime
-            if src_mtime > dest_mtime:
-                print(f"[Modifié] Le fichier source '{src_file.name}' est plus récent.")
-                should_copy = True
-
-        if should_copy:
-            try:
-                shutil.copy2(src_file, dest_file)  # copy2 préserve les métadonnées
-                print(f"  -> Copié : '{src_file.name}' vers '{DEST_DIR}'")
-                copied_count += 1
-            except Exception as e:
-                print(f"  -> ERREUR lors de la copie de '{src_file.name}': {e}")
-        else:
-            skipped_count += 1
+    for name in report.copied:
+        print(f"  -> Copié : '{name}' vers '{dest}'")
+    for name in report.deleted:
+        print(f"  -> Supprimé : '{name}'")
+    for name, error in report.errors.items():
+        print(f"  -> ERREUR pour '{name}': {error}")
 
     print("\n--- Synchronisation terminée ---")
-    print(f"Fichiers copiés/mis à jour : {copied_count}")
-    print(f"Fichiers ignorés (à jour) : {skipped_count}")
+    print(f"Fichiers copiés/mis à jour : {len(report.copied)}")
+    print(f"Fichiers ignorés (contenu identique) : {len(report.unchanged)}")
+    return 1 if report.errors else 0
 
 
 if __name__ == "__main__":
@@ -67,4 +43,9 @@ if __name__ == "__main__":
     # à l'intérieur du conteneur Elasticsearch.
     # Exemple : docker-compose exec elasticsearch python /chemin/vers/sync_es_files.py
     # Il est plus pratique de l'intégrer au démarrage du conteneur.
-    sync_files()
+    parser = argparse.ArgumentParser(description="Synchronisation différentielle des fichiers d'analyse ES")
+    parser.add_argument("--source", type=Path, default=SOURCE_DIR)
+    parser.add_argument("--dest", type=Path, default=DEST_DIR)
+    parser.add_argument("--delete", action="store_true", help="Supprime les fichiers absents de la source")
+    args = parser.parse_args()
+    sys.exit(sync_files(args.source, args.dest, args.delete))
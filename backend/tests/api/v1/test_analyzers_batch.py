@@ -0,0 +1,48 @@
+"""Tests API de l'analyse par lot (flux NDJSON, moteur local)."""
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from main import app
+
+pytestmark = pytest.mark.asyncio
+
+GRAPH = {
+    "nodes": [
+        {"id": "in", "kind": "input", "name": "Input Text"},
+        {"id": "t", "kind": "tokenizer", "name": "standard"},
+        {"id": "f", "kind": "token_filter", "name": "lowercase"},
+        {"id": "out", "kind": "output", "name": "Output"},
+    ],
+    "edges": [
+        {"id": "e1", "source": "in", "target": "t"},
+        {"id": "e2", "source": "t", "target": "f"},
+        {"id": "e3", "source": "f", "target": "out"},
+    ],
+}
+
+
+async def post(url, body):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        return await ac.post(url, json=body)
+
+
+async def test_batch_streams_one_line_per_text():
+    resp = await post(
+        "/api/v1/analyzer/analyze/batch?engine=local&top_n=1",
+        {"graph": GRAPH, "texts": ["Quick Fox", "quick dog"]},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [[t["token"] for t in line["tokens"]] for line in lines[:2]] == [["quick", "fox"], ["quick", "dog"]]
+    assert lines[2]["summary"]["token_frequency"] == [["quick", 2]]
+    assert [s["name"] for s in lines[2]["summary"]["stages"]] == ["standard", "lowercase"]
+
+
+async def test_batch_rejects_unsupported_local_component():
+    graph = {**GRAPH, "nodes": [*GRAPH["nodes"][:1], {"id": "t", "kind": "tokenizer", "name": "classic"},
+                                *GRAPH["nodes"][2:]]}
+    resp = await post("/api/v1/analyzer/analyze/batch?engine=local", {"graph": graph, "texts": ["x"]})
+    assert resp.status_code == 422
@@ -0,0 +1,126 @@
+"""Tests du cache des utilisateurs authentifiés et du chemin rapide par claims JWT."""
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.security import create_access_token
+from app.domain.user import services as user_services
+from app.domain.user.cache import user_cache
+from app.domain.user.models import User
+from app.domain.user.schemas import UserRole
+from app.domain.user.services import user_service
+from main import app
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    # Seule la table users est créée : les autres modèles utilisent des types propres à PostgreSQL
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(User.__table__.create)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_client(session_maker):
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    del app.dependency_overrides[get_db]
+
+
+@pytest_asyncio.fixture
+async def db_session(session_maker):
+    async with session_maker() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def user(db_session):
+    user = User(username="alice", email="alice@example.com", hashed_password="x", role=UserRole.USER)
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+@pytest.fixture
+def count_user_queries(monkeypatch):
+    calls = []
+    original = user_services.UserService.get
+
+    async def counting_get(db, user_id):
+        calls.append(user_id)
+        return await original(db, user_id)
+
+    monkeypatch.setattr(user_services.UserService, "get", staticmethod(counting_get))
+    return calls
+
+
+def _cookies(user):
+    return {"access_token": f"Bearer {create_access_token({'sub': str(user.id), 'role': user.role.value})}"}
+
+
+@pytest.mark.asyncio
+async def test_cookie_auth_hits_database_once_per_token(async_client, user, count_user_queries):
+    cookies = _cookies(user)
+    for _ in range(3):
+        response = await async_client.get("/api/v1/auth/me", cookies=cookies)
+        assert response.status_code == 200
+        assert response.json()["username"] == "alice"
+    assert len(count_user_queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_role_change_invalidates_cache(async_client, db_session, user, count_user_queries):
+    cookies = _cookies(user)
+    await async_client.get("/api/v1/auth/me", cookies=cookies)
+    await user_service.set_role(db_session, user, UserRole.ADMIN)
+
+    response = await async_client.get("/api/v1/auth/me", cookies=cookies)
+    assert response.json()["role"] == "admin"
+    assert len(count_user_queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_claims_fast_path_skips_database(async_client, user, count_user_queries, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CLAIMS_FAST_PATH", True)
+    response = await async_client.get("/api/v1/mappings/schema", cookies=_cookies(user))
+    assert response.status_code == 200
+    assert count_user_queries == []
+
+    # Un token émis avant une invalidation repasse par la base
+    user_cache.invalidate(user.id)
+    response = await async_client.get("/api/v1/mappings/schema", cookies=_cookies(user))
+    assert response.status_code == 200
+    assert len(count_user_queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_claims_fast_path_trusts_only_recent_tokens(async_client, user, count_user_queries, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CLAIMS_FAST_PATH", True)
+    # Âge maximal négatif : tout token est trop ancien pour être cru sur ses seules claims
+    monkeypatch.setattr(settings, "AUTH_CLAIMS_MAX_AGE", -1)
+    response = await async_client.get("/api/v1/mappings/schema", cookies=_cookies(user))
+    assert response.status_code == 200
+    assert len(count_user_queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected(async_client):
+    response = await async_client.get("/api/v1/auth/me", cookies={"access_token": "Bearer invalide"})
+    assert response.status_code == 401
@@ -0,0 +1,113 @@
+"""Tests du dry-run sur un fichier stocké avec échantillonnage côté serveur."""
+import json
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.dependencies import get_current_user_from_cookie
+from app.core.config import settings
+from app.core.db import get_db
+from app.domain.dataset.models import Dataset
+from app.domain.file.models import File
+from app.domain.mapping.models import Mapping
+from app.domain.user.models import User
+from main import app
+
+TABLES = [User.__table__, Dataset.__table__, File.__table__, Mapping.__table__]
+
+MAPPING = {
+    "dsl_version": "1.0",
+    "index": "clients",
+    "id_policy": {"from": ["id"], "op": "concat", "sep": ":", "on_conflict": "error"},
+    "fields": [
+        {"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []},
+        {"target": "pays", "type": "keyword", "input": [{"kind": "column", "name": "pays"}],
+         "pipeline": [{"op": "lower"}]},
+    ],
+}
+
+
+@pytest_asyncio.fixture
+async def stored_file(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dry_run.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: [t.create(c) for t in TABLES])
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+
+    async with maker() as db:
+        owner = User(username="owner", email="owner@example.com", hashed_password="x")
+        other = User(username="other", email="other@example.com", hashed_password="x")
+        db.add_all([owner, other])
+        await db.flush()
+        dataset = Dataset(name="Clients", owner_id=owner.id)
+        db.add(dataset)
+        await db.flush()
+        file = File(filename_original="clients.csv", filename_stored="clients.csv", version=1, hash="h",
+                    size_bytes=1, dataset_id=dataset.id, uploader_id=owner.id)
+        db.add(file)
+        await db.commit()
+
+    lines = ["id;pays"] + [f"{i};{'BE' if i % 50 == 0 else 'FR'}" for i in range(1_000)]
+    (tmp_path / str(dataset.id)).mkdir()
+    (tmp_path / str(dataset.id) / "clients.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    async def override_get_db():
+        async with maker() as session:
+            yield session
+
+    current = {"user": owner}
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user_from_cookie] = lambda: current["user"]
+    yield file, current, other
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def _post(payload, **params):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/api/v1/mappings/dry-run/file", params=params, json=payload)
+
+
+@pytest.mark.asyncio
+async def test_dry_run_on_stored_file_with_stratified_sampling(stored_file):
+    file, _, _ = stored_file
+    payload = {"file_id": str(file.id), "mapping": MAPPING,
+               "sampling": {"strategy": "stratified", "column": "pays", "size": 50, "seed": 1}}
+    response = await _post(payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    sample = data["stats"]["sample"]
+    assert sample["strategy"] == "stratified" and sample["rows_scanned"] == 1_000
+    assert sample["strata"] == {"FR": 49, "BE": 1}
+    assert len(data["docs_preview"]) == 50
+    assert [int(d["_id"]) for d in data["docs_preview"]] == sample["source_rows"]
+
+    raw = await _post(payload, raw="true")
+    assert raw.json() == data
+
+
+@pytest.mark.asyncio
+async def test_dry_run_on_stored_file_streams_with_sample_summary(stored_file):
+    file, _, _ = stored_file
+    payload = {"file_id": str(file.id), "mapping": MAPPING, "sampling": {"strategy": "head", "size": 10}}
+    response = await _post(payload, stream="ndjson")
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["_id"] for r in records if r["type"] == "doc"] == [str(i) for i in range(10)]
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["stats"]["sample"]["source_rows"] == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_dry_run_on_stored_file_checks_ownership_and_options(stored_file):
+    file, current, other = stored_file
+    invalid = await _post({"file_id": str(file.id), "mapping": MAPPING, "sampling": {"strategy": "stratified"}})
+    assert invalid.status_code == 422
+
+    current["user"] = other
+    forbidden = await _post({"file_id": str(file.id), "mapping": MAPPING})
+    assert forbidden.status_code == 403
@@ -204,3 +204,99 @@ async def test_structured_logging():
     assert "docs_preview" in data
     assert "issues" in data
     assert "stats" in data
+
+
+@pytest.mark.asyncio
+async def test_dry_run_raw_response_matches_default():
+    """Test que `raw=true` renvoie le même JSON que la réponse validée par le modèle."""
+    from httpx import ASGITransport
+    body = {
+        "dsl_version": "1.0",
+        "index": "test",
+        "globals": {"nulls": [""], "date_formats": ["yyyy-MM-dd"], "default_tz": "UTC"},
+        "id_policy": {"from": ["id"], "op": "concat", "sep": ":", "on_conflict": "error"},
+        "fields": [
+            {"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []},
+            {"target": "nom", "type": "keyword", "input": [{"kind": "column", "name": "nom"}],
+             "pipeline": [{"op": "trim"}]},
+        ],
+        "sample": {"rows": [{"id": "1", "nom": " Éric "}, {"id": "1", "nom": "Zoé"}]},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        default = await ac.post("/api/v1/mappings/dry-run/test", json=body)
+        raw = await ac.post("/api/v1/mappings/dry-run/test", params={"raw": "true"}, json=body)
+
+    assert default.status_code == raw.status_code == 200
+    assert raw.json() == default.json()
+    assert raw.json()["issues"][0]["code"] == "E_ID_CONFLICT"
+
+
+@pytest.mark.asyncio
+async def test_dry_run_ndjson_stream_matches_default():
+    """Test que `stream=ndjson` produit les mêmes documents, issues et stats, résumé en dernier."""
+    import json
+    from httpx import ASGITransport
+    body = {
+        "dsl_version": "1.0",
+        "index": "test",
+        "globals": {"nulls": [""], "date_formats": ["yyyy-MM-dd"], "default_tz": "UTC"},
+        "id_policy": {"from": ["id"], "op": "concat", "sep": ":", "on_conflict": "error"},
+        "fields": [
+            {"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []},
+        ],
+        "sample": {"rows": [{"id": str(i % 150)} for i in range(250)]},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        default = (await ac.post("/api/v1/mappings/dry-run/test", json=body)).json()
+        response = await ac.post("/api/v1/mappings/dry-run/test", params={"stream": "ndjson"}, json=body)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    summary = records.pop()
+    assert summary["type"] == "summary"
+    assert summary["docs"] == 250 and summary["issues"] == 100
+    assert summary["stats"] == default["stats"]
+    docs = [{k: v for k, v in r.items() if k != "type"} for r in records if r["type"] == "doc"]
+    issues = [{k: v for k, v in r.items() if k != "type"} for r in records if r["type"] == "issue"]
+    assert docs == default["docs_preview"]
+    assert issues == default["issues"]
+
+
+@pytest.mark.asyncio
+async def test_dry_run_reads_chunked_bodies_incrementally():
+    """Test que `/dry-run` accepte un corps chunked (sans Content-Length), en JSON comme en NDJSON."""
+    import json
+    from httpx import ASGITransport
+    from app.api.dependencies import get_current_claims_from_cookie
+    body = {
+        "dsl_version": "1.0",
+        "index": "test",
+        "fields": [{"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []}],
+        "id_policy": {"from": ["id"], "op": "concat", "sep": ":", "on_conflict": "error"},
+        "sample": {"rows": [{"id": str(i % 300)} for i in range(500)]},
+    }
+    raw = json.dumps(body).encode()
+
+    async def chunks():
+        for i in range(0, len(raw), 1000):
+            yield raw[i:i + 1000]
+
+    app.dependency_overrides[get_current_claims_from_cookie] = lambda: None
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            expected = (await ac.post("/api/v1/mappings/dry-run/test", json=body)).json()
+            response = await ac.post("/api/v1/mappings/dry-run", content=chunks())
+            streamed = await ac.post("/api/v1/mappings/dry-run", params={"stream": "ndjson"}, content=chunks())
+            invalid = await ac.post("/api/v1/mappings/dry-run", content=b'{"fields": [], "rows": [1,')
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == expected
+    summary = json.loads(streamed.text.splitlines()[-1])
+    assert summary["type"] == "summary" and summary["docs"] == 500 and summary["issues"] == 200
+    assert invalid.status_code == 400
@@ -0,0 +1,83 @@
+"""Tests de la fabrique d'engines SQLAlchemy et de son instrumentation."""
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import db
+from app.core.config import Settings
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_statement_type():
+    assert db.statement_type("  select 1") == "SELECT"
+    assert db.statement_type("(SELECT 1) UNION (SELECT 2)") == "SELECT"
+    assert db.statement_type("INSERT INTO t VALUES (1)") == "INSERT"
+    assert db.statement_type("CREATE TABLE t (id int)") == "OTHER"
+
+
+def test_engine_options_from_settings():
+    cfg = Settings(SECRET_KEY="x", DB_POOL_SIZE=3, DB_MAX_OVERFLOW=2, DB_STATEMENT_CACHE_SIZE=0)
+    options = db.engine_options("postgresql+asyncpg://u:p@localhost/x", cfg)
+    assert options["echo"] is False and options["pool_pre_ping"] is True
+    assert options["pool_size"] == 3 and options["max_overflow"] == 2
+    assert options["connect_args"] == {"prepared_statement_cache_size": 0, "statement_cache_size": 0}
+    # SQLite garde son pool par défaut
+    assert db.engine_options("sqlite+aiosqlite:///:memory:", cfg) == {"echo": False}
+
+
+def test_read_replica_engine_is_optional():
+    assert db.create_engine_from_settings(Settings(SECRET_KEY="x"), read_replica=True) is None
+    cfg = Settings(SECRET_KEY="x", DATABASE_READ_URL="postgresql+asyncpg://u:p@replica/x", DB_POOL_SIZE=4)
+    replica = db.create_engine_from_settings(cfg, read_replica=True)
+    assert replica.url.host == "replica" and replica.pool.size() == 4
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_and_query_latency_are_recorded(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}",
+                                 poolclass=db.InstrumentedQueuePool, pool_logging_name="test")
+    db._instrument(engine, "test")
+    checkouts = _sample("db_pool_checkout_wait_seconds_count", {"engine": "test"})
+    selects = _sample("db_query_duration_seconds_count", {"engine": "test", "statement": "SELECT"})
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("SELECT 2"))
+        assert _sample("db_pool_connections_checked_out", {"engine": "test"}) == 1
+    await engine.dispose()
+
+    assert _sample("db_pool_checkout_wait_seconds_count", {"engine": "test"}) == checkouts + 1
+    assert _sample("db_query_duration_seconds_count", {"engine": "test", "statement": "SELECT"}) == selects + 2
+
+
+class _Request:
+    def __init__(self, method):
+        self.method = method
+
+
+@pytest.mark.asyncio
+async def test_get_db_routes_reads_to_replica(monkeypatch):
+    used = []
+    monkeypatch.setattr(db, "read_session_maker", lambda: _Session(used, "replica"))
+    monkeypatch.setattr(db, "async_session_maker", lambda: _Session(used, "primary"))
+
+    for method in ("GET", "POST"):
+        async for _ in db.get_db(_Request(method)):
+            pass
+    assert used == ["replica", "primary"]
+
+
+class _Session:
+    def __init__(self, used, name):
+        self.used, self.name = used, name
+
+    async def __aenter__(self):
+        self.used.append(self.name)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
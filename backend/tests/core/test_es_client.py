@@ -0,0 +1,37 @@
+"""Tests du registre de clients Elasticsearch partagés."""
+import pytest
+
+from app.core.config import Settings
+from app.core.es_client import ESClientRegistry
+
+
+@pytest.fixture
+def registry():
+    cfg = Settings(
+        SECRET_KEY="x",
+        ES_HOST="http://localhost:1",
+        ES_CLUSTERS={"logs": "http://localhost:2"},
+        ES_CONNECTIONS_PER_NODE=4,
+    )
+    return ESClientRegistry(cfg)
+
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_per_cluster(registry):
+    default = registry.get()
+    assert registry.get() is default
+    assert registry.get("logs") is not default
+    assert registry.pool_stats() == {"nodes": 1, "in_use": 0, "max": 4}
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+    await registry.close()
+    assert registry.pool_stats() == {"nodes": 0, "in_use": 0, "max": 0}
+
+
+@pytest.mark.asyncio
+async def test_health_reports_unreachable_clusters(registry):
+    health = await registry.health()
+    assert set(health) == {"default", "logs"}
+    assert health["default"]["status"] == "unreachable"
+    assert health["logs"]["pool"]["max"] == 4
+    await registry.close()
@@ -0,0 +1,69 @@
+"""Tests du parseur JSON incrémental des lignes d'échantillon."""
+import json
+
+import pytest
+
+from app.core.json_stream import IncrementalRowsParser
+
+PATHS = (("sample", "rows"), ("rows",))
+
+
+def _parse(raw: bytes, step: int):
+    parser = IncrementalRowsParser(PATHS)
+    rows = []
+    for i in range(0, len(raw), step):
+        rows += parser.feed(raw[i:i + step])
+    rows += parser.close()
+    return parser, rows
+
+
+@pytest.mark.parametrize("step", [1, 5, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_rows_and_header_are_rebuilt_from_any_chunking(step, indent):
+    rows = [{"id": i, "nom": "Zoé \"Z\" \\ " * (i % 3), "score": i * 1.5e-3, "ok": i % 2 == 0, "x": None}
+            for i in range(40)]
+    body = {"dsl_version": "1.0", "fields": [{"target": "id"}], "sample": {"size": 40, "rows": rows, "seed": 3},
+            "globals": {"nulls": [""]}, "total": 123456}
+    parser, parsed = _parse(json.dumps(body, indent=indent, ensure_ascii=False).encode("utf-8"), step)
+
+    assert parsed == rows
+    assert parser.rows_path == ("sample", "rows") and parser.rows_count == 40
+    assert parser.header == {"dsl_version": "1.0", "fields": [{"target": "id"}], "sample": {"size": 40, "seed": 3},
+                             "globals": {"nulls": [""]}, "total": 123456}
+
+
+def test_rows_are_returned_as_soon_as_they_are_complete():
+    parser = IncrementalRowsParser(PATHS)
+    assert parser.feed(b'{"fields": [], "rows": [{"a": 1}, {"a"') == [{"a": 1}]
+    assert parser.header == {"fields": []}
+    assert parser.feed(b': 2}, {"a": 3}') == [{"a": 2}]
+    assert parser.feed(b"]}") == [{"a": 3}]
+    assert parser.close() == []
+
+
+def test_only_the_first_rows_array_is_streamed():
+    parser, rows = _parse(b'{"rows": [1, 2], "sample": {"rows": [3]}}', 3)
+    assert rows == [1, 2]
+    assert parser.header == {"sample": {"rows": [3]}}
+
+
+@pytest.mark.parametrize("step", [1, 4, 1 << 20])
+def test_root_array_is_streamed_with_the_empty_path(step):
+    parser = IncrementalRowsParser(row_paths=((),))
+    rows = []
+    raw = b' [{"a": 1}, [2, 3], "x", 4.5e-3, null] '
+    for i in range(0, len(raw), step):
+        rows += parser.feed(raw[i:i + step])
+    rows += parser.close()
+    assert rows == [{"a": 1}, [2, 3], "x", 4.5e-3, None]
+    assert parser.rows_path == () and parser.header == {}
+
+    for raw in (b"[1, 2", b"[1] [2]", b"[1 2]"):
+        with pytest.raises(ValueError):
+            IncrementalRowsParser(row_paths=((),)).feed(raw, final=True)
+
+
+@pytest.mark.parametrize("raw", [b"[1]", b'{"a": 1', b'{"a": 1} x', b'{"rows": [1,]}', b'{"a" 1}', b"\xff{}"])
+def test_invalid_bodies_raise_value_error(raw):
+    with pytest.raises(ValueError):
+        _parse(raw, 2)
@@ -0,0 +1,123 @@
+"""Tests du middleware de métriques HTTP et des profils de requêtes lentes."""
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from app.api.dependencies import get_current_user
+from app.core.request_metrics import ProfileStore, RequestMetricsMiddleware, RequestProfile, slow_request_profiles
+from app.domain.user.models import User
+from app.domain.user.schemas import UserRole
+from main import app as main_app
+
+
+def _build_app(**options):
+    store = ProfileStore(max_entries=2)
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware, store=store, **options)
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/metrics-test/in-flight")
+    async def in_flight():
+        return {"value": REGISTRY.get_sample_value("http_requests_in_progress", {"method": "GET"})}
+
+    @app.get("/metrics-test/missing")
+    async def missing():
+        raise HTTPException(status_code=404)
+
+    @app.get("/metrics-test/busy")
+    async def busy():
+        return {"total": _busy_loop()}
+
+    return app, store
+
+
+def _busy_loop() -> int:
+    return sum(i * i for i in range(200_000))
+
+
+def _count(route: str, status: str) -> float:
+    labels = {"route": route, "method": "GET", "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0.0
+
+
+async def _get(app, path: str):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+@pytest.mark.asyncio
+async def test_latency_is_labelled_by_route_template_and_status():
+    app, _ = _build_app(sample_rate=0)
+    route = "/metrics-test/items/{item_id}"
+    before_ok, before_missing = _count(route, "200"), _count("/metrics-test/missing", "404")
+
+    assert (await _get(app, "/metrics-test/items/1")).status_code == 200
+    assert (await _get(app, "/metrics-test/items/2")).status_code == 200
+    assert (await _get(app, "/metrics-test/missing")).status_code == 404
+    assert (await _get(app, "/metrics-test/nowhere")).status_code == 404
+
+    assert _count(route, "200") == before_ok + 2
+    assert _count("/metrics-test/missing", "404") == before_missing + 1
+    assert _count("unmatched", "404") >= 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_gauge_counts_the_current_request():
+    app, _ = _build_app(sample_rate=0)
+    response = await _get(app, "/metrics-test/in-flight")
+    assert response.json()["value"] >= 1
+    assert REGISTRY.get_sample_value("http_requests_in_progress", {"method": "GET"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_sampled_request_keeps_a_profile():
+    app, store = _build_app(sample_rate=1.0, threshold_ms=0, profiler="cprofile")
+    assert (await _get(app, "/metrics-test/busy")).status_code == 200
+
+    [profile] = store.list()
+    assert profile.route == "/metrics-test/busy"
+    assert profile.status == 200
+    assert profile.profiler == "cprofile"
+    assert "_busy_loop" in profile.report
+    assert "report" not in profile.summary()
+
+
+@pytest.mark.asyncio
+async def test_fast_or_unsampled_requests_are_not_profiled():
+    fast_app, fast_store = _build_app(sample_rate=1.0, threshold_ms=60_000)
+    unsampled_app, unsampled_store = _build_app(sample_rate=0, threshold_ms=0)
+    await _get(fast_app, "/metrics-test/busy")
+    await _get(unsampled_app, "/metrics-test/busy")
+    assert fast_store.list() == [] and unsampled_store.list() == []
+
+
+@pytest.mark.asyncio
+async def test_profile_store_evicts_the_oldest():
+    app, store = _build_app(sample_rate=1.0, threshold_ms=0)
+    for i in range(3):
+        await _get(app, f"/metrics-test/items/{i}")
+    assert [p.path for p in store.list()] == ["/metrics-test/items/2", "/metrics-test/items/1"]
+
+
+@pytest.mark.asyncio
+async def test_profiles_endpoint_is_admin_only():
+    profile = RequestProfile(method="GET", route="/x", path="/x", status=200, duration_ms=1500.0,
+                             profiler="cprofile", report="rapport")
+    slow_request_profiles.add(profile)
+    try:
+        main_app.dependency_overrides[get_current_user] = lambda: User(username="u", role=UserRole.USER)
+        assert (await _get(main_app, "/api/v1/monitoring/profiles")).status_code == 403
+
+        main_app.dependency_overrides[get_current_user] = lambda: User(username="a", role=UserRole.ADMIN)
+        listing = (await _get(main_app, "/api/v1/monitoring/profiles")).json()
+        assert listing[0]["id"] == profile.id and "report" not in listing[0]
+        detail = await _get(main_app, f"/api/v1/monitoring/profiles/{profile.id}")
+        assert detail.text == "rapport"
+        assert (await _get(main_app, "/api/v1/monitoring/profiles/absent")).status_code == 404
+    finally:
+        main_app.dependency_overrides.clear()
+        slow_request_profiles.clear()
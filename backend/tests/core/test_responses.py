@@ -0,0 +1,46 @@
+"""Tests de la réponse JSON rapide (orjson) utilisée par les dry-runs et les aperçus."""
+import datetime
+import decimal
+import json
+import uuid
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import RawJSONResponse, dumps
+from app.domain.mapping.schemas import DryRunOut
+
+
+def test_dumps_handles_data_row_types():
+    row = {
+        "ts": pd.Timestamp("2024-01-02 03:04:05"),
+        "day": datetime.date(2024, 1, 2),
+        "amount": decimal.Decimal("1.5"),
+        "count": np.int64(3),
+        "ratio": np.float32(0.5),
+        "id": uuid.UUID(int=1),
+        "missing": float("nan"),
+        1: "clé entière",
+    }
+    assert json.loads(dumps(row)) == {
+        "ts": "2024-01-02T03:04:05",
+        "day": "2024-01-02",
+        "amount": 1.5,
+        "count": 3,
+        "ratio": 0.5,
+        "id": "00000000-0000-0000-0000-000000000001",
+        "missing": None,
+        "1": "clé entière",
+    }
+
+
+def test_raw_response_matches_model_response_content():
+    result = {
+        "docs_preview": [{"_id": "1", "_source": {"nom": "Éric", "tags": ["a", "b"], "n": 1.25}}],
+        "issues": [{"row": 0, "field": "date", "code": "E_DATE_PARSE_FAIL", "msg": "invalid"}],
+        "stats": {"issues_per_code": {"E_DATE_PARSE_FAIL": 1}, "date_fail_per_field": {"date": 1}},
+    }
+    response = RawJSONResponse(result)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == jsonable_encoder(DryRunOut(**result))
@@ -0,0 +1,96 @@
+"""Tests du store des fichiers d'analyse (écriture en flux, manifeste) et de la synchronisation différentielle."""
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.domain.analysis_files import sync
+from app.domain.analysis_files.services import AnalysisFileStore
+from app.domain.analysis_files.sync import MANIFEST_NAME, delta_sync, hash_file
+
+
+@pytest.mark.asyncio
+async def test_save_streams_upload_and_updates_manifest(tmp_path):
+    store = AnalysisFileStore(tmp_path / "analysis", chunk_size=4)
+    content = "tv, télévision\nvoiture, auto\n".encode("utf-8")
+
+    entry = await store.save(UploadFile(io.BytesIO(content), filename="synonyms.txt"), "synonyms.txt")
+
+    path = tmp_path / "analysis" / "synonyms.txt"
+    assert path.read_bytes() == content
+    assert entry.sha256 == hash_file(path) and entry.size_bytes == len(content)
+    # Aucun fichier temporaire ne reste dans le dossier
+    assert os.listdir(tmp_path / "analysis") == ["synonyms.txt"]
+    assert [e.name for e in await store.manifest()] == ["synonyms.txt"]
+
+
+@pytest.mark.asyncio
+async def test_manifest_rehashes_only_changed_files(tmp_path, monkeypatch):
+    store = AnalysisFileStore(tmp_path)
+    (tmp_path / "stop.txt").write_text("le\nla\n", encoding="utf-8")
+    (tmp_path / ".hidden").write_text("x", encoding="utf-8")
+    (tmp_path / ".stop.txt.abc.part").write_text("partiel", encoding="utf-8")
+    first = await store.manifest()
+    assert [e.name for e in first] == ["stop.txt"]
+
+    hashed = []
+    original = sync.hash_file
+    monkeypatch.setattr(sync, "hash_file", lambda path, *a: hashed.append(path.name) or original(path, *a))
+
+    await store.manifest()
+    assert hashed == []
+
+    (tmp_path / "stop.txt").write_text("le\nla\nles\n", encoding="utf-8")
+    (tmp_path / "new.txt").write_text("a", encoding="utf-8")
+    entries = await store.manifest()
+    assert sorted(hashed) == ["new.txt", "stop.txt"]
+    assert entries[1].sha256 != first[0].sha256
+
+
+@pytest.mark.asyncio
+async def test_list_names_reads_only_the_directory(tmp_path, monkeypatch):
+    store = AnalysisFileStore(tmp_path)
+    (tmp_path / "b.txt").write_text("x", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("y", encoding="utf-8")
+    (tmp_path / ".a.txt.abc.part").write_text("partiel", encoding="utf-8")
+
+    def no_hash(*args):
+        raise AssertionError("contenu lu pour un simple listing")
+
+    monkeypatch.setattr(sync, "hash_file", no_hash)
+    assert await store.list_names() == ["a.txt", "b.txt"]
+
+
+def test_delta_sync_copies_only_changed_content(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    src.mkdir()
+    (src / "a.txt").write_text("alpha", encoding="utf-8")
+    (src / "b.txt").write_text("beta", encoding="utf-8")
+
+    report = delta_sync(src, dest)
+    assert report.copied == ["a.txt", "b.txt"] and (dest / MANIFEST_NAME).exists()
+
+    # mtime plus récent mais contenu identique : pas de copie
+    os.utime(src / "a.txt", (os.stat(src / "a.txt").st_atime, os.stat(src / "a.txt").st_mtime + 60))
+    (src / "b.txt").write_text("beta v2", encoding="utf-8")
+    report = delta_sync(src, dest)
+    assert report.copied == ["b.txt"] and report.unchanged == ["a.txt"]
+    assert (dest / "b.txt").read_text(encoding="utf-8") == "beta v2"
+
+    # Fichier modifié dans la destination : recopié
+    (dest / "a.txt").write_text("altéré", encoding="utf-8")
+    assert delta_sync(src, dest).copied == ["a.txt"]
+
+
+def test_delta_sync_delete_removes_files_missing_from_source(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    src.mkdir()
+    dest.mkdir()
+    (src / "keep.txt").write_text("1", encoding="utf-8")
+    (dest / "old.txt").write_text("2", encoding="utf-8")
+
+    assert delta_sync(src, dest).deleted == []
+    report = delta_sync(src, dest, delete=True)
+    assert report.deleted == ["old.txt"] and not (dest / "old.txt").exists()
+    assert report.unchanged == ["keep.txt"]
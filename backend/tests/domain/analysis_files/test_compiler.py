@@ -0,0 +1,124 @@
+"""Tests du compilateur de fichiers de synonymes et de stopwords."""
+import io
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.domain.analysis_files.compiler import compile_analysis_file, estimate_synonym_memory, find_cycles
+from app.domain.analysis_files.services import AnalysisFileStore
+
+
+def _write(tmp_path, content, name="src.txt"):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_solr_dedupes_normalizes_and_sorts(tmp_path):
+    src = _write(tmp_path, "# commentaire\nTV,  Télévision\ntélévision, tv\nvoiture, auto\na => c\nb => c\nc\\,d, e\n")
+    dest = tmp_path / "out.txt"
+
+    report = compile_analysis_file(src, dest, "solr", lowercase=True)
+
+    assert report.error_count == 0
+    assert report.rules_in == 6 and report.duplicates == 1
+    assert dest.read_text(encoding="utf-8").splitlines() == [
+        "a, b => c",
+        "voiture, auto",
+        "c\\,d, e",
+        "tv, télévision",
+    ]
+
+
+def test_solr_reports_syntax_errors_and_does_not_write(tmp_path):
+    src = _write(tmp_path, "a, , b\nx =>\np => q => r\nok, bon\n")
+    dest = tmp_path / "out.txt"
+
+    report = compile_analysis_file(src, dest, "solr")
+
+    assert report.error_count == 3
+    assert [e.line for e in report.errors] == [1, 2, 3]
+    assert not dest.exists()
+
+
+def test_cycles_and_explosive_expansions_are_flagged(tmp_path):
+    long_term = " ".join(f"mot{i}" for i in range(10))
+    src = _write(tmp_path, f"a => b\nb => c\nc => a\nz => y\n{long_term}, court\n")
+
+    report = compile_analysis_file(src, None, "solr", max_words=8)
+
+    assert report.cycles == [["a", "b", "c"]]
+    assert report.explosive_count == 1 and report.explosive[0]["max_words"] == 10
+    assert report.multiword_terms == 1
+
+
+def test_wordnet_groups_synsets(tmp_path):
+    src = _write(tmp_path, "s(1,1,'chat',n,1,0).\ns(1,2,'matou',n,1,0).\ns(2,1,'l''eau',n,1,0).\n"
+                           "s(2,2,'flotte',n,1,0).\nligne invalide\n")
+    report = compile_analysis_file(src, None, "wordnet")
+
+    assert report.rules_out == 2 and report.terms == 4
+    assert report.error_count == 1 and report.errors[0].line == 5
+
+
+def test_equivalences_keep_their_term_order(tmp_path):
+    # Sans expansion, ES réécrit chaque terme vers le premier du groupe
+    src = _write(tmp_path, "tv, television, tv\ntelevision, tv\n")
+    dest = tmp_path / "out.txt"
+
+    report = compile_analysis_file(src, dest, "solr", expand=False)
+
+    assert dest.read_text(encoding="utf-8").splitlines() == ["tv, television"]
+    assert report.duplicates == 1 and report.warnings[0].line == 2
+
+
+def test_wordnet_is_written_back_as_wordnet(tmp_path):
+    src = _write(tmp_path, "s(2,1,'voiture',n,1,0).\ns(2,2,'auto',n,1,0).\ns(1,1,'l''eau',n,1,0).\n"
+                           "s(1,2,'flotte',n,1,0).\n")
+    dest = tmp_path / "out.txt"
+
+    compile_analysis_file(src, dest, "wordnet")
+    lines = dest.read_text(encoding="utf-8").splitlines()
+
+    assert lines == [
+        "s(100000001,1,'voiture',n,1,0).",
+        "s(100000001,2,'auto',n,1,0).",
+        "s(100000002,1,'l''eau',n,1,0).",
+        "s(100000002,2,'flotte',n,1,0).",
+    ]
+    assert compile_analysis_file(dest, None, "wordnet").error_count == 0
+
+
+def test_stopwords_dedupes_and_warns_on_multiword(tmp_path):
+    src = _write(tmp_path, "le | article\nLa\nle\n# titre\nde la\n")
+    dest = tmp_path / "stop.txt"
+
+    report = compile_analysis_file(src, dest, "stopwords", lowercase=True)
+
+    assert dest.read_text(encoding="utf-8").splitlines() == ["de la", "la", "le"]
+    assert report.duplicates == 1 and len(report.warnings) == 1
+    assert report.memory["total_bytes"] > 0
+
+
+def test_find_cycles_and_memory_estimate():
+    assert find_cycles({"a": {"b"}, "b": {"a"}, "c": {"c"}, "d": {"a"}}) == [["a", "b"]]
+    shared = estimate_synonym_memory({"abcd": {"x"}, "abce": {"x"}})
+    distinct = estimate_synonym_memory({"abcd": {"x"}, "wxyz": {"x"}})
+    # Les préfixes communs sont partagés dans le FST
+    assert shared["fst_bytes"] < distinct["fst_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_save_compiled_publishes_only_valid_files(tmp_path):
+    store = AnalysisFileStore(tmp_path, chunk_size=8)
+
+    entry, report = await store.save_compiled(
+        UploadFile(io.BytesIO("b, a\na, b\n".encode()), filename="syn.txt"), "syn.txt", "solr")
+    assert report.rules_out == 1
+    assert (tmp_path / "syn.txt").read_text(encoding="utf-8") == "b, a\n"
+    assert [e.name for e in await store.manifest()] == ["syn.txt"] and entry.size_bytes == 5
+
+    entry, report = await store.save_compiled(
+        UploadFile(io.BytesIO(b"\xff\xfe"), filename="bad.txt"), "bad.txt", "solr")
+    assert entry is None and report.error_count == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["syn.txt"]
@@ -0,0 +1,149 @@
+"""Tests du cache `_analyze` (TTL, LRU, regroupement des appels simultanés, version du cluster)."""
+import asyncio
+
+import pytest
+
+from app.domain.analyzer import analyze_cache as cache_module
+from app.domain.analyzer.analyze_cache import AnalyzeCache, CachedAnalyzeClient, analyze_key, with_analyze_cache
+from app.domain.analyzer.local import analyze
+
+DEFINITION = {"tokenizer": "standard", "filter": ["lowercase"]}
+
+
+class FakeIndices:
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze(self, body):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if body["text"] == "boom":
+            raise RuntimeError("analyse refusée")
+        return analyze(body)
+
+
+class FakeES:
+    def __init__(self, version="8.14.0"):
+        self.indices = FakeIndices()
+        self.version = version
+
+    async def info(self):
+        if self.version is None:
+            raise ConnectionError("injoignable")
+        return {"version": {"number": self.version}}
+
+
+@pytest.fixture(autouse=True)
+def _reset_versions():
+    cache_module._cluster_versions.clear()
+    yield
+    cache_module._cluster_versions.clear()
+
+
+def test_key_depends_on_definition_text_and_version():
+    body = {"text": "Hello", **DEFINITION}
+    assert analyze_key(body, "8.14.0") == analyze_key({**DEFINITION, "text": "Hello"}, "8.14.0")
+    assert analyze_key(body, "8.14.0") != analyze_key({**body, "text": "hello"}, "8.14.0")
+    assert analyze_key(body, "8.14.0") != analyze_key({**body, "explain": True}, "8.14.0")
+    assert analyze_key(body, "8.14.0") != analyze_key(body, "8.15.0")
+
+
+@pytest.mark.asyncio
+async def test_repeated_request_is_served_from_cache():
+    es, cache = FakeES(), AnalyzeCache()
+    client = CachedAnalyzeClient(es, cache)
+    body = {"text": "Hello World", **DEFINITION}
+
+    first = await client.indices.analyze(body=body)
+    second = await client.indices.analyze(body=body)
+
+    assert first == second
+    assert [t["token"] for t in second["tokens"]] == ["hello", "world"]
+    assert es.indices.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    es, cache = FakeES(), AnalyzeCache()
+    client = CachedAnalyzeClient(es, cache)
+    body = {"text": "Hello", **DEFINITION}
+
+    results = await asyncio.gather(*(client.indices.analyze(body=body) for _ in range(5)))
+
+    assert es.indices.calls == 1
+    assert all(r == results[0] for r in results)
+    assert cache.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_but_not_cached():
+    es, cache = FakeES(), AnalyzeCache()
+    client = CachedAnalyzeClient(es, cache)
+    body = {"text": "boom", **DEFINITION}
+
+    results = await asyncio.gather(*(client.indices.analyze(body=body) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert es.indices.calls == 1
+
+    with pytest.raises(RuntimeError):
+        await client.indices.analyze(body=body)
+    assert es.indices.calls == 2 and len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru_bounds():
+    es, cache = FakeES(), AnalyzeCache(max_entries=2, ttl=0.2)
+    client = CachedAnalyzeClient(es, cache)
+    for text in ("a", "b", "c"):
+        await client.indices.analyze(body={"text": text, **DEFINITION})
+    assert len(cache) == 2
+
+    # "a" a été évincé, puis expire à son tour
+    await client.indices.analyze(body={"text": "a", **DEFINITION})
+    assert es.indices.calls == 4
+    await client.indices.analyze(body={"text": "a", **DEFINITION})
+    assert es.indices.calls == 4
+    await asyncio.sleep(0.25)
+    await client.indices.analyze(body={"text": "a", **DEFINITION})
+    assert es.indices.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_unknown_cluster_version_bypasses_cache():
+    es = FakeES(version=None)
+    client = CachedAnalyzeClient(es, AnalyzeCache())
+    body = {"text": "Hello", **DEFINITION}
+    await client.indices.analyze(body=body)
+    await client.indices.analyze(body=body)
+    assert es.indices.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cluster_version_failure_is_cached_briefly(monkeypatch):
+    es = FakeES(version=None)
+    calls = []
+    original_info = es.info
+
+    async def info():
+        calls.append(1)
+        return await original_info()
+
+    es.info = info
+    assert await cache_module.cluster_version(es) is None
+    assert await cache_module.cluster_version(es) is None
+    assert len(calls) == 1
+
+    # Une fois le délai écoulé, la version est relue
+    monkeypatch.setattr(cache_module, "VERSION_FAILURE_TTL", 0.0)
+    cache_module._cluster_versions.clear()
+    await cache_module.cluster_version(es)
+    es.version = "8.14.0"
+    assert await cache_module.cluster_version(es) == "8.14.0"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_returns_raw_client():
+    es = FakeES()
+    assert with_analyze_cache(es, AnalyzeCache(ttl=0)) is es
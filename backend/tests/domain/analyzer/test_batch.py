@@ -0,0 +1,106 @@
+"""Tests de l'analyse par lot (concurrence bornée, ordre des résultats, statistiques, flux NDJSON)."""
+import asyncio
+import json
+
+import pytest
+
+from app.domain.analyzer.batch import BatchAnalyzer
+from app.domain.analyzer.local import analyze
+
+pytestmark = pytest.mark.asyncio
+
+DEFINITION = {"tokenizer": "standard", "char_filter": [], "filter": ["lowercase", "stop"]}
+
+
+class FakeIndices:
+    """`_analyze` émulé par le moteur local, avec suivi des appels simultanés."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def analyze(self, body):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Les textes courts répondent plus vite : l'ordre de sortie ne doit pas en dépendre
+            await asyncio.sleep(0.001 * len(body["text"]) % 0.005)
+            if body["text"] == "boom":
+                raise RuntimeError("analyse refusée")
+            return analyze(body)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeES:
+    def __init__(self):
+        self.indices = FakeIndices()
+
+
+async def test_results_are_ordered_and_concurrency_is_bounded():
+    es = FakeES()
+    texts = [f"The fox {'x' * i}" for i in range(20)]
+    batch = BatchAnalyzer(DEFINITION, es, concurrency=4)
+    results = [r async for r in batch.iter_results(texts)]
+
+    assert [r["index"] for r in results] == list(range(20))
+    assert es.indices.calls == 20
+    assert 1 < es.indices.max_in_flight <= 4
+    # Format `_analyze` sans les attributs ajoutés par explain
+    assert results[0]["tokens"] == [
+        {"token": "fox", "start_offset": 4, "end_offset": 7, "type": "<ALPHANUM>", "position": 1}]
+
+
+async def test_stats_count_tokens_per_stage_and_frequency():
+    batch = BatchAnalyzer(DEFINITION, FakeES(), concurrency=2)
+    [_ async for _ in batch.iter_results(["The Fox", "the fox and the dog", "boom"])]
+    stats = batch.stats.to_dict(top_n=2)
+
+    assert stats["texts"] == 2 and stats["errors"] == 1
+    assert stats["token_frequency"] == [["fox", 2], ["dog", 1]]
+    assert stats["stages"] == [
+        {"name": "standard", "tokens": 7, "mean_per_text": 3.5},
+        {"name": "lowercase", "tokens": 7, "mean_per_text": 3.5},
+        {"name": "stop", "tokens": 3, "mean_per_text": 1.5},
+    ]
+
+
+async def test_local_engine_streams_ndjson_with_summary():
+    batch = BatchAnalyzer({**DEFINITION, "filter": ["lowercase", "lowercase"]}, es_client=None)
+    lines = [json.loads(line) async for line in batch.iter_ndjson(["Hello World", "Hi"], top_n=1)]
+
+    assert [t["token"] for t in lines[0]["tokens"]] == ["hello", "world"]
+    assert lines[1]["index"] == 1
+    summary = lines[-1]["summary"]
+    assert summary["texts"] == 2 and summary["tokens"] == 3
+    assert [s["name"] for s in summary["stages"]] == ["standard", "lowercase", "lowercase#2"]
+
+
+async def test_without_stats_skips_explain():
+    es = FakeES()
+    batch = BatchAnalyzer(DEFINITION, es, with_stats=False)
+    lines = [json.loads(line) async for line in batch.iter_ndjson(["a fox", "boom"])]
+
+    assert lines[0] == {"index": 0, "tokens": [
+        {"token": "fox", "start_offset": 2, "end_offset": 5, "type": "<ALPHANUM>", "position": 1}]}
+    assert lines[1] == {"index": 1, "error": "analyse refusée"}
+    assert lines[-1] == {"summary": {"texts": 1, "errors": 1}}
+
+
+async def test_unexpected_explain_payload_is_reported_per_item():
+    class OddIndices(FakeIndices):
+        async def analyze(self, body):
+            if body["text"] == "odd":
+                return {"detail": {}}  # ni tokenizer ni tokenfilters
+            return await super().analyze(body)
+
+    es = FakeES()
+    es.indices = OddIndices()
+    batch = BatchAnalyzer(DEFINITION, es)
+    lines = [json.loads(line) async for line in batch.iter_ndjson(["odd", "the fox"])]
+
+    assert lines[0]["index"] == 0 and "error" in lines[0]
+    assert [t["token"] for t in lines[1]["tokens"]] == ["fox"]
+    assert lines[-1]["summary"]["errors"] == 1 and lines[-1]["summary"]["texts"] == 1
@@ -0,0 +1,98 @@
+"""Tests du débogage pas à pas d'un analyseur (appel explain unique et repli par préfixes)."""
+import re
+
+import pytest
+
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import debug_analyzer_step_by_step
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeIndices:
+    """Émule `_analyze` : html_strip, tokenizers standard/whitespace, filtres lowercase/uppercase."""
+
+    def __init__(self, support_explain: bool = True):
+        self.support_explain = support_explain
+        self.calls = []
+
+    async def analyze(self, body):
+        self.calls.append(body)
+        text = body["text"]
+        chars = []
+        for cf in body.get("char_filter", []):
+            assert cf == "html_strip"
+            text = re.sub(r"<[^>]+>", "", text)
+            chars.append({"name": cf, "filtered_text": [text]})
+        tokens = re.findall(r"\w+", text) if body["tokenizer"] == "standard" else text.split()
+        stages = [{"name": body["tokenizer"], "tokens": [{"token": t} for t in tokens]}]
+        for f in body.get("filter", []):
+            tokens = [t.lower() if f == "lowercase" else t.upper() for t in tokens]
+            stages.append({"name": f, "tokens": [{"token": t} for t in tokens]})
+        if body.get("explain"):
+            if not self.support_explain:
+                raise RuntimeError("explain non supporté")
+            return {"detail": {"custom_analyzer": True, "charfilters": chars,
+                               "tokenizer": stages[0], "tokenfilters": stages[1:]}}
+        return {"tokens": stages[-1]["tokens"]}
+
+
+class FakeES:
+    def __init__(self, support_explain: bool = True):
+        self.indices = FakeIndices(support_explain)
+
+
+def make_graph(*nodes):
+    all_nodes = [{"id": "in", "kind": "input", "name": "Input Text"}]
+    all_nodes += [{"id": f"n{i}", "kind": kind, "name": name} for i, (kind, name) in enumerate(nodes)]
+    all_nodes.append({"id": "out", "kind": "output", "name": "Output"})
+    edges = [{"id": f"e{i}", "source": a["id"], "target": b["id"]}
+             for i, (a, b) in enumerate(zip(all_nodes, all_nodes[1:]))]
+    return AnalyzerGraph(nodes=all_nodes, edges=edges)
+
+
+@pytest.fixture
+def graph():
+    return make_graph(("char_filter", "html_strip"), ("tokenizer", "whitespace"),
+                      ("token_filter", "lowercase"), ("token_filter", "uppercase"))
+
+
+async def test_explain_matches_prefix_calls(graph):
+    text = "<b>Hello</b> World-Wide"
+    explain_es, fallback_es = FakeES(), FakeES(support_explain=False)
+
+    steps, path = await debug_analyzer_step_by_step(graph, text, explain_es)
+    fallback_steps, fallback_path = await debug_analyzer_step_by_step(graph, text, fallback_es)
+
+    assert steps == fallback_steps
+    assert path == fallback_path
+    assert [s["output"] for s in steps[3:]] == [["Hello", "World-Wide"], ["hello", "world-wide"],
+                                                ["HELLO", "WORLD-WIDE"], ["HELLO", "WORLD-WIDE"]]
+    assert path["nodes"] == ["in", "n0", "n1", "n2", "n3", "out"]
+    # 1 appel explain + input et char_filter (tokenisés en standard)
+    assert len(explain_es.indices.calls) == 3
+
+
+async def test_explain_reuses_tokenizer_stage_for_standard():
+    graph = make_graph(("tokenizer", "standard"), ("token_filter", "lowercase"))
+    es = FakeES()
+    steps, _ = await debug_analyzer_step_by_step(graph, "Hello World", es)
+    assert len(es.indices.calls) == 1
+    assert steps[1]["output"] == ["Hello", "World"]
+    assert steps[-1]["output"] == ["hello", "world"]
+
+
+async def test_prefix_calls_stop_at_failing_step(graph):
+    es = FakeES(support_explain=False)
+    analyze = es.indices.analyze
+
+    async def failing(body):
+        if "uppercase" in body.get("filter", []):
+            raise RuntimeError("boom")
+        return await analyze(body)
+
+    es.indices.analyze = failing
+    steps, path = await debug_analyzer_step_by_step(graph, "a b", es)
+    assert steps[-1] == {"step_name": "Error at 'uppercase'", "output": ["Analysis failed at this step."]}
+    assert path["nodes"] == ["in", "n0", "n1", "n2"]
+    assert path["edges"] == ["e0", "e1", "e2"]
@@ -0,0 +1,62 @@
+"""Tests de l'évaluation A/B d'analyseurs (index inversé, BM25, analyse parallèle, résumé)."""
+import math
+
+from app.domain.analyzer.evaluation import (
+    InvertedIndex, RelevanceEvaluator, sample_column, token_distribution, tokenize_documents,
+)
+
+DOCS = [
+    "Running shoes for trail runners",
+    "The runner runs a marathon",
+    "Shoe repair shop",
+    "Cooking recipes",
+]
+PLAIN = {"tokenizer": "standard", "filter": ["lowercase"]}
+STEMMED = {"tokenizer": "standard", "filter": ["lowercase", {"type": "stemmer", "language": "english"}]}
+
+
+def test_bm25_matches_lucene_formula():
+    index = InvertedIndex([["a", "b"], ["a", "a", "c"], ["c"]])
+    ranked = index.search(["a"])
+
+    assert [doc for doc, _ in ranked] == [1, 0]
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    avg = 6 / 3
+    expected = idf * 2 * 2.2 / (2 + 1.2 * (0.25 + 0.75 * 3 / avg))
+    assert math.isclose(ranked[0][1], expected)
+    assert index.search(["zzz"]) == []
+
+
+def test_parallel_tokenization_matches_inline():
+    texts = [f"Doc number {i} about Running" for i in range(40)]
+    inline = tokenize_documents([PLAIN, STEMMED], texts, workers=1)
+    parallel = tokenize_documents([PLAIN, STEMMED], texts, workers=2, min_chunk=10)
+
+    assert parallel == inline
+    assert inline[1][0] == ["doc", "number", "0", "about", "run"]
+
+
+def test_stemming_improves_recall():
+    evaluator = RelevanceEvaluator(PLAIN, STEMMED, top_k=3)
+    report = evaluator.run(DOCS, [{"text": "runner shoes", "relevant": [0, 1, 2]}, {"text": "pasta"}])
+
+    first = report["queries"][0]
+    assert first["a"]["matched"] == 2 and first["b"]["matched"] == 3
+    assert first["a"]["recall_at_k"] == 0.6667 and first["b"]["recall_at_k"] == 1.0
+    assert report["queries"][1]["a"]["matched"] == 0
+
+    summary = report["summary"]
+    assert summary["a"]["zero_hit_queries"] == 1
+    assert summary["compared_on"] == "mean_recall_at_k"
+    assert summary["better_recall"] == "b"
+    assert 0 < report["vocabulary_overlap"] < 1
+    assert report["analyzers"]["a"]["tokens"]["documents"] == 4
+
+
+def test_token_distribution_and_sampling():
+    dist = token_distribution([["a"], ["a", "b", "c"], []])
+    assert dist["min"] == 0 and dist["max"] == 3 and dist["p50"] == 1
+    assert dist["empty_documents"] == 1 and dist["distinct_terms"] == 3
+
+    rows = [{"title": "x"}, {"title": ""}, {"other": 1}, {"title": 42}, {"title": "y"}]
+    assert sample_column(rows, "title", 2) == ["x", "42"]
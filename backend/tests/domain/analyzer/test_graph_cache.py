@@ -0,0 +1,81 @@
+"""Tests du contexte de validation partagé et du cache par hash de graphe."""
+import pytest
+
+from app.domain.analyzer.graph_cache import GraphCache, graph_cache, graph_hash
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import convert_graph_to_es_analyzer
+from app.domain.analyzer.validators import utils
+from app.domain.analyzer.validators.validator import ValidationError, validate_full_graph
+
+
+def make_graph(filter_params=None, meta=None):
+    nodes = [
+        {"id": "in", "kind": "input", "name": "Input Text"},
+        {"id": "t", "kind": "tokenizer", "name": "standard"},
+        {"id": "f", "kind": "token_filter", "name": "ngram", "params": filter_params or {"min_gram": 2, "max_gram": 3},
+         "meta": meta},
+        {"id": "out", "kind": "output", "name": "Output"},
+    ]
+    edges = [{"id": "e1", "source": "in", "target": "t"}, {"id": "e2", "source": "t", "target": "f"},
+             {"id": "e3", "source": "f", "target": "out"}]
+    return AnalyzerGraph(nodes=nodes, edges=edges)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    graph_cache.clear()
+    yield
+    graph_cache.clear()
+
+
+def test_hash_ignores_ui_data_but_not_params():
+    assert graph_hash(make_graph(meta={"x": 1})) == graph_hash(make_graph(meta={"x": 2}))
+    assert graph_hash(make_graph()) != graph_hash(make_graph({"min_gram": 1, "max_gram": 3}))
+
+
+def test_path_is_computed_once_per_validation(monkeypatch):
+    calls = []
+    original = utils.find_path_and_nodes
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "find_path_and_nodes", counting)
+    validate_full_graph(make_graph(), use_cache=False)
+    assert len(calls) == 1
+
+
+def test_validation_result_is_cached():
+    hits = graph_cache.hits
+    validate_full_graph(make_graph())
+    validate_full_graph(make_graph(meta={"moved": True}))
+    assert graph_cache.hits == hits + 1
+
+
+def test_validation_errors_are_cached():
+    graph = make_graph()
+    graph.edges.pop()  # plus de chemin vers 'output'
+    hits = graph_cache.hits
+    for _ in range(2):
+        with pytest.raises(ValidationError, match="chemin"):
+            validate_full_graph(graph)
+    assert graph_cache.hits == hits + 1
+
+
+def test_converted_definition_is_cached_and_copied():
+    hits = graph_cache.hits
+    first = convert_graph_to_es_analyzer(make_graph())
+    first["filter"].append("mutated")
+    second = convert_graph_to_es_analyzer(make_graph())
+    assert second == {"tokenizer": "standard", "char_filter": [],
+                      "filter": [{"type": "ngram", "min_gram": 2, "max_gram": 3}]}
+    assert graph_cache.hits == hits + 1
+
+
+def test_lru_eviction():
+    cache = GraphCache(max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute("k", key, lambda: key)
+    assert len(cache) == 2
+    assert cache.get_or_compute("k", "b", lambda: "recomputed") == "recomputed"
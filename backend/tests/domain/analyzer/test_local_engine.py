@@ -0,0 +1,86 @@
+"""Conformité du moteur d'analyse local avec les sorties `_analyze` enregistrées d'Elasticsearch."""
+import json
+from pathlib import Path
+
+import pytest
+
+from app.domain.analyzer.local import (
+    LocalAnalysisError, LocalAnalyzer, LocalESClient, UnsupportedComponentError, analyze,
+)
+from app.domain.analyzer.local.stemmers import PorterStemmer
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import debug_analyzer_step_by_step
+
+RECORDINGS = json.loads((Path(__file__).parent / "fixtures" / "es_analyze_recordings.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("case", RECORDINGS["cases"], ids=lambda c: c["name"])
+def test_matches_recorded_es_output(case):
+    tokens = analyze(case["request"])["tokens"]
+    # Seuls les champs enregistrés sont comparés
+    assert [{k: t.get(k) for k in expected} for t, expected in zip(tokens, case["tokens"])] == case["tokens"]
+    assert len(tokens) == len(case["tokens"])
+
+
+def test_char_filter_offsets_point_to_original_text():
+    text = "<b>Hello</b> wörld"
+    tokens = analyze({"char_filter": ["html_strip"], "tokenizer": "standard",
+                      "filter": ["asciifolding"], "text": text})["tokens"]
+    assert [(t["token"], text[t["start_offset"]:t["end_offset"]]) for t in tokens] == [
+        ("Hello", "Hello"), ("world", "wörld")]
+
+
+def test_explain_detail_has_one_entry_per_component():
+    detail = analyze({"char_filter": ["html_strip"], "tokenizer": "whitespace",
+                      "filter": ["lowercase", {"type": "stop", "stopwords": ["the"]}],
+                      "text": "<i>The</i> Fox", "explain": True})["detail"]
+    assert detail["custom_analyzer"] is True
+    assert detail["charfilters"] == [{"name": "html_strip", "filtered_text": ["The Fox"]}]
+    assert [t["token"] for t in detail["tokenizer"]["tokens"]] == ["The", "Fox"]
+    assert [(f["name"], [t["token"] for t in f["tokens"]]) for f in detail["tokenfilters"]] == [
+        ("lowercase", ["the", "fox"]), ("__anonymous__stop", ["fox"])]
+
+
+def test_analyzer_is_reusable():
+    analyzer = LocalAnalyzer({"tokenizer": "standard", "filter": ["lowercase"]})
+    assert [t.token for t in analyzer.analyze("Big Data")] == ["big", "data"]
+    assert [t.token for t in analyzer.analyze("Big Data")] == ["big", "data"]
+
+
+@pytest.mark.parametrize("definition", [
+    {"tokenizer": "icu_tokenizer"},
+    {"tokenizer": "standard", "filter": [{"type": "stemmer", "language": "light_french"}]},
+    {"tokenizer": "standard", "filter": [{"type": "stop", "stopwords": "_arabic_"}]},
+    {"tokenizer": {"type": "pattern", "pattern": r"\p{L}+"}},
+    {"analyzer": "french"},
+])
+def test_unsupported_components_are_reported(definition):
+    with pytest.raises(UnsupportedComponentError):
+        LocalAnalyzer(definition)
+
+
+def test_ngram_diff_limit_matches_es():
+    with pytest.raises(LocalAnalysisError, match="index.max_ngram_diff"):
+        LocalAnalyzer({"tokenizer": "standard", "filter": [{"type": "ngram", "min_gram": 1, "max_gram": 3}]})
+
+
+def test_porter_reference_vocabulary():
+    words = "caresses ponies agreed plastered motoring hopping relational sensibiliti generalizations electrical"
+    assert [PorterStemmer().stem(w) for w in words.split()] == [
+        "caress", "poni", "agre", "plaster", "motor", "hop", "relat", "sensibl", "gener", "electr"]
+
+
+@pytest.mark.asyncio
+async def test_local_client_drives_step_by_step_debug():
+    nodes = [{"id": "in", "kind": "input", "name": "Input Text"},
+             {"id": "n0", "kind": "char_filter", "name": "html_strip"},
+             {"id": "n1", "kind": "tokenizer", "name": "whitespace"},
+             {"id": "n2", "kind": "token_filter", "name": "lowercase"},
+             {"id": "n3", "kind": "token_filter", "name": "asciifolding"},
+             {"id": "out", "kind": "output", "name": "Output"}]
+    edges = [{"id": f"e{i}", "source": a["id"], "target": b["id"]} for i, (a, b) in enumerate(zip(nodes, nodes[1:]))]
+    graph = AnalyzerGraph(nodes=nodes, edges=edges)
+    steps, path = await debug_analyzer_step_by_step(graph, "<b>Ça</b> Marche", LocalESClient())
+    assert [s["output"] for s in steps[3:]] == [["Ça", "Marche"], ["ça", "marche"],
+                                                ["ca", "marche"], ["ca", "marche"]]
+    assert path["nodes"] == ["in", "n0", "n1", "n2", "n3", "out"]
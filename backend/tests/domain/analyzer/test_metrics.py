@@ -0,0 +1,70 @@
+"""Tests des métriques Prometheus du chemin analyseur et des logs de debug échantillonnés."""
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.domain.analyzer import metrics
+from app.domain.analyzer.local import LocalAnalyzer, LocalESClient
+from app.domain.analyzer.models import AnalyzerGraph
+from app.domain.analyzer.services import analyze_text
+from app.domain.analyzer.validators.validator import ValidationError, validate_full_graph
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_graph(filter_name="lowercase"):
+    nodes = [
+        {"id": "in", "kind": "input", "name": "Input Text"},
+        {"id": "t", "kind": "tokenizer", "name": "standard"},
+        {"id": "f", "kind": "token_filter", "name": filter_name},
+        {"id": "out", "kind": "output", "name": "Output"},
+    ]
+    edges = [{"id": "e1", "source": "in", "target": "t"}, {"id": "e2", "source": "t", "target": "f"},
+             {"id": "e3", "source": "f", "target": "out"}]
+    return AnalyzerGraph(nodes=nodes, edges=edges)
+
+
+def test_rules_are_timed_and_failures_counted_by_rule():
+    rule = "validate_all_elements_exist"
+    timed = sample("analyzer_validation_rule_seconds_count", rule=rule)
+    failed = sample("analyzer_validation_failures_total", rule=rule)
+
+    validate_full_graph(make_graph(), use_cache=False)
+    with pytest.raises(ValidationError):
+        validate_full_graph(make_graph("does_not_exist"), use_cache=False)
+
+    assert sample("analyzer_validation_rule_seconds_count", rule=rule) == timed + 2
+    assert sample("analyzer_validation_failures_total", rule=rule) == failed + 1
+    assert sample("analyzer_validation_rule_seconds_count", rule="validate_all_node_params") >= 1
+
+
+def test_local_steps_are_timed_only_in_explain_mode():
+    analyzer = LocalAnalyzer({"tokenizer": "standard", "filter": ["lowercase", "asciifolding"]})
+    before = sample("analyzer_pipeline_step_seconds_count", kind="token_filter", engine="local")
+
+    analyzer.analyze("Déjà vu")
+    assert sample("analyzer_pipeline_step_seconds_count", kind="token_filter", engine="local") == before
+    analyzer.explain("Déjà vu")
+    assert sample("analyzer_pipeline_step_seconds_count", kind="token_filter", engine="local") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_analyze_calls_are_timed_by_engine():
+    before = sample("analyzer_analyze_call_seconds_count", call="tokens", engine="local")
+    await analyze_text(make_graph(), "Hello", LocalESClient())
+    assert sample("analyzer_analyze_call_seconds_count", call="tokens", engine="local") == before + 1
+
+
+def test_debug_logs_are_sampled(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(metrics.logger, "bind", lambda **fields: emitted.append(fields) or metrics.logger)
+
+    monkeypatch.setattr(settings, "ANALYZER_DEBUG_LOG_SAMPLE_RATE", 0)
+    metrics.sampled_debug("definition", definition={"tokenizer": "standard"})
+    assert emitted == []
+
+    monkeypatch.setattr(settings, "ANALYZER_DEBUG_LOG_SAMPLE_RATE", 1)
+    metrics.sampled_debug("definition", definition={"tokenizer": "standard"})
+    assert emitted == [{"definition": {"tokenizer": "standard"}}]
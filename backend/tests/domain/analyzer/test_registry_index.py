@@ -0,0 +1,97 @@
+"""Tests de l'index de la registry (paramètres, matrice de compatibilité) et du rechargement à chaud."""
+import json
+import shutil
+
+import pytest
+
+from app.core.config import settings
+from app.domain.analyzer.graph_cache import graph_cache
+from app.domain.analyzer.registry_index import (
+    COMPATIBLE, INCOMPATIBLE, NOT_LISTED_FORBIDDEN, NOT_LISTED_PARTIAL, build_index, compatibility_verdict,
+)
+from app.domain.analyzer.registry_loader import RegistryLoader
+
+DEFINITIONS = {
+    "tokenizers": {"standard": {"name": "standard"}, "keyword": {"name": "keyword"},
+                   "pattern": {"name": "pattern"}, "ngram": {"name": "ngram"}},
+    "token_filters": {
+        "lowercase": {"name": "lowercase"},
+        "stop": {"name": "stop"},
+        "length": {"name": "length", "params": {"elements": [
+            {"name": "min", "type": "integer", "mandatory": True},
+            {"name": "max", "field": {"itemType": "number"}},
+        ]}},
+        "shingle": {"name": "shingle", "params": {"elements": [
+            {"name": "output_unigrams", "field": {"itemType": "checkbox"}},
+            {"name": "token_separator"},
+        ]}},
+    },
+    "char_filters": {},
+    "compatibility": {
+        "keyword": {"*": False, "lowercase": True},
+        "pattern": {"*": "partial", "lowercase": True, "stop": False},
+        "ngram": {"stop": False},
+    },
+}
+
+
+def test_matrix_matches_rule_evaluation():
+    index = build_index(DEFINITIONS)
+    for tok in DEFINITIONS["tokenizers"]:
+        for tf in DEFINITIONS["token_filters"]:
+            expected = compatibility_verdict(DEFINITIONS["compatibility"].get(tok), tf)
+            assert index.compatibility.verdict(tok, tf) == expected
+
+    assert index.compatibility.verdict("standard", "stop") == COMPATIBLE
+    assert index.compatibility.verdict("keyword", "lowercase") == COMPATIBLE
+    assert index.compatibility.verdict("keyword", "stop") == NOT_LISTED_FORBIDDEN
+    assert index.compatibility.verdict("pattern", "stop") == INCOMPATIBLE
+    assert index.compatibility.verdict("pattern", "length") == NOT_LISTED_PARTIAL
+    # Composant hors registry : règles évaluées directement
+    assert index.compatibility.verdict("keyword", "unknown") == NOT_LISTED_FORBIDDEN
+
+
+def test_params_are_indexed_with_converters():
+    length = build_index(DEFINITIONS).get("token_filter", "length")
+
+    assert length.mandatory == ("min",)
+    assert length.params["min"].convert("3") == 3
+    assert length.params["max"].convert(7.0) == 7
+    with pytest.raises(ValueError, match="paramètre 'min'"):
+        length.params["min"].convert("trois")
+
+    shingle = build_index(DEFINITIONS).get("token_filter", "shingle")
+    assert shingle.params["output_unigrams"].convert(1) is True
+    assert shingle.params["token_separator"].convert("_") == "_"
+    assert not build_index(DEFINITIONS).get("token_filter", "stop").accepts_params
+
+
+def test_registry_reloads_when_files_change(tmp_path, monkeypatch):
+    shared = tmp_path / "registry"
+    shutil.copytree(RegistryLoader.SHARED_PATH, shared)
+    monkeypatch.setattr(RegistryLoader, "SHARED_PATH", shared)
+    monkeypatch.setattr(RegistryLoader, "_instance", None)
+    monkeypatch.setattr(settings, "REGISTRY_RELOAD_INTERVAL", 1e-9)
+
+    registry = RegistryLoader()
+    assert registry.get_token_filter("my_filter") is None
+    graph_cache.get_or_compute("validation", "some-graph", lambda: None)
+
+    path = shared / "_es_analyzer_token_filter.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["token_filters"].append({"name": "my_filter"})
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    assert RegistryLoader() is registry
+    assert registry.get_token_filter("my_filter") == {"name": "my_filter"}
+    assert registry.validate_element_exists("token_filter", "my_filter")
+    assert len(graph_cache) == 0
+
+    # Fichier invalide : les définitions précédentes restent en place
+    path.write_text("{", encoding="utf-8")
+    assert registry.reload_if_changed() is False
+    assert registry.get_token_filter("my_filter") == {"name": "my_filter"}
+
+
+def test_unknown_element_does_not_exist():
+    assert RegistryLoader().validate_element_exists("token_filter", "does_not_exist") is False
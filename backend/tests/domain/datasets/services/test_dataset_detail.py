@@ -0,0 +1,95 @@
+"""Tests de la vue détaillée d'un dataset : nombre de requêtes constant, ETag et pagination."""
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.exceptions import ResourceNotFoundError
+from app.domain.dataset.models import Dataset
+from app.domain.dataset.schemas import DatasetDetailOut
+from app.domain.dataset.services import DatasetService
+from app.domain.file.models import File
+from app.domain.mapping.models import Mapping
+from app.domain.user.models import User
+
+TABLES = [User.__table__, Dataset.__table__, File.__table__, Mapping.__table__]
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'datasets.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: [t.create(c) for t in TABLES])
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def seeded(engine):
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with maker() as db:
+        users = [User(username=f"u{i}", email=f"u{i}@example.com", hashed_password="x") for i in range(3)]
+        db.add_all(users)
+        await db.flush()
+        dataset = Dataset(name="Ventes", owner_id=users[0].id)
+        db.add(dataset)
+        await db.flush()
+        files = [
+            File(filename_original=f"f{i}.csv", filename_stored=f"s{i}", version=i + 1, hash=f"h{i}",
+                 size_bytes=10 * i, dataset_id=dataset.id, uploader_id=users[i % 3].id)
+            for i in range(30)
+        ]
+        db.add_all(files)
+        await db.flush()
+        db.add(Mapping(name="m1", mapping_rules=[], dataset_id=dataset.id, source_file_id=files[0].id))
+        await db.commit()
+    return maker, users[0], dataset, files
+
+
+@pytest.mark.asyncio
+async def test_detail_runs_constant_number_of_queries(engine, seeded):
+    maker, owner, dataset, files = seeded
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async with maker() as db:
+        etag, detail = await DatasetService().get_detail(db, dataset.id, owner.id, skip=0, limit=100)
+
+    assert len(statements) == 3
+    out = DatasetDetailOut.model_validate(detail)
+    assert out.files_total == 30 and len(out.files) == 30
+    assert {f.uploader_name for f in out.files} == {"u0", "u1", "u2"}
+    assert [f.mapping_id is not None for f in out.files].count(True) == 1
+    assert out.mappings[0].name == "m1"
+    assert etag.startswith('W/"')
+
+
+@pytest.mark.asyncio
+async def test_detail_pagination_and_etag(seeded):
+    maker, owner, dataset, files = seeded
+    service = DatasetService()
+    async with maker() as db:
+        etag, first = await service.get_detail(db, dataset.id, owner.id, skip=0, limit=10)
+        _, second = await service.get_detail(db, dataset.id, owner.id, skip=10, limit=10)
+        assert len(first["files"]) == 10 and first["files_total"] == 30
+        assert not {f["id"] for f in first["files"]} & {f["id"] for f in second["files"]}
+
+        # Vue inchangée : 304 côté endpoint
+        assert await service.get_detail(db, dataset.id, owner.id, skip=0, limit=10, if_none_match=etag) == (etag, None)
+
+        # Un nouveau fichier change l'ETag
+        db.add(File(filename_original="new.csv", filename_stored="new", version=31, hash="hn",
+                    size_bytes=1, dataset_id=dataset.id, uploader_id=owner.id))
+        await db.commit()
+        new_etag, detail = await service.get_detail(db, dataset.id, owner.id, skip=0, limit=10, if_none_match=etag)
+        assert new_etag != etag and detail["files_total"] == 31
+
+
+@pytest.mark.asyncio
+async def test_detail_requires_ownership(seeded):
+    maker, owner, dataset, files = seeded
+    async with maker() as db:
+        with pytest.raises(ResourceNotFoundError):
+            await DatasetService().get_detail(db, dataset.id, uuid.uuid4())
@@ -0,0 +1,99 @@
+"""Tests du listing des fichiers d'un dataset : pagination par clé, filtres et vérification de propriété par EXISTS."""
+import uuid
+from datetime import datetime, timedelta, UTC
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.exceptions import ResourceNotFoundError
+from app.domain.dataset.models import Dataset
+from app.domain.dataset.services import DatasetService
+from app.domain.file.models import File, FileStatus, IngestionStatus
+from app.domain.file.services import FileService
+from app.domain.mapping.models import Mapping
+from app.domain.user.models import User
+
+TABLES = [User.__table__, Dataset.__table__, File.__table__, Mapping.__table__]
+START = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'files.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: [t.create(c) for t in TABLES])
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def seeded(engine):
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with maker() as db:
+        owner = User(username="owner", email="owner@example.com", hashed_password="x")
+        db.add(owner)
+        await db.flush()
+        dataset = Dataset(name="Ventes", owner_id=owner.id)
+        db.add(dataset)
+        await db.flush()
+        # Deux fichiers par date : le départage se fait sur l'id
+        db.add_all([
+            File(filename_original=f"f{i}.csv", filename_stored=f"s{i}", version=i + 1, hash=f"h{i}", size_bytes=1,
+                 dataset_id=dataset.id, uploader_id=owner.id, created_at=START + timedelta(hours=i // 2),
+                 status=FileStatus.READY if i % 3 else FileStatus.ERROR,
+                 ingestion_status=IngestionStatus.COMPLETED if i < 5 else IngestionStatus.NOT_STARTED)
+            for i in range(25)
+        ])
+        await db.commit()
+    return maker, owner, dataset
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_walks_all_files_once(seeded):
+    maker, owner, dataset = seeded
+    service = FileService()
+    seen, cursor = [], None
+    async with maker() as db:
+        while True:
+            files, cursor = await service.list_by_dataset(db, dataset.id, limit=7, cursor=cursor)
+            seen.extend(files)
+            if cursor is None:
+                break
+    assert len(seen) == 25 and len({f.id for f in seen}) == 25
+    keys = [(f.created_at, str(f.id)) for f in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_filters_are_applied_in_database(seeded):
+    maker, owner, dataset = seeded
+    service = FileService()
+    async with maker() as db:
+        errors, _ = await service.list_by_dataset(db, dataset.id, file_status=FileStatus.ERROR)
+        assert len(errors) == 9 and {f.status for f in errors} == {FileStatus.ERROR}
+
+        done, _ = await service.list_by_dataset(db, dataset.id, ingestion_status=IngestionStatus.COMPLETED)
+        assert len(done) == 5
+
+        window, _ = await service.list_by_dataset(
+            db, dataset.id, created_after=START + timedelta(hours=2), created_before=START + timedelta(hours=4))
+        assert len(window) == 4
+
+        with pytest.raises(HTTPException):
+            await service.list_by_dataset(db, dataset.id, cursor="pas-un-curseur")
+
+
+@pytest.mark.asyncio
+async def test_ownership_check_is_a_single_exists_query(engine, seeded):
+    maker, owner, dataset = seeded
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    service = DatasetService()
+    async with maker() as db:
+        assert await service.ensure_owned_by(db, dataset.id, owner.id) == dataset.id
+        with pytest.raises(ResourceNotFoundError):
+            await service.ensure_owned_by(db, dataset.id, uuid.uuid4())
+    assert len(statements) == 2 and all("EXISTS" in s for s in statements)
@@ -0,0 +1,234 @@
+"""Tests du bus d'événements des fichiers, de sa publication par le parsing et du flux SSE de statut."""
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sse_starlette.sse import AppStatus
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.v1 import files as files_api
+from app.core.db import get_db
+from app.domain.dataset.models import Dataset
+from app.domain.file import events
+from app.domain.file import services as file_services
+from app.domain.file.events import FileEvent, FileEventBus
+from app.domain.file.models import File, FileStatus
+from app.domain.mapping.models import Mapping
+from app.domain.user.models import User
+from main import app
+
+TABLES = [User.__table__, Dataset.__table__, File.__table__, Mapping.__table__]
+
+
+@pytest.mark.asyncio
+async def test_bus_delivers_to_subscribers_of_the_file():
+    bus = FileEventBus()
+    async with bus.subscribe("a") as sub_a, bus.subscribe("b") as sub_b:
+        await bus.publish(FileEvent(file_id="a", kind=events.STATUS, status="ready"))
+        assert (await sub_a.next(1)).status == "ready"
+        assert await sub_b.next(0.01) is None
+    assert bus._subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_events(monkeypatch):
+    monkeypatch.setattr(events, "SUBSCRIBER_QUEUE_SIZE", 3)
+    bus = FileEventBus()
+    async with bus.subscribe("a") as sub:
+        for i in range(5):
+            await bus.publish(FileEvent(file_id="a", kind=events.PROGRESS, progress=float(i)))
+        assert [(await sub.next(1)).progress for _ in range(3)] == [2.0, 3.0, 4.0]
+
+
+def test_event_json_round_trip():
+    event = FileEvent(file_id="x", kind=events.PROGRESS, progress=12.5, stage="indexing")
+    assert FileEvent.from_json(event.to_json()) == event
+
+
+class _FakeListenConnection:
+    def __init__(self):
+        self.listeners, self.on_terminate = {}, []
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback):
+        self.on_terminate.append(callback)
+
+    def terminate(self):
+        for callback in self.on_terminate:
+            callback(self)
+
+    async def close(self):
+        self.closed = True
+        self.terminate()
+
+
+@pytest.mark.asyncio
+async def test_postgres_bus_reconnects_when_listen_connection_drops(monkeypatch):
+    import asyncpg
+
+    connections, attempts = [], []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 2:
+            raise OSError("serveur indisponible")
+        connections.append(_FakeListenConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(events, "RECONNECT_MIN_DELAY", 0.01)
+    bus = events.PostgresFileEventBus("postgresql://db", "file_events")
+    await bus.startup()
+
+    connections[0].terminate()
+    assert bus._conn is None
+    await asyncio.wait_for(bus._reconnect_task, 1)
+    assert len(attempts) == 3 and bus._conn is connections[1]
+
+    async with bus.subscribe("a") as sub:
+        connections[1].listeners["file_events"](None, 1, "file_events", FileEvent(file_id="a", kind="status").to_json())
+        assert (await sub.next(1)).kind == "status"
+
+    # Fermeture volontaire : pas de reconnexion
+    await bus.close()
+    assert connections[1].closed and bus._reconnect_task is None and len(attempts) == 3
+
+
+@pytest_asyncio.fixture
+async def file_in_db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: [t.create(c) for t in TABLES])
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    monkeypatch.setattr(file_services, "async_session_maker", maker)
+    monkeypatch.setattr(files_api, "async_session_maker", maker)
+    monkeypatch.setattr(file_services.settings, "UPLOAD_DIR", tmp_path)
+
+    async with maker() as db:
+        user = User(username="u", email="u@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        dataset = Dataset(name="Ventes", owner_id=user.id)
+        db.add(dataset)
+        await db.flush()
+        file = File(filename_original="data.csv", filename_stored="data.csv", version=1, hash="h", size_bytes=1,
+                    dataset_id=dataset.id, uploader_id=user.id)
+        db.add(file)
+        await db.commit()
+    (tmp_path / str(dataset.id)).mkdir()
+    (tmp_path / str(dataset.id) / "data.csv").write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    yield maker, file
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parse_task_publishes_status_and_progress(file_in_db):
+    _, file = file_in_db
+    async with events.file_events.subscribe(file.id) as sub:
+        await file_services.TaskService().parse_file(file.id)
+        received = []
+        while (event := await sub.next(0.05)) is not None:
+            received.append(event)
+
+    statuses = [e.status for e in received if e.kind == events.STATUS]
+    progress = [e.progress for e in received if e.kind == events.PROGRESS]
+    assert statuses == ["parsing", "ready"]
+    assert progress == [0.0, 70.0, 100.0]
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_follows_bus_without_polling(file_in_db):
+    maker, file = file_in_db
+    async with maker() as db:
+        stored = await db.get(File, file.id)
+        stored.status = FileStatus.PARSING
+        await db.commit()
+
+    async def override_get_db():
+        async with maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[files_api.get_current_user_from_cookie] = lambda: None
+    app.dependency_overrides[files_api.get_current_file_for_owner] = lambda: file
+
+    async def publish_later():
+        # Attend que le flux soit abonné au bus
+        while str(file.id) not in events.file_events._subscribers:
+            await asyncio.sleep(0.01)
+        await events.publish_file_event(file.id, events.PROGRESS, progress=50.0, stage="reading")
+        async with maker() as db:
+            stored = await db.get(File, file.id)
+            stored.status = FileStatus.ERROR
+            stored.parsing_error = "Format invalide"
+            await db.commit()
+        await events.publish_file_event(file.id, events.STATUS, status="error", detail="Format invalide")
+
+    try:
+        publisher = asyncio.create_task(publish_later())
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await asyncio.wait_for(client.get(f"/api/v1/files/{file.id}/status"), 10)
+        await publisher
+    finally:
+        app.dependency_overrides.clear()
+
+    body = response.text
+    assert body.index("event: status_update\r\ndata: parsing") < body.index("event: progress")
+    assert '"percent": 50.0' in body
+    assert "event: parsing_error\r\ndata: Format invalide" in body
+
+
+async def _stream_status(maker, file, path, publish):
+    # sse_starlette garde un Event global lié à la boucle du premier flux : une boucle par test ici
+    AppStatus.should_exit_event = None
+
+    async def override_get_db():
+        async with maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[files_api.get_current_user_from_cookie] = lambda: None
+    app.dependency_overrides[files_api.get_current_file_for_owner] = lambda: file
+    try:
+        publisher = asyncio.create_task(publish())
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await asyncio.wait_for(client.get(path), 10)
+        await publisher
+    finally:
+        app.dependency_overrides.clear()
+    return response.text
+
+
+@pytest.mark.asyncio
+async def test_sse_until_ingested_ends_on_parse_error(file_in_db):
+    maker, file = file_in_db
+
+    async def publish():
+        while str(file.id) not in events.file_events._subscribers:
+            await asyncio.sleep(0.01)
+        await events.publish_file_event(file.id, events.STATUS, status="error", detail="Format invalide")
+
+    body = await _stream_status(maker, file, f"/api/v1/files/{file.id}/status?until=ingested", publish)
+    assert "event: parsing_error\r\ndata: Format invalide" in body
+
+
+@pytest.mark.asyncio
+async def test_sse_rechecks_state_after_silence(file_in_db, monkeypatch):
+    maker, file = file_in_db
+    monkeypatch.setattr(files_api, "SSE_KEEPALIVE_SECONDS", 0.05)
+    monkeypatch.setattr(files_api, "SSE_RECHECK_SECONDS", 0.0)
+
+    async def update_without_event():
+        while str(file.id) not in events.file_events._subscribers:
+            await asyncio.sleep(0.01)
+        async with maker() as db:
+            stored = await db.get(File, file.id)
+            stored.status = FileStatus.READY
+            await db.commit()
+
+    body = await _stream_status(maker, file, f"/api/v1/files/{file.id}/status", update_without_event)
+    assert body.rstrip().endswith("event: status_update\r\ndata: ready")
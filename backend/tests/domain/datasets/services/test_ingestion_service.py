@@ -36,7 +36,7 @@ def task_service():
 
 @pytest.mark.asyncio
 @patch("app.domain.file.services.async_session_maker")
-@patch("app.domain.file.services.AsyncElasticsearch")
+@patch("app.domain.file.services.es_registry")
 @patch("app.domain.file.services.pd.read_csv")
 @patch("app.domain.file.services.async_bulk", new_callable=AsyncMock)
 async def test_ingest_data_from_file_task_ok(
@@ -87,7 +87,7 @@ def test_prepare_data_for_bulk(task_service):
 
 @pytest.mark.asyncio
 @patch("app.domain.file.services.async_session_maker")
-@patch("app.domain.file.services.AsyncElasticsearch")
+@patch("app.domain.file.services.es_registry")
 @patch("app.domain.file.services.pd.read_csv")
 @patch("app.domain.file.services.async_bulk", new_callable=AsyncMock)
 async def test_ingest_data_from_file_task_fail_bulk(
@@ -120,7 +120,7 @@ async def test_ingest_data_from_file_task_fail_bulk(
 
 @pytest.mark.asyncio
 @patch("app.domain.file.services.async_session_maker")
-@patch("app.domain.file.services.AsyncElasticsearch")
+@patch("app.domain.file.services.es_registry")
 async def test_ingest_data_from_file_task_missing(fake_es, mock_session, fake_file, fake_mapping, task_service):
     fake_db = MagicMock()
     fake_db.get = AsyncMock(return_value=None)
@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException, status
 
-from app.domain.mapping.services import MappingService
+from app.domain.mapping.services import COMPILER_VERSION, MappingService, _has_current_compilation
 from app.domain.mapping import models, schemas
 from app.domain.dataset import models as dataset_models
 from app.domain.file import models as file_models
@@ -126,3 +126,110 @@ async def test_get_mappings_for_dataset(fake_dataset, fake_mapping_model, mappin
     db.execute = AsyncMock(return_value=mock_result)
     result = await mapping_service.get_by_dataset(db, fake_dataset.id)
     assert result == [fake_mapping_model]
+
+
+# --- Cache de compilation (MappingVersion.compiled_mapping) ---
+
+@pytest.fixture
+def minimal_dsl():
+    return {
+        "dsl_version": "2.2",
+        "index": "demo",
+        "fields": [
+            {"target": "name", "type": "keyword", "input": [{"kind": "column", "name": "name"}]}
+        ],
+    }
+
+async def test_compile_cached_hit_skips_compilation(minimal_dsl, mapping_service):
+    stored = MappingService.compile(minimal_dsl).model_dump(exclude={"execution_plan"})
+    db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = stored
+    db.execute = AsyncMock(return_value=mock_result)
+
+    with patch.object(MappingService, "compile") as compile_mock:
+        out = await mapping_service.compile_cached(db, minimal_dsl, include_plan=True)
+
+    compile_mock.assert_not_called()
+    assert out.compiled_hash == stored["compiled_hash"]
+    assert out.mappings == stored["mappings"]
+    assert out.execution_plan[0]["target"] == "name"
+
+async def test_compile_cached_lookup_requires_current_compiler(minimal_dsl, mapping_service):
+    db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    db.execute = AsyncMock(return_value=mock_result)
+
+    await mapping_service.compile_cached(db, minimal_dsl)
+
+    query = db.execute.call_args.args[0]
+    assert "mapping_versions.compiler_version" in str(query)
+    assert COMPILER_VERSION in query.compile().params.values()
+
+def test_precompile_skips_only_current_compilations(minimal_dsl):
+    def version(compiler_version):
+        return models.MappingVersion(dsl_content=minimal_dsl, compiled_mapping={"mappings": {}},
+                                     compiled_hash="h", compiler_version=compiler_version)
+
+    assert _has_current_compilation(version(COMPILER_VERSION))
+    assert not _has_current_compilation(version("ancien"))
+    assert not _has_current_compilation(version(None))
+
+async def test_compile_cached_miss_compiles(minimal_dsl, mapping_service):
+    db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    db.execute = AsyncMock(return_value=mock_result)
+
+    out = await mapping_service.compile_cached(db, minimal_dsl)
+
+    assert out.mappings["properties"]["name"]["type"] == "keyword"
+    assert out.compiled_hash == MappingService.compile(minimal_dsl).compiled_hash
+
+async def test_create_version_fills_compile_cache(fake_user, minimal_dsl, mapping_service):
+    mapping_service.get_owned_by_user = AsyncMock()
+    mapping_service._get_next_version_number = AsyncMock(return_value=1)
+    mapping_service._deactivate_current_version = AsyncMock()
+    db = AsyncMock()
+    db.add = MagicMock()
+    version_in = schemas.MappingVersionCreate(dsl_content=minimal_dsl)
+
+    version = await mapping_service.create_version(db, uuid.uuid4(), version_in, fake_user)
+
+    assert version.compiled_hash == MappingService.compile(minimal_dsl).compiled_hash
+    assert version.compiled_mapping["mappings"]["properties"]["name"]["type"] == "keyword"
+    assert "execution_plan" not in version.compiled_mapping
+    assert version.compiler_version == COMPILER_VERSION
+
+async def test_create_version_with_invalid_dsl_has_no_cache(fake_user, mapping_service):
+    mapping_service.get_owned_by_user = AsyncMock()
+    mapping_service._get_next_version_number = AsyncMock(return_value=1)
+    mapping_service._deactivate_current_version = AsyncMock()
+    db = AsyncMock()
+    db.add = MagicMock()
+    version_in = schemas.MappingVersionCreate(dsl_content={"index": "demo"})
+
+    version = await mapping_service.create_version(db, uuid.uuid4(), version_in, fake_user)
+
+    assert version.compiled_mapping is None
+    assert version.compiled_hash is None
+    assert version.compiler_version is None
+
+# --- Vérification des _id sur fichier stocké ---
+
+async def test_check_ids_job_on_stored_file(tmp_path, fake_user, fake_file_model, minimal_dsl, mapping_service):
+    (tmp_path / "data.csv").write_text("id;name\n1;a\n2;b\n1;c\n", encoding="utf-8")
+    minimal_dsl["id_policy"] = {"from": ["id"], "hash": "sha1"}
+    mapping_service.get_version = AsyncMock(return_value=models.MappingVersion(dsl_content=minimal_dsl))
+    job = schemas.CheckIdsJobIn(file_id=fake_file_model.id, mapping_id=uuid.uuid4(), workers=2)
+
+    with patch("app.domain.file.services.FileService.get_owned_by_user", AsyncMock(return_value=fake_file_model)), \
+         patch("app.domain.file.readers.get_stored_path", return_value=tmp_path / "data.csv"):
+        out = await mapping_service.check_ids_job(AsyncMock(), job, fake_user)
+
+    assert (out.total, out.duplicates) == (3, 1)
+    assert out.samples[0]["row"] == 2
+    assert out.stats["mode"] == "sharded"
+    # Petit fichier : un seul shard, donc un seul processus malgré workers=2
+    assert (out.stats["shards"], out.stats["workers"]) == (1, 1)
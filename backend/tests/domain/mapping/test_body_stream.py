@@ -0,0 +1,96 @@
+"""Tests du dry-run alimenté au fil de la réception du corps."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.domain.mapping.body_stream import run_on_streamed_body
+from app.domain.mapping.executor import run_dry_run
+
+FIELDS = [{"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []}]
+
+
+def _row(i):
+    return json.dumps({"id": str(i)}).encode()
+
+
+@pytest.mark.asyncio
+async def test_rows_reach_the_executor_before_the_body_ends():
+    seen = []
+    three_seen = threading.Event()
+
+    def consume(mapping, rows):
+        for row in rows:
+            seen.append(row)
+            if len(seen) == 3:
+                three_seen.set()
+        return run_dry_run(mapping, seen)
+
+    async def chunks():
+        yield b'{"fields": ' + json.dumps(FIELDS).encode() + b', "rows": ['
+        yield b",".join(_row(i) for i in range(3)) + b","
+        # Le reste du corps n'est envoyé qu'une fois les premières lignes exécutées
+        assert await asyncio.to_thread(three_seen.wait, 5)
+        yield b",".join(_row(i) for i in range(3, 6)) + b"]}"
+
+    result = await run_on_streamed_body(chunks(), consume)
+    assert [d["_id"] for d in result["docs_preview"]] == [None] * 6
+    assert [r["id"] for r in seen] == [str(i) for i in range(6)]
+
+
+async def _body(payload: dict, step: int = 7):
+    raw = json.dumps(payload).encode()
+    for i in range(0, len(raw), step):
+        yield raw[i:i + step]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("payload", [
+    {"fields": FIELDS, "id_policy": {"from": ["id"]}, "sample": {"rows": [{"id": "1"}, {"id": "1"}]}},
+    # Lignes avant le mapping : gardées jusqu'à la fin du corps
+    {"rows": [{"id": "1"}, {"id": "2"}], "fields": FIELDS, "id_policy": {"from": ["id"]}},
+    # Membre final sans effet sur le mapping
+    {"fields": FIELDS, "rows": [{"id": "1"}], "globals": {}},
+])
+async def test_result_matches_a_buffered_dry_run(payload):
+    expected_rows = (payload.get("sample") or {}).get("rows") or payload.get("rows")
+    expected = run_dry_run({**payload, "globals": {}}, expected_rows)
+    result = await run_on_streamed_body(_body(payload), lambda mapping, rows: run_dry_run(mapping, list(rows)))
+    assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_mapping_members_after_executed_rows_rerun_on_all_rows():
+    rows = [{"id": str(i)} for i in range(50)]
+    payload = {"fields": FIELDS, "rows": rows, "id_policy": {"from": ["id"]}}
+    calls = []
+
+    def consume(mapping, rows):
+        calls.append(mapping.get("id_policy"))
+        return run_dry_run(mapping, list(rows))
+
+    result = await run_on_streamed_body(_body(payload), consume)
+
+    assert calls == [None, {"from": ["id"]}]
+    assert result == run_dry_run({**payload, "globals": {}}, rows)
+    assert [d["_id"] for d in result["docs_preview"]][:2] == ["0", "1"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_body_stops_the_executor():
+    finished = threading.Event()
+
+    def consume(mapping, rows):
+        try:
+            return list(rows)
+        finally:
+            finished.set()
+
+    async def chunks():
+        yield b'{"fields": [], "rows": [{"id": 1}, '
+        yield b"oops]}"
+
+    with pytest.raises(ValueError):
+        await run_on_streamed_body(chunks(), consume)
+    assert finished.is_set()
@@ -0,0 +1,88 @@
+"""Tests du hash canonique du DSL (compiled_hash)."""
+import hashlib
+import json
+
+import pytest
+
+from app.domain.mapping import canonical_hash
+from app.domain.mapping.canonical_hash import CanonicalHasher
+from app.domain.mapping.services import MappingService
+
+
+def legacy_hash(dsl: dict) -> str:
+    """Hash historique : SHA-256 du json.dumps trié et compact."""
+    s = json.dumps(dsl, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+@pytest.fixture
+def dsl():
+    return {
+        "dsl_version": "2.2",
+        "index": "démo",
+        "globals": {"nulls": ["", "N/A"], "decimal_sep": ",", "ratio": 1.5e-05, "big": 1e16},
+        "settings": {
+            "number_of_shards": 1,
+            "analysis": {"analyzer": {"fr": {"type": "custom", "tokenizer": "standard"}}},
+        },
+        "dictionaries": {
+            "pays": {"meta": {"version": 1, "case_insensitive": True}, "data": {"fr": "France", "é\n": " "}},
+            "codes": {"A": 1, "B": None},
+        },
+        "fields": [
+            {"target": "name", "type": "keyword", "input": [{"kind": "column", "name": "name"}]}
+        ],
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_hash_matches_legacy_serialization(dsl, use_orjson):
+    hasher = CanonicalHasher(use_orjson=use_orjson)
+    assert hasher.hexdigest(dsl) == legacy_hash(dsl)
+    # Un second passage donne le même hash
+    assert hasher.hexdigest(dsl) == legacy_hash(dsl)
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_hash_matches_legacy_for_edge_cases(use_orjson):
+    hasher = CanonicalHasher(use_orjson=use_orjson)
+    for dsl in [{}, {"settings": {}}, {"dictionaries": {}}, {"settings": None}, {"dictionaries": {"d": []}},
+                {"x": {1: "int key"}}, {"n": 2 ** 70}, {"f": [0.1, 1e-7, -0.0, 123456789012345678.0]},
+                {"f": {"a": 1.5e-05, "b": [1e16, 5e-324]}}, {"s": "\x00\x1f\x7f\u2028\"\\/\U0001f600"},
+                {"dictionaries": {"d": {"data": {"3e arr.": "1e5", "x": ":2e", "y": [0.00001]}}}}]:
+        assert hasher.hexdigest(dsl) == legacy_hash(dsl)
+
+
+def test_text_that_looks_like_a_number_keeps_orjson(monkeypatch):
+    def fail(obj):
+        raise AssertionError("repli json inattendu")
+
+    monkeypatch.setattr(canonical_hash, "_json_dumps", fail)
+    out = canonical_hash._orjson_dumps({"3e arrondissement": "valeur 2e-1", "n": [1, 0.5]})
+    assert out == '{"3e arrondissement":"valeur 2e-1","n":[1,0.5]}'.encode()
+
+
+def test_in_place_edits_change_the_hash(dsl):
+    hasher = CanonicalHasher()
+    before = hasher.hexdigest(dsl)
+    # Même taille, même tag de version : seul le contenu change
+    dsl["dictionaries"]["pays"]["data"]["fr"] = "FRANCE"
+    after = hasher.hexdigest(dsl)
+    assert after != before
+    assert after == legacy_hash(dsl)
+
+
+def test_version_bump_changes_the_hash(dsl):
+    hasher = CanonicalHasher()
+    before = hasher.hexdigest(dsl)
+    pays = dsl["dictionaries"]["pays"]
+    pays["data"]["fr"] = "République française"
+    pays["meta"]["version"] = 2
+    after = hasher.hexdigest(dsl)
+    assert after != before
+    assert after == legacy_hash(dsl)
+
+
+def test_compiled_hash_is_stable(dsl):
+    out = MappingService.compile(dsl)
+    assert out.compiled_hash == legacy_hash(dsl)
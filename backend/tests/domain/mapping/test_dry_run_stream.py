@@ -0,0 +1,68 @@
+"""Tests du dry-run en flux NDJSON (générateur sur l'exécuteur)."""
+import json
+import tracemalloc
+
+from app.domain.mapping.executor import run_dry_run
+from app.domain.mapping.services import MappingService
+
+MAPPING = {
+    "dsl_version": "1.0",
+    "index": "test",
+    "globals": {"nulls": [""]},
+    "id_policy": {"from": ["id"], "op": "concat", "sep": ":", "on_conflict": "error"},
+    "fields": [
+        {"target": "id", "type": "keyword", "input": [{"kind": "column", "name": "id"}], "pipeline": []},
+        {"target": "nom", "type": "keyword", "input": [{"kind": "column", "name": "nom"}],
+         "pipeline": [{"op": "trim"}, {"op": "lowercase"}]},
+    ],
+}
+
+
+def _rows(count):
+    return [{"id": str(i), "nom": f"  Nom {i} "} for i in range(count)]
+
+
+def test_first_document_is_sent_before_the_rest_is_executed():
+    stream = MappingService.dry_run_stream(dict(MAPPING), {"rows": _rows(1_000)}, batch_size=100)
+    first = next(stream)
+    assert first.count(b"\n") == 1
+    assert json.loads(first) == {"type": "doc", "_id": "0", "_source": {"id": "0", "nom": "nom 0"}}
+    rest = b"".join(stream).splitlines()
+    assert len(rest) == 1_000
+    assert json.loads(rest[-1])["type"] == "summary"
+
+
+def test_execution_error_ends_the_stream_with_an_error_record(monkeypatch):
+    from app.domain.mapping.executor import executor
+
+    def failing(mapping, row, row_idx):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(executor, "execute_document", failing)
+    lines = b"".join(MappingService.dry_run_stream(dict(MAPPING), {"rows": _rows(3)})).splitlines()
+    assert [json.loads(line) for line in lines] == [{"type": "error", "msg": "boom"}]
+
+
+def _stream_peak(mapping, rows):
+    tracemalloc.start()
+    try:
+        for _ in MappingService.dry_run_stream(mapping, {"rows": rows}):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_stream_memory_does_not_grow_with_sample_size():
+    # Sans id_policy : l'index des _id (borné par son propre seuil de déversement) n'intervient pas
+    mapping = {k: v for k, v in MAPPING.items() if k != "id_policy"}
+    small = _stream_peak(dict(mapping), _rows(1_000))
+    large = _stream_peak(dict(mapping), _rows(4_000))
+    assert large < small * 2
+
+    rows = _rows(4_000)
+    tracemalloc.start()
+    run_dry_run(dict(mapping), rows)
+    buffered = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert large * 5 < buffered
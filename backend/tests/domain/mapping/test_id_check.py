@@ -0,0 +1,131 @@
+"""Tests de la vérification d'unicité des _id (mode exact et mode bloom)."""
+import hashlib
+
+import pytest
+
+from app.domain.file.readers import iter_file_rows
+from app.domain.mapping.executor.executor import run_dry_run
+from app.domain.mapping.id_check import (
+    BloomFilter, ExactIdIndex, check_ids, check_ids_sharded, id_digest, make_id_builder, shards_for_size
+)
+
+
+@pytest.fixture
+def rows():
+    # 1000 lignes, 100 _id distincts répétés -> 900 doublons
+    return [{"id": str(i % 100), "name": f"n{i}"} for i in range(1000)]
+
+
+def test_id_builder_hash_and_salt():
+    build = make_id_builder({"from": ["a", "b"], "sep": "|", "hash": "sha1", "salt": "s"})
+    assert build({"a": 1, "b": None}) == hashlib.sha1(b"s1|").hexdigest()
+    assert make_id_builder({"source": "a"})({"a": "x"}) == "x"
+    assert make_id_builder({}) is None
+
+
+def test_exact_index_spills_to_disk():
+    with ExactIdIndex(memory_limit_bytes=1000) as index:
+        assert all(index.add(str(i)) for i in range(200))
+        assert index.spilled
+        assert not index.add("42")
+        assert "199" in index and "200" not in index
+
+
+@pytest.mark.parametrize("memory_limit", [None, 1000])
+def test_exact_mode_counts_duplicates(rows, memory_limit):
+    result = check_ids(lambda: rows, {"from": ["id"]}, mode="exact", memory_limit_bytes=memory_limit)
+    assert result["total"] == 1000
+    assert result["duplicates"] == 900
+    assert result["duplicate_rate"] == 0.9
+    assert result["samples"][0] == {"row": 100, "_id": "0"}
+    assert result["stats"]["spilled"] is (memory_limit is not None)
+
+
+def test_bloom_mode_confirms_exactly(rows):
+    exact = check_ids(lambda: rows, {"from": ["id", "name"]}, mode="exact")
+    # Filtre volontairement sous-dimensionné : beaucoup de faux positifs, comptage toujours exact
+    bloom = check_ids(lambda: rows, {"from": ["id", "name"]}, mode="bloom", fp_rate=0.5, capacity=10)
+    assert exact["duplicates"] == bloom["duplicates"] == 0
+    assert bloom["stats"]["false_positives"] == bloom["stats"]["candidates"]
+    assert bloom["stats"]["capacity_exceeded"] is True
+
+    bloom = check_ids(lambda: rows, {"from": ["id"]}, mode="bloom", capacity=1000)
+    assert bloom["duplicates"] == 900
+    assert bloom["samples"][0] == {"row": 100, "_id": "0"}
+
+
+def test_bloom_capacity_defaults_to_a_counting_pass(rows):
+    passes = []
+
+    def rows_factory():
+        passes.append(1)
+        return iter(rows)
+
+    bloom = check_ids(rows_factory, {"from": ["id"]}, mode="bloom")
+    assert bloom["duplicates"] == 900
+    assert bloom["stats"]["capacity"] == 1000 and bloom["stats"]["capacity_exceeded"] is False
+    assert len(passes) == 3
+
+
+def test_bloom_false_positive_rate():
+    bloom = BloomFilter.for_capacity(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(id_digest(str(i)))
+    fp = sum(id_digest(f"x{i}") in bloom for i in range(10_000))
+    assert fp < 300
+
+
+@pytest.mark.parametrize("memory_limit", [None, 1000])
+def test_sharded_matches_exact(rows, memory_limit):
+    build = make_id_builder({"from": ["id"], "hash": "sha256"})
+    exact = check_ids(lambda: rows, {"from": ["id"], "hash": "sha256"}, mode="exact")
+    sharded = check_ids_sharded(iter(rows), build, shards=4, max_workers=2, memory_limit_bytes=memory_limit)
+    assert sharded["total"] == exact["total"] == 1000
+    assert sharded["duplicates"] == exact["duplicates"] == 900
+    assert sharded["samples"] == exact["samples"]
+    assert sharded["stats"] == {"mode": "sharded", "shards": 4, "workers": 2}
+
+
+def test_shard_count_follows_file_size(monkeypatch):
+    monkeypatch.setattr("app.domain.mapping.id_check.settings.ID_CHECK_SHARD_SIZE_MB", 1)
+    assert shards_for_size(0) == 1
+    assert shards_for_size(3 * 1024 * 1024 + 1) == 4
+    assert shards_for_size(10 ** 12) == 256
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        check_ids(lambda: [], {"from": ["id"]}, mode="cuckoo")
+
+
+def test_check_ids_on_csv_file(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("id;name\n1;a\n2;b\n1;c\n", encoding="utf-8")
+    result = check_ids(lambda: iter_file_rows(path), {"from": ["id"]}, mode="bloom", capacity=3)
+    assert (result["total"], result["duplicates"]) == (3, 1)
+    assert result["samples"] == [{"row": 2, "_id": "1"}]
+
+
+@pytest.mark.parametrize("bom", [b"", b"\xef\xbb\xbf"])
+def test_check_ids_on_json_array_file_is_streamed(tmp_path, monkeypatch, bom):
+    monkeypatch.setattr("app.domain.file.readers.JSON_READ_CHUNK_SIZE", 7)
+    path = tmp_path / "data.json"
+    path.write_bytes(bom + b'\n [{"id": "1", "nom": "\xc3\xa9"}, {"id": 2}, {"id": "1"}]\n')
+    assert list(iter_file_rows(path)) == [{"id": "1", "nom": "é"}, {"id": 2}, {"id": "1"}]
+    result = check_ids(lambda: iter_file_rows(path), {"from": ["id"]})
+    assert (result["total"], result["duplicates"]) == (3, 1)
+
+
+def test_dry_run_id_conflicts():
+    mapping = {"id_policy": {"from": ["id"], "on_conflict": "skip"}, "fields": []}
+    out = run_dry_run(mapping, [{"id": 1}, {"id": 2}, {"id": 1}])
+    assert [d["_id"] for d in out["docs_preview"]] == ["1", "2"]
+    assert out["stats"]["issues_per_code"] == {"E_ID_CONFLICT": 1}
+
+
+def test_dry_run_id_uses_only_from_columns():
+    # Sémantique historique de l'exécuteur : `source` ignoré, _id "" sans colonne `from`
+    out = run_dry_run({"id_policy": {"source": "id"}, "fields": []}, [{"id": 1}])
+    assert out["docs_preview"][0]["_id"] == ""
+    out = run_dry_run({"id_policy": {"from": [], "hash": "sha1", "salt": "s"}, "fields": []}, [{"id": 1}])
+    assert out["docs_preview"][0]["_id"] == hashlib.sha1(b"s").hexdigest()
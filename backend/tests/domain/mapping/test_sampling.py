@@ -0,0 +1,89 @@
+"""Tests des stratégies d'échantillonnage côté serveur du dry-run."""
+import pytest
+
+from app.domain.mapping import sampling
+from app.domain.mapping.sampling import sample_rows
+
+
+def _rows(count):
+    return ({"id": str(i), "pays": "FR" if i % 10 else "BE"} for i in range(count))
+
+
+def test_head_stops_reading_after_size():
+    consumed = []
+
+    def rows():
+        for row in _rows(1_000):
+            consumed.append(row)
+            yield row
+
+    picked, info = sample_rows(rows(), "head", 5)
+    assert [r["id"] for r in picked] == ["0", "1", "2", "3", "4"]
+    assert info == {"strategy": "head", "size": 5, "rows_scanned": 5, "source_rows": [0, 1, 2, 3, 4]}
+    assert len(consumed) == 5
+
+
+def test_reservoir_is_uniform_reproducible_and_in_file_order():
+    picked, info = sample_rows(_rows(10_000), "reservoir", 100, seed=7)
+    again, _ = sample_rows(_rows(10_000), "reservoir", 100, seed=7)
+    assert picked == again
+    assert info["rows_scanned"] == 10_000 and info["size"] == 100
+    assert info["source_rows"] == sorted(info["source_rows"])
+    assert [r["id"] for r in picked] == [str(i) for i in info["source_rows"]]
+    # Échantillon uniforme : la moyenne des index est proche du milieu du fichier
+    assert 3_500 < sum(info["source_rows"]) / 100 < 6_500
+
+
+def test_reservoir_smaller_file_returns_everything():
+    picked, info = sample_rows(_rows(3), "reservoir", 10, seed=1)
+    assert [r["id"] for r in picked] == ["0", "1", "2"]
+    assert info["rows_scanned"] == 3
+
+
+def test_stratified_is_proportional_and_keeps_rare_strata():
+    rows = [{"id": str(i), "pays": "FR"} for i in range(995)] + [{"id": f"be{i}", "pays": "BE"} for i in range(5)]
+    picked, info = sample_rows(rows, "stratified", 20, column="pays", seed=3)
+    assert info["strata"] == {"FR": 19, "BE": 1}
+    assert len(picked) == 20
+    assert sum(1 for r in picked if r["pays"] == "BE") == 1
+
+
+def test_stratified_caps_the_number_of_strata(monkeypatch):
+    monkeypatch.setattr(sampling, "MAX_STRATA", 3)
+    rows = [{"id": str(i), "cat": i % 10} for i in range(100)]
+    picked, info = sample_rows(rows, "stratified", 50, column="cat", seed=0)
+    assert set(info["strata"]) == {"0", "1", "2", sampling.OTHER_STRATUM}
+    assert info["strata"][sampling.OTHER_STRATUM] == 35
+    assert len(picked) == 50
+
+
+def test_most_issues_keeps_the_worst_rows():
+    date = [{"op": "date_parse", "formats": ["%Y-%m-%d"], "assume_tz": "UTC"}]
+    mapping = {
+        "globals": {},
+        "fields": [
+            {"target": "debut", "type": "date", "input": [{"kind": "column", "name": "debut"}], "pipeline": date},
+            {"target": "fin", "type": "date", "input": [{"kind": "column", "name": "fin"}], "pipeline": date},
+        ],
+    }
+    ok, bad = "2024-01-01", "??"
+    rows = [{"debut": ok, "fin": ok}] * 40
+    rows[3] = {"debut": bad, "fin": ok}
+    rows[10] = {"debut": bad, "fin": bad}
+    rows[20] = {"debut": ok, "fin": bad}
+    rows[30] = {"debut": bad, "fin": bad}
+
+    picked, info = sample_rows(rows, "most_issues", 3, mapping=mapping)
+    assert info["rows_scanned"] == 40
+    # Les deux lignes à 2 issues, puis la première ligne à 1 issue ; rendues dans l'ordre du fichier
+    assert info["source_rows"] == [3, 10, 30]
+    assert picked == [rows[3], rows[10], rows[30]]
+
+
+def test_invalid_options_are_rejected():
+    with pytest.raises(ValueError):
+        sample_rows([], "random", 10)
+    with pytest.raises(ValueError):
+        sample_rows([], "stratified", 10)
+    with pytest.raises(ValueError):
+        sample_rows([], "most_issues", 10)
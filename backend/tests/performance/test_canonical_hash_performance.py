@@ -0,0 +1,50 @@
+"""Tests de performance du hash canonique sur un DSL avec de gros dictionnaires inline."""
+import hashlib
+import json
+import random
+import time
+
+from app.domain.mapping.canonical_hash import CanonicalHasher
+
+
+def _large_dsl(entries, seed=42):
+    rng = random.Random(seed)
+    dictionaries = {
+        f"dict{j}": {
+            "meta": {"version": 1, "case_insensitive": True},
+            "data": {f"clé {i} {rng.random():.6f}": f"{i}e arrondissement" for i in range(entries)},
+        }
+        for j in range(4)
+    }
+    return {
+        "dsl_version": "2.2",
+        "index": "perf",
+        "dictionaries": dictionaries,
+        "fields": [{"target": "name", "type": "keyword", "input": [{"kind": "column", "name": "name"}]}],
+    }
+
+
+def _legacy_hash(dsl):
+    s = json.dumps(dsl, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def _best_of(fn, dsl, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(dsl)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def test_orjson_hash_is_faster_than_legacy_serialization():
+    dsl = _large_dsl(50_000)
+
+    legacy_s, expected = _best_of(_legacy_hash, dsl)
+    fast_s, digest = _best_of(CanonicalHasher(use_orjson=True).hexdigest, dsl)
+
+    print(f"\nhash canonique : json {legacy_s * 1000:.0f} ms, orjson {fast_s * 1000:.0f} ms "
+          f"(x{legacy_s / fast_s:.1f})")
+    assert digest == expected
+    assert fast_s < legacy_s
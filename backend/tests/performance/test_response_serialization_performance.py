@@ -0,0 +1,69 @@
+"""Banc de sérialisation des réponses de dry-run et d'aperçu : chemin validé (Pydantic) contre orjson brut."""
+import time
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core.responses import RawJSONResponse
+from app.domain.file_preview.schemas import FilePreviewChunk
+from app.domain.mapping.schemas import DryRunOut
+
+SIZES = (100, 1_000, 10_000)
+
+
+def _dry_run_result(count):
+    docs = [{"_id": f"user_{i}", "_source": {
+        "nom": f"Nom {i}", "email": f"user{i}@example.com", "age": i % 90, "score": i / 7,
+        "tags": [f"tag_{k}" for k in range(5)],
+        "adresse": {"ville": "Paris", "code_postal": "75001"},
+    }} for i in range(count)]
+    issues = [{"row": i, "field": "date", "code": "E_DATE_PARSE_FAIL", "msg": f"invalid date 'x{i}'"}
+              for i in range(0, count, 3)]
+    return {"docs_preview": docs, "issues": issues,
+            "stats": {"issues_per_code": {"E_DATE_PARSE_FAIL": len(issues)}, "date_fail_per_field": {}}}
+
+
+def _preview_data(count):
+    df = pd.DataFrame({
+        "id": range(count),
+        "nom": [f"Nom {i}" for i in range(count)],
+        "montant": [i * 1.5 for i in range(count)],
+        "date": pd.date_range("2024-01-01", periods=count, freq="min").astype(str),
+    })
+    rows = df.where(pd.notna(df), None).to_dict(orient="records")
+    return {"chunk_index": 0, "chunk_size": count, "total_rows": count, "total_chunks": 1,
+            "has_more": False, "rows": rows}
+
+
+def _best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def _compare(name, model, data):
+    # Chemin par défaut : modèle Pydantic, jsonable_encoder puis json
+    validated, default_body = _best_of(lambda: JSONResponse(jsonable_encoder(model(**data))).body)
+    raw, raw_body = _best_of(lambda: RawJSONResponse(data).body)
+    print(f"\n{name}: validé {validated * 1000:.1f} ms, brut {raw * 1000:.1f} ms "
+          f"(x{validated / raw:.1f}, {len(raw_body) / 1e6:.2f} Mo)")
+    return validated, raw, default_body, raw_body
+
+
+def test_dry_run_serialization_across_sizes():
+    for count in SIZES:
+        validated, raw, default_body, raw_body = _compare(f"dry-run {count} docs", DryRunOut, _dry_run_result(count))
+        assert len(raw_body) <= len(default_body)
+        if count >= 1_000:
+            assert raw < validated
+
+
+def test_preview_serialization_across_sizes():
+    for count in SIZES:
+        validated, raw, _, _ = _compare(f"aperçu {count} lignes", FilePreviewChunk, _preview_data(count))
+        if count >= 1_000:
+            assert raw < validated
@@ -0,0 +1,36 @@
+"""Tests de performance du compilateur de synonymes sur de gros fichiers."""
+import random
+import time
+
+from app.domain.analysis_files.compiler import compile_analysis_file
+
+
+def _generate_rules(path, count, seed=42):
+    rng = random.Random(seed)
+    vocab = [f"terme{i}" for i in range(count // 2)]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            if i % 5 == 0:
+                f.write(f"{rng.choice(vocab)} {rng.choice(vocab)} => {rng.choice(vocab)}\n")
+            else:
+                f.write(", ".join(rng.sample(vocab, rng.randint(2, 4))) + "\n")
+
+
+def test_compile_large_synonym_file(tmp_path):
+    src, dest = tmp_path / "synonyms.txt", tmp_path / "compiled.txt"
+    count = 200_000
+    _generate_rules(src, count)
+
+    start = time.perf_counter()
+    report = compile_analysis_file(src, dest, "solr")
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{count} règles compilées en {elapsed:.2f}s ({count / elapsed:,.0f} règles/s), "
+          f"{report.terms} termes, mémoire estimée {report.memory['total_bytes'] / 1e6:.1f} Mo")
+    assert report.error_count == 0 and report.rules_in == count
+    assert elapsed < 60
+
+    # Le fichier compilé est stable : le recompiler ne change rien
+    again = compile_analysis_file(dest, tmp_path / "again.txt", "solr")
+    assert (tmp_path / "again.txt").read_bytes() == dest.read_bytes()
+    assert again.rules_out == report.rules_out
@@ -1,9 +1,9 @@
 import React from 'react';
-import type { MappingOut } from '@shared/types';
+import type { MappingSummaryOut } from '@shared/types';
 import styles from './MappingList.module.scss';
 
 interface MappingListProps {
-  mappings: MappingOut[];
+  mappings: MappingSummaryOut[];
 }
 
 export const MappingList: React.FC<MappingListProps> = ({ mappings }) => {
@@ -50,7 +50,8 @@ export interface Dataset {
 
 export interface DatasetDetailOut extends Dataset {
   files: FileOut[];
-  mappings: MappingOut[];
+  files_total: number;
+  mappings: MappingSummaryOut[];
 }
 
 export interface FileOut {
@@ -112,6 +113,8 @@ export interface MappingOut {
   index_name?: string | null;
 }
 
+export type MappingSummaryOut = Omit<MappingOut, 'mapping_rules'>;
+
 export interface MappingCreate {
   name: string;
   source_file_id: string;